@@ -0,0 +1,128 @@
+import asyncio
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from starlette_context import context, request_cycle_context
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+
+DESCRIBE_COMMANDS = {"describe", "describe_pr"}
+# commands that read the describe output, when config.enable_ai_metadata is on
+AI_METADATA_CONSUMERS = {"review", "review_pr", "auto_review", "improve", "improve_code"}
+
+
+@dataclass
+class CommandNode:
+    name: str  # unique in the DAG, e.g. "review" or "review#2" for a repeated command
+    command: str  # the full command, with its arguments
+    depends_on: Set[str] = field(default_factory=set)
+
+    @property
+    def action(self) -> str:
+        return self.command.split(" ")[0].lstrip("/").lower()
+
+
+def build_auto_command_dag(commands: List[str]) -> List[CommandNode]:
+    """
+    Builds the execution DAG of a list of auto commands (e.g. github_app.pr_commands).
+
+    Commands are independent of each other, except review and improve, which run after describe when
+    config.enable_ai_metadata is on, since they read the AI file summaries that describe publishes. With
+    config.concurrent_auto_commands off, every command depends on the previous one, as a sequential run.
+    """
+    nodes = []
+    names_count = {}
+    for command in commands:
+        command = command.strip()
+        if not command:
+            continue
+        node = CommandNode(name="", command=command)
+        names_count[node.action] = names_count.get(node.action, 0) + 1
+        node.name = node.action if names_count[node.action] == 1 else f"{node.action}#{names_count[node.action]}"
+        nodes.append(node)
+
+    if not get_settings().config.get("concurrent_auto_commands", True):
+        for previous, node in zip(nodes, nodes[1:], strict=False):
+            node.depends_on.add(previous.name)
+        return nodes
+
+    if get_settings().config.get("enable_ai_metadata", False):
+        for i, node in enumerate(nodes):
+            if node.action in AI_METADATA_CONSUMERS:
+                node.depends_on.update(n.name for n in nodes[:i] if n.action in DESCRIBE_COMMANDS)
+    return nodes
+
+
+def _validate_dag(nodes: List[CommandNode]):
+    nodes_by_name = {node.name: node for node in nodes}
+    if len(nodes_by_name) != len(nodes):
+        raise ValueError("Command names in the DAG must be unique")
+    for node in nodes:
+        unknown = node.depends_on - nodes_by_name.keys()
+        if unknown:
+            raise ValueError(f"Command '{node.name}' depends on unknown commands: {sorted(unknown)}")
+
+    visited, in_path = set(), set()
+
+    def visit(name: str):
+        if name in in_path:
+            raise ValueError(f"Dependency cycle through command '{name}'")
+        if name in visited:
+            return
+        in_path.add(name)
+        for dependency in nodes_by_name[name].depends_on:
+            visit(dependency)
+        in_path.discard(name)
+        visited.add(name)
+
+    for node in nodes:
+        visit(node.name)
+
+
+def _isolated_context_data() -> dict:
+    try:
+        data = dict(context.data)
+    except Exception:
+        data = {}  # not in a request context (CLI, GitHub Action)
+    # settings changes of a command (command args, model overrides, ...) must not leak into the concurrent ones
+    data["settings"] = copy.deepcopy(get_settings())
+    # git providers are stateful (cached diff files, temporary comments, incremental state) and not thread-safe:
+    # each command creates its own
+    data.pop("git_provider", None)
+    return data
+
+
+async def run_command_dag(nodes: List[CommandNode], run_node: Callable[[CommandNode], Awaitable[Any]],
+                          pr_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Runs the commands of the DAG, each one as soon as all the commands it depends on are done.
+
+    Each command runs with its own deep copy of the settings, and its own git provider. A failing command is logged,
+    and does not prevent its dependents from running, as in a sequential run. `pr_url` is only used in the logs.
+
+    Returns:
+        The result of `run_node` per command name, or the raised exception.
+    """
+    _validate_dag(nodes)
+    if not nodes:
+        return {}
+
+    done_events = {node.name: asyncio.Event() for node in nodes}
+    results = {}
+
+    async def _run(node: CommandNode):
+        try:
+            for dependency in node.depends_on:
+                await done_events[dependency].wait()
+            with request_cycle_context(_isolated_context_data()):
+                results[node.name] = await run_node(node)
+        except Exception as e:
+            get_logger().exception(f"Auto command '{node.command}' failed" + (f" for {pr_url}" if pr_url else ""))
+            results[node.name] = e
+        finally:
+            done_events[node.name].set()
+
+    await asyncio.gather(*[_run(node) for node in nodes])
+    return results
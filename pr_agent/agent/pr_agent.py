@@ -3,49 +3,44 @@ from functools import partial
 
 from pr_agent.algo import MAX_TOKENS
 from pr_agent.algo.ai_handlers.base_ai_handler import BaseAiHandler
-from pr_agent.algo.ai_handlers.copilot_sdk_ai_handler import CopilotSDKAIHandler
-from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
 from pr_agent.algo.cli_args import CliArgs
+from pr_agent.algo.lazy_registry import LazyRegistry
 from pr_agent.algo.utils import update_settings_from_args
 from pr_agent.config_loader import get_settings
 from pr_agent.git_providers.utils import apply_repo_settings
 from pr_agent.log import get_logger
-from pr_agent.tools.pr_add_docs import PRAddDocs
-from pr_agent.tools.pr_code_suggestions import PRCodeSuggestions
-from pr_agent.tools.pr_config import PRConfig
-from pr_agent.tools.pr_description import PRDescription
-from pr_agent.tools.pr_generate_labels import PRGenerateLabels
-from pr_agent.tools.pr_help_docs import PRHelpDocs
-from pr_agent.tools.pr_help_message import PRHelpMessage
-from pr_agent.tools.pr_line_questions import PR_LineQuestions
-from pr_agent.tools.pr_models import PRModels
-from pr_agent.tools.pr_questions import PRQuestions
-from pr_agent.tools.pr_reviewer import PRReviewer
-from pr_agent.tools.pr_similar_issue import PRSimilarIssue
-from pr_agent.tools.pr_update_changelog import PRUpdateChangelog
-
-command2class = {
-    "auto_review": PRReviewer,
-    "answer": PRReviewer,
-    "review": PRReviewer,
-    "review_pr": PRReviewer,
-    "describe": PRDescription,
-    "describe_pr": PRDescription,
-    "improve": PRCodeSuggestions,
-    "improve_code": PRCodeSuggestions,
-    "ask": PRQuestions,
-    "ask_question": PRQuestions,
-    "ask_line": PR_LineQuestions,
-    "update_changelog": PRUpdateChangelog,
-    "config": PRConfig,
-    "settings": PRConfig,
-    "help": PRHelpMessage,
-    "models": PRModels,
-    "similar_issue": PRSimilarIssue,
-    "add_docs": PRAddDocs,
-    "generate_labels": PRGenerateLabels,
-    "help_docs": PRHelpDocs,
-}
+from pr_agent.log.metrics import CommandTimer
+from pr_agent.log.tracing import span
+
+# tools are imported when their command is first run, so a single command does not pay for importing all of them
+command2class = LazyRegistry({
+    "auto_review": "pr_agent.tools.pr_reviewer:PRReviewer",
+    "answer": "pr_agent.tools.pr_reviewer:PRReviewer",
+    "review": "pr_agent.tools.pr_reviewer:PRReviewer",
+    "review_pr": "pr_agent.tools.pr_reviewer:PRReviewer",
+    "describe": "pr_agent.tools.pr_description:PRDescription",
+    "describe_pr": "pr_agent.tools.pr_description:PRDescription",
+    "improve": "pr_agent.tools.pr_code_suggestions:PRCodeSuggestions",
+    "improve_code": "pr_agent.tools.pr_code_suggestions:PRCodeSuggestions",
+    "ask": "pr_agent.tools.pr_questions:PRQuestions",
+    "ask_question": "pr_agent.tools.pr_questions:PRQuestions",
+    "ask_line": "pr_agent.tools.pr_line_questions:PR_LineQuestions",
+    "update_changelog": "pr_agent.tools.pr_update_changelog:PRUpdateChangelog",
+    "config": "pr_agent.tools.pr_config:PRConfig",
+    "settings": "pr_agent.tools.pr_config:PRConfig",
+    "help": "pr_agent.tools.pr_help_message:PRHelpMessage",
+    "models": "pr_agent.tools.pr_models:PRModels",
+    "similar_issue": "pr_agent.tools.pr_similar_issue:PRSimilarIssue",
+    "add_docs": "pr_agent.tools.pr_add_docs:PRAddDocs",
+    "generate_labels": "pr_agent.tools.pr_generate_labels:PRGenerateLabels",
+    "help_docs": "pr_agent.tools.pr_help_docs:PRHelpDocs",
+})
+
+ai_handlers = LazyRegistry({
+    "litellm": "pr_agent.algo.ai_handlers.litellm_ai_handler:LiteLLMAIHandler",
+    "copilot": "pr_agent.algo.ai_handlers.copilot_sdk_ai_handler:CopilotSDKAIHandler",
+    "copilot_sdk": "pr_agent.algo.ai_handlers.copilot_sdk_ai_handler:CopilotSDKAIHandler",
+})
 
 commands = list(command2class.keys())
 
@@ -72,19 +67,13 @@ def _resolve_ai_handler(
         return ai_handler
 
     configured_handler = str(get_settings().config.get("ai_handler", "litellm")).strip().lower()
-    handlers = {
-        "litellm": LiteLLMAIHandler,
-        "copilot": CopilotSDKAIHandler,
-        "copilot_sdk": CopilotSDKAIHandler,
-    }
-    selected_handler = handlers.get(configured_handler)
-    if selected_handler:
-        return selected_handler
+    if configured_handler in ai_handlers:
+        return ai_handlers[configured_handler]
 
     get_logger().warning(
         f"Unknown config.ai_handler '{configured_handler}'. Falling back to 'litellm'."
     )
-    return LiteLLMAIHandler
+    return ai_handlers["litellm"]
 
 
 class PRAgent:
@@ -116,7 +105,7 @@ class PRAgent:
         configured_handler = str(get_settings().config.get("ai_handler", "litellm")).strip().lower()
         if configured_handler in {"copilot", "copilot_sdk"}:
             try:
-                copilot_models = await CopilotSDKAIHandler.fetch_models()
+                copilot_models = await ai_handlers["copilot_sdk"].fetch_models()
                 for model in copilot_models:
                     if candidate != model.get("id"):
                         continue
@@ -217,14 +206,15 @@ class PRAgent:
                 get_settings().set("config.custom_model_max_tokens", original_custom_model_max_tokens)
             return False
         try:
-            with get_logger().contextualize(command=action, pr_url=pr_url):
+            with get_logger().contextualize(command=action, pr_url=pr_url), span(f"command.{action}", pr_url=pr_url), \
+                    CommandTimer(action):
                 get_logger().info("PR-Agent request handler started", analytics=True)
                 if action == "answer":
                     if notify:
                         notify()
-                    await PRReviewer(pr_url, is_answer=True, args=args, ai_handler=self.ai_handler).run()
+                    await command2class["answer"](pr_url, is_answer=True, args=args, ai_handler=self.ai_handler).run()
                 elif action == "auto_review":
-                    await PRReviewer(pr_url, is_auto=True, args=args, ai_handler=self.ai_handler).run()
+                    await command2class["auto_review"](pr_url, is_auto=True, args=args, ai_handler=self.ai_handler).run()
                 elif action in command2class:
                     if notify:
                         notify()
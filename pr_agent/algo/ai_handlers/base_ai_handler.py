@@ -1,11 +1,17 @@
 from abc import ABC, abstractmethod
 
+from pr_agent.log.tracing import trace_methods
+
 
 class BaseAiHandler(ABC):
     """
     This class defines the interface for an AI handler to be used by the PR Agents.
     """
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls, ["chat_completion"], prefix="llm", ai_handler=cls.__name__)
+
     @abstractmethod
     def __init__(self):
         pass
@@ -16,7 +22,8 @@ class BaseAiHandler(ABC):
         pass
 
     @abstractmethod
-    async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2, img_path: str = None):
+    async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2, img_path: str = None,
+                              local_prompt_tokens: int = None):
         """
         This method should be implemented to return a chat completion from the AI model.
         Args:
@@ -24,5 +31,7 @@ class BaseAiHandler(ABC):
             system (str): the system message string to use for the chat completion
             user (str): the user message string to use for the chat completion
             temperature (float): the temperature to use for the chat completion
+            local_prompt_tokens (int): the local (tiktoken) token count of the system and user messages, as computed by
+                TokenHandler.count_prompt_tokens. Used to calibrate the token count estimates of the model's family
         """
         pass
@@ -258,6 +258,7 @@ class CopilotSDKAIHandler(BaseAiHandler):
         user: str,
         temperature: float = 0.2,
         img_path: str = None,
+        local_prompt_tokens: int = None,
     ):
         _ = temperature  # Copilot SDK does not expose temperature in SessionConfig.
 
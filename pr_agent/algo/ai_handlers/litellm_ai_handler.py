@@ -9,9 +9,11 @@ from pr_agent.algo import CLAUDE_EXTENDED_THINKING_MODELS, NO_SUPPORT_TEMPERATUR
 from pr_agent.algo.ai_handlers.base_ai_handler import BaseAiHandler
 from pr_agent.algo.ai_handlers.litellm_helpers import _handle_streaming_response, MockResponse, _get_azure_ad_token, \
     _process_litellm_extra_body
+from pr_agent.algo.token_estimator import record_token_count_sample
 from pr_agent.algo.utils import ReasoningEffort, get_version
 from pr_agent.config_loader import get_settings
 from pr_agent.log import get_logger
+from pr_agent.log.metrics import record_llm_tokens
 import json
 
 MODEL_RETRIES = 2
@@ -264,7 +266,8 @@ class LiteLLMAIHandler(BaseAiHandler):
         retry=retry_if_exception_type(openai.APIError) & retry_if_not_exception_type(openai.RateLimitError),
         stop=stop_after_attempt(MODEL_RETRIES),
     )
-    async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2, img_path: str = None):
+    async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2, img_path: str = None,
+                              local_prompt_tokens: int = None):
         try:
             resp, finish_reason = None, None
             deployment_id = self.deployment_id
@@ -419,6 +422,10 @@ class LiteLLMAIHandler(BaseAiHandler):
 
         get_logger().debug(f"\nAI response:\n{resp}")
 
+        usage = self._get_usage(response_obj)
+        record_llm_tokens(model, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        record_token_count_sample(model, local_prompt_tokens, usage.get("prompt_tokens"))
+
         # log the full response for debugging
         response_log = self.prepare_logs(response_obj, system, user, resp, finish_reason)
         get_logger().debug("Full_response", artifact=response_log)
@@ -429,6 +436,16 @@ class LiteLLMAIHandler(BaseAiHandler):
 
         return resp, finish_reason
 
+    @staticmethod
+    def _get_usage(response_obj) -> dict:
+        usage = response_obj.get("usage") if isinstance(response_obj, dict) else getattr(response_obj, "usage", None)
+        if usage is None:
+            return {}  # e.g. streaming responses
+        if isinstance(usage, dict):
+            return usage
+        return {"prompt_tokens": getattr(usage, "prompt_tokens", None),
+                "completion_tokens": getattr(usage, "completion_tokens", None)}
+
     async def _get_completion(self, **kwargs):
         """
         Wrapper that automatically handles streaming for required models.
@@ -0,0 +1,226 @@
+"""
+Unified diffs of two versions of a file, for the providers that only return the file contents (see
+`load_large_diff`).
+
+difflib's SequenceMatcher looks for the longest matching blocks, which is quadratic on large files with many changes
+or repeated lines (e.g. generated code). The "myers" engine computes a shortest edit script instead, with the linear
+space variant of Myers' O(ND) algorithm, on integer ids of the lines (a hashing prepass). Lines that appear in only one
+of the two versions cannot be matched, and are left out of the search. The output has difflib.unified_diff's format.
+
+Engines: "difflib", "myers", or "auto" (difflib for small files, myers for large ones). The two engines give the same
+patch for most files, but not all: difflib's greedy matching is not always minimal, where myers' is, and when a file
+has several shortest edit scripts they can choose different ones. Both patches are valid.
+"""
+
+import difflib
+from typing import Iterator, List, Sequence, Tuple
+
+DIFF_ENGINES = ("auto", "difflib", "myers")
+AUTO_MYERS_MIN_LINES = 5000  # lines of both versions together
+CONTEXT_LINES = 3
+
+Block = Tuple[int, int, int]  # (start in a, start in b, size), as difflib's matching blocks
+Opcode = Tuple[str, int, int, int, int]
+
+
+def _line_ids(a_lines: Sequence[str], b_lines: Sequence[str]) -> Tuple[List[int], List[int]]:
+    ids = {}
+    return [ids.setdefault(line, len(ids)) for line in a_lines], [ids.setdefault(line, len(ids)) for line in b_lines]
+
+
+def _bisect(a: Sequence[int], a_lo: int, a_hi: int, b: Sequence[int], b_lo: int, b_hi: int):
+    """
+    Finds the middle of a shortest edit script between a[a_lo:a_hi] and b[b_lo:b_hi], walking from both ends at
+    once. Returns the (x, y) split point, relative to (a_lo, b_lo), or None when the ranges have no line in common.
+    """
+    len1, len2 = a_hi - a_lo, b_hi - b_lo
+    max_d = (len1 + len2 + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v2 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2[v_offset + 1] = 0
+    delta = len1 - len2
+    front = delta % 2 != 0  # the paths meet on the forward walk when the delta is odd
+    k1start = k1end = k2start = k2end = 0
+    for d in range(max_d):
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < len1 and y1 < len2 and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > len1:
+                k1end += 2  # ran off the right of the graph
+            elif y1 > len2:
+                k1start += 2  # ran off the bottom of the graph
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= len1 - v2[k2_offset]:
+                        return x1, y1
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < len1 and y2 < len2 and a[a_hi - 1 - x2] == b[b_hi - 1 - y2]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > len1:
+                k2end += 2
+            elif y2 > len2:
+                k2start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = v_offset + x1 - k1_offset
+                    if x1 >= len1 - x2:
+                        return x1, y1
+    return None
+
+
+def _myers_pairs(a: Sequence[int], b: Sequence[int]) -> List[Tuple[int, int]]:
+    """The (index in a, index in b) pairs of matched lines of a shortest edit script, in no particular order."""
+    pairs = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a_lo, a_hi, b_lo, b_hi = stack.pop()
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            pairs.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            pairs.append((a_hi, b_hi))
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+        split = _bisect(a, a_lo, a_hi, b, b_lo, b_hi)
+        if split is None:
+            continue
+        x, y = split
+        stack.append((a_lo + x, a_hi, b_lo + y, b_hi))
+        stack.append((a_lo, a_lo + x, b_lo, b_lo + y))
+    return pairs
+
+
+def myers_matching_blocks(a_lines: Sequence[str], b_lines: Sequence[str]) -> List[Block]:
+    """
+    The matching blocks of a shortest edit script between two lists of lines, in difflib's format: sorted, maximal,
+    and ending with the (len(a), len(b), 0) sentinel.
+    """
+    a, b = _line_ids(a_lines, b_lines)
+    # lines of one side that are not in the other one are never matched: drop them from the search
+    b_ids, a_ids = set(b), set(a)
+    a_kept = [i for i, line in enumerate(a) if line in b_ids]
+    b_kept = [j for j, line in enumerate(b) if line in a_ids]
+    pairs = _myers_pairs([a[i] for i in a_kept], [b[j] for j in b_kept])
+    pairs.sort()
+
+    blocks: List[Block] = []
+    for i, j in pairs:
+        i, j = a_kept[i], b_kept[j]
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            blocks[-1] = (blocks[-1][0], blocks[-1][1], blocks[-1][2] + 1)
+        else:
+            blocks.append((i, j, 1))
+    blocks.append((len(a), len(b), 0))
+    return blocks
+
+
+def get_opcodes(blocks: Sequence[Block]) -> List[Opcode]:
+    """difflib.SequenceMatcher.get_opcodes, from the matching blocks."""
+    i = j = 0
+    opcodes = []
+    for ai, bj, size in blocks:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(("equal", ai, i, bj, j))
+    return opcodes
+
+
+def get_grouped_opcodes(opcodes: List[Opcode], n: int = CONTEXT_LINES) -> Iterator[List[Opcode]]:
+    """difflib.SequenceMatcher.get_grouped_opcodes: the hunks of changes, with up to `n` lines of context."""
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range_unified(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def format_unified_diff(a_lines: Sequence[str], b_lines: Sequence[str], opcodes: List[Opcode],
+                        n: int = CONTEXT_LINES) -> Iterator[str]:
+    """The lines of difflib.unified_diff(a_lines, b_lines, n=n), from the opcodes of the two sequences."""
+    started = False
+    for group in get_grouped_opcodes(opcodes, n):
+        if not started:
+            started = True
+            yield "--- \n"
+            yield "+++ \n"
+        first, last = group[0], group[-1]
+        yield f"@@ -{_format_range_unified(first[1], last[2])} +{_format_range_unified(first[3], last[4])} @@\n"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a_lines[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in a_lines[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in b_lines[j1:j2]:
+                    yield "+" + line
+
+
+def unified_diff(a_lines: Sequence[str], b_lines: Sequence[str], engine: str = "auto",
+                 auto_min_lines: int = AUTO_MYERS_MIN_LINES) -> str:
+    """
+    The unified diff between two lists of lines (with their line endings), as ''.join(difflib.unified_diff(...)).
+    With the "auto" engine, myers is used from `auto_min_lines` lines (both versions together).
+    """
+    if engine == "auto":
+        engine = "myers" if len(a_lines) + len(b_lines) >= auto_min_lines else "difflib"
+    if engine == "myers":
+        return "".join(format_unified_diff(a_lines, b_lines, get_opcodes(myers_matching_blocks(a_lines, b_lines))))
+    if engine != "difflib":
+        raise ValueError(f"Unknown diff engine '{engine}', expected one of {DIFF_ENGINES}")
+    return "".join(difflib.unified_diff(a_lines, b_lines))
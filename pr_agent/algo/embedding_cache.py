@@ -0,0 +1,66 @@
+import os
+import sqlite3
+from array import array
+from threading import Lock
+from typing import Dict, Iterable, List
+
+from pr_agent.log import get_logger
+from pr_agent.log.metrics import record_cache_lookup
+
+
+class EmbeddingCache:
+    """
+    A persistent embedding cache in a local SQLite file, keyed by embedding model and text content hash.
+
+    Vectors are stored as packed float32 blobs. Cache errors are logged and treated as misses, so a broken or
+    read-only cache file never fails the embedding itself.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings ("
+                                   "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                                   "PRIMARY KEY (model, hash))")
+        except sqlite3.Error:
+            self._conn.close()
+            raise
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        hashes = list(hashes)
+        found = {}
+        try:
+            with self._lock:
+                for i in range(0, len(hashes), 500):  # stay below sqlite's host parameters limit
+                    chunk = hashes[i:i + 500]
+                    rows = self._conn.execute(
+                        f"SELECT hash, vector FROM embeddings WHERE model = ? "
+                        f"AND hash IN ({', '.join('?' * len(chunk))})", [model, *chunk]).fetchall()
+                    for text_hash, blob in rows:
+                        found[text_hash] = array('f', blob).tolist()
+        except sqlite3.Error as e:
+            get_logger().warning(f"Failed to read embedding cache {self.path}: {e}")
+        record_cache_lookup("embeddings", hits=len(found), misses=len(hashes) - len(found))
+        return found
+
+    def put_many(self, model: str, embeddings_by_hash: Dict[str, List[float]]):
+        if not embeddings_by_hash:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                    [(model, text_hash, array('f', embed).tobytes())
+                     for text_hash, embed in embeddings_by_hash.items()])
+        except sqlite3.Error as e:
+            get_logger().warning(f"Failed to write embedding cache {self.path}: {e}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pr_agent.algo.embedding_cache import EmbeddingCache
+from pr_agent.log import get_logger
+
+EMBEDDING_DIMENSION = 1536
+
+
+def content_hash(text: str) -> str:
+    """
+    Returns a stable hash of an embedding input, used to detect texts that were already embedded or indexed.
+    """
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+def _estimate_tokens(text: str) -> int:
+    """A 4-chars-per-token estimate of the number of tokens in a text."""
+    return len(text) // 4 + 1
+
+
+def make_batches(texts: List[str], max_batch_size: int, max_batch_tokens: int,
+                 count_tokens: Optional[Callable[[str], int]] = None) -> List[List[int]]:
+    """
+    Split texts into batches that respect both a maximal number of inputs and a maximal number of tokens per request.
+
+    Args:
+        texts: The texts to split.
+        max_batch_size: Maximal number of texts in a single batch.
+        max_batch_tokens: Maximal sum of tokens in a single batch. A single text larger than this limit gets its own
+            batch.
+        count_tokens: Callable returning the number of tokens in a text. Defaults to a 4-chars-per-token estimate.
+
+    Returns:
+        A list of batches, each batch is a list of indices into `texts`, in their original order.
+    """
+    if count_tokens is None:
+        count_tokens = _estimate_tokens
+    max_batch_size = max(1, max_batch_size)
+
+    batches = []
+    current_batch = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        num_tokens = count_tokens(text)
+        if current_batch and (len(current_batch) >= max_batch_size or current_tokens + num_tokens > max_batch_tokens):
+            batches.append(current_batch)
+            current_batch = []
+            current_tokens = 0
+        current_batch.append(i)
+        current_tokens += num_tokens
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+class EmbeddingIngestionPipeline:
+    """
+    Embeds a list of texts with size- and token-aware batches, sent with bounded concurrency.
+
+    - Identical texts are embedded once.
+    - Completed batches are appended to an optional checkpoint file (JSON lines of content hash and embedding), so an
+      interrupted ingestion resumes without re-embedding what was already done. The checkpoint is removed once
+      all texts were embedded successfully.
+    - If an embedding cache is given, texts already embedded with the same model are taken from it, and new
+      embeddings are added to it.
+    - A failing batch is split in halves and retried, down to single texts. A single text that still fails gets a zero
+      vector and is reported as failed. It is neither checkpointed nor cached, so it is retried on the next run, as
+      long as the caller does not store its zero vector as a valid embedding.
+    """
+
+    def __init__(self, embed_fn: Callable[[List[str]], List[List[float]]],
+                 count_tokens: Optional[Callable[[str], int]] = None,
+                 max_batch_size: int = 256,
+                 max_batch_tokens: int = 100_000,
+                 max_concurrency: int = 4,
+                 checkpoint_path: Optional[str] = None,
+                 dimension: int = EMBEDDING_DIMENSION,
+                 cache: Optional[EmbeddingCache] = None,
+                 model: str = ""):
+        self.embed_fn = embed_fn
+        self.count_tokens = count_tokens
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max(1, max_concurrency)
+        self.checkpoint_path = checkpoint_path
+        self.dimension = dimension
+        self.cache = cache
+        self.model = model
+        self._checkpoint_lock = Lock()
+
+    def embed(self, texts: List[str]) -> Tuple[List[List[float]], List[int]]:
+        """
+        Returns one embedding per input text, in the same order as `texts`, and the indices of the texts that failed
+        to embed (their embedding is a zero vector).
+        """
+        if not texts:
+            return [], []
+
+        hashes = [content_hash(text) for text in texts]
+        embeddings_by_hash = self._load_checkpoint()
+        if embeddings_by_hash:
+            get_logger().info(f"Resuming embedding from checkpoint with {len(embeddings_by_hash)} embedded texts")
+        if self.cache is not None:
+            cached = self.cache.get_many(self.model, set(hashes) - embeddings_by_hash.keys())
+            if cached:
+                get_logger().info(f"Found {len(cached)} embedded texts in the embedding cache")
+                embeddings_by_hash.update(cached)
+
+        # unique texts that still need embedding, in their original order
+        pending_texts = {}
+        for text, text_hash in zip(texts, hashes, strict=True):
+            if text_hash not in embeddings_by_hash and text_hash not in pending_texts:
+                pending_texts[text_hash] = text
+        pending_hashes = list(pending_texts.keys())
+        pending_list = list(pending_texts.values())
+
+        batches = make_batches(pending_list, self.max_batch_size, self.max_batch_tokens, self.count_tokens)
+        get_logger().info(f"Embedding {len(pending_list)} unique texts out of {len(texts)} in {len(batches)} batches")
+
+        failed_hashes = set()
+
+        def _run_batch(batch: List[int]):
+            batch_hashes = [pending_hashes[i] for i in batch]
+            batch_embeds = self._embed_with_split([pending_list[i] for i in batch])
+            batch_results = {}
+            for text_hash, embed in zip(batch_hashes, batch_embeds, strict=True):
+                if embed is None:
+                    failed_hashes.add(text_hash)
+                    embed = [0] * self.dimension
+                batch_results[text_hash] = embed
+            succeeded = {h: e for h, e in batch_results.items() if h not in failed_hashes}
+            self._append_checkpoint(succeeded)
+            if self.cache is not None:
+                self.cache.put_many(self.model, succeeded)
+            return batch_results
+
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                for batch_results in executor.map(_run_batch, batches):
+                    embeddings_by_hash.update(batch_results)
+
+        if failed_hashes:
+            get_logger().error(f"Failed to embed {len(failed_hashes)} texts, using zero vectors instead")
+        else:
+            self._remove_checkpoint()
+        failed_indices = [i for i, text_hash in enumerate(hashes) if text_hash in failed_hashes]
+        return [embeddings_by_hash[text_hash] for text_hash in hashes], failed_indices
+
+    def _embed_with_split(self, texts: List[str]) -> List[Optional[List[float]]]:
+        try:
+            embeds = self.embed_fn(texts)
+            if len(embeds) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeds)}")
+            return embeds
+        except Exception as e:
+            if len(texts) == 1:
+                get_logger().warning(f"Failed to embed text: {e}")
+                return [None]
+            get_logger().warning(f"Failed to embed a batch of {len(texts)} texts, splitting it: {e}")
+            middle = len(texts) // 2
+            return self._embed_with_split(texts[:middle]) + self._embed_with_split(texts[middle:])
+
+    def _load_checkpoint(self) -> Dict[str, List[float]]:
+        embeddings_by_hash = {}
+        if not self.checkpoint_path or not os.path.isfile(self.checkpoint_path):
+            return embeddings_by_hash
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        embeddings_by_hash[entry["hash"]] = entry["embedding"]
+                    except (ValueError, KeyError):
+                        continue  # a partially written last line
+        except Exception as e:
+            get_logger().warning(f"Failed to load embedding checkpoint {self.checkpoint_path}: {e}")
+        return embeddings_by_hash
+
+    def _append_checkpoint(self, embeddings_by_hash: Dict[str, List[float]]):
+        if not self.checkpoint_path or not embeddings_by_hash:
+            return
+        with self._checkpoint_lock:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+                with open(self.checkpoint_path, "a") as f:
+                    for text_hash, embed in embeddings_by_hash.items():
+                        f.write(json.dumps({"hash": text_hash, "embedding": embed}) + "\n")
+            except Exception as e:
+                get_logger().warning(f"Failed to write embedding checkpoint {self.checkpoint_path}: {e}")
+
+    def _remove_checkpoint(self):
+        if self.checkpoint_path and os.path.isfile(self.checkpoint_path):
+            try:
+                os.remove(self.checkpoint_path)
+            except OSError as e:
+                get_logger().warning(f"Failed to remove embedding checkpoint {self.checkpoint_path}: {e}")
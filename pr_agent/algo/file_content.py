@@ -0,0 +1,341 @@
+"""
+Storage of the full file contents of a PR (FilePatchInfo.base_file and head_file).
+
+The contents of all the changed files are held for the whole request, so a PR with large (e.g. generated) files can
+take gigabytes. Contents are stored as FileContent handles, read back as strings on access:
+
+- LazyFileContent: fetched from the git provider on first access
+- InMemoryFileContent: a plain string, while the request's memory budget allows it
+- CompressedFileContent: zlib-compressed bytes, once the budget is exceeded
+- SpilledFileContent: written to a temporary file and memory-mapped, once the budget is exceeded
+
+Extending the hunks of a patch only needs a few lines around each hunk. When a provider can load some lines of a file
+on their own (a `range_loader`), a LazyFileContent not loaded yet serves them as SparseFileLines.
+
+The budget is per request (see get_file_content_budget), and is set by config.file_contents_memory_budget_mb.
+"""
+
+import codecs
+import mmap
+import tempfile
+import weakref
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from starlette_context import context
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+
+OVERFLOW_COMPRESS = "compress"
+OVERFLOW_SPILL = "spill"
+# below this size, compressing or spilling a file costs more than it saves
+MIN_OVERFLOW_SIZE = 4096
+COMPRESSION_LEVEL = 1  # fast: the content may be decompressed several times by a command
+ENCODING_ERRORS = "surrogatepass"  # lossless for any Python string
+STREAM_CHUNK_SIZE = 64 * 1024
+
+LineRanges = List[Tuple[int, int]]  # 1-based, inclusive (start, end) line numbers
+
+
+class MissingLineError(LookupError):
+    pass
+
+
+class SparseFileLines(Sequence):
+    """
+    Some of the lines of a file. Reads like the list of all its lines (`text.splitlines()`): the length is the number
+    of lines of the file, and reading a line that was not loaded raises MissingLineError.
+    """
+
+    __slots__ = ("_lines", "_num_lines")
+
+    def __init__(self, lines: Dict[int, str], num_lines: int):
+        self._lines = lines  # 0-based index -> line
+        self._num_lines = num_lines
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], ranges: LineRanges) -> "SparseFileLines":
+        wanted = set()
+        for start, end in ranges:
+            wanted.update(range(max(start, 1) - 1, end))
+        kept = {}
+        num_lines = 0
+        for index, line in enumerate(lines):
+            if index in wanted:
+                kept[index] = line
+            num_lines = index + 1
+        return cls(kept, num_lines)
+
+    @classmethod
+    def from_text(cls, text: str, ranges: LineRanges) -> "SparseFileLines":
+        return cls.from_lines(iter_text_lines([text]), ranges)
+
+    def __len__(self) -> int:
+        return self._num_lines
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._num_lines))]
+        if index < 0:
+            index += self._num_lines
+        if not 0 <= index < self._num_lines:
+            raise IndexError("line index out of range")
+        try:
+            return self._lines[index]
+        except KeyError:
+            raise MissingLineError(f"line {index + 1} was not loaded") from None
+
+
+def iter_text_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    The lines of a text given in chunks, split like `str.splitlines()`.
+    """
+    remainder = ""
+    for chunk in chunks:
+        lines = (remainder + chunk).splitlines(keepends=True)
+        # the last line may continue in the next chunk (including a '\r' followed by '\n')
+        remainder = lines.pop() if lines else ""
+        for line in lines:
+            yield line.splitlines()[0]
+    if remainder:
+        yield remainder.splitlines()[0]
+
+
+def iter_stream_lines(stream, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    The lines of a binary stream (e.g. a git blob), decoded and read in chunks.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+
+    def chunks():
+        while True:
+            data = stream.read(STREAM_CHUNK_SIZE)
+            if not data:
+                yield decoder.decode(b"", final=True)
+                return
+            yield decoder.decode(data)
+
+    return iter_text_lines(chunks())
+
+
+class FileContent(ABC):
+    """
+    A handle on the content of a file. `get()` returns it as a string.
+    """
+
+    __slots__ = ("__weakref__",)
+
+    @abstractmethod
+    def get(self) -> str:
+        pass
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """Bytes of process memory held by the content."""
+        pass
+
+    def get_line_ranges(self, ranges: LineRanges) -> Union[str, SparseFileLines]:
+        """
+        The content to read the given lines from: only these lines when they can be loaded on their own, otherwise
+        the full content.
+        """
+        return self.get()
+
+    def __deepcopy__(self, memo):
+        return self  # contents are immutable
+
+    def __reduce__(self):
+        return InMemoryFileContent, (self.get(),)
+
+
+class InMemoryFileContent(FileContent):
+    __slots__ = ("_text",)
+
+    def __init__(self, text: str, budget: "Optional[FileContentBudget]" = None):
+        self._text = text
+        if budget is not None and text:
+            budget.charge(len(text))
+            weakref.finalize(self, budget.release, len(text))
+
+    def get(self) -> str:
+        return self._text
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._text)
+
+
+class CompressedFileContent(FileContent):
+    __slots__ = ("_data",)
+
+    def __init__(self, text: str):
+        self._data = zlib.compress(text.encode("utf-8", ENCODING_ERRORS), COMPRESSION_LEVEL)
+
+    def get(self) -> str:
+        return zlib.decompress(self._data).decode("utf-8", ENCODING_ERRORS)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._data)
+
+
+def _close_spill(mapped: mmap.mmap, file):
+    mapped.close()
+    file.close()
+
+
+class SpilledFileContent(FileContent):
+    __slots__ = ("_mmap", "_size")
+
+    def __init__(self, text: str, spill_dir: Optional[str] = None):
+        data = text.encode("utf-8", ENCODING_ERRORS)
+        self._size = len(data)
+        # deleted by the OS when closed; the mapping's pages are loaded on access and can be evicted at any time
+        file = tempfile.TemporaryFile(dir=spill_dir or None)
+        file.write(data)
+        file.flush()
+        self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        weakref.finalize(self, _close_spill, self._mmap, file)
+
+    def get(self) -> str:
+        return self._mmap[:].decode("utf-8", ENCODING_ERRORS)
+
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+
+class LazyFileContent(FileContent):
+    """
+    Content fetched by `loader` on first access (e.g. a git provider API call), then stored by the budget.
+    Until then, `range_loader` (when given) loads some lines of the file on their own.
+    """
+
+    __slots__ = ("_loader", "_range_loader", "_content", "_budget", "_lock")
+
+    def __init__(self, loader: Callable[[], str], budget: "Optional[FileContentBudget]" = None,
+                 range_loader: Optional[Callable[[LineRanges], SparseFileLines]] = None):
+        self._loader = loader
+        self._range_loader = range_loader
+        self._content: Optional[FileContent] = None
+        self._budget = budget or get_file_content_budget()
+        self._lock = Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._content is not None
+
+    def get(self) -> str:
+        if self._content is None:
+            with self._lock:
+                if self._content is None:
+                    try:
+                        text = self._loader() or ""
+                    except Exception as e:
+                        get_logger().warning(f"Failed to load file content: {e}")
+                        text = ""
+                    self._content = self._budget.store(text)
+                    self._loader = self._range_loader = None
+        return self._content.get()
+
+    def get_line_ranges(self, ranges: LineRanges) -> Union[str, SparseFileLines]:
+        range_loader = self._range_loader
+        if self._content is None and range_loader is not None:
+            try:
+                return range_loader(ranges)
+            except Exception as e:
+                get_logger().warning(f"Failed to load file lines, loading the full content: {e}")
+        return self.get()
+
+    @property
+    def nbytes(self) -> int:
+        return self._content.nbytes if self._content is not None else 0
+
+
+class FileContentBudget:
+    """
+    Memory budget of the file contents of a request. Contents are kept as strings until the budget is used, the
+    following ones are compressed, or spilled to temporary files.
+    """
+
+    def __init__(self, max_bytes: int = 0, overflow: str = OVERFLOW_COMPRESS, spill_dir: Optional[str] = None):
+        self.max_bytes = max_bytes  # 0: no limit
+        self.overflow = overflow
+        self.spill_dir = spill_dir
+        self.in_memory_bytes = 0
+        self.peak_in_memory_bytes = 0
+        self.compressed_files = 0
+        self.spilled_files = 0
+        self._lock = Lock()
+
+    def charge(self, num_bytes: int):
+        with self._lock:
+            self.in_memory_bytes += num_bytes
+            self.peak_in_memory_bytes = max(self.peak_in_memory_bytes, self.in_memory_bytes)
+
+    def release(self, num_bytes: int):
+        with self._lock:
+            self.in_memory_bytes -= num_bytes
+
+    def store(self, text: str) -> FileContent:
+        size = len(text)
+        if self.max_bytes <= 0 or size < MIN_OVERFLOW_SIZE or self.in_memory_bytes + size <= self.max_bytes:
+            return InMemoryFileContent(text, self)
+        if self.overflow == OVERFLOW_SPILL:
+            try:
+                content = SpilledFileContent(text, self.spill_dir)
+                self.spilled_files += 1
+                return content
+            except OSError as e:
+                get_logger().warning(f"Failed to spill file content to disk, compressing it instead: {e}")
+        self.compressed_files += 1
+        return CompressedFileContent(text)
+
+
+def _budget_from_settings() -> FileContentBudget:
+    settings = get_settings()
+    overflow = str(settings.get("config.file_contents_overflow", OVERFLOW_COMPRESS)).lower()
+    if overflow not in (OVERFLOW_COMPRESS, OVERFLOW_SPILL):
+        get_logger().warning(f"Unknown config.file_contents_overflow '{overflow}', using '{OVERFLOW_COMPRESS}'")
+        overflow = OVERFLOW_COMPRESS
+    max_mb = settings.get("config.file_contents_memory_budget_mb", 0) or 0
+    return FileContentBudget(max_bytes=int(max_mb * 1024 * 1024), overflow=overflow,
+                             spill_dir=settings.get("config.file_contents_spill_dir", "") or None)
+
+
+_process_budget: Optional[FileContentBudget] = None
+
+
+def get_file_content_budget() -> FileContentBudget:
+    """
+    The file contents budget of the current request, or of the process when not serving a request (CLI).
+    """
+    global _process_budget
+    try:
+        budget = context.get("file_content_budget")
+        if budget is None:
+            budget = context["file_content_budget"] = _budget_from_settings()
+        return budget
+    except Exception:  # not in a request context
+        if _process_budget is None:
+            _process_budget = _budget_from_settings()
+        return _process_budget
+
+
+def store_file_content(value):
+    """
+    The stored form of a FilePatchInfo content: strings are stored by the current budget, handles and other values
+    (None, bytes) are kept as is.
+    """
+    if isinstance(value, str) and value:
+        return get_file_content_budget().store(value)
+    return value
+
+
+def read_file_content(value):
+    return value.get() if isinstance(value, FileContent) else value
@@ -0,0 +1,45 @@
+"""
+Per-file stage of the PR diff preparation, fanned out to a thread pool on large PRs.
+
+Extending or compressing the patch of each file, and counting its tokens, is independent per file. PRs with at least
+config.parallel_file_processing_min_files files are processed by a pool of config.parallel_file_processing_workers
+threads; smaller PRs are processed inline, where a pool costs more than it saves. The results keep the order of the
+files, so the diff is the same either way.
+
+Threads rather than processes: the file contents are loaded lazily through the git provider's client, and the request's
+settings live in a context variable (see get_settings), neither of which crosses a process boundary. Each task runs in a
+copy of the caller's context. Fetching the contents and tokenizing release the GIL. The contents of several files are
+then fetched at the same time through the same API client, which must be safe to use from several threads (see
+http_session.install_github_connection_pool for PyGithub).
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+from pr_agent.config_loader import get_settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MIN_FILES = 50
+DEFAULT_WORKERS = 8
+
+
+def map_files(func: Callable[[T], R], files: Sequence[T], min_files: Optional[int] = None,
+              max_workers: Optional[int] = None) -> List[R]:
+    """
+    [func(file) for file in files], on a thread pool when there are at least `min_files` files (0: never). An
+    exception raised for a file is raised here, once the other files are done.
+    """
+    files = list(files)
+    if min_files is None:
+        min_files = get_settings().get("config.parallel_file_processing_min_files", DEFAULT_MIN_FILES)
+    if max_workers is None:
+        max_workers = get_settings().get("config.parallel_file_processing_workers", DEFAULT_WORKERS)
+    if min_files <= 0 or len(files) < min_files or max_workers <= 1:
+        return [func(file) for file in files]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(files)), thread_name_prefix="pr_files") as executor:
+        futures = [executor.submit(contextvars.copy_context().run, func, file) for file in files]
+        return [future.result() for future in futures]
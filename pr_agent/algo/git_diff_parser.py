@@ -0,0 +1,162 @@
+"""
+Parsing of git diffs (the output of `git diff`, as returned by the providers' diff endpoints), shared by the git
+providers.
+
+A PR diff can be many megabytes. It is read as a stream of byte chunks and split at the 'diff --git' line of each
+file, so only the diff of the current file is buffered, and each file diff is decoded once. The header of a file diff
+(paths, new / deleted / renamed file) and the counts of its added and removed lines are read in the same pass that
+extracts its patch.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple
+
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+from pr_agent.log import get_logger
+
+DIFF_FILE_HEADER = b"diff --git "
+# utf-8 first; iso-8859-1 decodes any byte, so it never fails
+DIFF_ENCODINGS = ("utf-8", "iso-8859-1")
+
+
+def iter_file_diffs(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Splits a git diff, read as byte chunks, into the diff of each file, starting at its 'diff --git' line.
+    Anything before the first 'diff --git' line is dropped.
+    """
+    boundary = b"\n" + DIFF_FILE_HEADER
+    buffer = bytearray()
+    started = False
+    search_from = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        if not started:
+            if len(buffer) < len(DIFF_FILE_HEADER):
+                continue
+            start = 0 if buffer.startswith(DIFF_FILE_HEADER) else buffer.find(boundary)
+            if start < 0:
+                # keep the end of the buffer, in case the first 'diff --git' line is cut between two chunks
+                del buffer[:max(len(buffer) - len(boundary), 0)]
+                continue
+            del buffer[:start if start == 0 else start + 1]
+            started = True
+            search_from = 1
+        while True:
+            index = buffer.find(boundary, search_from)
+            if index < 0:
+                search_from = max(len(buffer) - len(boundary) + 1, 1)
+                break
+            yield bytes(buffer[:index + 1])
+            del buffer[:index + 1]
+            search_from = 1
+    if started and buffer.strip():
+        yield bytes(buffer)
+
+
+def decode_diff(data: bytes, encodings=DIFF_ENCODINGS) -> str:
+    for encoding in encodings:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            get_logger().debug(f"Failed to decode a file diff with {encoding}")
+    return data.decode(encodings[-1], errors="replace")
+
+
+def count_patch_lines(patch: str) -> Tuple[int, int]:
+    """
+    The number of added and removed lines of a patch. Lines before the first hunk header (e.g. the '---' and '+++'
+    lines of a unified diff) are not counted.
+    """
+    start = _first_hunk_index(patch or "")
+    if start < 0:
+        return 0, 0
+    body = patch[start:]
+    return body.count("\n+"), body.count("\n-")
+
+
+def _first_hunk_index(text: str) -> int:
+    if text.startswith("@@"):
+        return 0
+    index = text.find("\n@@")
+    return index + 1 if index >= 0 else -1
+
+
+def _header_path(value: str) -> Optional[str]:
+    value = value.rstrip("\t").strip()
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    if value == "/dev/null":
+        return None
+    if value[:2] in ("a/", "b/"):
+        return value[2:]
+    return value
+
+
+@dataclass
+class FileDiff:
+    old_path: Optional[str]  # None for an added file
+    new_path: Optional[str]  # None for a deleted file
+    edit_type: EDIT_TYPE
+    patch: str  # from the first hunk header
+    num_plus_lines: int
+    num_minus_lines: int
+
+    @property
+    def filename(self) -> str:
+        return self.new_path or self.old_path or ""
+
+    def to_file_patch_info(self, base_file="", head_file="") -> FilePatchInfo:
+        old_filename = self.old_path if self.old_path and self.old_path != self.new_path else None
+        return FilePatchInfo(base_file, head_file, self.patch, self.filename, edit_type=self.edit_type,
+                             old_filename=old_filename, num_plus_lines=self.num_plus_lines,
+                             num_minus_lines=self.num_minus_lines)
+
+
+def parse_file_diff(file_diff: str) -> FileDiff:
+    """
+    Parses the diff of one file, from its 'diff --git' line.
+    """
+    header_end = _first_hunk_index(file_diff)
+    header = file_diff[:header_end] if header_end >= 0 else file_diff
+    old_path = new_path = None
+    git_old_path = git_new_path = None
+    edit_type = EDIT_TYPE.MODIFIED
+    for line in header.splitlines():
+        if line.startswith("diff --git "):
+            paths = line[len("diff --git "):]
+            # 'a/<path> b/<path>': the paths are ambiguous when they contain ' b/', the '---'/'+++' lines win
+            middle = paths.find(" b/")
+            if paths.startswith("a/") and middle > 0:
+                git_old_path, git_new_path = paths[2:middle], paths[middle + 3:]
+        elif line.startswith("new file mode"):
+            edit_type = EDIT_TYPE.ADDED
+        elif line.startswith("deleted file mode"):
+            edit_type = EDIT_TYPE.DELETED
+        elif line.startswith("rename from "):
+            edit_type, old_path = EDIT_TYPE.RENAMED, line[len("rename from "):]
+        elif line.startswith("rename to "):
+            edit_type, new_path = EDIT_TYPE.RENAMED, line[len("rename to "):]
+        elif line.startswith("--- "):
+            old_path = _header_path(line[4:]) if old_path is None else old_path
+        elif line.startswith("+++ "):
+            new_path = _header_path(line[4:]) if new_path is None else new_path
+
+    if edit_type != EDIT_TYPE.ADDED:
+        old_path = old_path or git_old_path
+    if edit_type != EDIT_TYPE.DELETED:
+        new_path = new_path or git_new_path
+    if header_end < 0:
+        # no hunks, e.g. a binary file, or a mode change only
+        return FileDiff(old_path, new_path, edit_type, "", 0, 0)
+    patch = file_diff[header_end:].rstrip("\n")
+    return FileDiff(old_path, new_path, edit_type, patch, patch.count("\n+"), patch.count("\n-"))
+
+
+def parse_git_diff(chunks: Iterable[bytes]) -> Iterator[FileDiff]:
+    """
+    The parsed diff of each file of a git diff read as byte chunks, in the order of the diff.
+    """
+    for file_diff in iter_file_diffs(chunks):
+        yield parse_file_diff(decode_diff(file_diff))
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import re
 import traceback
+from typing import Sequence, Tuple
 
+from pr_agent.algo.file_content import LineRanges
 from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
 from pr_agent.config_loader import get_settings
 from pr_agent.log import get_logger
@@ -53,12 +55,39 @@ def should_skip_patch(filename):
     return False
 
 
+RE_HUNK_HEADER_MULTILINE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@[ ]?(.*)", re.MULTILINE)
+
+
+def hunk_line_ranges(patch_str: str, patch_extra_lines_before: int,
+                     patch_extra_lines_after: int) -> Tuple[LineRanges, LineRanges]:
+    """
+    The line ranges of the original and of the new file that process_patch_lines reads to extend the hunks of a
+    patch, as 1-based (start, end) line numbers. Loading only these lines is enough to extend the patch.
+    """
+    if get_settings().config.allow_dynamic_context:
+        patch_extra_lines_before = max(patch_extra_lines_before,
+                                       get_settings().config.max_extra_lines_before_dynamic_context)
+    original_ranges, new_ranges = [], []
+    for match in RE_HUNK_HEADER_MULTILINE.finditer(patch_str or ""):
+        _, size1, size2, start1, start2 = extract_hunk_headers(match)
+        original_ranges.append((start1 - patch_extra_lines_before, start1 + size1 - 1 + patch_extra_lines_after))
+        new_ranges.append((start2 - patch_extra_lines_before, start2 - 1))
+    return original_ranges, new_ranges
+
+
+def _file_lines(file_content) -> Sequence[str]:
+    # the full content, or the lines of it loaded around the hunks (SparseFileLines)
+    if isinstance(file_content, str):
+        return file_content.splitlines()
+    return file_content or []
+
+
 def process_patch_lines(patch_str, original_file_str, patch_extra_lines_before, patch_extra_lines_after, new_file_str=""):
     allow_dynamic_context = get_settings().config.allow_dynamic_context
     patch_extra_lines_before_dynamic = get_settings().config.max_extra_lines_before_dynamic_context
 
-    file_original_lines = original_file_str.splitlines()
-    file_new_lines = new_file_str.splitlines() if new_file_str else []
+    file_original_lines = _file_lines(original_file_str)
+    file_new_lines = _file_lines(new_file_str)
     len_original_lines = len(file_original_lines)
     patch_lines = patch_str.splitlines()
     extended_patch_lines = []
@@ -297,6 +326,19 @@ def handle_patch_deletions(patch: str, original_file_content_str: str,
     return patch
 
 
+def _rstrip_parts(parts: list):
+    """
+    Strips the trailing whitespace of a string built as a list of parts, like str.rstrip() on their concatenation,
+    without copying the whole string (which made building a many-hunk patch quadratic).
+    """
+    while parts:
+        stripped = parts[-1].rstrip()
+        if stripped:
+            parts[-1] = stripped
+            return
+        parts.pop()
+
+
 def decouple_and_convert_to_hunks_with_lines_numbers(patch: str, file) -> str:
     """
     Convert a given patch string into a string with line numbers for each hunk, indicating the new and old content of
@@ -336,9 +378,9 @@ __old hunk__
         if hasattr(file, 'edit_type') and file.edit_type == EDIT_TYPE.DELETED:
             return f"\n\n## File '{file.filename.strip()}' was deleted\n"
 
-        patch_with_lines_str = f"\n\n## File: '{file.filename.strip()}'\n"
+        patch_with_lines = [f"\n\n## File: '{file.filename.strip()}'\n"]
     else:
-        patch_with_lines_str = ""
+        patch_with_lines = []
 
     patch_lines = patch.splitlines()
     RE_HUNK_HEADER = re.compile(
@@ -358,20 +400,22 @@ __old hunk__
             match = RE_HUNK_HEADER.match(line)
             if match and (new_content_lines or old_content_lines):  # found a new hunk, split the previous lines
                 if prev_header_line:
-                    patch_with_lines_str += f'\n{prev_header_line}\n'
+                    patch_with_lines.append(f'\n{prev_header_line}\n')
                 is_plus_lines = is_minus_lines = False
                 if new_content_lines:
                     is_plus_lines = any([line.startswith('+') for line in new_content_lines])
                 if old_content_lines:
                     is_minus_lines = any([line.startswith('-') for line in old_content_lines])
                 if is_plus_lines or is_minus_lines: # notice 'True' here - we always present __new hunk__ for section, otherwise LLM gets confused
-                    patch_with_lines_str = patch_with_lines_str.rstrip() + '\n__new hunk__\n'
+                    _rstrip_parts(patch_with_lines)
+                    patch_with_lines.append('\n__new hunk__\n')
                     for i, line_new in enumerate(new_content_lines):
-                        patch_with_lines_str += f"{start2 + i} {line_new}\n"
+                        patch_with_lines.append(f"{start2 + i} {line_new}\n")
                 if is_minus_lines:
-                    patch_with_lines_str = patch_with_lines_str.rstrip() + '\n__old hunk__\n'
+                    _rstrip_parts(patch_with_lines)
+                    patch_with_lines.append('\n__old hunk__\n')
                     for line_old in old_content_lines:
-                        patch_with_lines_str += f"{line_old}\n"
+                        patch_with_lines.append(f"{line_old}\n")
                 new_content_lines = []
                 old_content_lines = []
             if match:
@@ -394,22 +438,24 @@ __old hunk__
 
     # finishing last hunk
     if match and new_content_lines:
-        patch_with_lines_str += f'\n{header_line}\n'
+        patch_with_lines.append(f'\n{header_line}\n')
         is_plus_lines = is_minus_lines = False
         if new_content_lines:
             is_plus_lines = any([line.startswith('+') for line in new_content_lines])
         if old_content_lines:
             is_minus_lines = any([line.startswith('-') for line in old_content_lines])
         if is_plus_lines or is_minus_lines:  # notice 'True' here - we always present __new hunk__ for section, otherwise LLM gets confused
-            patch_with_lines_str = patch_with_lines_str.rstrip() + '\n__new hunk__\n'
+            _rstrip_parts(patch_with_lines)
+            patch_with_lines.append('\n__new hunk__\n')
             for i, line_new in enumerate(new_content_lines):
-                patch_with_lines_str += f"{start2 + i} {line_new}\n"
+                patch_with_lines.append(f"{start2 + i} {line_new}\n")
         if is_minus_lines:
-            patch_with_lines_str = patch_with_lines_str.rstrip() + '\n__old hunk__\n'
+            _rstrip_parts(patch_with_lines)
+            patch_with_lines.append('\n__old hunk__\n')
             for line_old in old_content_lines:
-                patch_with_lines_str += f"{line_old}\n"
+                patch_with_lines.append(f"{line_old}\n")
 
-    return patch_with_lines_str.rstrip()
+    return "".join(patch_with_lines).rstrip()
 
 
 def extract_hunk_lines_from_patch(patch: str, file_name, line_start, line_end, side, remove_trailing_chars: bool = True) -> tuple[str, str]:
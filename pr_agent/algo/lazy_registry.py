@@ -0,0 +1,54 @@
+import importlib
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Union
+
+
+def import_object(path: str) -> Any:
+    """
+    Imports an object from a "package.module:attribute" path.
+    """
+    module_name, _, attribute = path.partition(":")
+    if not attribute:
+        raise ValueError(f"Expected a 'module:attribute' path, got '{path}'")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class LazyRegistry(MutableMapping):
+    """
+    A name -> object mapping whose values are given as "module:attribute" paths, and imported on first access only.
+
+    Entry points that dispatch on a single name (a command, a git provider) use it to avoid importing every tool,
+    git provider SDK and AI library at startup. Listing names (keys, `in`, len) never imports anything. Values that are
+    not strings are stored as is, so registering or overriding an entry with an actual class still works.
+    """
+
+    def __init__(self, entries: Dict[str, Union[str, Any]]):
+        self._entries = dict(entries)
+
+    def __getitem__(self, name: str) -> Any:
+        value = self._entries[name]
+        if isinstance(value, str):
+            value = import_object(value)
+            self._entries[name] = value
+        return value
+
+    def __setitem__(self, name: str, value: Union[str, Any]):
+        self._entries[name] = value
+
+    def __delitem__(self, name: str):
+        del self._entries[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def is_loaded(self, name: str) -> bool:
+        return not isinstance(self._entries.get(name), str)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._entries!r})"
@@ -6,8 +6,9 @@ from typing import Callable, List, Tuple
 from github import RateLimitExceededException
 
 from pr_agent.algo.file_filter import filter_ignored
+from pr_agent.algo.file_pool import map_files
 from pr_agent.algo.git_patch_processing import (
-    extend_patch, handle_patch_deletions,
+    extend_patch, handle_patch_deletions, hunk_line_ranges,
     decouple_and_convert_to_hunks_with_lines_numbers)
 from pr_agent.algo.language_handler import sort_files_by_main_languages
 from pr_agent.algo.token_handler import TokenHandler
@@ -16,6 +17,7 @@ from pr_agent.algo.utils import ModelType, clip_tokens, get_max_tokens, get_mode
 from pr_agent.config_loader import get_settings
 from pr_agent.git_providers.git_provider import GitProvider
 from pr_agent.log import get_logger
+from pr_agent.log.tracing import traced
 
 DELETED_FILES_ = "Deleted files:\n"
 
@@ -35,6 +37,7 @@ def cap_and_log_extra_lines(value, direction) -> int:
     return value
 
 
+@traced("pr_processing.get_pr_diff", record_args=("model",))
 def get_pr_diff(git_provider: GitProvider, token_handler: TokenHandler,
                 model: str,
                 add_line_numbers_to_hunks: bool = False,
@@ -164,6 +167,18 @@ def get_pr_diff_multiple_patchs(git_provider: GitProvider, token_handler: TokenH
     return patches_compressed_list, total_tokens_list, deleted_files_list, remaining_files_list, file_dict, files_in_patches_list
 
 
+def _deletion_check_contents(file: FilePatchInfo) -> Tuple[str, str]:
+    """
+    The (original, new) contents to pass to handle_patch_deletions, which only checks whether the new file is empty
+    when the edit type is DELETED or UNKNOWN. A deleted file is empty by definition, so the contents are only fetched
+    for an unknown edit type.
+    """
+    if file.edit_type == EDIT_TYPE.UNKNOWN:
+        return "", file.head_file
+    return "", ""
+
+
+@traced("pr_processing.extend_patches")
 def pr_generate_extended_diff(pr_languages: list,
                               token_handler: TokenHandler,
                               add_line_numbers_to_hunks: bool,
@@ -172,41 +187,49 @@ def pr_generate_extended_diff(pr_languages: list,
     total_tokens = token_handler.prompt_tokens  # initial tokens
     patches_extended = []
     patches_extended_tokens = []
-    for lang in pr_languages:
-        for file in lang['files']:
-            original_file_content_str = file.base_file
-            new_file_content_str = file.head_file
-            patch = file.patch
-            if not patch:
-                continue
+    files = [file for lang in pr_languages for file in lang['files'] if file.patch]
 
-            # extend each patch with extra lines of context
-            extended_patch = extend_patch(original_file_content_str, patch,
-                                          patch_extra_lines_before, patch_extra_lines_after, file.filename,
-                                          new_file_str=new_file_content_str)
-            if not extended_patch:
-                get_logger().warning(f"Failed to extend patch for file: {file.filename}")
-                continue
+    def extend_file_patch(file: FilePatchInfo):
+        patch = file.patch
+        # only the lines around the hunks are needed, when the provider can load them without the full files
+        original_ranges, new_ranges = hunk_line_ranges(patch, patch_extra_lines_before, patch_extra_lines_after)
+        original_file_content_str = file.get_line_ranges(original_ranges)
+        new_file_content_str = file.get_line_ranges(new_ranges, head=True)
+
+        # extend each patch with extra lines of context
+        extended_patch = extend_patch(original_file_content_str, patch,
+                                      patch_extra_lines_before, patch_extra_lines_after, file.filename,
+                                      new_file_str=new_file_content_str)
+        if not extended_patch:
+            get_logger().warning(f"Failed to extend patch for file: {file.filename}")
+            return None
+
+        if add_line_numbers_to_hunks:
+            full_extended_patch = decouple_and_convert_to_hunks_with_lines_numbers(extended_patch, file)
+        else:
+            extended_patch = extended_patch.replace('\n@@ ', '\n\n@@ ') # add extra line before each hunk
+            full_extended_patch = f"\n\n## File: '{file.filename.strip()}'\n\n{extended_patch.strip()}\n"
 
-            if add_line_numbers_to_hunks:
-                full_extended_patch = decouple_and_convert_to_hunks_with_lines_numbers(extended_patch, file)
-            else:
-                extended_patch = extended_patch.replace('\n@@ ', '\n\n@@ ') # add extra line before each hunk
-                full_extended_patch = f"\n\n## File: '{file.filename.strip()}'\n\n{extended_patch.strip()}\n"
+        # add AI-summary metadata to the patch
+        if file.ai_file_summary and get_settings().get("config.enable_ai_metadata", False):
+            full_extended_patch = add_ai_summary_top_patch(file, full_extended_patch)
 
-            # add AI-summary metadata to the patch
-            if file.ai_file_summary and get_settings().get("config.enable_ai_metadata", False):
-                full_extended_patch = add_ai_summary_top_patch(file, full_extended_patch)
+        patch_tokens = token_handler.count_tokens(full_extended_patch)
+        file.tokens = patch_tokens
+        return full_extended_patch, patch_tokens
 
-            patch_tokens = token_handler.count_tokens(full_extended_patch)
-            file.tokens = patch_tokens
-            total_tokens += patch_tokens
-            patches_extended_tokens.append(patch_tokens)
-            patches_extended.append(full_extended_patch)
+    for result in map_files(extend_file_patch, files):
+        if result is None:
+            continue
+        full_extended_patch, patch_tokens = result
+        total_tokens += patch_tokens
+        patches_extended_tokens.append(patch_tokens)
+        patches_extended.append(full_extended_patch)
 
     return patches_extended, total_tokens, patches_extended_tokens
 
 
+@traced("pr_processing.compress_diff")
 def pr_generate_compressed_diff(top_langs: list, token_handler: TokenHandler, model: str,
                                 convert_hunks_to_line_numbers: bool,
                                 large_pr_handling: bool) -> Tuple[list, list, list, list, dict, list]:
@@ -218,21 +241,15 @@ def pr_generate_compressed_diff(top_langs: list, token_handler: TokenHandler, mo
         sorted_files.extend(sorted(lang['files'], key=lambda x: x.tokens, reverse=True))
 
     # generate patches for each file, and count tokens
-    file_dict = {}
-    for file in sorted_files:
-        original_file_content_str = file.base_file
-        new_file_content_str = file.head_file
-        patch = file.patch
-        if not patch:
-            continue
+    files = [file for file in sorted_files if file.patch]
 
+    def compress_file_patch(file: FilePatchInfo):
         # removing delete-only hunks
-        patch = handle_patch_deletions(patch, original_file_content_str,
+        original_file_content_str, new_file_content_str = _deletion_check_contents(file)
+        patch = handle_patch_deletions(file.patch, original_file_content_str,
                                        new_file_content_str, file.filename, file.edit_type)
         if patch is None:
-            if file.filename not in deleted_files_list:
-                deleted_files_list.append(file.filename)
-            continue
+            return None
 
         if convert_hunks_to_line_numbers:
             patch = decouple_and_convert_to_hunks_with_lines_numbers(patch, file)
@@ -241,7 +258,15 @@ def pr_generate_compressed_diff(top_langs: list, token_handler: TokenHandler, mo
         # if file.ai_file_summary and get_settings().config.get('config.is_auto_command', False):
         #     patch = add_ai_summary_top_patch(file, patch)
 
-        new_patch_tokens = token_handler.count_tokens(patch)
+        return patch, token_handler.count_tokens(patch)
+
+    file_dict = {}
+    for file, result in zip(files, map_files(compress_file_patch, files), strict=True):
+        if result is None:
+            if file.filename not in deleted_files_list:
+                deleted_files_list.append(file.filename)
+            continue
+        patch, new_patch_tokens = result
         file_dict[file.filename] = {'patch': patch, 'tokens': new_patch_tokens, 'edit_type': file.edit_type}
 
     max_tokens_model = get_max_tokens(model)
@@ -317,6 +342,7 @@ def generate_full_patch(convert_hunks_to_line_numbers, file_dict, max_tokens_mod
     return total_tokens, patches, remaining_files_list_new, files_in_patch_list
 
 
+@traced("pr_processing.retry_with_fallback_models", record_args=("model_type",))
 async def retry_with_fallback_models(f: Callable, model_type: ModelType = ModelType.REGULAR):
     all_models = _get_all_models(model_type)
     all_deployments = _get_all_deployments(all_models)
@@ -369,6 +395,7 @@ def _get_all_deployments(all_models: List[str]) -> List[str]:
     return all_deployments
 
 
+@traced("pr_processing.get_pr_multi_diffs", record_args=("model",))
 def get_pr_multi_diffs(git_provider: GitProvider,
                        token_handler: TokenHandler,
                        model: str,
@@ -431,13 +458,12 @@ def get_pr_multi_diffs(git_provider: GitProvider,
                 get_logger().info(f"Reached max calls ({max_calls})")
             break
 
-        original_file_content_str = file.base_file
-        new_file_content_str = file.head_file
         patch = file.patch
         if not patch:
             continue
 
         # Remove delete-only hunks
+        original_file_content_str, new_file_content_str = _deletion_check_contents(file)
         patch = handle_patch_deletions(patch, original_file_content_str, new_file_content_str, file.filename, file.edit_type)
         if patch is None:
             continue
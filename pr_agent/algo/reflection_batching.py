@@ -0,0 +1,84 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List
+
+
+@dataclass
+class ReflectionItem:
+    data: dict  # the prediction of a chunk, with its "code_suggestions"
+    patches_diff: str  # the diff the suggestions refer to
+    tokens: int  # tokens of the suggestions and the diff in a reflection prompt
+
+
+def split_feedback(items: List[ReflectionItem], feedback: list) -> List[list]:
+    """
+    Splits the feedback of a merged reflection call (one entry per suggestion, in the order of the merged suggestion
+    list) into the feedback of each item.
+    """
+    split, start = [], 0
+    for item in items:
+        end = start + len(item.data["code_suggestions"])
+        split.append(feedback[start:end])
+        start = end
+    return split
+
+
+class ReflectionScheduler:
+    """
+    Groups the suggestions of the chunks of /improve into as few self-reflection calls as a token budget allows,
+    while overlapping reflection with generation.
+
+    Items are added as their chunks are generated. The pending batch is dispatched as soon as a reflection slot is
+    free (up to `concurrency` reflections run at once), so the first chunks are reflected on while the next ones are
+    generated, and the items generated meanwhile are grouped into the next batch. The pending batch is also dispatched
+    when the next item does not fit in `max_batch_tokens` (or it is full), and the rest when the scheduler is closed.
+    A single item larger than the budget gets its own batch, and a budget of 0 reflects on every item alone.
+    """
+
+    def __init__(self, reflect_batch: Callable[[List[ReflectionItem]], Awaitable[None]], max_batch_tokens: int,
+                 concurrency: int = 3):
+        self.reflect_batch = reflect_batch
+        self.max_batch_tokens = max_batch_tokens
+        self.concurrency = max(1, concurrency)
+        self.num_batches = 0
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._pending: List[ReflectionItem] = []
+        self._pending_tokens = 0
+        self._running = 0  # dispatched batches not reflected on yet
+        self._cancelled = False
+        self._tasks: List[asyncio.Future] = []
+
+    def add(self, item: ReflectionItem):
+        if self._pending and self._pending_tokens + item.tokens > self.max_batch_tokens:
+            self._dispatch()
+        self._pending.append(item)
+        self._pending_tokens += item.tokens
+        if self._pending_tokens >= self.max_batch_tokens or self._running < self.concurrency:
+            self._dispatch()
+
+    async def close(self):
+        """Dispatches the pending batch, and waits for all the reflections."""
+        if self._pending:
+            self._dispatch()
+        await asyncio.gather(*self._tasks)
+
+    def cancel(self):
+        self._cancelled = True
+        for task in self._tasks:
+            task.cancel()
+
+    def _dispatch(self):
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        self.num_batches += 1
+        self._running += 1
+        self._tasks.append(asyncio.ensure_future(self._run(batch)))
+
+    async def _run(self, batch: List[ReflectionItem]):
+        try:
+            async with self._semaphore:
+                await self.reflect_batch(batch)
+        finally:
+            self._running -= 1
+            # a slot is free: the items added meanwhile do not wait for the next item or for close()
+            if self._pending and not self._cancelled:
+                self._dispatch()
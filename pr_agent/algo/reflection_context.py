@@ -0,0 +1,226 @@
+"""
+Diff context of the self-reflection prompts of /improve, limited to the hunks the suggestions refer to.
+
+The chunks of /improve are in the decoupled format (see `decouple_and_convert_to_hunks_with_lines_numbers`): per file,
+a '## File: ...' header, then hunks with a numbered '__new hunk__' section and an optional '__old hunk__' section.
+Each suggestion names its `relevant_file`, and quotes the `existing_code` it targets from a '__new hunk__'. Only the
+hunks of the chunk that contain that code are kept, and their '__new hunk__' sections are cut down
+to the quoted lines plus a margin. Line numbers are kept, so the reflection can still locate the suggestions.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+RE_FILE_HEADER = re.compile(r"^## File:? '(.+?)'")
+RE_NEW_HUNK_LINE = re.compile(r"^(\d+) (.*)$")
+NEW_HUNK = "__new hunk__"
+OLD_HUNK = "__old hunk__"
+
+
+@dataclass
+class DiffHunk:
+    header: str  # the '@@ ... @@' line
+    new_lines: List[Tuple[int, str]] = field(default_factory=list)  # (line number, line with its '+'/' ' prefix)
+    old_lines: List[str] = field(default_factory=list)
+
+
+@dataclass
+class DiffFileSection:
+    filename: str
+    preamble: List[str] = field(default_factory=list)  # the header, and the AI summary if any
+    hunks: List[DiffHunk] = field(default_factory=list)
+
+
+def parse_decoupled_diff(patches_diff: str) -> Optional[List[DiffFileSection]]:
+    """
+    Parses a chunk diff in the decoupled format. Returns None when the text is not in that format.
+    """
+    sections: List[DiffFileSection] = []
+    section, hunk, part = None, None, None
+    for line in patches_diff.splitlines():
+        match = RE_FILE_HEADER.match(line)
+        if match:
+            section = DiffFileSection(match.group(1).strip(), preamble=[line])
+            sections.append(section)
+            hunk, part = None, None
+            continue
+        if section is None:
+            if line.strip():
+                return None
+            continue
+        if line.startswith("@@"):
+            hunk, part = DiffHunk(line), None
+            section.hunks.append(hunk)
+        elif line == NEW_HUNK or line == OLD_HUNK:
+            if hunk is None:
+                # a hunk without a '@@' header line
+                hunk = DiffHunk("")
+                section.hunks.append(hunk)
+            part = line
+        elif hunk is None:
+            section.preamble.append(line)
+        elif not line:
+            continue  # separates the sections and the hunks
+        elif part == NEW_HUNK:
+            match = RE_NEW_HUNK_LINE.match(line)
+            if not match:
+                return None
+            hunk.new_lines.append((int(match.group(1)), match.group(2)))
+        elif part == OLD_HUNK:
+            hunk.old_lines.append(line)
+        else:
+            return None
+    return sections if sections else None
+
+
+def _code_segments(code: str) -> List[List[str]]:
+    """The stripped non-empty lines of quoted code, split at the '...' lines that elide part of it."""
+    segments = [[]]
+    for line in (code or "").splitlines():
+        line = line.strip()
+        if line == "...":
+            segments.append([])
+        elif line:
+            segments[-1].append(line)
+    return [segment for segment in segments if segment]
+
+
+def _match_segments(lines: List[Tuple[int, str]], segments: List[List[str]], start: int) -> Optional[int]:
+    """
+    The position in `lines` of the last line of the quoted code, when its first segment starts at `start` and the
+    next segments follow in order, or None.
+    """
+    position = start
+    for k, segment in enumerate(segments):
+        if k > 0:
+            # an elided part: the segment starts at its first occurrence after the previous one
+            position = next((i for i in range(position, len(lines) - len(segment) + 1)
+                             if [line for _, line in lines[i:i + len(segment)]] == segment), None)
+            if position is None:
+                return None
+        elif [line for _, line in lines[position:position + len(segment)]] != segment:
+            return None
+        position += len(segment)
+    return position - 1
+
+
+def _find_code(hunk: DiffHunk, segments: List[List[str]]) -> List[Tuple[int, int]]:
+    """
+    The (first, last) indices in the '__new hunk__' lines of each occurrence of the code quoted by a suggestion. When
+    the whole quote is not found, its longest line is looked for instead: the whole hunk is returned when that line is
+    not unique.
+    """
+    if not segments:
+        return []
+    # the non-empty lines of the hunk, with their index
+    lines = [(i, line[1:].strip()) for i, (_, line) in enumerate(hunk.new_lines) if line[1:].strip()]
+    windows = []
+    for start in range(len(lines)):
+        end = _match_segments(lines, segments, start)
+        if end is not None:
+            windows.append((lines[start][0], lines[end][0]))
+    if windows:
+        return windows
+
+    anchor = max((line for segment in segments for line in segment), key=len)
+    anchors = [i for i, line in lines if line == anchor]
+    if len(anchors) > 1:
+        return [(0, len(hunk.new_lines) - 1)]
+    return [(anchors[0], anchors[0])] if anchors else []
+
+
+def _lines_window(hunk: DiffHunk, start_line: int, end_line: int) -> Optional[Tuple[int, int]]:
+    indices = [i for i, (number, _) in enumerate(hunk.new_lines) if start_line <= number <= end_line]
+    return (indices[0], indices[-1]) if indices else None
+
+
+def _suggestion_windows(section: DiffFileSection, suggestion: dict) -> Dict[int, List[Tuple[int, int]]]:
+    """The windows of '__new hunk__' line indices, per hunk index, that a suggestion refers to."""
+    windows: Dict[int, List[Tuple[int, int]]] = {}
+    start_line, end_line = suggestion.get("relevant_lines_start"), suggestion.get("relevant_lines_end")
+    has_lines = isinstance(start_line, int) and isinstance(end_line, int) and 0 < start_line <= end_line
+    segments = _code_segments(suggestion.get("existing_code", ""))
+    for index, hunk in enumerate(section.hunks):
+        if has_lines:
+            window = _lines_window(hunk, start_line, end_line)
+            hunk_windows = [window] if window else []
+        else:
+            hunk_windows = _find_code(hunk, segments)
+        if hunk_windows:
+            windows.setdefault(index, []).extend(hunk_windows)
+    return windows
+
+
+def _merge_windows(windows: List[Tuple[int, int]], margin: int, num_lines: int) -> List[Tuple[int, int]]:
+    merged = []
+    for start, end in sorted(windows):
+        start, end = max(start - margin, 0), min(end + margin, num_lines - 1)
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _render_hunk(hunk: DiffHunk, windows: Optional[List[Tuple[int, int]]], margin: int) -> List[str]:
+    lines = [hunk.header] if hunk.header else []
+    if hunk.new_lines:
+        lines.append(NEW_HUNK)
+        if windows is None:
+            kept = [(0, len(hunk.new_lines) - 1)]
+        else:
+            kept = _merge_windows(windows, margin, len(hunk.new_lines))
+        for i, (start, end) in enumerate(kept):
+            if i > 0 or start > 0:
+                lines.append("...")
+            lines.extend(f"{number} {line}" for number, line in hunk.new_lines[start:end + 1])
+        if kept[-1][1] < len(hunk.new_lines) - 1:
+            lines.append("...")
+    if hunk.old_lines:
+        lines.append(OLD_HUNK)
+        lines.extend(hunk.old_lines)
+    return lines
+
+
+def build_reflection_context(patches_diff: str, suggestions: List[dict], margin: int = 3) -> str:
+    """
+    Returns the part of a chunk diff that the suggestions refer to: the hunks that contain the code of each
+    suggestion, with `margin` lines around that code. All the hunks of a file are kept when the code of a suggestion
+    on it is not found, and the whole diff when a suggestion's file is not in it, or the diff cannot be parsed.
+    """
+    sections = parse_decoupled_diff(patches_diff or "")
+    if not sections or not suggestions:
+        return patches_diff
+    sections_by_name = {section.filename: section for section in sections}
+
+    selected: Dict[str, Optional[Dict[int, List[Tuple[int, int]]]]] = {}  # None: all the hunks of the file
+    for suggestion in suggestions:
+        filename = str(suggestion.get("relevant_file", "")).strip().strip("'\"`")
+        section = sections_by_name.get(filename)
+        if section is None:
+            return patches_diff
+        windows = _suggestion_windows(section, suggestion)
+        if not windows:
+            selected[filename] = None
+        elif filename not in selected or selected[filename] is not None:
+            file_windows = selected.setdefault(filename, {})
+            for index, hunk_windows in windows.items():
+                file_windows.setdefault(index, []).extend(hunk_windows)
+
+    output: List[str] = []
+    for section in sections:
+        if section.filename not in selected:
+            continue
+        file_windows = selected[section.filename]
+        preamble = list(section.preamble)
+        while preamble and not preamble[-1].strip():
+            preamble.pop()
+        output.extend(["", ""] + preamble)
+        included: Set[int] = set(range(len(section.hunks))) if file_windows is None else set(file_windows)
+        for index, hunk in enumerate(section.hunks):
+            if index in included:
+                windows = None if file_windows is None else file_windows[index]
+                output.append("")
+                output.extend(_render_hunk(hunk, windows, margin))
+    return "\n".join(output).strip()
@@ -0,0 +1,204 @@
+"""
+Offline estimation of a model's token count from the local tokenizer count (tiktoken).
+
+Each model family tokenizes differently. The ratio between the true token count of a prompt (the prompt tokens
+reported by the model's API) and its local count is calibrated per family from (local count, true count) pairs,
+recorded after the LLM calls of the tools, which count their rendered prompt locally. An estimate is the local count
+times the upper confidence bound of that ratio, so a prompt estimated within a budget is unlikely to exceed it. Until
+a family has enough samples, the ratio is 1 + config.model_token_count_estimate_factor.
+"""
+
+import atexit
+import json
+import math
+import os
+import re
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+
+CALIBRATION_FORMAT_VERSION = 1
+# prompts shorter than this are dominated by the per-message overhead of the APIs, and would skew the ratio
+MIN_SAMPLE_TOKENS = 200
+# OpenAI models use the local tokenizer itself
+EXACT_FAMILIES = ("openai",)
+
+_FAMILY_PATTERNS = [
+    ("anthropic", re.compile(r"claude|anthropic")),
+    ("gemini", re.compile(r"gemini|gemma")),
+    ("mistral", re.compile(r"mistral|codestral|mixtral")),
+    ("deepseek", re.compile(r"deepseek")),
+    ("qwen", re.compile(r"qwen")),
+    ("llama", re.compile(r"llama")),
+    ("openai", re.compile(r"gpt|(^|/)o[1-9]\b")),
+]
+
+
+def get_model_family(model: str) -> str:
+    model = (model or "").lower()
+    for family, pattern in _FAMILY_PATTERNS:
+        if pattern.search(model):
+            return family
+    return "other"
+
+
+class RatioCalibration:
+    """
+    Running mean and variance (Welford) of the true / local token count ratio of a model family.
+    """
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, ratio: float):
+        self.count += 1
+        delta = ratio - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (ratio - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RatioCalibration":
+        return cls(int(data["count"]), float(data["mean"]), float(data["m2"]))
+
+
+class TokenCountEstimator:
+    """
+    Estimates the token count of a model from the local tokenizer count, with per model family calibrations.
+    Calibrations are kept in a JSON file when `path` is set, so they survive restarts. The file is written every
+    `save_every` samples, and by flush().
+    """
+
+    def __init__(self, path: Optional[str] = None, min_samples: int = 20, confidence_z: float = 2.0,
+                 default_factor: Optional[float] = None, save_every: int = 10):
+        self.path = path
+        self.min_samples = min_samples
+        self.confidence_z = confidence_z
+        self.default_factor = default_factor  # None: config.model_token_count_estimate_factor
+        self.save_every = max(1, save_every)
+        self.calibrations: Dict[str, RatioCalibration] = {}
+        self._unsaved_samples = 0
+        self._lock = Lock()
+        if path:
+            self._load()
+
+    def record(self, model: str, local_tokens: Optional[int], true_tokens: Optional[int]):
+        if not local_tokens or not true_tokens or local_tokens < MIN_SAMPLE_TOKENS:
+            return
+        family = get_model_family(model)
+        if family in EXACT_FAMILIES:
+            return
+        with self._lock:
+            self.calibrations.setdefault(family, RatioCalibration()).add(true_tokens / local_tokens)
+            self._unsaved_samples += 1
+            save = self.path and self._unsaved_samples >= self.save_every
+        if save:
+            self._save()
+
+    def flush(self):
+        """Writes the samples recorded since the last save to the calibration file."""
+        if self.path and self._unsaved_samples:
+            self._save()
+
+    def ratio_bounds(self, model: str) -> Tuple[float, float, float]:
+        """
+        The (lower, expected, upper) ratio between the model's token count and the local one.
+        """
+        family = get_model_family(model)
+        if family in EXACT_FAMILIES:
+            return 1.0, 1.0, 1.0
+        calibration = self.calibrations.get(family)
+        if calibration is None or calibration.count < self.min_samples:
+            default_factor = self.default_factor
+            if default_factor is None:
+                default_factor = get_settings().get("config.model_token_count_estimate_factor", 0)
+            factor = 1 + default_factor
+            return 1.0, factor, factor
+        margin = self.confidence_z * calibration.std
+        return max(calibration.mean - margin, 0.0), calibration.mean, calibration.mean + margin
+
+    def estimate(self, model: str, local_tokens: int) -> int:
+        """The upper bound of the model's token count."""
+        return math.ceil(local_tokens * self.ratio_bounds(model)[2])
+
+    def is_calibrated(self, model: str) -> bool:
+        family = get_model_family(model)
+        calibration = self.calibrations.get(family)
+        return family in EXACT_FAMILIES or (calibration is not None and calibration.count >= self.min_samples)
+
+    def fit(self, samples: Iterable[Tuple[str, int, int]]):
+        """Calibrates from logged (model, local tokens, true tokens) samples."""
+        for model, local_tokens, true_tokens in samples:
+            self.record(model, local_tokens, true_tokens)
+        self.flush()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") != CALIBRATION_FORMAT_VERSION:
+                get_logger().warning(f"Ignoring token count calibration {self.path}: unknown format version")
+                return
+            self.calibrations = {family: RatioCalibration.from_dict(calibration)
+                                 for family, calibration in data.get("families", {}).items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            get_logger().warning(f"Failed to load token count calibration {self.path}: {e}")
+
+    def _save(self):
+        with self._lock:
+            data = {"version": CALIBRATION_FORMAT_VERSION,
+                    "families": {family: calibration.to_dict() for family, calibration in self.calibrations.items()}}
+            self._unsaved_samples = 0
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            get_logger().warning(f"Failed to save token count calibration {self.path}: {e}")
+
+
+_estimator: Optional[TokenCountEstimator] = None
+_estimator_lock = Lock()
+
+
+def get_token_count_estimator() -> TokenCountEstimator:
+    global _estimator
+    if _estimator is None:
+        with _estimator_lock:
+            if _estimator is None:
+                settings = get_settings(use_context=False)
+                _estimator = TokenCountEstimator(
+                    path=settings.get("token_count_calibration.path", "") or None,
+                    min_samples=settings.get("token_count_calibration.min_samples", 20),
+                    confidence_z=settings.get("token_count_calibration.confidence_z", 2.0),
+                    save_every=settings.get("token_count_calibration.save_every", 10))
+                if _estimator.path:
+                    atexit.register(_estimator.flush)
+    return _estimator
+
+
+def record_token_count_sample(model: str, local_tokens: Optional[int], prompt_tokens: Optional[int]):
+    """
+    Records the true prompt token count of an LLM call, with the local count of the same prompt, as already computed
+    by the caller (the prompt is not encoded again here).
+    """
+    if not local_tokens or not prompt_tokens or not get_settings().get("token_count_calibration.enabled", True):
+        return
+    try:
+        get_token_count_estimator().record(model, local_tokens, prompt_tokens)
+    except Exception as e:
+        get_logger().debug(f"Failed to record token count sample: {e}")
@@ -1,10 +1,12 @@
 from threading import Lock
-from math import ceil
+from typing import Optional
 import re
 
 from jinja2 import Environment, StrictUndefined
 from tiktoken import encoding_for_model, get_encoding
 
+from pr_agent.algo.token_estimator import (EXACT_FAMILIES, get_model_family,
+                                           get_token_count_estimator)
 from pr_agent.config_loader import get_settings
 from pr_agent.log import get_logger
 
@@ -52,10 +54,6 @@ class TokenHandler:
       method.
     """
 
-    # Constants
-    CLAUDE_MODEL = "claude-3-7-sonnet-20250219"
-    CLAUDE_MAX_CONTENT_SIZE = 9_000_000 # Maximum allowed content size (9MB) for Claude API
-
     def __init__(self, pr=None, vars: dict = {}, system="", user=""):
         """
         Initializes the TokenHandler object.
@@ -96,40 +94,6 @@ class TokenHandler:
             get_logger().error(f"Error in _get_system_user_tokens: {e}")
             return 0
 
-    def _calc_claude_tokens(self, patch: str) -> int:
-        try:
-            import anthropic
-            from pr_agent.algo import MAX_TOKENS
-            
-            client = anthropic.Anthropic(api_key=get_settings(use_context=False).get('anthropic.key'))
-            max_tokens = MAX_TOKENS[get_settings().config.model]
-
-            if len(patch.encode('utf-8')) > self.CLAUDE_MAX_CONTENT_SIZE:
-                get_logger().warning(
-                    "Content too large for Anthropic token counting API, falling back to local tokenizer"
-                )
-                return max_tokens
-
-            response = client.messages.count_tokens(
-                model=self.CLAUDE_MODEL,
-                system="system",
-                messages=[{
-                    "role": "user",
-                    "content": patch
-                }],
-            )
-            return response.input_tokens
-
-        except Exception as e:
-            get_logger().error(f"Error in Anthropic token counting: {e}")
-            return max_tokens
-
-    def _apply_estimation_factor(self, model_name: str, default_estimate: int) -> int:
-        factor = 1 + get_settings().get('config.model_token_count_estimate_factor', 0)
-        get_logger().warning(f"{model_name}'s token count cannot be accurately estimated. Using factor of {factor}")
-        
-        return ceil(factor * default_estimate)
-
     def _get_token_count_by_model_type(self, patch: str, default_estimate: int) -> int:
         """
         Get token count based on model type.
@@ -146,10 +110,11 @@ class TokenHandler:
         if ModelTypeValidator.is_openai_model(model_name) and get_settings(use_context=False).get('openai.key'):
             return default_estimate
 
-        if ModelTypeValidator.is_anthropic_model(model_name) and get_settings(use_context=False).get('anthropic.key'):
-            return self._calc_claude_tokens(patch)
-        
-        return self._apply_estimation_factor(model_name, default_estimate)
+        # offline: the local count, scaled by the calibrated ratio of the model family (upper confidence bound)
+        estimator = get_token_count_estimator()
+        if not estimator.is_calibrated(model_name):
+            get_logger().debug(f"{model_name}'s token count is not calibrated yet, using the default estimation factor")
+        return estimator.estimate(model_name, default_estimate)
     
     def count_tokens(self, patch: str, force_accurate: bool = False) -> int:
         """
@@ -169,3 +134,17 @@ class TokenHandler:
             return encoder_estimate
 
         return self._get_token_count_by_model_type(patch, encoder_estimate)
+
+    def count_prompt_tokens(self, system: str, user: str, model: str) -> Optional[int]:
+        """
+        Counts the local tokens of the rendered system and user messages of an LLM call, passed to chat_completion
+        as local_prompt_tokens to calibrate the token count estimates of the model's family.
+
+        Returns:
+        The number of tokens, or None when the call cannot calibrate anything (calibration disabled, or a model using
+        the local tokenizer itself), so the prompt is not encoded for nothing.
+        """
+        if not get_settings().get("token_count_calibration.enabled", True) or \
+                get_model_family(model) in EXACT_FAMILIES:
+            return None
+        return self.count_tokens(system or "") + self.count_tokens(user or "")
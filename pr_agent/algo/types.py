@@ -1,7 +1,9 @@
-from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
+from pr_agent.algo.file_content import (FileContent, LineRanges,
+                                        read_file_content, store_file_content)
+
 
 class EDIT_TYPE(Enum):
     ADDED = 1
@@ -11,16 +13,73 @@ class EDIT_TYPE(Enum):
     UNKNOWN = 5
 
 
-@dataclass
 class FilePatchInfo:
-    base_file: str
-    head_file: str
-    patch: str
-    filename: str
-    tokens: int = -1
-    edit_type: EDIT_TYPE = EDIT_TYPE.UNKNOWN
-    old_filename: str = None
-    num_plus_lines: int = -1
-    num_minus_lines: int = -1
-    language: Optional[str] = None
-    ai_file_summary: str = None
+    """
+    A changed file of a PR. `base_file` and `head_file` are read as strings, but stored as FileContent handles: a
+    provider can pass a LazyFileContent, fetched on first access, and strings are stored within the request's memory
+    budget (see pr_agent/algo/file_content.py).
+    """
+
+    __slots__ = ("_base_file", "_head_file", "patch", "filename", "tokens", "edit_type", "old_filename",
+                 "num_plus_lines", "num_minus_lines", "language", "ai_file_summary", "patches_range")
+
+    def __init__(self, base_file, head_file, patch: str, filename: str, tokens: int = -1,
+                 edit_type: EDIT_TYPE = EDIT_TYPE.UNKNOWN, old_filename: str = None, num_plus_lines: int = -1,
+                 num_minus_lines: int = -1, language: Optional[str] = None, ai_file_summary: str = None):
+        self.base_file = base_file
+        self.head_file = head_file
+        self.patch = patch
+        self.filename = filename
+        self.tokens = tokens
+        self.edit_type = edit_type
+        self.old_filename = old_filename
+        self.num_plus_lines = num_plus_lines
+        self.num_minus_lines = num_minus_lines
+        self.language = language
+        self.ai_file_summary = ai_file_summary
+
+    @property
+    def base_file(self) -> str:
+        return read_file_content(self._base_file)
+
+    @base_file.setter
+    def base_file(self, value):
+        self._base_file = store_file_content(value)
+
+    @property
+    def head_file(self) -> str:
+        return read_file_content(self._head_file)
+
+    @head_file.setter
+    def head_file(self, value):
+        self._head_file = store_file_content(value)
+
+    @property
+    def contents_loaded(self) -> bool:
+        """False while a lazy content was not fetched yet."""
+        return all(getattr(content, "is_loaded", True) for content in (self._base_file, self._head_file))
+
+    def get_line_ranges(self, ranges: LineRanges, head: bool = False):
+        """
+        The base (or head) content to read the given lines from: a SparseFileLines when the provider can load them
+        without the full file, otherwise the full content.
+        """
+        content = self._head_file if head else self._base_file
+        return content.get_line_ranges(ranges) if isinstance(content, FileContent) else content
+
+    def _fields(self) -> tuple:
+        return (self.base_file, self.head_file, self.patch, self.filename, self.tokens, self.edit_type,
+                self.old_filename, self.num_plus_lines, self.num_minus_lines, self.language, self.ai_file_summary)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self):
+        names = ("base_file", "head_file", "patch", "filename", "tokens", "edit_type", "old_filename",
+                 "num_plus_lines", "num_minus_lines", "language", "ai_file_summary")
+        fields = ", ".join(f"{name}={value!r}" for name, value in zip(names, self._fields(), strict=True))
+        return f"FilePatchInfo({fields})"
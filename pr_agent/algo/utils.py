@@ -24,6 +24,7 @@ from pydantic import BaseModel
 from starlette_context import context
 
 from pr_agent.algo import MAX_TOKENS
+from pr_agent.algo.diff_engine import AUTO_MYERS_MIN_LINES, unified_diff
 from pr_agent.algo.git_patch_processing import extract_hunk_lines_from_patch
 from pr_agent.algo.token_handler import TokenEncoder
 from pr_agent.algo.types import FilePatchInfo
@@ -692,11 +693,13 @@ def load_large_diff(filename, new_file_content_str: str, original_file_content_s
     try:
         original_file_content_str = (original_file_content_str or "").rstrip() + "\n"
         new_file_content_str = (new_file_content_str or "").rstrip() + "\n"
-        diff = difflib.unified_diff(original_file_content_str.splitlines(keepends=True),
-                                    new_file_content_str.splitlines(keepends=True))
+        patch = unified_diff(original_file_content_str.splitlines(keepends=True),
+                             new_file_content_str.splitlines(keepends=True),
+                             engine=get_settings().get("config.diff_engine", "auto"),
+                             auto_min_lines=get_settings().get("config.diff_engine_auto_min_lines",
+                                                               AUTO_MYERS_MIN_LINES))
         if get_settings().config.verbosity_level >= 2 and show_warning:
             get_logger().info(f"File was modified, but no patch was found. Manually creating patch: {filename}.")
-        patch = ''.join(diff)
         return patch
     except Exception as e:
         get_logger().exception(f"Failed to generate patch for file: {filename}")
@@ -14,32 +14,33 @@ dynconf_kwargs = {'core_loaders': [], # DISABLE default loaders, otherwise will
                            'root_path': join(current_dir, "settings"), #Used for Dynaconf.find_file() - So that root path points to settings folder, since we disabled all core loaders.
                            'merge_enabled': True  # In case more than one file is sent, merge them. Must be set to True, otherwise, a .toml file with section [XYZ] overwrites the entire section of a previous .toml file's [XYZ] and we want it to only overwrite the overlapping fields under such section
                            }
+SETTINGS_FILES = [join(current_dir, f) for f in [
+    "settings/configuration.toml",
+    "settings/ignore.toml",
+    "settings/generated_code_ignore.toml",
+    "settings/language_extensions.toml",
+    "settings/pr_reviewer_prompts.toml",
+    "settings/pr_questions_prompts.toml",
+    "settings/pr_line_questions_prompts.toml",
+    "settings/pr_description_prompts.toml",
+    "settings/code_suggestions/pr_code_suggestions_prompts.toml",
+    "settings/code_suggestions/pr_code_suggestions_prompts_not_decoupled.toml",
+    "settings/code_suggestions/pr_code_suggestions_reflect_prompts.toml",
+    "settings/pr_information_from_user_prompts.toml",
+    "settings/pr_update_changelog_prompts.toml",
+    "settings/pr_custom_labels.toml",
+    "settings/pr_add_docs.toml",
+    "settings/custom_labels.toml",
+    "settings/pr_help_prompts.toml",
+    "settings/pr_help_docs_prompts.toml",
+    "settings/pr_help_docs_headings_prompts.toml",
+    "settings/.secrets.toml",
+    "settings_prod/.secrets.toml",
+]]
 global_settings = Dynaconf(
     envvar_prefix=False,
     load_dotenv=False,  # Security: Don't load .env files
-    settings_files=[join(current_dir, f) for f in [
-        "settings/configuration.toml",
-        "settings/ignore.toml",
-        "settings/generated_code_ignore.toml",
-        "settings/language_extensions.toml",
-        "settings/pr_reviewer_prompts.toml",
-        "settings/pr_questions_prompts.toml",
-        "settings/pr_line_questions_prompts.toml",
-        "settings/pr_description_prompts.toml",
-        "settings/code_suggestions/pr_code_suggestions_prompts.toml",
-        "settings/code_suggestions/pr_code_suggestions_prompts_not_decoupled.toml",
-        "settings/code_suggestions/pr_code_suggestions_reflect_prompts.toml",
-        "settings/pr_information_from_user_prompts.toml",
-        "settings/pr_update_changelog_prompts.toml",
-        "settings/pr_custom_labels.toml",
-        "settings/pr_add_docs.toml",
-        "settings/custom_labels.toml",
-        "settings/pr_help_prompts.toml",
-        "settings/pr_help_docs_prompts.toml",
-        "settings/pr_help_docs_headings_prompts.toml",
-        "settings/.secrets.toml",
-        "settings_prod/.secrets.toml",
-    ]],
+    settings_files=SETTINGS_FILES,
     **dynconf_kwargs
 )
 
@@ -4,6 +4,7 @@ import tomllib #tomllib should be used instead of Py toml for Python 3.11+
 from jinja2.exceptions import SecurityError
 
 from pr_agent.log import get_logger
+from pr_agent.settings_snapshot import get_snapshot_data, load_snapshot
 
 def load(obj, env=None, silent=True, key=None, filename=None):
     """
@@ -12,6 +13,8 @@ def load(obj, env=None, silent=True, key=None, filename=None):
     - Replaces list and dict fields instead of appending/updating (non-default Dynaconf behavior).
     - Enforces several security checks (e.g., disallows includes/preloads and enforces .toml files).
     - Supports optional single-key loading.
+    - Takes the parsed content of unchanged packaged settings files from the precompiled snapshot, if one was built
+      (see pr_agent/settings_snapshot.py).
     Args:
         obj: The Dynaconf settings instance to update.
         env: The current environment name (upper case). Defaults to 'DEVELOPMENT'. Note: currently unused.
@@ -36,6 +39,7 @@ def load(obj, env=None, silent=True, key=None, filename=None):
 
     # Storage for all loaded data
     accumulated_data = {}
+    snapshot = load_snapshot()
 
     # Security: Check for forbidden configuration options
     if hasattr(obj, 'includes') and obj.includes:
@@ -67,15 +71,20 @@ def load(obj, env=None, silent=True, key=None, filename=None):
                 continue
 
             with open(file_path, 'rb') as f:
-                file_data = tomllib.load(f)
+                content = f.read()
 
-            # Handle sections (like [config], [default], etc.)
-            if not isinstance(file_data, dict):
-                get_logger().warning(f"TOML root is not a table in '{settings_file}'. Skipping.")
-                continue
+            # The snapshot holds files that were already parsed and validated with the same content
+            file_data = get_snapshot_data(snapshot, settings_file, content) if snapshot else None
+            if file_data is None:
+                file_data = tomllib.loads(content.decode('utf-8'))
+
+                # Handle sections (like [config], [default], etc.)
+                if not isinstance(file_data, dict):
+                    get_logger().warning(f"TOML root is not a table in '{settings_file}'. Skipping.")
+                    continue
 
-            # Security: Check file contents for forbidden directives
-            validate_file_security(file_data, settings_file)
+                # Security: Check file contents for forbidden directives
+                validate_file_security(file_data, settings_file)
 
             for section_name, section_data in file_data.items():
                 if not isinstance(section_data, dict):
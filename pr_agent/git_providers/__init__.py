@@ -1,32 +1,43 @@
 from starlette_context import context
 
+from pr_agent.algo.lazy_registry import LazyRegistry
 from pr_agent.config_loader import get_settings
-from pr_agent.git_providers.azuredevops_provider import AzureDevopsProvider
-from pr_agent.git_providers.bitbucket_provider import BitbucketProvider
-from pr_agent.git_providers.bitbucket_server_provider import \
-    BitbucketServerProvider
-from pr_agent.git_providers.codecommit_provider import CodeCommitProvider
-from pr_agent.git_providers.gerrit_provider import GerritProvider
 from pr_agent.git_providers.git_provider import GitProvider
-from pr_agent.git_providers.gitea_provider import GiteaProvider
-from pr_agent.git_providers.github_provider import GithubProvider
-from pr_agent.git_providers.gitlab_provider import GitLabProvider
-from pr_agent.git_providers.local_git_provider import LocalGitProvider
-from pr_agent.git_providers.gitea_provider import GiteaProvider
 
-_GIT_PROVIDERS = {
-    'github': GithubProvider,
-    'gitlab': GitLabProvider,
-    'bitbucket': BitbucketProvider,
-    'bitbucket_server': BitbucketServerProvider,
-    'azure': AzureDevopsProvider,
-    'codecommit': CodeCommitProvider,
-    'local': LocalGitProvider,
-    'gerrit': GerritProvider,
-    'gitea': GiteaProvider
+# each provider module pulls in its SDK (PyGithub, python-gitlab, atlassian, azure-devops, boto3, ...), so only the
+# configured provider is imported
+_GIT_PROVIDERS = LazyRegistry({
+    'github': 'pr_agent.git_providers.github_provider:GithubProvider',
+    'gitlab': 'pr_agent.git_providers.gitlab_provider:GitLabProvider',
+    'bitbucket': 'pr_agent.git_providers.bitbucket_provider:BitbucketProvider',
+    'bitbucket_server': 'pr_agent.git_providers.bitbucket_server_provider:BitbucketServerProvider',
+    'azure': 'pr_agent.git_providers.azuredevops_provider:AzureDevopsProvider',
+    'codecommit': 'pr_agent.git_providers.codecommit_provider:CodeCommitProvider',
+    'local': 'pr_agent.git_providers.local_git_provider:LocalGitProvider',
+    'gerrit': 'pr_agent.git_providers.gerrit_provider:GerritProvider',
+    'gitea': 'pr_agent.git_providers.gitea_provider:GiteaProvider'
+})
+
+_PROVIDER_CLASSES = {
+    'AzureDevopsProvider': 'azure',
+    'BitbucketProvider': 'bitbucket',
+    'BitbucketServerProvider': 'bitbucket_server',
+    'CodeCommitProvider': 'codecommit',
+    'GerritProvider': 'gerrit',
+    'GiteaProvider': 'gitea',
+    'GithubProvider': 'github',
+    'GitLabProvider': 'gitlab',
+    'LocalGitProvider': 'local',
 }
 
 
+def __getattr__(name):
+    # keeps `from pr_agent.git_providers import GithubProvider` working, importing only the requested provider
+    if name in _PROVIDER_CLASSES:
+        return _GIT_PROVIDERS[_PROVIDER_CLASSES[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_git_provider():
     try:
         provider_id = get_settings().config.git_provider
@@ -0,0 +1,97 @@
+"""
+Non-blocking calls to the git providers from the async tools.
+
+The providers are synchronous (PyGithub, python-gitlab, requests, ...): a call made directly from a coroutine blocks the
+event loop, and every other PR handled by the same worker with it. AsyncGitProvider wraps a provider so that
+`await provider.method(...)` runs the method on a dedicated thread pool, shared by all the requests of the process, of
+config.git_provider_io_workers threads. Each call runs in a copy of the caller's context, so the request's settings and
+log context are kept.
+
+Providers are stateful (cached diff files, temporary comments, ...) and not thread-safe: the calls made through
+AsyncGitProvider on the same provider object hold a per-provider lock, so they run one at a time, whichever facade or
+task they come from. Within such a call, the per-file stage of the diff preparation (see file_pool) may still load file
+contents from several threads, through the provider's API client. The clients must allow it: PyGithub's connection
+objects keep their pending request per thread (see http_session.install_github_connection_pool).
+"""
+
+import asyncio
+import contextvars
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, RLock
+from typing import Any, Callable, Optional, TypeVar
+
+from pr_agent.config_loader import get_settings
+from pr_agent.git_providers.git_provider import GitProvider
+
+R = TypeVar("R")
+
+DEFAULT_IO_WORKERS = 32
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+_provider_locks: "weakref.WeakKeyDictionary[GitProvider, RLock]" = weakref.WeakKeyDictionary()
+_provider_locks_lock = Lock()
+
+
+def get_provider_executor() -> ThreadPoolExecutor:
+    """The thread pool of the provider calls, created on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                max_workers = max(1, int(get_settings().get("config.git_provider_io_workers", DEFAULT_IO_WORKERS)))
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="git_provider")
+    return _executor
+
+
+async def run_provider_io(func: Callable[..., R], *args, **kwargs) -> R:
+    """
+    Runs a blocking function (a provider method, or a helper calling the provider such as get_pr_diff) on the provider
+    thread pool, and returns its result.
+    """
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_provider_executor(), call)
+
+
+def get_provider_lock(provider: GitProvider) -> RLock:
+    """The lock of the calls made on a provider object through AsyncGitProvider."""
+    with _provider_locks_lock:
+        lock = _provider_locks.get(provider)
+        if lock is None:
+            lock = _provider_locks[provider] = RLock()
+        return lock
+
+
+def _call_locked(lock: RLock, func: Callable[..., R], *args, **kwargs) -> R:
+    with lock:
+        return func(*args, **kwargs)
+
+
+class AsyncGitProvider:
+    """
+    Async facade over a GitProvider: its methods are coroutine functions, running the provider's method on the
+    provider thread pool, under the provider's lock. Other attributes are read from the provider as they are.
+    """
+
+    def __init__(self, provider: GitProvider):
+        self.provider = provider
+
+    async def run(self, func: Callable[..., R], *args, **kwargs) -> R:
+        """
+        Runs a blocking function that uses the provider (e.g. get_pr_diff) on the provider thread pool, under the
+        provider's lock.
+        """
+        return await run_provider_io(_call_locked, get_provider_lock(self.provider), func, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.provider, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            return await self.run(attribute, *args, **kwargs)
+
+        return call
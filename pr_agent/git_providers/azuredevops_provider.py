@@ -7,6 +7,7 @@ from urllib.parse import urlparse
 from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
 
 from ..algo.file_filter import filter_ignored
+from ..algo.git_diff_parser import count_patch_lines
 from ..algo.language_handler import is_valid_file
 from ..algo.utils import (PRDescriptionHeader, clip_tokens,
                           find_line_number_of_relevant_line_in_file,
@@ -326,9 +327,7 @@ class AzureDevopsProvider(GitProvider):
                 ).rstrip()
 
                 # count number of lines added and removed
-                patch_lines = patch.splitlines(keepends=True)
-                num_plus_lines = len([line for line in patch_lines if line.startswith('+')])
-                num_minus_lines = len([line for line in patch_lines if line.startswith('-')])
+                num_plus_lines, num_minus_lines = count_patch_lines(patch)
 
                 diff_files.append(
                     FilePatchInfo(
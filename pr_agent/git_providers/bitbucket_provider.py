@@ -1,21 +1,23 @@
 import difflib
 import json
 import re
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 from urllib.parse import urlparse
 
-import requests
 from atlassian.bitbucket import Cloud
 from starlette_context import context
 
-from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+from pr_agent.algo.types import FilePatchInfo
 
+from ..algo.file_content import STREAM_CHUNK_SIZE
 from ..algo.file_filter import filter_ignored
+from ..algo.git_diff_parser import FileDiff, parse_git_diff
 from ..algo.language_handler import is_valid_file
 from ..algo.utils import find_line_number_of_relevant_line_in_file
 from ..config_loader import get_settings
 from ..log import get_logger
 from .git_provider import MAX_FILES_ALLOWED_FULL, GitProvider
+from .http_session import get_pooled_session, get_shared_session
 
 
 def _gef_filename(diff):
@@ -28,7 +30,7 @@ class BitbucketProvider(GitProvider):
     def __init__(
         self, pr_url: Optional[str] = None, incremental: Optional[bool] = False
     ):
-        s = requests.Session()
+        s = get_pooled_session()
         s.headers["Content-Type"] = "application/json"
 
         self.auth_type = get_settings().get("BITBUCKET.AUTH_TYPE", "bearer")
@@ -81,7 +83,7 @@ class BitbucketProvider(GitProvider):
         try:
             url = (f"https://api.bitbucket.org/2.0/repositories/{self.workspace_slug}/{self.repo_slug}/src/"
                    f"{self.pr.destination_branch}/.pr_agent.toml")
-            response = requests.request("GET", url, headers=self.headers)
+            response = get_shared_session().request("GET", url, headers=self.headers)
             if response.status_code == 404:  # not found
                 return ""
             contents = response.text.encode('utf-8')
@@ -231,58 +233,25 @@ class BitbucketProvider(GitProvider):
             except Exception as e:
                 pass
 
-        # get the pr patches
-        try:
-            pr_patches = self.pr.diff()
-        except Exception as e:
-            # Try different encodings if UTF-8 fails
-            get_logger().warning(f"Failed to decode PR patch with utf-8, error: {e}")
-            encodings_to_try = ['iso-8859-1', 'latin-1', 'ascii', 'utf-16']
-            pr_patches = None
-            for encoding in encodings_to_try:
-                try:
-                    pr_patches = self.pr.diff(encoding=encoding)
-                    get_logger().info(f"Successfully decoded PR patch with encoding {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    continue
-
-            if pr_patches is None:
-                raise ValueError(f"Failed to decode PR patch with encodings {encodings_to_try}")
-
-        diff_split = ["diff --git" + x for x in pr_patches.split("diff --git") if x.strip()]
-        # filter all elements of 'diff_split' that are of indices in 'diffs_original' that are not in 'diffs'
-        if len(diff_split) > len(diffs) and len(diffs_original) == len(diff_split):
-            diff_split = [diff_split[i] for i in range(len(diff_split)) if diffs_original[i] in diffs]
-        if len(diff_split) != len(diffs):
+        # get the pr patches, streamed and split per file
+        filtered_indices = set()
+        if len(diffs) != len(diffs_original):
+            filtered_indices = {i for i, diff in enumerate(diffs_original) if diff not in diffs}
+        file_diffs = []
+        num_file_diffs = 0
+        for i, file_diff in enumerate(self._iter_pr_file_diffs()):
+            num_file_diffs += 1
+            if i not in filtered_indices:
+                file_diffs.append(file_diff)
+        # the diff has the ignored files too, when some were filtered out
+        if num_file_diffs != (len(diffs_original) if filtered_indices else len(diffs)):
             get_logger().error(f"Error - failed to split the diff into {len(diffs)} parts")
             return []
-        # bitbucket diff has a header for each file, we need to remove it:
-        # "diff --git filename
-        # new file mode 100644 (optional)
-        #  index caa56f0..61528d7 100644
-        #   --- a/pr_agent/cli_pip.py
-        #  +++ b/pr_agent/cli_pip.py
-        #   @@ -... @@"
-        for i, _ in enumerate(diff_split):
-            diff_split_lines = diff_split[i].splitlines()
-            if (len(diff_split_lines) >= 6) and \
-                    ((diff_split_lines[2].startswith("---") and
-                      diff_split_lines[3].startswith("+++") and
-                      diff_split_lines[4].startswith("@@")) or
-                     (diff_split_lines[3].startswith("---") and  # new or deleted file
-                      diff_split_lines[4].startswith("+++") and
-                      diff_split_lines[5].startswith("@@"))):
-                diff_split[i] = "\n".join(diff_split_lines[4:])
-            else:
+        for i, file_diff in enumerate(file_diffs):
+            if not file_diff.patch:
                 if diffs[i].data.get('lines_added', 0) == 0 and diffs[i].data.get('lines_removed', 0) == 0:
-                    diff_split[i] = ""
-                elif len(diff_split_lines) <= 3:
-                    diff_split[i] = ""
-                    get_logger().info(f"Disregarding empty diff for file {_gef_filename(diffs[i])}")
-                else:
-                    get_logger().warning(f"Bitbucket failed to get diff for file {_gef_filename(diffs[i])}")
-                    diff_split[i] = ""
+                    continue
+                get_logger().info(f"Disregarding diff without hunks for file {_gef_filename(diffs[i])}")
 
         invalid_files_names = []
         diff_files = []
@@ -320,21 +289,9 @@ class BitbucketProvider(GitProvider):
                 original_file_content_str = ""
                 new_file_content_str = ""
 
-            file_patch_canonic_structure = FilePatchInfo(
-                original_file_content_str,
-                new_file_content_str,
-                diff_split[index],
-                file_path,
-            )
-
-            if diff.data['status'] == 'added':
-                file_patch_canonic_structure.edit_type = EDIT_TYPE.ADDED
-            elif diff.data['status'] == 'removed':
-                file_patch_canonic_structure.edit_type = EDIT_TYPE.DELETED
-            elif diff.data['status'] == 'modified':
-                file_patch_canonic_structure.edit_type = EDIT_TYPE.MODIFIED
-            elif diff.data['status'] == 'renamed':
-                file_patch_canonic_structure.edit_type = EDIT_TYPE.RENAMED
+            file_patch_canonic_structure = file_diffs[index].to_file_patch_info(original_file_content_str,
+                                                                                new_file_content_str)
+            file_patch_canonic_structure.filename = file_path
             diff_files.append(file_patch_canonic_structure)
 
         if invalid_files_names:
@@ -343,6 +300,17 @@ class BitbucketProvider(GitProvider):
         self.diff_files = diff_files
         return diff_files
 
+    def _iter_pr_file_diffs(self) -> Iterator[FileDiff]:
+        """
+        The parsed diff of each file of the PR, in the order of the diffstat. The diff is streamed, so only the diff
+        of one file is held in memory at a time.
+        """
+        response = get_shared_session().get(f"{self.bitbucket_pull_request_api_url}/diff", headers=self.headers,
+                                            stream=True)
+        with response:
+            response.raise_for_status()
+            yield from parse_git_diff(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
+
     def get_latest_commit_url(self):
         return self.pr.data['source']['commit']['links']['html']['href']
 
@@ -435,7 +403,7 @@ class BitbucketProvider(GitProvider):
                 "path": file
             },
         })
-        response = requests.request(
+        response = get_shared_session().request(
             "POST", self.bitbucket_comment_api_url, data=payload, headers=self.headers
         )
         return response
@@ -494,7 +462,7 @@ class BitbucketProvider(GitProvider):
     def get_repo_default_branch(self):
         try:
             url_repo = f"https://api.bitbucket.org/2.0/repositories/{self.workspace_slug}/{self.repo_slug}/"
-            response_repo = requests.request("GET", url_repo, headers=self.headers).json()
+            response_repo = get_shared_session().request("GET", url_repo, headers=self.headers).json()
             return response_repo['mainbranch']['name']
         except:
             return self.pr.destination_branch
@@ -560,7 +528,7 @@ class BitbucketProvider(GitProvider):
                 branch = self.pr.data["destination"]["commit"]["hash"]
             url = (f"https://api.bitbucket.org/2.0/repositories/{self.workspace_slug}/{self.repo_slug}/src/"
                    f"{branch}/{file_path}")
-            response = requests.request("GET", url, headers=self.headers)
+            response = get_shared_session().request("GET", url, headers=self.headers)
             if response.status_code == 404:  # not found
                 return ""
             contents = response.text
@@ -582,13 +550,13 @@ class BitbucketProvider(GitProvider):
         }
         headers = {'Authorization': self.headers['Authorization']} if 'Authorization' in self.headers else {}
         try:
-            requests.request("POST", url, headers=headers, data=data, files=files)
+            get_shared_session().request("POST", url, headers=headers, data=data, files=files)
         except Exception:
             get_logger().exception(f"Failed to create empty file {file_path} in branch {branch}")
 
     def _get_pr_file_content(self, remote_link: str):
         try:
-            response = requests.request("GET", remote_link, headers=self.headers)
+            response = get_shared_session().request("GET", remote_link, headers=self.headers)
             if response.status_code == 404:  # not found
                 return ""
             contents = response.text
@@ -607,7 +575,7 @@ class BitbucketProvider(GitProvider):
 
         })
 
-        response = requests.request("PUT", self.bitbucket_pull_request_api_url, headers=self.headers, data=payload)
+        response = get_shared_session().request("PUT", self.bitbucket_pull_request_api_url, headers=self.headers, data=payload)
         try:
             if response.status_code != 200:
                 get_logger().info(f"Failed to update description, error code: {response.status_code}")
@@ -11,6 +11,7 @@ import shlex
 import subprocess
 
 from ..algo.file_filter import filter_ignored
+from ..algo.git_diff_parser import count_patch_lines
 from ..algo.git_patch_processing import decode_if_bytes
 from ..algo.language_handler import is_valid_file
 from ..algo.types import EDIT_TYPE, FilePatchInfo
@@ -19,6 +20,7 @@ from ..algo.utils import (find_line_number_of_relevant_line_in_file,
 from ..config_loader import get_settings
 from ..log import get_logger
 from .git_provider import GitProvider, get_git_ssl_env
+from .http_session import get_pooled_session
 
 
 class BitbucketServerProvider(GitProvider):
@@ -52,13 +54,15 @@ class BitbucketServerProvider(GitProvider):
             if self.bearer_token:  # if bearer token is provided, use it
                 self.bitbucket_client = Bitbucket(
                     url=self.bitbucket_server_url,
-                    token=self.bearer_token
+                    token=self.bearer_token,
+                    session=get_pooled_session()
                 )
             else:  # otherwise use username and password
                 self.bitbucket_client = Bitbucket(
                     url=self.bitbucket_server_url,
                     username=username,
-                    password=password
+                    password=password,
+                    session=get_pooled_session()
                 )
         try:
             self.bitbucket_api_version = parse_version(self.bitbucket_client.get("rest/api/1.0/application-properties").get('version'))
@@ -292,6 +296,7 @@ class BitbucketServerProvider(GitProvider):
                     new_file_content_str = decode_if_bytes(new_file_content_str)
 
             patch = load_large_diff(file_path, new_file_content_str, original_file_content_str, show_warning=False)
+            num_plus_lines, num_minus_lines = count_patch_lines(patch)
 
             diff_files.append(
                 FilePatchInfo(
@@ -300,6 +305,8 @@ class BitbucketServerProvider(GitProvider):
                     patch,
                     file_path,
                     edit_type=edit_type,
+                    num_plus_lines=num_plus_lines,
+                    num_minus_lines=num_minus_lines,
                 )
             )
 
@@ -8,6 +8,7 @@ from pr_agent.algo.language_handler import is_valid_file
 from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
 from pr_agent.git_providers.codecommit_client import CodeCommitClient
 
+from ..algo.git_diff_parser import count_patch_lines
 from ..algo.utils import load_large_diff
 from ..config_loader import get_settings
 from ..log import get_logger
@@ -136,6 +137,7 @@ class CodeCommitProvider(GitProvider):
                 new_file_content_str = ""
 
             patch = load_large_diff(patch_filename, new_file_content_str, original_file_content_str)
+            num_plus_lines, num_minus_lines = count_patch_lines(patch)
 
             # Store the diffs as a list of FilePatchInfo objects
             info = FilePatchInfo(
@@ -147,6 +149,8 @@ class CodeCommitProvider(GitProvider):
                 old_filename=None
                 if diff_item.a_path == diff_item.b_path
                 else diff_item.a_path,
+                num_plus_lines=num_plus_lines,
+                num_minus_lines=num_minus_lines,
             )
             # Only add valid files to the diff list
             # "bad extensions" are set in the language_extensions.toml file
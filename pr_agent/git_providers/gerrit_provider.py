@@ -8,13 +8,14 @@ from collections import Counter, namedtuple
 from pathlib import Path
 from tempfile import NamedTemporaryFile, mkdtemp
 
-import requests
 import urllib3.util
 from git import Repo
 
+from pr_agent.algo.git_diff_parser import count_patch_lines, decode_diff
 from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
 from pr_agent.config_loader import get_settings
 from pr_agent.git_providers.git_provider import GitProvider
+from pr_agent.git_providers.http_session import get_shared_session
 from pr_agent.git_providers.local_git_provider import PullRequestMimic
 from pr_agent.log import get_logger
 
@@ -156,7 +157,7 @@ def upload_patch(patch, path):
     patch_server_token = get_settings().get(
         'gerrit.patch_server_token')
 
-    response = requests.post(
+    response = get_shared_session().post(
         patch_server_endpoint,
         json={
             "content": patch,
@@ -258,16 +259,20 @@ class GerritProvider(GitProvider):
                 edit_type = EDIT_TYPE.DELETED
             elif diff_item.renamed_file:
                 edit_type = EDIT_TYPE.RENAMED
+            patch = decode_diff(diff_item.diff)
+            num_plus_lines, num_minus_lines = count_patch_lines(patch)
             diff_files.append(
                 FilePatchInfo(
                     original_file_content_str,
                     new_file_content_str,
-                    diff_item.diff.decode('utf-8'),
+                    patch,
                     diff_item.b_path,
                     edit_type=edit_type,
                     old_filename=None
                     if diff_item.a_path == diff_item.b_path
-                    else diff_item.a_path
+                    else diff_item.a_path,
+                    num_plus_lines=num_plus_lines,
+                    num_minus_lines=num_minus_lines
                 )
             )
         self.diff_files = diff_files
@@ -8,7 +8,10 @@ from typing import Optional, Tuple
 from pr_agent.algo.types import FilePatchInfo
 from pr_agent.algo.utils import Range, process_description
 from pr_agent.config_loader import get_settings
+from pr_agent.git_providers.persistent_comment_locator import \
+    get_persistent_comment_locator
 from pr_agent.log import get_logger
+from pr_agent.log.tracing import trace_methods
 
 MAX_FILES_ALLOWED_FULL = 50
 
@@ -71,7 +74,17 @@ def get_git_ssl_env() -> dict[str, str]:
     return returned_env
 
 
+# git API calls whose latency is traced in every provider implementation
+TRACED_METHODS = ("get_diff_files", "publish_description", "publish_code_suggestions", "publish_comment",
+                  "publish_persistent_comment", "edit_comment", "publish_inline_comment", "publish_inline_comments",
+                  "publish_labels", "remove_initial_comment")
+
+
 class GitProvider(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls, TRACED_METHODS, prefix="git_provider", git_provider=cls.__name__)
+
     @abstractmethod
     def is_supported(self, capability: str) -> bool:
         pass
@@ -304,9 +317,10 @@ class GitProvider(ABC):
                                    name='review',
                                    final_update_message=True):
         try:
-            prev_comments = list(self.get_issue_comments())
+            prev_comments = self.get_persistent_comment_candidates(initial_header)
             for comment in prev_comments:
                 if comment.body.startswith(initial_header):
+                    self.record_persistent_comment(initial_header, comment)
                     latest_commit_url = self.get_latest_commit_url()
                     comment_url = self.get_comment_url(comment)
                     if update_header:
@@ -324,7 +338,42 @@ class GitProvider(ABC):
         except Exception as e:
             get_logger().exception(f"Failed to update persistent review, error: {e}")
             pass
-        return self.publish_comment(pr_comment)
+        response = self.publish_comment(pr_comment)
+        self.record_persistent_comment(initial_header, response)
+        return response
+
+    def get_persistent_comment_candidates(self, initial_header: str) -> list:
+        """
+        The comments that may be the persistent comment starting with `initial_header`: the comment recorded by the
+        persistent comment locator, when it still starts with the header. Otherwise, all the PR comments.
+        """
+        locator = get_persistent_comment_locator()
+        pr_url = self.get_pr_url() if locator else ""
+        if pr_url:
+            comment_id = locator.get(pr_url, initial_header)
+            if comment_id is not None:
+                try:
+                    comment = self.get_issue_comment_by_id(comment_id)
+                    if comment is None:  # not supported by the provider
+                        return list(self.get_issue_comments())
+                    if (getattr(comment, "body", None) or "").startswith(initial_header):
+                        return [comment]
+                except Exception as e:
+                    get_logger().debug(f"Failed to fetch persistent comment {comment_id}: {e}")
+                locator.delete(pr_url, initial_header)  # deleted or edited since
+        return list(self.get_issue_comments())
+
+    def record_persistent_comment(self, initial_header: str, comment):
+        locator = get_persistent_comment_locator()
+        comment_id = getattr(comment, "id", None)
+        if locator is None or comment_id is None:
+            return
+        try:
+            pr_url = self.get_pr_url()
+        except Exception:
+            return
+        if pr_url:
+            locator.put(pr_url, initial_header, comment_id)
 
     @abstractmethod
     def publish_inline_comment(self, body: str, relevant_file: str, relevant_line_in_file: str, original_suggestion=None):
@@ -353,6 +402,10 @@ class GitProvider(ABC):
     def get_comment_url(self, comment) -> str:
         return ""
 
+    def get_issue_comment_by_id(self, comment_id):
+        """A PR comment fetched by its id, or None when the provider cannot fetch a single comment."""
+        return None
+
     def get_review_thread_comments(self, comment_id: int) -> list[dict]:
         pass
 
@@ -1,4 +1,5 @@
 import json
+from threading import Lock
 from typing import Any, Dict, List, Optional, Set, Tuple
 from urllib.parse import urlparse
 
@@ -6,6 +7,7 @@ import giteapy
 from giteapy.rest import ApiException
 
 from pr_agent.algo.file_filter import filter_ignored
+from pr_agent.algo.git_diff_parser import parse_git_diff
 from pr_agent.algo.language_handler import is_valid_file
 from pr_agent.algo.types import EDIT_TYPE
 from pr_agent.algo.utils import (clip_tokens,
@@ -16,6 +18,24 @@ from pr_agent.git_providers.git_provider import (MAX_FILES_ALLOWED_FULL,
                                                  IncrementalPR)
 from pr_agent.log import get_logger
 
+_api_clients = {}
+_api_clients_lock = Lock()
+
+
+def _get_api_client(configuration: giteapy.Configuration) -> giteapy.ApiClient:
+    """
+    Reuse one ApiClient, and so one urllib3 connection pool, per Gitea host and credentials, instead of opening a
+    new pool for every provider instance.
+    """
+    key = (configuration.host, configuration.api_key.get('Authorization'),
+           configuration.verify_ssl, configuration.ssl_ca_cert)
+    with _api_clients_lock:
+        client = _api_clients.get(key)
+        if client is None:
+            configuration.connection_pool_maxsize = get_settings().get("HTTP.POOL_MAXSIZE", 20)
+            client = _api_clients[key] = giteapy.ApiClient(configuration)
+    return client
+
 
 class GiteaProvider(GitProvider):
     def __init__(self, url: Optional[str] = None):
@@ -46,7 +66,7 @@ class GiteaProvider(GitProvider):
         # Use custom cert (self-signed)
         configuration.ssl_ca_cert = get_settings().get("GITEA.SSL_CA_CERT", None)
 
-        client = giteapy.ApiClient(configuration)
+        client = _get_api_client(configuration)
         self.repo_api = RepoApi(client)
         self.owner = None
         self.repo = None
@@ -129,25 +149,8 @@ class GiteaProvider(GitProvider):
                     pr_number=self.pr_number
             )
 
-            lines = diff_contents.splitlines()
-            current_file = None
-            current_patch = []
-            file_patches = {}
-            for line in lines:
-                if line.startswith('diff --git'):
-                    if current_file and current_patch:
-                        file_patches[current_file] = '\n'.join(current_patch)
-                        current_patch = []
-                    current_file = line.split(' b/')[-1]
-                elif line.startswith('@@'):
-                    current_patch = [line]
-                elif current_patch:
-                    current_patch.append(line)
-
-            if current_file and current_patch:
-                file_patches[current_file] = '\n'.join(current_patch)
-
-            self.file_diffs = file_patches
+            self.file_diffs = {file_diff.filename: file_diff
+                               for file_diff in parse_git_diff([diff_contents.encode("utf-8")])}
         except Exception as e:
             self.logger.error(f"Error getting diff content: {str(e)}")
 
@@ -460,7 +463,8 @@ class GiteaProvider(GitProvider):
 
             counter_valid += 1
             avoid_load = False
-            patch = self.file_diffs.get(filename,"")
+            file_diff = self.file_diffs.get(filename)
+            patch = file_diff.patch if file_diff else ""
             head_file = ""
             base_file = ""
 
@@ -484,6 +488,11 @@ class GiteaProvider(GitProvider):
                 else:
                     base_file = self._get_file_content_from_base(filename)
 
+            if file_diff:
+                diff_files.append(file_diff.to_file_patch_info(base_file, head_file))
+                continue
+
+            # the file is not in the PR diff (e.g. the diff failed to load): use the file list of the API
             num_plus_lines = file.get("additions",0)
             num_minus_lines = file.get("deletions",0)
             status = file.get("status","")
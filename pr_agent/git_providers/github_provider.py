@@ -7,6 +7,7 @@ import time
 import traceback
 import json
 from datetime import datetime
+from functools import partial
 from typing import Optional, Tuple
 from urllib.parse import urlparse
 
@@ -15,7 +16,9 @@ from github import AppAuthentication, Auth, Github, GithubException
 from retry import retry
 from starlette_context import context
 
+from ..algo.file_content import LazyFileContent
 from ..algo.file_filter import filter_ignored
+from ..algo.git_diff_parser import count_patch_lines
 from ..algo.git_patch_processing import extract_hunk_headers
 from ..algo.language_handler import is_valid_file
 from ..algo.types import EDIT_TYPE
@@ -27,6 +30,8 @@ from ..log import get_logger
 from ..servers.utils import RateLimitExceeded
 from .git_provider import (MAX_FILES_ALLOWED_FULL, FilePatchInfo, GitProvider,
                            IncrementalPR)
+from .http_session import install_github_connection_pool
+from .inline_comment_validation import InlineCommentValidator
 
 
 class GithubProvider(GitProvider):
@@ -291,8 +296,12 @@ class GithubProvider(GitProvider):
                         if counter_valid == MAX_FILES_ALLOWED_FULL:
                             get_logger().info(f"Too many files in PR, will avoid loading full content for rest of files")
 
+                    # with a patch, the full contents are only needed by some of the tools: fetch them on first access
+                    load_lazily = bool(patch) and not self.incremental.is_incremental
                     if avoid_load:
                         new_file_content_str = ""
+                    elif load_lazily:
+                        new_file_content_str = LazyFileContent(partial(self._get_pr_file_content, file, self.pr.head.sha))
                     else:
                         new_file_content_str = self._get_pr_file_content(file, self.pr.head.sha)  # communication with GitHub
 
@@ -303,6 +312,9 @@ class GithubProvider(GitProvider):
                     else:
                         if avoid_load:
                             original_file_content_str = ""
+                        elif load_lazily:
+                            original_file_content_str = LazyFileContent(
+                                partial(self._get_pr_file_content, file, merge_base_commit.sha))
                         else:
                             original_file_content_str = self._get_pr_file_content(file, merge_base_commit.sha)
                             # original_file_content_str = self._get_pr_file_content(file, self.pr.base.sha)
@@ -327,9 +339,7 @@ class GithubProvider(GitProvider):
                     num_plus_lines = file.additions
                     num_minus_lines = file.deletions
                 else:
-                    patch_lines = patch.splitlines(keepends=True)
-                    num_plus_lines = len([line for line in patch_lines if line.startswith('+')])
-                    num_minus_lines = len([line for line in patch_lines if line.startswith('-')])
+                    num_plus_lines, num_minus_lines = count_patch_lines(patch)
 
                 file_patch_canonical_structure = FilePatchInfo(original_file_content_str, new_file_content_str, patch,
                                                                file.filename, edit_type=edit_type,
@@ -361,6 +371,9 @@ class GithubProvider(GitProvider):
     def get_comment_url(self, comment) -> str:
         return comment.html_url
 
+    def get_issue_comment_by_id(self, comment_id):
+        return self.pr.get_issue_comment(int(comment_id))
+
     def publish_persistent_comment(self, pr_comment: str,
                                    initial_header: str,
                                    update_header: bool = True,
@@ -465,8 +478,9 @@ class GithubProvider(GitProvider):
 
     def _publish_inline_comments_fallback_with_verification(self, comments: list[dict]):
         """
-        Check each inline comment separately against the GitHub API and discard of invalid comments,
-        then publish all the remaining valid comments in a single review.
+        Check each inline comment separately and discard of invalid comments, then publish all the remaining valid
+        comments in a single review. Comments are checked locally against the hunks of the diff, and only the ones
+        the diff cannot decide are checked against the GitHub API.
         For invalid comments, also try removing the suggestion part and posting the comment just on the first line.
         """
         verified_comments, invalid_comments = self._verify_code_comments(comments)
@@ -475,8 +489,16 @@ class GithubProvider(GitProvider):
         if verified_comments:
             try:
                 self.pr.create_review(commit=self.last_commit_id, comments=verified_comments)
-            except:
-                pass
+            except Exception:
+                # a comment passed the local validation but was rejected: check each of them against the API
+                get_logger().info("Failed to publish the locally verified inline comments, verifying them with GitHub")
+                verified_comments, invalid_probed_comments = self._probe_code_comments(verified_comments)
+                invalid_comments.extend(invalid_probed_comments)
+                if verified_comments:
+                    try:
+                        self.pr.create_review(commit=self.last_commit_id, comments=verified_comments)
+                    except:
+                        pass
 
         # try to publish one by one the invalid comments as a one-line code comment
         if invalid_comments and get_settings().github.try_fix_invalid_inline_comments:
@@ -511,12 +533,40 @@ class GithubProvider(GitProvider):
         return is_verified, e
 
     def _verify_code_comments(self, comments: list[dict]) -> tuple[list[dict], list[tuple[dict, Exception]]]:
-        """Very each comment against the GitHub API and return 2 lists: 1 of verified and 1 of invalid comments"""
+        """Verify each comment and return 2 lists: 1 of verified and 1 of invalid comments"""
+        if self.incremental.is_incremental:
+            # the diff files of an incremental review are not the diff the comments are published on
+            return self._probe_code_comments(comments)
+        validator = InlineCommentValidator(self.diff_files or [])
+        verified_comments, invalid, unknown_comments = validator.partition(comments)
+        invalid_comments = [(comment, ValueError(reason)) for comment, reason in invalid]
+        if invalid_comments:
+            get_logger().info(f"{len(invalid_comments)} inline comments are outside of the PR diff",
+                              artifact={"reasons": [reason for _, reason in invalid]})
+        if unknown_comments:
+            verified_probed_comments, invalid_probed_comments = self._probe_code_comments(unknown_comments)
+            verified_comments.extend(verified_probed_comments)
+            invalid_comments.extend(invalid_probed_comments)
+        return verified_comments, invalid_comments
+
+    def _probe_code_comments(self, comments: list[dict]) -> tuple[list[dict], list[tuple[dict, Exception]]]:
+        """
+        Verify each comment against the GitHub API (a pending review, then deleted). GitHub allows a single pending
+        review per user on a PR, so the probes run one at a time, at most once every
+        github.inline_comment_probe_interval seconds, to stay within the secondary rate limit of content creation
+        requests.
+        """
+        if not comments:
+            return [], []
+        interval = get_settings().get("github.inline_comment_probe_interval", 1.0)
+        results = []
+        for i, comment in enumerate(comments):
+            if i and interval > 0:
+                time.sleep(interval)
+            results.append(self._verify_code_comment(comment))
         verified_comments = []
         invalid_comments = []
-        for comment in comments:
-            time.sleep(1)  # for avoiding secondary rate limit
-            is_verified, e = self._verify_code_comment(comment)
+        for comment, (is_verified, e) in zip(comments, results, strict=True):
             if is_verified:
                 verified_comments.append(comment)
             else:
@@ -847,6 +897,7 @@ class GithubProvider(GitProvider):
                     "https://github.com/Codium-ai/pr-agent#method-2-run-from-source") from e
             self.auth = Auth.Token(token)
         if self.auth:
+            install_github_connection_pool()
             return Github(auth=self.auth, base_url=self.base_url)
         else:
             raise ValueError("Could not authenticate to GitHub")
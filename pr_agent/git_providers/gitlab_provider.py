@@ -13,6 +13,7 @@ from gitlab import (GitlabAuthenticationError, GitlabCreateError,
 from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
 
 from ..algo.file_filter import filter_ignored
+from ..algo.git_diff_parser import count_patch_lines
 from ..algo.git_patch_processing import decode_if_bytes
 from ..algo.language_handler import is_valid_file
 from ..algo.utils import (clip_tokens,
@@ -21,6 +22,7 @@ from ..algo.utils import (clip_tokens,
 from ..config_loader import get_settings
 from ..log import get_logger
 from .git_provider import MAX_FILES_ALLOWED_FULL, GitProvider
+from .http_session import get_pooled_session
 
 
 class DiffNotFoundError(Exception):
@@ -52,13 +54,15 @@ class GitLabProvider(GitProvider):
                 self.gl = gitlab.Gitlab(
                     url=gitlab_url,
                     oauth_token=gitlab_access_token,
-                    ssl_verify=ssl_verify
+                    ssl_verify=ssl_verify,
+                    session=get_pooled_session()
                 )
             else:  # private_token
                 self.gl = gitlab.Gitlab(
                     url=gitlab_url,
                     private_token=gitlab_access_token,
-                    ssl_verify=ssl_verify
+                    ssl_verify=ssl_verify,
+                    session=get_pooled_session()
                 )
         except Exception as e:
             get_logger().error(f"Failed to create GitLab instance: {e}")
@@ -459,9 +463,7 @@ class GitLabProvider(GitProvider):
 
 
             # count number of lines added and removed
-            patch_lines = patch.splitlines(keepends=True)
-            num_plus_lines = len([line for line in patch_lines if line.startswith('+')])
-            num_minus_lines = len([line for line in patch_lines if line.startswith('-')])
+            num_plus_lines, num_minus_lines = count_patch_lines(patch)
             diff_files.append(
                 FilePatchInfo(original_file_content_str, new_file_content_str,
                               patch=patch,
@@ -503,6 +505,9 @@ class GitLabProvider(GitProvider):
     def get_comment_url(self, comment):
         return f"{self.mr.web_url}#note_{comment.id}"
 
+    def get_issue_comment_by_id(self, comment_id):
+        return self.mr.notes.get(int(comment_id))
+
     def publish_persistent_comment(self, pr_comment: str,
                                    initial_header: str,
                                    update_header: bool = True,
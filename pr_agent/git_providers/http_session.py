@@ -0,0 +1,200 @@
+"""
+Process-wide pooled HTTP layer for the git providers.
+
+Connection pools (and their kept-alive TLS connections) live in shared HTTPAdapters. Every provider instance gets its
+own lightweight requests.Session, so auth headers and cookies never leak between providers, but all sessions mount
+the same adapters, so a new provider per PR URL reuses the connections opened by the previous ones.
+
+HTTP/2 is not used: requests and urllib3 1.x, on top of which PyGithub, python-gitlab and atlassian-python-api are
+built, only speak HTTP/1.1.
+"""
+
+from http.cookiejar import DefaultCookiePolicy
+from threading import RLock, local
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+from pr_agent.log.metrics import record_git_api_response
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_lock = RLock()
+_default_adapter: Optional[HTTPAdapter] = None
+_host_adapters: Dict[str, HTTPAdapter] = {}
+_shared_session: Optional[requests.Session] = None
+_github_pool_installed = False
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter mounted on many sessions. Closing one of these sessions must not close the shared pools.
+    """
+
+    def close(self):
+        pass
+
+    def close_pools(self):
+        super().close()
+
+
+def _build_retry() -> Retry:
+    return Retry(
+        total=get_settings().get("http.max_retries", 3),
+        backoff_factor=get_settings().get("http.backoff_factor", 0.5),
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _build_adapter(pool_maxsize: int) -> SharedHTTPAdapter:
+    return SharedHTTPAdapter(pool_connections=get_settings().get("http.pool_connections", 10),
+                             pool_maxsize=pool_maxsize,
+                             max_retries=_build_retry(),
+                             pool_block=False)
+
+
+def _get_adapters():
+    global _default_adapter
+    if _default_adapter is None:
+        with _lock:
+            if _default_adapter is None:
+                for host, maxsize in (get_settings().get("http.pool_maxsize_per_host", {}) or {}).items():
+                    _host_adapters[host] = _build_adapter(int(maxsize))
+                _default_adapter = _build_adapter(get_settings().get("http.pool_maxsize", 20))
+    return _default_adapter, _host_adapters
+
+
+def mount_shared_adapters(session: requests.Session) -> requests.Session:
+    default_adapter, host_adapters = _get_adapters()
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+    for host, adapter in host_adapters.items():  # longer prefixes take precedence in requests
+        session.mount(f"https://{host}/", adapter)
+        session.mount(f"http://{host}/", adapter)
+    return session
+
+
+def get_pooled_session() -> requests.Session:
+    """
+    Returns a new session backed by the process-wide connection pools. Use it when the session carries per-provider
+    state, such as auth headers.
+    """
+    session = mount_shared_adapters(requests.Session())
+    session.hooks["response"].append(record_git_api_response)
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """
+    Returns the process-wide session, a drop-in replacement for the module-level requests.request / requests.get
+    calls. Do not set headers or auth on it; pass them per request.
+    """
+    global _shared_session
+    if _shared_session is None:
+        with _lock:
+            if _shared_session is None:
+                session = get_pooled_session()
+                # shared by all providers: never keep cookies set by one of them for the others
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                _shared_session = session
+    return _shared_session
+
+
+def _pool_stats(adapter: HTTPAdapter, stats: dict):
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        host_stats = stats.setdefault(pool.host, {"pools": 0, "connections_created": 0, "requests": 0,
+                                                  "idle_connections": 0})
+        host_stats["pools"] += 1
+        host_stats["connections_created"] += pool.num_connections
+        host_stats["requests"] += pool.num_requests
+        host_stats["idle_connections"] += pool.pool.qsize() if pool.pool is not None else 0
+
+
+def get_http_pool_stats() -> Dict[str, dict]:
+    """
+    Returns per-host connection pool metrics: kept pools, created connections, sent requests and idle connections.
+    A requests count well above the created connections count means connections are being reused.
+    """
+    stats = {}
+    if _default_adapter is None:
+        return stats
+    for adapter in [_default_adapter, *_host_adapters.values()]:
+        _pool_stats(adapter, stats)
+    return stats
+
+
+def close_http_pools():
+    global _default_adapter, _shared_session
+    with _lock:
+        for adapter in [_default_adapter, *_host_adapters.values()]:
+            if adapter is not None:
+                adapter.close_pools()
+        _default_adapter = None
+        _host_adapters.clear()
+        _shared_session = None
+
+
+def install_github_connection_pool():
+    """
+    Make PyGithub send its requests through the shared pools, instead of opening a new connection pool for every
+    Github client (one per provider instance).
+    """
+    global _github_pool_installed
+    if _github_pool_installed:
+        return
+    try:
+        from github.Requester import (HTTPRequestsConnectionClass,
+                                      HTTPSRequestsConnectionClass, Requester)
+    except ImportError:
+        return
+
+    def pending_request_attribute(name: str) -> property:
+        return property(lambda self: getattr(self._pending_request, name),
+                        lambda self, value: setattr(self._pending_request, name, value))
+
+    class ThreadLocalRequestMixin:
+        """
+        PyGithub's connection objects keep the pending request (verb, URL, input, headers) on the object between
+        request() and getresponse(). A connection object used by two threads at once could send the request of one
+        thread and hand its response to the other, so the pending request is kept per thread.
+        """
+        verb = pending_request_attribute("verb")
+        url = pending_request_attribute("url")
+        input = pending_request_attribute("input")
+        headers = pending_request_attribute("headers")
+
+    class PooledHTTPSConnectionClass(ThreadLocalRequestMixin, HTTPSRequestsConnectionClass):
+        def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, **kwargs):
+            self.port = port if port else 443
+            self.host = host
+            self.protocol = "https"
+            self.timeout = timeout
+            self.verify = kwargs.get("verify", True)
+            self.session = get_shared_session()
+            self._pending_request = local()
+
+    class PooledHTTPConnectionClass(ThreadLocalRequestMixin, HTTPRequestsConnectionClass):
+        def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, **kwargs):
+            self.port = port if port else 80
+            self.host = host
+            self.protocol = "http"
+            self.timeout = timeout
+            self.verify = kwargs.get("verify", True)
+            self.session = get_shared_session()
+            self._pending_request = local()
+
+    Requester.injectConnectionClasses(PooledHTTPConnectionClass, PooledHTTPSConnectionClass)
+    _github_pool_installed = True
+    get_logger().debug("PyGithub requests are sent through the shared HTTP connection pools")
@@ -0,0 +1,112 @@
+"""
+Offline validation of inline review comments against the hunks of the PR diff.
+
+A review comment (GitHub's pull request review API) targets a `line` of a file, on the new (`side` RIGHT) or old
+(`side` LEFT) version, and optionally starts at `start_line` / `start_side`. The API rejects the whole review (422)
+when a comment targets a line outside of the diff, or spans more than one hunk. These rules are checked locally,
+from the hunk ranges of each file's patch. A comment is:
+
+- VALID: all its lines are inside a single hunk
+- INVALID: a line is outside of the hunks of its file
+- UNKNOWN: the local diff cannot tell (file missing or without a patch, e.g. too large or binary), and the comment
+  has to be checked against the API
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pr_agent.algo.types import FilePatchInfo
+
+VALID = "valid"
+INVALID = "invalid"
+UNKNOWN = "unknown"
+
+RE_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@", re.MULTILINE)
+
+Hunk = Tuple[int, int, int, int]  # (old start, old end, new start, new end), 1-based and inclusive
+
+
+def parse_hunk_ranges(patch: str) -> List[Hunk]:
+    hunks = []
+    for match in RE_HUNK_HEADER.finditer(patch or ""):
+        start1, size1, start2, size2 = match.groups()
+        start1, start2 = int(start1), int(start2)
+        size1 = 1 if size1 is None else int(size1)
+        size2 = 1 if size2 is None else int(size2)
+        hunks.append((start1, start1 + size1 - 1, start2, start2 + size2 - 1))
+    return hunks
+
+
+class InlineCommentValidator:
+    """
+    Validates inline comments against the hunks of the diff files of a PR.
+    """
+
+    def __init__(self, diff_files: Iterable[FilePatchInfo]):
+        self._hunks: Dict[str, List[Hunk]] = {}
+        self._num_patch_lines: Dict[str, int] = {}
+        for file in diff_files or []:
+            if file.patch:
+                self._hunks[file.filename] = parse_hunk_ranges(file.patch)
+                self._num_patch_lines[file.filename] = len(file.patch.splitlines())
+
+    def _hunk_of_line(self, hunks: List[Hunk], line: int, side: str) -> Optional[int]:
+        for index, (old_start, old_end, new_start, new_end) in enumerate(hunks):
+            start, end = (old_start, old_end) if side == "LEFT" else (new_start, new_end)
+            if start <= line <= end:
+                return index
+        return None
+
+    def validate(self, comment: dict) -> Tuple[str, str]:
+        """
+        Returns the verdict on a comment (VALID, INVALID or UNKNOWN), and its reason.
+        """
+        path = (comment.get("path") or "").strip()
+        hunks = self._hunks.get(path)
+        if not hunks:
+            return UNKNOWN, f"no patch for '{path}'"
+
+        if comment.get("position") is not None:
+            # the legacy API: a position in the patch, counted from the line below the first hunk header
+            position = comment["position"]
+            if isinstance(position, int) and 0 < position < self._num_patch_lines[path]:
+                return VALID, ""
+            return INVALID, f"position {position} is outside of the patch of '{path}'"
+
+        line = comment.get("line")
+        if not isinstance(line, int) or line <= 0:
+            return INVALID, f"invalid line {line!r}"
+        side = comment.get("side", "RIGHT")
+        hunk = self._hunk_of_line(hunks, line, side)
+        if hunk is None:
+            return INVALID, f"line {line} ({side}) of '{path}' is outside of the diff"
+
+        start_line = comment.get("start_line")
+        if start_line is None:
+            return VALID, ""
+        start_side = comment.get("start_side", side)
+        if not isinstance(start_line, int) or start_line <= 0:
+            return INVALID, f"invalid start_line {start_line!r}"
+        if start_side == side and start_line > line:
+            return INVALID, f"start_line {start_line} is after line {line}"
+        start_hunk = self._hunk_of_line(hunks, start_line, start_side)
+        if start_hunk is None:
+            return INVALID, f"start_line {start_line} ({start_side}) of '{path}' is outside of the diff"
+        if start_hunk != hunk:
+            return INVALID, f"lines {start_line}-{line} of '{path}' span more than one hunk"
+        return VALID, ""
+
+    def partition(self, comments: List[dict]) -> Tuple[List[dict], List[Tuple[dict, str]], List[dict]]:
+        """
+        Splits comments into the valid ones, the invalid ones (with the reason), and the ones to check with the API.
+        """
+        valid, invalid, unknown = [], [], []
+        for comment in comments:
+            verdict, reason = self.validate(comment)
+            if verdict == VALID:
+                valid.append(comment)
+            elif verdict == INVALID:
+                invalid.append((comment, reason))
+            else:
+                unknown.append(comment)
+        return valid, invalid, unknown
@@ -4,6 +4,9 @@ from typing import List
 
 from git import Repo
 
+from pr_agent.algo.file_content import (LazyFileContent, SparseFileLines,
+                                        iter_stream_lines)
+from pr_agent.algo.git_diff_parser import count_patch_lines, decode_diff
 from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
 from pr_agent.config_loader import _find_repository_root, get_settings
 from pr_agent.git_providers.git_provider import GitProvider
@@ -70,14 +73,8 @@ class LocalGitProvider(GitProvider):
         )
         diff_files = []
         for diff_item in diffs:
-            if diff_item.a_blob is not None:
-                original_file_content_str = diff_item.a_blob.data_stream.read().decode('utf-8')
-            else:
-                original_file_content_str = ""  # empty file
-            if diff_item.b_blob is not None:
-                new_file_content_str = diff_item.b_blob.data_stream.read().decode('utf-8')
-            else:
-                new_file_content_str = ""  # empty file
+            original_file_content_str = self._blob_content(diff_item.a_blob)
+            new_file_content_str = self._blob_content(diff_item.b_blob)
             edit_type = EDIT_TYPE.MODIFIED
             if diff_item.new_file:
                 edit_type = EDIT_TYPE.ADDED
@@ -85,18 +82,33 @@ class LocalGitProvider(GitProvider):
                 edit_type = EDIT_TYPE.DELETED
             elif diff_item.renamed_file:
                 edit_type = EDIT_TYPE.RENAMED
+            patch = decode_diff(diff_item.diff)
+            num_plus_lines, num_minus_lines = count_patch_lines(patch)
             diff_files.append(
                 FilePatchInfo(original_file_content_str,
                               new_file_content_str,
-                              diff_item.diff.decode('utf-8'),
+                              patch,
                               diff_item.b_path,
                               edit_type=edit_type,
-                              old_filename=None if diff_item.a_path == diff_item.b_path else diff_item.a_path
+                              old_filename=None if diff_item.a_path == diff_item.b_path else diff_item.a_path,
+                              num_plus_lines=num_plus_lines,
+                              num_minus_lines=num_minus_lines
                               )
             )
         self.diff_files = diff_files
         return diff_files
 
+    @staticmethod
+    def _blob_content(blob):
+        """
+        The content of a blob, read on first access. Until then, line ranges are read by streaming the blob.
+        """
+        if blob is None:
+            return ""  # empty file
+        return LazyFileContent(lambda: blob.data_stream.read().decode('utf-8'),
+                               range_loader=lambda ranges: SparseFileLines.from_lines(
+                                   iter_stream_lines(blob.data_stream), ranges))
+
     def get_files(self) -> List[str]:
         """
         Returns a list of files with changes in the diff.
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+from pr_agent.log.metrics import record_cache_lookup
+
+
+class PersistentCommentLocator:
+    """
+    Remembers the id of the persistent comment of each tool output (e.g. the review or the code suggestions) of a PR,
+    so the next run fetches that comment instead of scanning all the PR comments.
+
+    Ids are kept in a bounded in-memory LRU, and in a local SQLite file when `path` is set (shared by the server
+    workers, and kept across restarts). Store errors are logged and treated as misses.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = Lock()
+        self._conn = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                with self._lock, self._conn:
+                    self._conn.execute("PRAGMA journal_mode=WAL")
+                    self._conn.execute("CREATE TABLE IF NOT EXISTS persistent_comments ("
+                                       "pr_url TEXT NOT NULL, header TEXT NOT NULL, comment_id TEXT NOT NULL, "
+                                       "PRIMARY KEY (pr_url, header))")
+            except sqlite3.Error as e:
+                get_logger().warning(f"Failed to open persistent comment locator {path}: {e}")
+                self._conn = None
+
+    def get(self, pr_url: str, header: str) -> Optional[str]:
+        key = (pr_url, header)
+        with self._lock:
+            comment_id = self._entries.get(key)
+            if comment_id is not None:
+                self._entries.move_to_end(key)
+        if comment_id is None and self._conn is not None:
+            try:
+                with self._lock:
+                    row = self._conn.execute("SELECT comment_id FROM persistent_comments WHERE pr_url = ? "
+                                             "AND header = ?", key).fetchone()
+                if row:
+                    comment_id = row[0]
+                    self._remember(key, comment_id)
+            except sqlite3.Error as e:
+                get_logger().warning(f"Failed to read persistent comment locator {self.path}: {e}")
+        record_cache_lookup("persistent_comments", hits=int(comment_id is not None), misses=int(comment_id is None))
+        return comment_id
+
+    def put(self, pr_url: str, header: str, comment_id):
+        key = (pr_url, header)
+        self._remember(key, str(comment_id))
+        if self._conn is not None:
+            try:
+                with self._lock, self._conn:
+                    self._conn.execute("INSERT OR REPLACE INTO persistent_comments (pr_url, header, comment_id) "
+                                       "VALUES (?, ?, ?)", (*key, str(comment_id)))
+            except sqlite3.Error as e:
+                get_logger().warning(f"Failed to write persistent comment locator {self.path}: {e}")
+
+    def delete(self, pr_url: str, header: str):
+        key = (pr_url, header)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self._conn is not None:
+            try:
+                with self._lock, self._conn:
+                    self._conn.execute("DELETE FROM persistent_comments WHERE pr_url = ? AND header = ?", key)
+            except sqlite3.Error as e:
+                get_logger().warning(f"Failed to write persistent comment locator {self.path}: {e}")
+
+    def _remember(self, key: tuple, comment_id: str):
+        with self._lock:
+            self._entries[key] = comment_id
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_locator: Optional[PersistentCommentLocator] = None
+_locator_lock = Lock()
+
+
+def get_persistent_comment_locator() -> Optional[PersistentCommentLocator]:
+    """The process-wide locator, or None when disabled."""
+    global _locator
+    settings = get_settings(use_context=False)
+    if not settings.get("persistent_comment_locator.enabled", True):
+        return None
+    if _locator is None:
+        with _locator_lock:
+            if _locator is None:
+                _locator = PersistentCommentLocator(
+                    path=settings.get("persistent_comment_locator.path", "") or None,
+                    max_entries=settings.get("persistent_comment_locator.max_entries", 10000))
+    return _locator
@@ -0,0 +1,182 @@
+"""
+Prometheus metrics of the webhook servers, served on GET /metrics.
+
+With several gunicorn workers, set the PROMETHEUS_MULTIPROC_DIR environment variable to an empty directory shared by
+the workers (the gunicorn config cleans up after exited workers), so /metrics aggregates all of them, whichever worker
+serves it. prometheus-client is optional: without it, recording metrics is a no-op and /metrics is not available.
+"""
+
+import functools
+import inspect
+import os
+import time
+from typing import Callable, Optional
+
+from pr_agent.log import get_logger
+
+try:
+    import prometheus_client
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry,
+                                   Counter, Gauge, Histogram, generate_latest)
+    from prometheus_client import multiprocess
+except ImportError:  # optional dependency
+    prometheus_client = None
+
+COMMAND_LATENCY_BUCKETS = (1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 240, 300, 600)
+RATE_LIMIT_HEADERS = ("X-RateLimit-Remaining", "RateLimit-Remaining")
+
+if prometheus_client is not None:
+    WEBHOOK_REQUESTS = Counter("pr_agent_webhook_requests_total", "Webhook requests received",
+                               ["server", "event"])
+    BACKGROUND_TASKS_QUEUED = Gauge("pr_agent_background_tasks_queued",
+                                    "Background tasks scheduled by a webhook and not started yet",
+                                    ["server"], multiprocess_mode="livesum")
+    BACKGROUND_TASKS_IN_FLIGHT = Gauge("pr_agent_background_tasks_in_flight", "Background tasks running",
+                                       ["server"], multiprocess_mode="livesum")
+    COMMAND_DURATION = Histogram("pr_agent_command_duration_seconds", "Duration of a command, e.g. review",
+                                 ["command", "status"], buckets=COMMAND_LATENCY_BUCKETS)
+    LLM_TOKENS = Counter("pr_agent_llm_tokens_total", "LLM tokens sent (prompt) and received (completion)",
+                         ["model", "direction"])
+    GIT_API_REQUESTS = Counter("pr_agent_git_api_requests_total", "HTTP requests sent to git provider APIs",
+                               ["host", "status"])
+    GIT_API_RATE_LIMIT_REMAINING = Gauge("pr_agent_git_api_rate_limit_remaining",
+                                         "Remaining git API rate limit, from the last response of the host",
+                                         ["host"], multiprocess_mode="mostrecent")
+    CACHE_LOOKUPS = Counter("pr_agent_cache_lookups_total", "Cache lookups, by cache and result (hit or miss)",
+                            ["cache", "result"])
+
+
+def is_metrics_available() -> bool:
+    return prometheus_client is not None
+
+
+def record_webhook_request(server: str, event: Optional[str]):
+    if prometheus_client is not None:
+        WEBHOOK_REQUESTS.labels(server=server, event=event or "unknown").inc()
+
+
+def track_background_task(server: str, func: Callable) -> Callable:
+    """
+    Wraps a function passed to BackgroundTasks.add_task, so the queued and running background tasks are counted.
+    Call it when the task is scheduled.
+    """
+    if prometheus_client is None:
+        return func
+    BACKGROUND_TASKS_QUEUED.labels(server=server).inc()
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            BACKGROUND_TASKS_QUEUED.labels(server=server).dec()
+            with BACKGROUND_TASKS_IN_FLIGHT.labels(server=server).track_inprogress():
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        BACKGROUND_TASKS_QUEUED.labels(server=server).dec()
+        with BACKGROUND_TASKS_IN_FLIGHT.labels(server=server).track_inprogress():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def observe_command(command: str, status: str, duration_seconds: float):
+    if prometheus_client is not None:
+        COMMAND_DURATION.labels(command=command, status=status).observe(duration_seconds)
+
+
+def record_llm_tokens(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    if prometheus_client is None:
+        return
+    for direction, tokens in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+        if isinstance(tokens, (int, float)) and tokens > 0:
+            LLM_TOKENS.labels(model=model, direction=direction).inc(tokens)
+
+
+def record_git_api_response(response, *args, **kwargs):
+    """
+    A requests response hook: counts git API calls per host and status, and keeps the rate limit left per host.
+    """
+    if prometheus_client is None:
+        return
+    try:
+        host = response.request.url.split("/")[2] if response.request is not None else "unknown"
+        GIT_API_REQUESTS.labels(host=host, status=str(response.status_code)).inc()
+        for header in RATE_LIMIT_HEADERS:
+            remaining = response.headers.get(header)
+            if remaining is not None:
+                GIT_API_RATE_LIMIT_REMAINING.labels(host=host).set(float(remaining))
+                break
+    except Exception as e:
+        get_logger().debug(f"Failed to record git API metrics: {e}")
+
+
+def record_cache_lookup(cache: str, hits: int = 0, misses: int = 0):
+    if prometheus_client is None:
+        return
+    if hits:
+        CACHE_LOOKUPS.labels(cache=cache, result="hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache=cache, result="miss").inc(misses)
+
+
+class CommandTimer:
+    """
+    Times a command and records it in the command latency histogram, with an "error" status if it raised.
+    """
+
+    def __init__(self, command: str):
+        self.command = command
+        self.status = "success"
+
+    def __enter__(self):
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.status = "error"
+        observe_command(self.command, self.status, time.monotonic() - self._start)
+        return False
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """
+    Returns the metrics payload and its content type. With PROMETHEUS_MULTIPROC_DIR set, the metrics of all the
+    worker processes are aggregated.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def add_metrics_route(router):
+    """
+    Adds GET /metrics to a FastAPI router, when prometheus-client is installed and metrics.enabled is on.
+    """
+    if prometheus_client is None:
+        return
+
+    from fastapi import Response
+
+    from pr_agent.config_loader import get_settings
+
+    @router.get("/metrics")
+    async def metrics():
+        if not get_settings().get("metrics.enabled", True):
+            return Response(status_code=404)
+        payload, content_type = generate_metrics()
+        return Response(content=payload, media_type=content_type)
+
+
+def mark_worker_dead(pid: int):
+    """
+    To be called by gunicorn's child_exit hook, so the gauges of an exited worker are dropped.
+    """
+    if prometheus_client is not None and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,268 @@
+"""
+Lightweight in-process tracing of the stages of a command (diff fetching, diff processing, LLM calls, publishing).
+
+Spans follow the OpenTelemetry data model (trace id, span id, parent span id, start/end time in unix nanoseconds,
+attributes and status), and are serialized with the OTLP/JSON field names, so exported traces can be loaded in OTLP
+compatible tools. The parent span is tracked in a context variable, so nesting works across `await`s and concurrent
+asyncio tasks.
+
+Tracing is configured by the [tracing] settings section, read once on first use. When disabled, a traced function
+costs a single module-level flag check.
+"""
+
+import functools
+import inspect
+import json
+import os
+import secrets
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from pr_agent.log import get_logger
+
+STATUS_UNSET = "STATUS_CODE_UNSET"
+STATUS_OK = "STATUS_CODE_OK"
+STATUS_ERROR = "STATUS_CODE_ERROR"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    start_time_unix_nano: int = 0
+    end_time_unix_nano: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status_code: str = STATUS_UNSET
+    status_message: str = ""
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time_unix_nano is None:
+            return None
+        return (self.end_time_unix_nano - self.start_time_unix_nano) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value if isinstance(value, (str, bool, int, float)) else str(value)
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_time_unix_nano,
+            "endTimeUnixNano": self.end_time_unix_nano,
+            "durationMs": self.duration_ms,
+            "attributes": self.attributes,
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, span: Span):
+        pass
+
+
+class LogSpanExporter(SpanExporter):
+    """
+    Sends spans to the analytics log (see config.analytics_folder), next to the other analytics records.
+    """
+
+    def export(self, span: Span):
+        get_logger().info(f"span {span.name} took {span.duration_ms:.1f}ms", analytics=True, span=span.to_dict())
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Appends spans to a file, one JSON object per line.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                get_logger().warning(f"Failed to export span to {self.path}: {e}")
+
+
+class InMemorySpanExporter(SpanExporter):
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+
+_enabled: Optional[bool] = None  # None until configured from the settings, on first use
+_exporter: Optional[SpanExporter] = None
+_current_span: ContextVar[Optional[Span]] = ContextVar("pr_agent_current_span", default=None)
+
+
+def configure_tracing(enabled: Optional[bool] = None, exporter: Optional[SpanExporter] = None):
+    """
+    Enables or disables tracing. Arguments that are not given are taken from the [tracing] settings.
+    """
+    global _enabled, _exporter
+    from pr_agent.config_loader import get_settings
+
+    if enabled is None:
+        enabled = bool(get_settings().get("tracing.enabled", False))
+    if enabled and exporter is None:
+        exporter_name = str(get_settings().get("tracing.exporter", "log")).lower()
+        if exporter_name == "json":
+            exporter = JsonLinesSpanExporter(get_settings().get("tracing.json_path", "./traces.jsonl"))
+        else:
+            if exporter_name != "log":
+                get_logger().warning(f"Unknown tracing exporter '{exporter_name}', using 'log'")
+            exporter = LogSpanExporter()
+    _exporter = exporter
+    _enabled = enabled
+
+
+def is_tracing_enabled() -> bool:
+    if _enabled is None:
+        configure_tracing()
+    return _enabled
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _start_span(name: str, attributes: Optional[Dict[str, Any]]) -> Span:
+    parent = _current_span.get()
+    span = Span(name=name,
+                trace_id=parent.trace_id if parent else secrets.token_hex(16),
+                span_id=secrets.token_hex(8),
+                parent_span_id=parent.span_id if parent else None,
+                start_time_unix_nano=time.time_ns())
+    for key, value in (attributes or {}).items():
+        span.set_attribute(key, value)
+    return span
+
+
+def _end_span(span: Span, error: Optional[BaseException] = None):
+    span.end_time_unix_nano = time.time_ns()
+    if error is not None:
+        span.status_code = STATUS_ERROR
+        span.status_message = f"{type(error).__name__}: {error}"
+    elif span.status_code == STATUS_UNSET:
+        span.status_code = STATUS_OK
+    exporter = _exporter
+    if exporter is not None:
+        try:
+            exporter.export(span)
+        except Exception as e:
+            get_logger().warning(f"Failed to export span {span.name}: {e}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Context manager tracing a block of code, sync or async:
+
+        with span("pr_reviewer.publish", num_comments=3) as s:
+            ...
+            s.set_attribute("published", True)
+    """
+    if not (_enabled or (_enabled is None and is_tracing_enabled())):
+        yield NOOP_SPAN
+        return
+    current = _start_span(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        _end_span(current, e)
+        raise
+    else:
+        _end_span(current)
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None,
+           record_args: Iterable[str] = ()):
+    """
+    Decorator tracing every call of a sync or async function.
+
+    Args:
+        name: The span name. Defaults to the function's qualified name.
+        attributes: Static attributes added to every span.
+        record_args: Names of function arguments to add as span attributes (e.g. "model").
+    """
+    record_args = tuple(record_args)
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        signature = inspect.signature(func) if record_args else None
+
+        def _span_attributes(args, kwargs) -> Dict[str, Any]:
+            span_attributes = dict(attributes or {})
+            if signature is not None:
+                try:
+                    bound = signature.bind_partial(*args, **kwargs).arguments
+                except TypeError:
+                    bound = kwargs
+                for arg in record_args:
+                    if arg in bound:
+                        span_attributes[arg] = bound[arg]
+            return span_attributes
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _enabled is False:
+                    return await func(*args, **kwargs)
+                with span(span_name, **_span_attributes(args, kwargs)):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _enabled is False:
+                return func(*args, **kwargs)
+            with span(span_name, **_span_attributes(args, kwargs)):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls: type, method_names: Iterable[str], prefix: str, **attributes):
+    """
+    Wraps the given methods of a class, when the class defines them, with `traced`. Used by base classes in
+    __init_subclass__, so every git provider or AI handler implementation is traced without decorating each one.
+    """
+    for method_name in method_names:
+        method = cls.__dict__.get(method_name)
+        if inspect.isfunction(method) and not getattr(method, "__pr_agent_traced__", False):
+            wrapped = traced(f"{prefix}.{method_name}", attributes=attributes,
+                             record_args=("model",) if "model" in inspect.signature(method).parameters else ())(method)
+            wrapped.__pr_agent_traced__ = True
+            setattr(cls, method_name, wrapped)
@@ -7,7 +7,6 @@ import re
 import time
 
 import jwt
-import requests
 import uvicorn
 from fastapi import APIRouter, FastAPI, Request, Response
 from starlette.background import BackgroundTasks
@@ -19,10 +18,13 @@ from starlette_context.middleware import RawContextMiddleware
 from pr_agent.agent.pr_agent import PRAgent
 from pr_agent.algo.utils import update_settings_from_args
 from pr_agent.config_loader import get_settings, global_settings
+from pr_agent.git_providers.http_session import get_shared_session
 from pr_agent.git_providers.utils import apply_repo_settings
 from pr_agent.identity_providers import get_identity_provider
 from pr_agent.identity_providers.identity_provider import Eligibility
 from pr_agent.log import LoggingFormat, get_logger, setup_logger
+from pr_agent.log.metrics import (add_metrics_route, record_webhook_request,
+                                track_background_task)
 from pr_agent.secret_providers import get_secret_provider
 
 setup_logger(fmt=LoggingFormat.JSON, level=get_settings().get("CONFIG.LOG_LEVEL", "DEBUG"))
@@ -51,7 +53,7 @@ async def get_bearer_token(shared_secret: str, client_key: str):
             'Authorization': f'JWT {token}',
             'Content-Type': 'application/x-www-form-urlencoded'
         }
-        response = requests.request("POST", url, headers=headers, data=payload)
+        response = get_shared_session().request("POST", url, headers=headers, data=payload)
         bearer_token = response.json()["access_token"]
         return bearer_token
     except Exception as e:
@@ -101,7 +103,7 @@ async def _validate_time_from_last_commit_to_pr_update(data: dict) -> bool:
             'Authorization': f'Bearer {bearer_token}',
             'Accept': 'application/json'
         }
-        response = requests.get(commits_api, headers=headers)
+        response = get_shared_session().get(commits_api, headers=headers)
         if response.status_code != 200:
             get_logger().warning(f"Bitbucket commits API returned {response.status_code} for {commits_api}")
             return False
@@ -304,7 +306,8 @@ async def handle_github_webhooks(background_tasks: BackgroundTasks, request: Req
                         await agent.handle_request(pr_url, comment_body)
         except Exception as e:
             get_logger().error(f"Failed to handle webhook: {e}")
-    background_tasks.add_task(inner)
+    record_webhook_request("bitbucket_app", data.get("event") if isinstance(data, dict) else None)
+    background_tasks.add_task(track_background_task("bitbucket_app", inner))
     return "OK"
 
 @router.get("/webhook")
@@ -338,6 +341,9 @@ async def handle_uninstalled_webhooks(request: Request, response: Response):
     get_logger().info(data)
 
 
+add_metrics_route(router)
+
+
 def start():
     get_settings().set("CONFIG.PUBLISH_OUTPUT_PROGRESS", False)
     get_settings().set("CONFIG.GIT_PROVIDER", "bitbucket")
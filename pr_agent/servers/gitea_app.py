@@ -14,6 +14,8 @@ from pr_agent.algo.utils import update_settings_from_args
 from pr_agent.config_loader import get_settings, global_settings
 from pr_agent.git_providers.utils import apply_repo_settings
 from pr_agent.log import LoggingFormat, get_logger, setup_logger
+from pr_agent.log.metrics import (add_metrics_route, record_webhook_request,
+                                track_background_task)
 from pr_agent.servers.utils import verify_signature
 
 # Setup logging and router
@@ -32,7 +34,9 @@ async def handle_gitea_webhooks(background_tasks: BackgroundTasks, request: Requ
     context["git_provider"] = {}
 
     # Handle the webhook in background
-    background_tasks.add_task(handle_request, body, event=request.headers.get("X-Gitea-Event", None))
+    event = request.headers.get("X-Gitea-Event", None)
+    record_webhook_request("gitea_app", event)
+    background_tasks.add_task(track_background_task("gitea_app", handle_request), body, event=event)
     return {}
 
 async def get_body(request: Request):
@@ -206,6 +210,8 @@ def should_process_pr_logic(body) -> bool:
         get_logger().error(f"Failed 'should_process_pr_logic': {e}")
     return True
 
+add_metrics_route(router)
+
 # FastAPI app setup
 middleware = [Middleware(RawContextMiddleware)]
 app = FastAPI(middleware=middleware)
@@ -3,15 +3,13 @@ import json
 import os
 from typing import Union
 
-from pr_agent.agent.pr_agent import PRAgent
+from pr_agent.agent.command_dag import build_auto_command_dag, run_command_dag
+from pr_agent.agent.pr_agent import PRAgent, command2class
 from pr_agent.config_loader import get_settings
 from pr_agent.git_providers import get_git_provider
 from pr_agent.git_providers.utils import apply_repo_settings
 from pr_agent.log import get_logger
 from pr_agent.servers.github_app import handle_line_comments
-from pr_agent.tools.pr_code_suggestions import PRCodeSuggestions
-from pr_agent.tools.pr_description import PRDescription
-from pr_agent.tools.pr_reviewer import PRReviewer
 
 
 def is_true(value: Union[str, bool]) -> bool:
@@ -131,12 +129,18 @@ async def run_action():
                 get_logger().info(f"Running auto actions: auto_describe={auto_describe}, auto_review={auto_review}, auto_improve={auto_improve}")
 
                 # invoke by default all three tools
+                auto_commands = []
                 if auto_describe is None or is_true(auto_describe):
-                    await PRDescription(pr_url).run()
+                    auto_commands.append("describe")
                 if auto_review is None or is_true(auto_review):
-                    await PRReviewer(pr_url).run()
+                    auto_commands.append("review")
                 if auto_improve is None or is_true(auto_improve):
-                    await PRCodeSuggestions(pr_url).run()
+                    auto_commands.append("improve")
+
+                async def _run_tool(node):
+                    return await command2class[node.action](pr_url).run()
+
+                await run_command_dag(build_auto_command_dag(auto_commands), _run_tool, pr_url=pr_url)
         else:
             get_logger().info(f"Skipping action: {action}")
 
@@ -12,6 +12,7 @@ from starlette.middleware import Middleware
 from starlette_context import context
 from starlette_context.middleware import RawContextMiddleware
 
+from pr_agent.agent.command_dag import build_auto_command_dag, run_command_dag
 from pr_agent.agent.pr_agent import PRAgent
 from pr_agent.algo.utils import update_settings_from_args
 from pr_agent.config_loader import get_settings, global_settings
@@ -22,6 +23,8 @@ from pr_agent.git_providers.utils import apply_repo_settings
 from pr_agent.identity_providers import get_identity_provider
 from pr_agent.identity_providers.identity_provider import Eligibility
 from pr_agent.log import LoggingFormat, get_logger, setup_logger
+from pr_agent.log.metrics import (add_metrics_route, record_webhook_request,
+                                track_background_task)
 from pr_agent.servers.utils import DefaultDictWithTimeout, verify_signature
 
 setup_logger(fmt=LoggingFormat.JSON, level=get_settings().get("CONFIG.LOG_LEVEL", "DEBUG"))
@@ -50,7 +53,9 @@ async def handle_github_webhooks(background_tasks: BackgroundTasks, request: Req
     context["installation_id"] = installation_id
     context["settings"] = copy.deepcopy(global_settings)
     context["git_provider"] = {}
-    background_tasks.add_task(handle_request, body, event=request.headers.get("X-GitHub-Event", None))
+    event = request.headers.get("X-GitHub-Event", None)
+    record_webhook_request("github_app", event)
+    background_tasks.add_task(track_background_task("github_app", handle_request), body, event=event)
     return {}
 
 
@@ -405,14 +410,18 @@ async def _perform_auto_commands_github(commands_conf: str, agent: PRAgent, body
         get_logger().info(f"New PR, but no auto commands configured")
         return
     get_settings().set("config.is_auto_command", True)
-    for command in commands:
-        split_command = command.split(" ")
+
+    async def _perform_command(node):
+        # runs with its own copy of the settings, so the command args only apply to this command
+        split_command = node.command.split(" ")
         command = split_command[0]
         args = split_command[1:]
         other_args = update_settings_from_args(args)
         new_command = ' '.join([command] + other_args)
         get_logger().info(f"{commands_conf}. Performing auto command '{new_command}', for {api_url=}")
-        await agent.handle_request(api_url, new_command)
+        return await agent.handle_request(api_url, new_command)
+
+    await run_command_dag(build_auto_command_dag(commands), _perform_command, pr_url=api_url)
 
 
 @router.get("/")
@@ -420,6 +429,9 @@ async def root():
     return {"status": "ok"}
 
 
+add_metrics_route(router)
+
+
 if get_settings().github_app.override_deployment_type:
     # Override the deployment type to app
     get_settings().set("GITHUB.DEPLOYMENT_TYPE", "app")
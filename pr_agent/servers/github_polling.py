@@ -1,20 +1,90 @@
 import asyncio
-import multiprocessing
-import time
+import copy
+import functools
 import traceback
-from collections import deque
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
+from typing import Iterable
 
 import aiohttp
-import requests
+from starlette_context import request_cycle_context
 
 from pr_agent.agent.pr_agent import PRAgent
-from pr_agent.config_loader import get_settings
+from pr_agent.config_loader import get_settings, global_settings
 from pr_agent.git_providers import get_git_provider
 from pr_agent.log import LoggingFormat, get_logger, setup_logger
+from pr_agent.log.metrics import record_cache_lookup
 
 setup_logger(fmt=LoggingFormat.JSON, level=get_settings().get("CONFIG.LOG_LEVEL", "DEBUG"))
 NOTIFICATION_URL = "https://api.github.com/notifications"
+MAX_CACHED_RESPONSES = 1000
+
+
+class ConditionalResponseCache:
+    """
+    Remembers the ETag / Last-Modified validators and the body of GET responses, so repeated GETs can be sent as
+    conditional requests. GitHub does not count '304 Not Modified' responses against the rate limit.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESPONSES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # url -> (etag, last_modified, body)
+
+    def conditional_headers(self, url: str) -> dict:
+        entry = self._entries.get(url)
+        if not entry:
+            return {}
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def get_body(self, url: str):
+        entry = self._entries.get(url)
+        if not entry:
+            return None
+        self._entries.move_to_end(url)
+        return entry[2]
+
+    def store(self, url: str, response_headers, body):
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        self._entries[url] = (etag, last_modified, body)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+async def get_json_conditional(session, url, headers, response_cache: ConditionalResponseCache = None, params=None):
+    """
+    GET a JSON resource, revalidating a previously fetched copy with a conditional request when possible.
+
+    Returns:
+        (status, body). A '304 Not Modified' is returned as status 200 with the cached body.
+    """
+    request_headers = dict(headers)
+    if response_cache is not None:
+        request_headers.update(response_cache.conditional_headers(url))
+    async with session.get(url, headers=request_headers, params=params) as response:
+        if response.status == 304 and response_cache is not None:
+            cached_body = response_cache.get_body(url)
+            if cached_body is not None:
+                record_cache_lookup("github_conditional_requests", hits=1)
+                return 200, cached_body
+        if response.status != 200:
+            return response.status, None
+        body = await response.json()
+        if response_cache is not None:
+            record_cache_lookup("github_conditional_requests", misses=1)
+            response_cache.store(url, response.headers, body)
+        return response.status, body
 
 
 async def mark_notification_as_read(headers, notification, session):
@@ -37,28 +107,30 @@ def now() -> str:
     now_utc = now_utc.replace("+00:00", "Z")
     return now_utc
 
-async def async_handle_request(pr_url, rest_of_comment, comment_id, git_provider):
-    agent = PRAgent()
-    success = await agent.handle_request(
-        pr_url,
-        rest_of_comment,
-        notify=lambda: git_provider.add_eyes_reaction(comment_id)
-    )
-    return success
-
-def run_handle_request(pr_url, rest_of_comment, comment_id, git_provider):
-    return asyncio.run(async_handle_request(pr_url, rest_of_comment, comment_id, git_provider))
+def init_polling_worker():
+    """
+    Initializer of the long-lived worker processes that handle mentions.
+    """
+    get_settings().set("CONFIG.PUBLISH_OUTPUT_PROGRESS", False)
+    get_settings().set("pr_description.publish_description_as_comment", True)
 
 
 def process_comment_sync(pr_url, rest_of_comment, comment_id):
+    """
+    Handle a single mention in a worker process. Each call works on its own copy of the settings, since workers are
+    reused across mentions and tools may modify the settings while running.
+    """
     try:
-        # Run the async handle_request in a separate function
-        git_provider = get_git_provider()(pr_url=pr_url)
-        success = run_handle_request(pr_url, rest_of_comment, comment_id, git_provider)
+        asyncio.run(_process_comment_with_isolated_settings(pr_url, rest_of_comment, comment_id))
     except Exception as e:
         get_logger().error(f"Error processing comment: {e}", artifact={"traceback": traceback.format_exc()})
 
 
+async def _process_comment_with_isolated_settings(pr_url, rest_of_comment, comment_id):
+    with request_cycle_context({"settings": copy.deepcopy(global_settings), "git_provider": {}}):
+        await process_comment(pr_url, rest_of_comment, comment_id)
+
+
 async def process_comment(pr_url, rest_of_comment, comment_id):
     try:
         git_provider = get_git_provider()(pr_url=pr_url)
@@ -73,7 +145,74 @@ async def process_comment(pr_url, rest_of_comment, comment_id):
     except Exception as e:
         get_logger().error(f"Error processing comment: {e}", artifact={"traceback": traceback.format_exc()})
 
-async def is_valid_notification(notification, headers, handled_ids, session, user_id):
+class MentionWorkerPool:
+    """
+    Long-lived worker processes handling the mentions: a mention does not pay for a new process and for importing the
+    tools. A worker that dies (e.g. OOM-killed) breaks the whole process pool: the pool is then replaced, and the
+    mentions that were queued or running on it are submitted again, once.
+    """
+
+    def __init__(self, max_workers: int, max_pending_tasks: int, max_attempts: int = 2):
+        self.max_workers = max_workers
+        self.max_pending_tasks = max_pending_tasks
+        self.max_attempts = max_attempts
+        self.pending_tasks = set()
+        self.retry_queue = deque()  # (task, attempt) of the mentions lost with a broken pool
+        self.pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_polling_worker)
+
+    def _restart(self):
+        get_logger().error("The mention worker pool is broken, starting a new one")
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = self._new_pool()
+
+    def submit(self, tasks: Iterable[tuple]):
+        """
+        Starts handling the mentions, given as (pr_url, rest_of_comment, comment_id), without waiting for them, after
+        the mentions to submit again.
+        """
+        queue = deque(self.retry_queue)
+        self.retry_queue.clear()
+        queue.extend((task, 1) for task in tasks)
+        while queue:
+            if len(self.pending_tasks) >= self.max_workers + self.max_pending_tasks:
+                get_logger().error(f"Dropping {len(queue)} tasks from polling session, "
+                                   f"{len(self.pending_tasks)} tasks are already pending")
+                return
+            task, attempt = queue[0]
+            try:
+                future = asyncio.get_running_loop().run_in_executor(self.pool, process_comment_sync, *task)
+            except BrokenProcessPool:
+                self._restart()
+                continue
+            queue.popleft()
+            self.pending_tasks.add(future)
+            future.add_done_callback(functools.partial(self._on_task_done, task, attempt))
+
+    def _on_task_done(self, task: tuple, attempt: int, future: asyncio.Future):
+        self.pending_tasks.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            return
+        pr_url = task[0]
+        if isinstance(error, BrokenProcessPool) and attempt < self.max_attempts:
+            get_logger().warning(f"A mention worker died while handling a mention on {pr_url}, submitting it again")
+            self.retry_queue.append((task, attempt + 1))
+        else:
+            error_traceback = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+            get_logger().error(f"Failed to handle a mention on {pr_url}: {error!r}",
+                               artifact={"traceback": error_traceback})
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+async def is_valid_notification(notification, headers, handled_ids, session, user_id,
+                                response_cache: ConditionalResponseCache = None):
     try:
         if 'reason' in notification and notification['reason'] == 'mention':
             if 'subject' in notification and notification['subject']['type'] == 'PullRequest':
@@ -82,57 +221,56 @@ async def is_valid_notification(notification, headers, handled_ids, session, use
                 if not latest_comment or not isinstance(latest_comment, str):
                     get_logger().debug(f"no latest_comment")
                     return False, handled_ids
-                async with session.get(latest_comment, headers=headers) as comment_response:
-                    check_prev_comments = False
-                    user_tag = "@" + user_id
-                    if comment_response.status == 200:
-                        comment = await comment_response.json()
-                        if 'id' in comment:
-                            if comment['id'] in handled_ids:
-                                get_logger().debug(f"comment['id'] in handled_ids")
-                                return False, handled_ids
-                            else:
-                                handled_ids.add(comment['id'])
-                        if 'user' in comment and 'login' in comment['user']:
-                            if comment['user']['login'] == user_id:
-                                get_logger().debug(f"comment['user']['login'] == user_id")
-                                check_prev_comments = True
-                        comment_body = comment.get('body', '')
-                        if not comment_body:
-                            get_logger().debug(f"no comment_body")
+                comment_status, comment = await get_json_conditional(session, latest_comment, headers, response_cache)
+                check_prev_comments = False
+                user_tag = "@" + user_id
+                if comment_status == 200:
+                    if 'id' in comment:
+                        if comment['id'] in handled_ids:
+                            get_logger().debug(f"comment['id'] in handled_ids")
+                            return False, handled_ids
+                        else:
+                            handled_ids.add(comment['id'])
+                    if 'user' in comment and 'login' in comment['user']:
+                        if comment['user']['login'] == user_id:
+                            get_logger().debug(f"comment['user']['login'] == user_id")
+                            check_prev_comments = True
+                    comment_body = comment.get('body', '')
+                    if not comment_body:
+                        get_logger().debug(f"no comment_body")
+                        check_prev_comments = True
+                    else:
+                        if user_tag not in comment_body:
+                            get_logger().debug(f"user_tag not in comment_body")
                             check_prev_comments = True
                         else:
-                            if user_tag not in comment_body:
-                                get_logger().debug(f"user_tag not in comment_body")
-                                check_prev_comments = True
-                            else:
+                            get_logger().info(f"Polling, pr_url: {pr_url}",
+                                              artifact={"comment": comment_body})
+
+                    if not check_prev_comments:
+                        return True, handled_ids, comment, comment_body, pr_url, user_tag
+                    else: # we could not find the user tag in the latest comment. Check previous comments
+                        # get all comments in the PR
+                        requests_url = f"{pr_url}/comments".replace("pulls", "issues")
+                        _, comments = await get_json_conditional(session, requests_url, headers, response_cache)
+                        comments = (comments or [])[::-1]
+                        max_comment_to_scan = 4
+                        for comment in comments[:max_comment_to_scan]:
+                            if 'user' in comment and 'login' in comment['user']:
+                                if comment['user']['login'] == user_id:
+                                    continue
+                            comment_body = comment.get('body', '')
+                            if not comment_body:
+                                continue
+                            if user_tag in comment_body:
+                                get_logger().info("found user tag in previous comments")
                                 get_logger().info(f"Polling, pr_url: {pr_url}",
                                                   artifact={"comment": comment_body})
+                                return True, handled_ids, comment, comment_body, pr_url, user_tag
 
-                        if not check_prev_comments:
-                            return True, handled_ids, comment, comment_body, pr_url, user_tag
-                        else: # we could not find the user tag in the latest comment. Check previous comments
-                            # get all comments in the PR
-                            requests_url = f"{pr_url}/comments".replace("pulls", "issues")
-                            comments_response = requests.get(requests_url, headers=headers)
-                            comments = comments_response.json()[::-1]
-                            max_comment_to_scan = 4
-                            for comment in comments[:max_comment_to_scan]:
-                                if 'user' in comment and 'login' in comment['user']:
-                                    if comment['user']['login'] == user_id:
-                                        continue
-                                comment_body = comment.get('body', '')
-                                if not comment_body:
-                                    continue
-                                if user_tag in comment_body:
-                                    get_logger().info("found user tag in previous comments")
-                                    get_logger().info(f"Polling, pr_url: {pr_url}",
-                                                      artifact={"comment": comment_body})
-                                    return True, handled_ids, comment, comment_body, pr_url, user_tag
-
-                            get_logger().warning(f"Failed to fetch comments for PR: {pr_url}",
-                                                    artifact={"comments": comments})
-                            return False, handled_ids
+                        get_logger().warning(f"Failed to fetch comments for PR: {pr_url}",
+                                                artifact={"comments": comments})
+                        return False, handled_ids
 
         return False, handled_ids
     except Exception as e:
@@ -149,10 +287,10 @@ async def polling_loop():
     handled_ids = set()
     since = [now()]
     last_modified = [None]
+    etag = [None]
     git_provider = get_git_provider()()
     user_id = git_provider.get_user_id()
-    get_settings().set("CONFIG.PUBLISH_OUTPUT_PROGRESS", False)
-    get_settings().set("pr_description.publish_description_as_comment", True)
+    init_polling_worker()
 
     try:
         deployment_type = get_settings().github.deployment_type
@@ -166,76 +304,79 @@ async def polling_loop():
     if not token:
         raise ValueError("User token must be set to get notifications")
 
-    async with aiohttp.ClientSession() as session:
-        while True:
-            try:
-                await asyncio.sleep(5)
-                headers = {
-                    "Accept": "application/vnd.github.v3+json",
-                    "Authorization": f"Bearer {token}"
-                }
-                params = {
-                    "participating": "true"
-                }
-                if since[0]:
-                    params["since"] = since[0]
-                if last_modified[0]:
-                    headers["If-Modified-Since"] = last_modified[0]
-
-                async with session.get(NOTIFICATION_URL, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        if 'Last-Modified' in response.headers:
-                            last_modified[0] = response.headers['Last-Modified']
-                            since[0] = None
-                        notifications = await response.json()
-                        if not notifications:
+    max_workers = get_settings().get("github.polling_max_workers", 10)
+    max_pending_tasks = get_settings().get("github.polling_max_pending_tasks", 20)
+    response_cache = ConditionalResponseCache()
+
+    workers = MentionWorkerPool(max_workers, max_pending_tasks)
+    try:
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await asyncio.sleep(5)
+                    # the mentions lost with a broken worker pool
+                    workers.submit([])
+                    headers = {
+                        "Accept": "application/vnd.github.v3+json",
+                        "Authorization": f"Bearer {token}"
+                    }
+                    params = {
+                        "participating": "true"
+                    }
+                    if since[0]:
+                        params["since"] = since[0]
+                    notification_headers = dict(headers)
+                    if last_modified[0]:
+                        notification_headers["If-Modified-Since"] = last_modified[0]
+                    if etag[0]:
+                        notification_headers["If-None-Match"] = etag[0]
+
+                    async with session.get(NOTIFICATION_URL, headers=notification_headers, params=params) as response:
+                        if response.status == 200:
+                            if 'Last-Modified' in response.headers:
+                                last_modified[0] = response.headers['Last-Modified']
+                                since[0] = None
+                            etag[0] = response.headers.get('ETag', etag[0])
+                            notifications = await response.json()
+                        elif response.status == 304:
                             continue
-                        get_logger().info(f"Received {len(notifications)} notifications")
-                        task_queue = deque()
-                        for notification in notifications:
-                            if not notification:
-                                continue
-                            # mark notification as read
-                            await mark_notification_as_read(headers, notification, session)
-
-                            handled_ids.add(notification['id'])
-                            output = await is_valid_notification(notification, headers, handled_ids, session, user_id)
-                            if output[0]:
-                                _, handled_ids, comment, comment_body, pr_url, user_tag = output
-                                rest_of_comment = comment_body.split(user_tag)[1].strip()
-                                comment_id = comment['id']
-
-                                # Add to the task queue
-                                get_logger().info(
-                                    f"Adding comment processing to task queue for PR, {pr_url}, comment_body: {comment_body}")
-                                task_queue.append((process_comment_sync, (pr_url, rest_of_comment, comment_id)))
-                                get_logger().info(f"Queued comment processing for PR: {pr_url}")
-                            else:
-                                get_logger().debug(f"Skipping comment processing for PR")
-
-                        max_allowed_parallel_tasks = 10
-                        if task_queue:
-                            processes = []
-                            for i, (func, args) in enumerate(task_queue):  # Create  parallel tasks
-                                p = multiprocessing.Process(target=func, args=args)
-                                processes.append(p)
-                                p.start()
-                                if i > max_allowed_parallel_tasks:
-                                    get_logger().error(
-                                        f"Dropping {len(task_queue) - max_allowed_parallel_tasks} tasks from polling session")
-                                    break
-                            task_queue.clear()
-
-                            # Dont wait for all processes to complete. Move on to the next iteration
-                            # for p in processes:
-                            #     p.join()
-
-                    elif response.status != 304:
-                        print(f"Failed to fetch notifications. Status code: {response.status}")
-
-            except Exception as e:
-                get_logger().error(f"Polling exception during processing of a notification: {e}",
-                                   artifact={"traceback": traceback.format_exc()})
+                        else:
+                            get_logger().warning(f"Failed to fetch notifications. Status code: {response.status}")
+                            continue
+                    if not notifications:
+                        continue
+                    get_logger().info(f"Received {len(notifications)} notifications")
+                    task_queue = deque()
+                    for notification in notifications:
+                        if not notification:
+                            continue
+                        # mark notification as read
+                        await mark_notification_as_read(headers, notification, session)
+
+                        handled_ids.add(notification['id'])
+                        output = await is_valid_notification(notification, headers, handled_ids, session, user_id,
+                                                             response_cache)
+                        if output[0]:
+                            _, handled_ids, comment, comment_body, pr_url, user_tag = output
+                            rest_of_comment = comment_body.split(user_tag)[1].strip()
+                            comment_id = comment['id']
+
+                            # Add to the task queue
+                            get_logger().info(
+                                f"Adding comment processing to task queue for PR, {pr_url}, comment_body: {comment_body}")
+                            task_queue.append((pr_url, rest_of_comment, comment_id))
+                            get_logger().info(f"Queued comment processing for PR: {pr_url}")
+                        else:
+                            get_logger().debug(f"Skipping comment processing for PR")
+
+                    # Dont wait for the tasks to complete. Move on to the next iteration
+                    workers.submit(task_queue)
+
+                except Exception as e:
+                    get_logger().error(f"Polling exception during processing of a notification: {e}",
+                                       artifact={"traceback": traceback.format_exc()})
+    finally:
+        workers.shutdown()
 
 
 if __name__ == '__main__':
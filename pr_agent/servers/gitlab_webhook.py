@@ -17,6 +17,8 @@ from pr_agent.algo.utils import update_settings_from_args
 from pr_agent.config_loader import get_settings, global_settings
 from pr_agent.git_providers.utils import apply_repo_settings
 from pr_agent.log import LoggingFormat, get_logger, setup_logger
+from pr_agent.log.metrics import (add_metrics_route, record_webhook_request,
+                                track_background_task)
 from pr_agent.secret_providers import get_secret_provider
 from pr_agent.git_providers import get_git_provider_with_context
 
@@ -269,7 +271,8 @@ async def gitlab_webhook(background_tasks: BackgroundTasks, request: Request):
 
                 await handle_request(url, body, log_context, sender_id, notify=lambda: provider.add_eyes_reaction(comment_id))
 
-    background_tasks.add_task(inner, request_json)
+    record_webhook_request("gitlab_webhook", request.headers.get("X-Gitlab-Event", None))
+    background_tasks.add_task(track_background_task("gitlab_webhook", inner), request_json)
     end_time = datetime.now()
     get_logger().info(f"Processing time: {end_time - start_time}", request=request_json)
     return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder({"message": "success"}))
@@ -299,6 +302,9 @@ def handle_ask_line(body, data):
 async def root():
     return {"status": "ok"}
 
+
+add_metrics_route(router)
+
 gitlab_url = get_settings().get("GITLAB.URL", None)
 if not gitlab_url:
     raise ValueError("GITLAB.URL is not set")
@@ -189,3 +189,9 @@ proc_name = None
 #
 #       A callable that takes a server instance as the sole argument.
 #
+
+
+def child_exit(server, worker):
+    # drop the live gauges of the exited worker from the shared metrics (PROMETHEUS_MULTIPROC_DIR)
+    from pr_agent.log.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
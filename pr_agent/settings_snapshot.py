@@ -0,0 +1,95 @@
+"""
+Precompiled snapshot of the default settings files.
+
+`custom_merge_loader` parses and validates about 20 TOML files on every process start (and every gunicorn worker).
+The snapshot stores the parsed content of the packaged settings files in a compact marshal file, together with the
+sha256 of each source file. The loader uses a file's snapshot entry only if the file content still has the same hash,
+so an edited or replaced settings file is always parsed again. Secret files are never written to the snapshot, and
+env-var and secret overrides are applied on top by the other loaders, as before.
+
+Build it once, e.g. in the Docker image:
+
+    python -m pr_agent.settings_snapshot
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+import tomllib
+from os.path import abspath, dirname, join
+from typing import Dict, List, Optional
+
+SNAPSHOT_FORMAT_VERSION = 1
+PACKAGE_DIR = dirname(abspath(__file__))
+SNAPSHOT_PATH = join(PACKAGE_DIR, "settings", ".settings_snapshot.marshal")
+SECRET_FILE_NAMES = {".secrets.toml"}
+
+_SNAPSHOT_HEADER = ("pr-agent-settings-snapshot", SNAPSHOT_FORMAT_VERSION, marshal.version,
+                    tuple(sys.version_info[:2]))
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _snapshot_key(settings_file: str) -> str:
+    # relative to the package, so the snapshot stays valid when the installed package is moved
+    return os.path.normcase(os.path.relpath(abspath(settings_file), PACKAGE_DIR))
+
+
+def build_snapshot(settings_files: List[str], snapshot_path: str = SNAPSHOT_PATH) -> int:
+    """
+    Parses and validates the given TOML files, and writes their content to the snapshot file. Missing files and
+    secret files are skipped. Returns the number of files in the snapshot.
+    """
+    from pr_agent.custom_merge_loader import validate_file_security
+
+    entries = {}
+    for settings_file in settings_files:
+        if os.path.basename(settings_file) in SECRET_FILE_NAMES or not os.path.isfile(settings_file):
+            continue
+        with open(settings_file, "rb") as f:
+            content = f.read()
+        file_data = tomllib.loads(content.decode("utf-8"))
+        validate_file_security(file_data, settings_file)
+        entries[_snapshot_key(settings_file)] = (content_hash(content), file_data)
+
+    tmp_path = f"{snapshot_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        marshal.dump((_SNAPSHOT_HEADER, entries), f)
+    os.replace(tmp_path, snapshot_path)
+    return len(entries)
+
+
+def load_snapshot(snapshot_path: str = SNAPSHOT_PATH) -> Dict[str, tuple]:
+    """
+    Returns the snapshot entries (source file -> (sha256, parsed content)), or an empty dict if there is no usable
+    snapshot, for example one written by another Python version.
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            header, entries = marshal.load(f)
+    except Exception:
+        return {}  # missing, corrupted, or written with an incompatible marshal format
+    if header != _SNAPSHOT_HEADER or not isinstance(entries, dict):
+        return {}
+    return entries
+
+
+def get_snapshot_data(snapshot: Dict[str, tuple], settings_file: str, content: bytes) -> Optional[dict]:
+    """
+    Returns the parsed content of `settings_file` from the snapshot, if it was built from the same content.
+    """
+    entry = snapshot.get(_snapshot_key(settings_file))
+    if entry is None or entry[0] != content_hash(content):
+        return None
+    return entry[1]
+
+
+if __name__ == "__main__":
+    from pr_agent.config_loader import SETTINGS_FILES
+
+    path = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_PATH
+    num_files = build_snapshot(SETTINGS_FILES, path)
+    print(f"Wrote a settings snapshot of {num_files} files to {path}")
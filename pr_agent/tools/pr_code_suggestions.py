@@ -6,7 +6,7 @@ import textwrap
 import traceback
 from datetime import datetime
 from functools import partial
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from jinja2 import Environment, StrictUndefined
 
@@ -14,9 +14,14 @@ from pr_agent.algo import MAX_TOKENS
 from pr_agent.algo.ai_handlers.base_ai_handler import BaseAiHandler
 from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
 from pr_agent.algo.git_patch_processing import decouple_and_convert_to_hunks_with_lines_numbers
-from pr_agent.algo.pr_processing import (add_ai_metadata_to_diff_files,
+from pr_agent.algo.pr_processing import (OUTPUT_BUFFER_TOKENS_SOFT_THRESHOLD,
+                                         add_ai_metadata_to_diff_files,
                                          get_pr_diff, get_pr_multi_diffs,
                                          retry_with_fallback_models)
+from pr_agent.algo.reflection_batching import (ReflectionItem,
+                                               ReflectionScheduler,
+                                               split_feedback)
+from pr_agent.algo.reflection_context import build_reflection_context
 from pr_agent.algo.token_handler import TokenHandler
 from pr_agent.algo.utils import (ModelType, load_yaml, replace_code_tags,
                                  show_relevant_configurations, get_max_tokens, clip_tokens, get_model)
@@ -24,8 +29,10 @@ from pr_agent.config_loader import get_settings
 from pr_agent.git_providers import (AzureDevopsProvider, GithubProvider,
                                     GitLabProvider, get_git_provider,
                                     get_git_provider_with_context)
+from pr_agent.git_providers.async_provider import AsyncGitProvider
 from pr_agent.git_providers.git_provider import get_main_pr_language, GitProvider
 from pr_agent.log import get_logger
+from pr_agent.log.tracing import traced
 from pr_agent.servers.help import HelpMessage
 from pr_agent.tools.pr_description import insert_br_after_x_chars
 
@@ -91,8 +98,9 @@ class PRCodeSuggestions:
         self.progress_response = None
 
     async def run(self):
+        git_provider = AsyncGitProvider(self.git_provider)
         try:
-            if not self.git_provider.get_files():
+            if not await git_provider.get_files():
                 get_logger().info(f"PR has no files: {self.pr_url}, skipping code suggestions")
                 return None
 
@@ -105,9 +113,9 @@ class PRCodeSuggestions:
             if (get_settings().config.publish_output and get_settings().config.publish_output_progress and
                     not get_settings().config.get('is_auto_command', False)):
                 if self.git_provider.is_supported("gfm_markdown"):
-                    self.progress_response = self.git_provider.publish_comment(self.progress)
+                    self.progress_response = await git_provider.publish_comment(self.progress)
                 else:
-                    self.git_provider.publish_comment("Preparing suggestions...", is_temporary=True)
+                    await git_provider.publish_comment("Preparing suggestions...", is_temporary=True)
 
             # # call the model to get the suggestions, and self-reflect on them
             # if not self.is_extended:
@@ -126,7 +134,7 @@ class PRCodeSuggestions:
             # publish the suggestions
             if get_settings().config.publish_output:
                 # If a temporary comment was published, remove it
-                self.git_provider.remove_initial_comment()
+                await git_provider.remove_initial_comment()
 
                 # Publish table summarized suggestions
                 if ((not get_settings().pr_code_suggestions.commitable_code_suggestions) and
@@ -155,19 +163,19 @@ class PRCodeSuggestions:
 
                     # publish the PR comment
                     if get_settings().pr_code_suggestions.persistent_comment: # true by default
-                        self.publish_persistent_comment_with_history(self.git_provider,
-                                                                     pr_body,
-                                                                     initial_header="## PR Code Suggestions ✨",
-                                                                     update_header=True,
-                                                                     name="suggestions",
-                                                                     final_update_message=False,
-                                                                     max_previous_comments=get_settings().pr_code_suggestions.max_history_len,
-                                                                     progress_response=self.progress_response)
+                        await git_provider.run(self.publish_persistent_comment_with_history, self.git_provider,
+                                               pr_body,
+                                               initial_header="## PR Code Suggestions ✨",
+                                               update_header=True,
+                                               name="suggestions",
+                                               final_update_message=False,
+                                               max_previous_comments=get_settings().pr_code_suggestions.max_history_len,
+                                               progress_response=self.progress_response)
                     else:
                         if self.progress_response:
-                            self.git_provider.edit_comment(self.progress_response, body=pr_body)
+                            await git_provider.edit_comment(self.progress_response, body=pr_body)
                         else:
-                            self.git_provider.publish_comment(pr_body)
+                            await git_provider.publish_comment(pr_body)
 
                     # dual publishing mode
                     if int(get_settings().pr_code_suggestions.dual_publishing_score_threshold) > 0:
@@ -175,7 +183,7 @@ class PRCodeSuggestions:
                 else:
                     await self.push_inline_code_suggestions(data)
                     if self.progress_response:
-                        self.git_provider.remove_comment(self.progress_response)
+                        await git_provider.remove_comment(self.progress_response)
             else:
                 get_logger().info('Code suggestions generated for PR, but not published since publish_output is False.')
                 pr_body = self.generate_summarized_suggestions(data)
@@ -186,11 +194,11 @@ class PRCodeSuggestions:
                                artifact={"traceback": traceback.format_exc()})
             if get_settings().config.publish_output:
                 if self.progress_response:
-                    self.progress_response.delete()
+                    await git_provider.run(self.progress_response.delete)
                 else:
                     try:
-                        self.git_provider.remove_initial_comment()
-                        self.git_provider.publish_comment(f"Failed to generate code suggestions for PR")
+                        await git_provider.remove_initial_comment()
+                        await git_provider.publish_comment(f"Failed to generate code suggestions for PR")
                     except Exception as e:
                         get_logger().exception(f"Failed to update persistent review, error: {e}")
 
@@ -213,10 +221,11 @@ class PRCodeSuggestions:
                 get_settings().pr_code_suggestions.get('publish_output_no_suggestions', True)):
             get_logger().warning('No code suggestions found for the PR.')
             get_logger().debug(f"PR output", artifact=pr_body)
+            git_provider = AsyncGitProvider(self.git_provider)
             if self.progress_response:
-                self.git_provider.edit_comment(self.progress_response, body=pr_body)
+                await git_provider.edit_comment(self.progress_response, body=pr_body)
             else:
-                self.git_provider.publish_comment(pr_body)
+                await git_provider.publish_comment(pr_body)
         else:
             get_settings().data = {"artifact": ""}
 
@@ -271,7 +280,7 @@ class PRCodeSuggestions:
 
         if max_previous_comments > 0:
             try:
-                prev_comments = list(git_provider.get_issue_comments())
+                prev_comments = git_provider.get_persistent_comment_candidates(initial_header)
                 for comment in prev_comments:
                     if comment.body.startswith(initial_header):
                         prev_suggestions = comment.body
@@ -339,6 +348,7 @@ class PRCodeSuggestions:
                             comment = progress_response
                         else:
                             git_provider.edit_comment(comment, pr_comment_updated)
+                        git_provider.record_persistent_comment(initial_header, comment)
                         return comment
             except Exception as e:
                 get_logger().exception(f"Failed to update persistent review, error: {e}")
@@ -352,6 +362,7 @@ class PRCodeSuggestions:
             new_comment = progress_response
         else:
             new_comment = git_provider.publish_comment(pr_comment)
+        git_provider.record_persistent_comment(initial_header, new_comment)
         return new_comment
 
 
@@ -365,11 +376,12 @@ class PRCodeSuggestions:
         return up_to_commit_txt
 
     async def _prepare_prediction(self, model: str) -> dict:
-        self.patches_diff = get_pr_diff(self.git_provider,
-                                        self.token_handler,
-                                        model,
-                                        add_line_numbers_to_hunks=True,
-                                        disable_extra_lines=False)
+        git_provider = AsyncGitProvider(self.git_provider)
+        self.patches_diff = await git_provider.run(get_pr_diff, self.git_provider,
+                                                   self.token_handler,
+                                                   model,
+                                                   add_line_numbers_to_hunks=True,
+                                                   disable_extra_lines=False)
         self.patches_diff_list = [self.patches_diff]
         self.patches_diff_no_line_number = self.remove_line_numbers([self.patches_diff])[0]
 
@@ -384,6 +396,12 @@ class PRCodeSuggestions:
         return data
 
     async def _get_prediction(self, model: str, patches_diff: str, patches_diff_no_line_number: str) -> dict:
+        data = await self._generate_suggestions(model, patches_diff, patches_diff_no_line_number)
+        reflection_diff = self._get_reflection_diff(patches_diff, data["code_suggestions"])
+        await self._apply_self_reflection(data, reflection_diff, self._get_reflection_model(model))
+        return data
+
+    async def _generate_suggestions(self, model: str, patches_diff: str, patches_diff_no_line_number: str) -> dict:
         variables = copy.deepcopy(self.vars)
         variables["diff"] = patches_diff  # update diff
         variables["diff_no_line_numbers"] = patches_diff_no_line_number  # update diff
@@ -391,15 +409,16 @@ class PRCodeSuggestions:
         system_prompt = environment.from_string(self.pr_code_suggestions_prompt_system).render(variables)
         user_prompt = environment.from_string(get_settings().pr_code_suggestions_prompt.user).render(variables)
         response, finish_reason = await self.ai_handler.chat_completion(
-            model=model, temperature=get_settings().config.temperature, system=system_prompt, user=user_prompt)
+            model=model, temperature=get_settings().config.temperature, system=system_prompt, user=user_prompt,
+            local_prompt_tokens=self.token_handler.count_prompt_tokens(system_prompt, user_prompt, model))
         if not get_settings().config.publish_output:
             get_settings().system_prompt = system_prompt
             get_settings().user_prompt = user_prompt
 
         # load suggestions from the AI response
-        data = self._prepare_pr_code_suggestions(response)
+        return self._prepare_pr_code_suggestions(response)
 
-        # self-reflect on suggestions (mandatory, since line numbers are generated now here)
+    def _get_reflection_model(self, model: str) -> str:
         model_reflect_with_reasoning = get_model('model_reasoning')
         fallbacks = get_settings().config.fallback_models
         if model_reflect_with_reasoning == get_settings().config.model and model != get_settings().config.model and fallbacks and model == \
@@ -407,6 +426,10 @@ class PRCodeSuggestions:
             # we are using a fallback model (should not happen on regular conditions)
             get_logger().warning(f"Using the same model for self-reflection as the one used for suggestions")
             model_reflect_with_reasoning = model
+        return model_reflect_with_reasoning
+
+    async def _apply_self_reflection(self, data: dict, patches_diff: str, model_reflect_with_reasoning: str):
+        # self-reflect on suggestions (mandatory, since line numbers are generated now here)
         response_reflect = await self.self_reflect_on_suggestions(data["code_suggestions"],
                                                                   patches_diff, model=model_reflect_with_reasoning)
         if response_reflect:
@@ -417,11 +440,109 @@ class PRCodeSuggestions:
                 suggestion["score"] = 7
                 suggestion["score_why"] = ""
 
-        return data
+    async def _get_predictions_pipelined(self, model: str) -> List[dict]:
+        """
+        Generates the suggestions of each chunk, and self-reflects on them, as a pipeline: the suggestions of a
+        chunk are handed to the reflection scheduler as soon as they are generated, and up to
+        pr_code_suggestions.reflection_concurrency reflections run while the next chunks are generated.
+        With pr_code_suggestions.batch_reflection, the suggestions of several chunks are reflected on in one call,
+        within the token budget of the reasoning model.
+        Chunks are generated concurrently with pr_code_suggestions.parallel_calls, and one after another otherwise.
+
+        Returns:
+            The predictions, in the order of the chunks.
+        """
+        chunks = list(zip(self.patches_diff_list, self.patches_diff_list_no_line_numbers, strict=True))
+        model_reflect_with_reasoning = self._get_reflection_model(model)
+        predictions: List[Optional[dict]] = [None] * len(chunks)
+        scheduler = ReflectionScheduler(partial(self._reflect_on_batch, model=model_reflect_with_reasoning),
+                                        max_batch_tokens=self._get_reflection_batch_budget(model_reflect_with_reasoning),
+                                        concurrency=int(get_settings().pr_code_suggestions.get("reflection_concurrency", 3)))
+
+        async def generate(index: int, patches_diff: str, patches_diff_no_line_numbers: str):
+            data = await self._generate_suggestions(model, patches_diff, patches_diff_no_line_numbers)
+            predictions[index] = data
+            if data.get("code_suggestions"):
+                reflection_diff = self._get_reflection_diff(patches_diff, data["code_suggestions"])
+                tokens = self.token_handler.count_tokens(reflection_diff) + \
+                         self.token_handler.count_tokens(str(data["code_suggestions"]))
+                scheduler.add(ReflectionItem(data, reflection_diff, tokens))
+
+        try:
+            if get_settings().pr_code_suggestions.parallel_calls:
+                await asyncio.gather(*[generate(i, *chunk) for i, chunk in enumerate(chunks)])
+            else:
+                for i, chunk in enumerate(chunks):
+                    await generate(i, *chunk)
+            await scheduler.close()
+        finally:
+            scheduler.cancel()
+        get_logger().info(f"Self-reflected on {len(chunks)} chunks in {scheduler.num_batches} calls")
+        return predictions
+
+    def _get_reflection_diff(self, patches_diff: str, suggestion_list: List) -> str:
+        """
+        The diff context of the self-reflection on the suggestions of a chunk: only the hunks the suggestions refer
+        to, with pr_code_suggestions.reflection_context_margin_lines around their code.
+        """
+        if not get_settings().pr_code_suggestions.get("reflection_relevant_hunks_only", True):
+            return patches_diff
+        try:
+            margin = int(get_settings().pr_code_suggestions.get("reflection_context_margin_lines", 3))
+            reflection_diff = build_reflection_context(patches_diff, suggestion_list, margin=margin)
+        except Exception as e:
+            get_logger().warning(f"Failed to build the reflection diff context, using the whole chunk: {e}")
+            return patches_diff
+        if reflection_diff != patches_diff:
+            get_logger().debug(f"Reflection diff context reduced from {len(patches_diff)} "
+                               f"to {len(reflection_diff)} characters")
+        return reflection_diff
+
+    def _get_reflection_batch_budget(self, model_reflect_with_reasoning: str) -> int:
+        """
+        The tokens available for the suggestions and diffs of a merged reflection call, or 0 to reflect on every
+        chunk alone.
+        """
+        try:
+            system_prompt, user_prompt = self._render_reflection_prompts([], "")
+            budget = get_max_tokens(model_reflect_with_reasoning) - OUTPUT_BUFFER_TOKENS_SOFT_THRESHOLD - \
+                self.token_handler.count_tokens(system_prompt) - self.token_handler.count_tokens(user_prompt)
+        except Exception as e:
+            get_logger().warning(f"Failed to compute the reflection token budget, reflecting on each chunk alone: {e}")
+            return 0
+        if not get_settings().pr_code_suggestions.get("batch_reflection", True):
+            return 0
+        max_batch_tokens = int(get_settings().pr_code_suggestions.get("reflection_max_batch_tokens", 0))
+        if max_batch_tokens > 0:
+            budget = min(budget, max_batch_tokens)
+        return max(budget, 0)
+
+    async def _reflect_on_batch(self, batch: List[ReflectionItem], model: str):
+        if len(batch) == 1:
+            await self._apply_self_reflection(batch[0].data, batch[0].patches_diff, model)
+            return
+
+        suggestion_list = [suggestion for item in batch for suggestion in item.data["code_suggestions"]]
+        patches_diff = "\n\n\n".join(item.patches_diff.strip() for item in batch)
+        response_reflect = await self.self_reflect_on_suggestions(suggestion_list, patches_diff, model=model)
+        feedback = []
+        if response_reflect:
+            feedback = (load_yaml(response_reflect) or {}).get("code_suggestions", [])
+        if len(feedback) != len(suggestion_list):
+            # the feedback cannot be matched to the suggestions of each chunk
+            get_logger().warning(f"Merged self-reflection returned {len(feedback)} feedbacks for "
+                                 f"{len(suggestion_list)} suggestions, reflecting on each chunk alone")
+            await asyncio.gather(*[self._apply_self_reflection(item.data, item.patches_diff, model) for item in batch])
+            return
+        for item, item_feedback in zip(batch, split_feedback(batch, feedback), strict=True):
+            await self.apply_self_reflection_feedback(item.data, item_feedback)
 
     async def analyze_self_reflection_response(self, data, response_reflect):
         response_reflect_yaml = load_yaml(response_reflect)
         code_suggestions_feedback = response_reflect_yaml.get("code_suggestions", [])
+        await self.apply_self_reflection_feedback(data, code_suggestions_feedback)
+
+    async def apply_self_reflection_feedback(self, data, code_suggestions_feedback):
         if code_suggestions_feedback and len(code_suggestions_feedback) == len(data["code_suggestions"]):
             for i, suggestion in enumerate(data["code_suggestions"]):
                 try:
@@ -537,15 +658,16 @@ class PRCodeSuggestions:
         return data
 
     async def push_inline_code_suggestions(self, data):
+        git_provider = AsyncGitProvider(self.git_provider)
         code_suggestions = []
 
         if not data['code_suggestions']:
             get_logger().info('No suggestions found to improve this PR.')
             if self.progress_response:
-                return self.git_provider.edit_comment(self.progress_response,
-                                                      body='No suggestions found to improve this PR.')
+                return await git_provider.edit_comment(self.progress_response,
+                                                       body='No suggestions found to improve this PR.')
             else:
-                return self.git_provider.publish_comment('No suggestions found to improve this PR.')
+                return await git_provider.publish_comment('No suggestions found to improve this PR.')
 
         for d in data['code_suggestions']:
             try:
@@ -572,11 +694,11 @@ class PRCodeSuggestions:
             except Exception:
                 get_logger().info(f"Could not parse suggestion: {d}")
 
-        is_successful = self.git_provider.publish_code_suggestions(code_suggestions)
+        is_successful = await git_provider.publish_code_suggestions(code_suggestions)
         if not is_successful:
             get_logger().info("Failed to publish code suggestions, trying to publish each suggestion separately")
             for code_suggestion in code_suggestions:
-                self.git_provider.publish_code_suggestions([code_suggestion])
+                await git_provider.publish_code_suggestions([code_suggestion])
 
     def dedent_code(self, relevant_file, relevant_lines_start, new_code_snippet):
         try:  # dedent code snippet
@@ -668,48 +790,36 @@ class PRCodeSuggestions:
             return patches_diff_list
 
     async def prepare_prediction_main(self, model: str) -> dict:
+        git_provider = AsyncGitProvider(self.git_provider)
         # get PR diff
+        max_calls = get_settings().pr_code_suggestions.max_number_of_calls
         if get_settings().pr_code_suggestions.decouple_hunks:
-            self.patches_diff_list = get_pr_multi_diffs(self.git_provider,
-                                                        self.token_handler,
-                                                        model,
-                                                        max_calls=get_settings().pr_code_suggestions.max_number_of_calls,
-                                                        add_line_numbers=True)  # decouple hunk with line numbers
+            self.patches_diff_list = await git_provider.run(get_pr_multi_diffs, self.git_provider, self.token_handler,
+                                                            model, max_calls=max_calls,
+                                                            add_line_numbers=True)  # decouple hunk with line numbers
             self.patches_diff_list_no_line_numbers = self.remove_line_numbers(self.patches_diff_list)  # decouple hunk
 
         else:
             # non-decoupled hunks
-            self.patches_diff_list_no_line_numbers = get_pr_multi_diffs(self.git_provider,
-                                                                        self.token_handler,
-                                                                        model,
-                                                                        max_calls=get_settings().pr_code_suggestions.max_number_of_calls,
-                                                                        add_line_numbers=False)
+            self.patches_diff_list_no_line_numbers = await git_provider.run(get_pr_multi_diffs, self.git_provider,
+                                                                            self.token_handler, model,
+                                                                            max_calls=max_calls,
+                                                                            add_line_numbers=False)
             self.patches_diff_list = await self.convert_to_decoupled_with_line_numbers(
                 self.patches_diff_list_no_line_numbers, model)
             if not self.patches_diff_list:
                 # fallback to decoupled hunks
-                self.patches_diff_list = get_pr_multi_diffs(self.git_provider,
-                                                            self.token_handler,
-                                                            model,
-                                                            max_calls=get_settings().pr_code_suggestions.max_number_of_calls,
-                                                            add_line_numbers=True)  # decouple hunk with line numbers
+                self.patches_diff_list = await git_provider.run(get_pr_multi_diffs, self.git_provider,
+                                                                self.token_handler, model, max_calls=max_calls,
+                                                                add_line_numbers=True)  # decouple hunk with line numbers
 
         if self.patches_diff_list:
             get_logger().info(f"Number of PR chunk calls: {len(self.patches_diff_list)}")
             get_logger().debug(f"PR diff:", artifact=self.patches_diff_list)
 
-            # parallelize calls to AI:
-            if get_settings().pr_code_suggestions.parallel_calls:
-                prediction_list = await asyncio.gather(
-                    *[self._get_prediction(model, patches_diff, patches_diff_no_line_numbers) for
-                      patches_diff, patches_diff_no_line_numbers in
-                      zip(self.patches_diff_list, self.patches_diff_list_no_line_numbers)])
-                self.prediction_list = prediction_list
-            else:
-                prediction_list = []
-                for patches_diff, patches_diff_no_line_numbers in zip(self.patches_diff_list, self.patches_diff_list_no_line_numbers):
-                    prediction = await self._get_prediction(model, patches_diff, patches_diff_no_line_numbers)
-                    prediction_list.append(prediction)
+            # generate and self-reflect on the chunks as a pipeline
+            prediction_list = await self._get_predictions_pipelined(model)
+            self.prediction_list = prediction_list
 
             data = {"code_suggestions": []}
             for j, predictions in enumerate(prediction_list):  # each call adds an element to the list
@@ -899,6 +1009,7 @@ class PRCodeSuggestions:
         else:  # score < 7
             return "Low"
 
+    @traced("pr_code_suggestions.self_reflect")
     async def self_reflect_on_suggestions(self,
                                           suggestion_list: List,
                                           patches_diff: str,
@@ -909,36 +1020,45 @@ class PRCodeSuggestions:
             return ""
 
         try:
-            suggestion_str = ""
-            for i, suggestion in enumerate(suggestion_list):
-                suggestion_str += f"suggestion {i + 1}: " + str(suggestion) + '\n\n'
-
-            variables = {'suggestion_list': suggestion_list,
-                         'suggestion_str': suggestion_str,
-                         "diff": patches_diff,
-                         'num_code_suggestions': len(suggestion_list),
-                         'prev_suggestions_str': prev_suggestions_str,
-                         "is_ai_metadata": get_settings().get("config.enable_ai_metadata", False),
-                         'duplicate_prompt_examples': get_settings().config.get('duplicate_prompt_examples', False)}
-            environment = Environment(undefined=StrictUndefined)
-
-            if dedicated_prompt:
-                system_prompt_reflect = environment.from_string(
-                    get_settings().get(dedicated_prompt).system).render(variables)
-                user_prompt_reflect = environment.from_string(
-                    get_settings().get(dedicated_prompt).user).render(variables)
-            else:
-                system_prompt_reflect = environment.from_string(
-                    get_settings().pr_code_suggestions_reflect_prompt.system).render(variables)
-                user_prompt_reflect = environment.from_string(
-                    get_settings().pr_code_suggestions_reflect_prompt.user).render(variables)
+            system_prompt_reflect, user_prompt_reflect = self._render_reflection_prompts(
+                suggestion_list, patches_diff, prev_suggestions_str, dedicated_prompt)
+            local_prompt_tokens = self.token_handler.count_prompt_tokens(system_prompt_reflect, user_prompt_reflect,
+                                                                         model)
 
             with get_logger().contextualize(command="self_reflect_on_suggestions"):
                 response_reflect, finish_reason_reflect = await self.ai_handler.chat_completion(model=model,
                                                                                                 system=system_prompt_reflect,
                                                                                                 temperature=get_settings().config.temperature,
-                                                                                                user=user_prompt_reflect)
+                                                                                                user=user_prompt_reflect,
+                                                                                                local_prompt_tokens=local_prompt_tokens)
         except Exception as e:
             get_logger().info(f"Could not reflect on suggestions, error: {e}")
             return ""
-        return response_reflect
\ No newline at end of file
+        return response_reflect
+
+    def _render_reflection_prompts(self, suggestion_list: List, patches_diff: str, prev_suggestions_str: str = "",
+                                   dedicated_prompt: str = ""):
+        suggestion_str = ""
+        for i, suggestion in enumerate(suggestion_list):
+            suggestion_str += f"suggestion {i + 1}: " + str(suggestion) + '\n\n'
+
+        variables = {'suggestion_list': suggestion_list,
+                     'suggestion_str': suggestion_str,
+                     "diff": patches_diff,
+                     'num_code_suggestions': len(suggestion_list),
+                     'prev_suggestions_str': prev_suggestions_str,
+                     "is_ai_metadata": get_settings().get("config.enable_ai_metadata", False),
+                     'duplicate_prompt_examples': get_settings().config.get('duplicate_prompt_examples', False)}
+        environment = Environment(undefined=StrictUndefined)
+
+        if dedicated_prompt:
+            system_prompt_reflect = environment.from_string(
+                get_settings().get(dedicated_prompt).system).render(variables)
+            user_prompt_reflect = environment.from_string(
+                get_settings().get(dedicated_prompt).user).render(variables)
+        else:
+            system_prompt_reflect = environment.from_string(
+                get_settings().pr_code_suggestions_reflect_prompt.system).render(variables)
+            user_prompt_reflect = environment.from_string(
+                get_settings().pr_code_suggestions_reflect_prompt.user).render(variables)
+        return system_prompt_reflect, user_prompt_reflect
@@ -22,6 +22,7 @@ from pr_agent.algo.utils import (ModelType, PRDescriptionHeader, clip_tokens,
 from pr_agent.config_loader import get_settings
 from pr_agent.git_providers import (GithubProvider, get_git_provider,
                                     get_git_provider_with_context)
+from pr_agent.git_providers.async_provider import AsyncGitProvider
 from pr_agent.git_providers.git_provider import get_main_pr_language
 from pr_agent.log import get_logger
 from pr_agent.servers.help import HelpMessage
@@ -93,13 +94,14 @@ class PRDescription:
         self.file_label_dict = None
 
     async def run(self):
+        git_provider = AsyncGitProvider(self.git_provider)
         try:
             get_logger().info(f"Generating a PR description for pr_id: {self.pr_id}")
             relevant_configs = {'pr_description': dict(get_settings().pr_description),
                                 'config': dict(get_settings().config)}
             get_logger().debug("Relevant configs", artifact=relevant_configs)
             if get_settings().config.publish_output and not get_settings().config.get('is_auto_command', False):
-                self.git_provider.publish_comment("Preparing PR description...", is_temporary=True)
+                await git_provider.publish_comment("Preparing PR description...", is_temporary=True)
 
             # ticket extraction if exists
             await extract_and_cache_pr_tickets(self.git_provider, self.vars)
@@ -110,7 +112,7 @@ class PRDescription:
                 self._prepare_data()
             else:
                 get_logger().warning(f"Empty prediction, PR: {self.pr_id}")
-                self.git_provider.remove_initial_comment()
+                await git_provider.remove_initial_comment()
                 return None
 
             if get_settings().pr_description.enable_semantic_files_types:
@@ -157,14 +159,14 @@ class PRDescription:
 
                 # publish labels
                 if get_settings().pr_description.publish_labels and pr_labels and self.git_provider.is_supported("get_labels"):
-                    original_labels = self.git_provider.get_pr_labels(update=True)
+                    original_labels = await git_provider.get_pr_labels(update=True)
                     get_logger().debug(f"original labels", artifact=original_labels)
                     user_labels = get_user_labels(original_labels)
                     new_labels = pr_labels + user_labels
                     get_logger().debug(f"published labels", artifact=new_labels)
                     if set(new_labels) != set(original_labels):
                         get_logger().info(f"Setting describe labels:\n{new_labels}")
-                        self.git_provider.publish_labels(new_labels)
+                        await git_provider.publish_labels(new_labels)
                     else:
                         get_logger().debug(f"Labels are the same, not updating")
 
@@ -172,24 +174,24 @@ class PRDescription:
                 if get_settings().pr_description.publish_description_as_comment:
                     full_markdown_description = f"## Title\n\n{pr_title.strip()}\n\n___\n{pr_body}"
                     if get_settings().pr_description.publish_description_as_comment_persistent:
-                        self.git_provider.publish_persistent_comment(full_markdown_description,
-                                                                     initial_header="## Title",
-                                                                     update_header=True,
-                                                                     name="describe",
-                                                                     final_update_message=False, )
+                        await git_provider.publish_persistent_comment(full_markdown_description,
+                                                                      initial_header="## Title",
+                                                                      update_header=True,
+                                                                      name="describe",
+                                                                      final_update_message=False, )
                     else:
-                        self.git_provider.publish_comment(full_markdown_description)
+                        await git_provider.publish_comment(full_markdown_description)
                 else:
-                    self.git_provider.publish_description(pr_title.strip(), pr_body)
+                    await git_provider.publish_description(pr_title.strip(), pr_body)
 
                     # publish final update message
                     if (get_settings().pr_description.final_update_message and not get_settings().config.get('is_auto_command', False)):
-                        latest_commit_url = self.git_provider.get_latest_commit_url()
+                        latest_commit_url = await git_provider.get_latest_commit_url()
                         if latest_commit_url:
                             pr_url = self.git_provider.get_pr_url()
                             update_comment = f"**[PR Description]({pr_url})** updated to latest commit ({latest_commit_url})"
-                            self.git_provider.publish_comment(update_comment)
-                self.git_provider.remove_initial_comment()
+                            await git_provider.publish_comment(update_comment)
+                await git_provider.remove_initial_comment()
             else:
                 get_logger().info('PR description, but not published since publish_output is False.')
                 get_settings().data = {"artifact": pr_body}
@@ -201,12 +203,14 @@ class PRDescription:
         return ""
 
     async def _prepare_prediction(self, model: str) -> None:
+        git_provider = AsyncGitProvider(self.git_provider)
         if get_settings().pr_description.use_description_markers and 'pr_agent:' not in self.user_description:
             get_logger().info("Markers were enabled, but user description does not contain markers. Skipping AI prediction")
             return None
 
         large_pr_handling = get_settings().pr_description.enable_large_pr_handling and "pr_description_only_files_prompts" in get_settings()
-        output = get_pr_diff(self.git_provider, self.token_handler, model, large_pr_handling=large_pr_handling, return_remaining_files=True)
+        output = await git_provider.run(get_pr_diff, self.git_provider, self.token_handler, model,
+                                        large_pr_handling=large_pr_handling, return_remaining_files=True)
         if isinstance(output, tuple):
             patches_diff, remaining_files_list = output
         else:
@@ -237,7 +241,7 @@ class PRDescription:
                 get_settings().pr_description_only_files_prompts.user,
             )
             (patches_compressed_list, total_tokens_list, deleted_files_list, remaining_files_list, file_dict,
-             files_in_patches_list) = get_pr_diff_multiple_patchs(
+             files_in_patches_list) = await git_provider.run(get_pr_diff_multiple_patchs,
                 self.git_provider, token_handler_only_files_prompt, model)
 
             # get the files prediction for each patch
@@ -437,7 +441,8 @@ class PRDescription:
             model=model,
             temperature=get_settings().config.temperature,
             system=system_prompt,
-            user=user_prompt
+            user=user_prompt,
+            local_prompt_tokens=self.token_handler.count_prompt_tokens(system_prompt, user_prompt, model)
         )
 
         return response
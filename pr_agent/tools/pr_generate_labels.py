@@ -145,7 +145,8 @@ class PRGenerateLabels:
             model=model,
             temperature=get_settings().config.temperature,
             system=system_prompt,
-            user=user_prompt
+            user=user_prompt,
+            local_prompt_tokens=self.token_handler.count_prompt_tokens(system_prompt, user_prompt, model)
         )
 
         return response
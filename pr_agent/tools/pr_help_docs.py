@@ -275,7 +275,8 @@ class PredictionPreparator:
             raise ValueError("PredictionPreparator not initialized")
         try:
             response, finish_reason = await self.ai_handler.chat_completion(
-                model=model, temperature=get_settings().config.temperature, system=self.system_prompt, user=self.user_prompt)
+                model=model, temperature=get_settings().config.temperature, system=self.system_prompt, user=self.user_prompt,
+                local_prompt_tokens=TokenHandler().count_prompt_tokens(self.system_prompt, self.user_prompt, model))
             return response
         except Exception as e:
             get_logger().exception("Caught exception during prediction.", artifacts={'system': self.system_prompt, 'user': self.user_prompt})
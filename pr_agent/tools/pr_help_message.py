@@ -52,7 +52,8 @@ class PRHelpMessage:
             system_prompt = environment.from_string(get_settings().pr_help_prompts.system).render(variables)
             user_prompt = environment.from_string(get_settings().pr_help_prompts.user).render(variables)
             response, finish_reason = await self.ai_handler.chat_completion(
-                model=model, temperature=get_settings().config.temperature, system=system_prompt, user=user_prompt)
+                model=model, temperature=get_settings().config.temperature, system=system_prompt, user=user_prompt,
+                local_prompt_tokens=self.token_handler.count_prompt_tokens(system_prompt, user_prompt, model))
             return response
         except Exception as e:
             get_logger().error(f"Error while preparing prediction: {e}")
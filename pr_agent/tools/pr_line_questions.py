@@ -162,5 +162,6 @@ class PR_LineQuestions:
             print(f"\nUser prompt:\n{user_prompt}")
 
         response, finish_reason = await self.ai_handler.chat_completion(
-            model=model, temperature=get_settings().config.temperature, system=system_prompt, user=user_prompt)
+            model=model, temperature=get_settings().config.temperature, system=system_prompt, user=user_prompt,
+            local_prompt_tokens=self.token_handler.count_prompt_tokens(system_prompt, user_prompt, model))
         return response
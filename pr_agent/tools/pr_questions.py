@@ -110,10 +110,13 @@ class PRQuestions:
             img_path = self.vars['img_path']
             response, finish_reason = await (self.ai_handler.chat_completion
                                              (model=model, temperature=get_settings().config.temperature,
-                                              system=system_prompt, user=user_prompt, img_path=img_path))
+                                              system=system_prompt, user=user_prompt, img_path=img_path,
+                                              local_prompt_tokens=self.token_handler.count_prompt_tokens(
+                                                  system_prompt, user_prompt, model)))
         else:
             response, finish_reason = await self.ai_handler.chat_completion(
-                model=model, temperature=get_settings().config.temperature, system=system_prompt, user=user_prompt)
+                model=model, temperature=get_settings().config.temperature, system=system_prompt, user=user_prompt,
+                local_prompt_tokens=self.token_handler.count_prompt_tokens(system_prompt, user_prompt, model))
         return response
 
     def gitlab_protections(self, model_answer: str) -> str:
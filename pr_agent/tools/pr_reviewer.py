@@ -19,6 +19,7 @@ from pr_agent.algo.utils import (ModelType, PRReviewHeader,
 from pr_agent.config_loader import get_settings
 from pr_agent.git_providers import (get_git_provider,
                                     get_git_provider_with_context)
+from pr_agent.git_providers.async_provider import AsyncGitProvider
 from pr_agent.git_providers.git_provider import (IncrementalPR,
                                                  get_main_pr_language)
 from pr_agent.log import get_logger
@@ -118,12 +119,13 @@ class PRReviewer:
         return incremental
 
     async def run(self) -> None:
+        git_provider = AsyncGitProvider(self.git_provider)
         try:
-            if not self.git_provider.get_files():
+            if not await git_provider.get_files():
                 get_logger().info(f"PR has no files: {self.pr_url}, skipping review")
                 return None
 
-            if self.incremental.is_incremental and not self._can_run_incremental_review():
+            if self.incremental.is_incremental and not await git_provider.run(self._can_run_incremental_review):
                 return None
 
             # if isinstance(self.args, list) and self.args and self.args[0] == 'auto_approve':
@@ -145,19 +147,20 @@ class PRReviewer:
                 if hasattr(self.git_provider, "previous_review"):
                     previous_review_url = self.git_provider.previous_review.html_url
                 if get_settings().config.publish_output:
-                    self.git_provider.publish_comment(f"Incremental Review Skipped\n"
+                    await git_provider.publish_comment(f"Incremental Review Skipped\n"
                                     f"No files were changed since the [previous PR Review]({previous_review_url})")
                 return None
 
             if get_settings().config.publish_output and not get_settings().config.get('is_auto_command', False):
-                self.git_provider.publish_comment("Preparing review...", is_temporary=True)
+                await git_provider.publish_comment("Preparing review...", is_temporary=True)
 
             await retry_with_fallback_models(self._prepare_prediction, model_type=ModelType.REGULAR)
             if not self.prediction:
-                self.git_provider.remove_initial_comment()
+                await git_provider.remove_initial_comment()
                 return None
 
-            pr_review = self._prepare_pr_review()
+            # the review labels are published while preparing the review
+            pr_review = await git_provider.run(self._prepare_pr_review)
             get_logger().debug(f"PR output", artifact=pr_review)
 
             should_publish = get_settings().config.publish_output and self._should_publish_review_no_suggestions(pr_review)
@@ -172,14 +175,14 @@ class PRReviewer:
             # publish the review
             if get_settings().pr_reviewer.persistent_comment and not self.incremental.is_incremental:
                 final_update_message = get_settings().pr_reviewer.final_update_message
-                self.git_provider.publish_persistent_comment(pr_review,
+                await git_provider.publish_persistent_comment(pr_review,
                                                             initial_header=f"{PRReviewHeader.REGULAR.value} 🔍",
                                                             update_header=True,
                                                             final_update_message=final_update_message, )
             else:
-                self.git_provider.publish_comment(pr_review)
+                await git_provider.publish_comment(pr_review)
 
-            self.git_provider.remove_initial_comment()
+            await git_provider.remove_initial_comment()
         except Exception as e:
             get_logger().error(f"Failed to review PR: {e}")
 
@@ -187,11 +190,12 @@ class PRReviewer:
         return get_settings().pr_reviewer.get('publish_output_no_suggestions', True) or "No major issues detected" not in pr_review
 
     async def _prepare_prediction(self, model: str) -> None:
-        self.patches_diff = get_pr_diff(self.git_provider,
-                                        self.token_handler,
-                                        model,
-                                        add_line_numbers_to_hunks=True,
-                                        disable_extra_lines=False,)
+        git_provider = AsyncGitProvider(self.git_provider)
+        self.patches_diff = await git_provider.run(get_pr_diff, self.git_provider,
+                                                   self.token_handler,
+                                                   model,
+                                                   add_line_numbers_to_hunks=True,
+                                                   disable_extra_lines=False,)
 
         if self.patches_diff:
             get_logger().debug(f"PR diff", diff=self.patches_diff)
@@ -221,7 +225,8 @@ class PRReviewer:
             model=model,
             temperature=get_settings().config.temperature,
             system=system_prompt,
-            user=user_prompt
+            user=user_prompt,
+            local_prompt_tokens=self.token_handler.count_prompt_tokens(system_prompt, user_prompt, model)
         )
 
         return response
@@ -1,16 +1,20 @@
-import time
+import os
 from enum import Enum
-from typing import List
+from typing import List, Optional, Tuple
 
 import openai
 from pydantic import BaseModel, Field
 
 from pr_agent.algo import MAX_TOKENS
+from pr_agent.algo.embedding_cache import EmbeddingCache
+from pr_agent.algo.embedding_ingestion import (EmbeddingIngestionPipeline,
+                                               content_hash)
 from pr_agent.algo.token_handler import TokenHandler
 from pr_agent.algo.utils import get_max_tokens
 from pr_agent.config_loader import get_settings
 from pr_agent.git_providers import get_git_provider
 from pr_agent.log import get_logger
+from pr_agent.vector_stores import get_vector_store
 
 MODEL = "text-embedding-ada-002"
 
@@ -32,230 +36,53 @@ class PRSimilarIssue:
         repo_obj = self.git_provider.repo_obj
         repo_name_for_index = self.repo_name_for_index = repo_obj.full_name.lower().replace('/', '-').replace('_/', '-')
         index_name = self.index_name = "codium-ai-pr-agent-issues"
+        self.embedding_cache = self._get_embedding_cache()
 
-        if get_settings().pr_similar_issue.vectordb == "pinecone":
-            try:
-                import pandas as pd
-                import pinecone
-                from pinecone_datasets import Dataset, DatasetMetadata
-            except:
-                raise Exception("Please install 'pinecone' and 'pinecone_datasets' to use pinecone as vectordb")
-            # assuming pinecone api key and environment are set in secrets file
-            try:
-                api_key = get_settings().pinecone.api_key
-                environment = get_settings().pinecone.environment
-            except Exception:
-                if not self.cli_mode:
-                    repo_name, original_issue_number = self.git_provider._parse_issue_url(self.issue_url.split('=')[-1])
-                    issue_main = self.git_provider.repo_obj.get_issue(original_issue_number)
-                    issue_main.create_comment("Please set pinecone api key and environment in secrets file")
-                raise Exception("Please set pinecone api key and environment in secrets file")
-
-            # check if index exists, and if repo is already indexed
-            run_from_scratch = False
-            if run_from_scratch:  # for debugging
-                pinecone.init(api_key=api_key, environment=environment)
-                if index_name in pinecone.list_indexes():
-                    get_logger().info('Removing index...')
-                    pinecone.delete_index(index_name)
-                    get_logger().info('Done')
-
-            upsert = True
-            pinecone.init(api_key=api_key, environment=environment)
-            if not index_name in pinecone.list_indexes():
-                run_from_scratch = True
-                upsert = False
-            else:
-                if get_settings().pr_similar_issue.force_update_dataset:
-                    upsert = True
-                else:
-                    pinecone_index = pinecone.Index(index_name=index_name)
-                    res = pinecone_index.fetch([f"example_issue_{repo_name_for_index}"]).to_dict()
-                    if res["vectors"]:
-                        upsert = False
-
-            if run_from_scratch or upsert:  # index the entire repo
-                get_logger().info('Indexing the entire repo...')
-
-                get_logger().info('Getting issues...')
-                issues = list(repo_obj.get_issues(state='all'))
-                get_logger().info('Done')
-                self._update_index_with_issues(issues, repo_name_for_index, upsert=upsert)
-            else:  # update index if needed
-                pinecone_index = pinecone.Index(index_name=index_name)
-                issues_to_update = []
-                issues_paginated_list = repo_obj.get_issues(state='all')
-                counter = 1
-                for issue in issues_paginated_list:
-                    if issue.pull_request:
-                        continue
-                    issue_str, comments, number = self._process_issue(issue)
-                    issue_key = f"issue_{number}"
-                    id = issue_key + "." + "issue"
-                    res = pinecone_index.fetch([id]).to_dict()
-                    is_new_issue = True
-                    for vector in res["vectors"].values():
-                        if vector['metadata']['repo'] == repo_name_for_index:
-                            is_new_issue = False
-                            break
-                    if is_new_issue:
-                        counter += 1
-                        issues_to_update.append(issue)
-                    else:
-                        break
-
-                if issues_to_update:
-                    get_logger().info(f'Updating index with {counter} new issues...')
-                    self._update_index_with_issues(issues_to_update, repo_name_for_index, upsert=True)
-                else:
-                    get_logger().info('No new issues to update')
+        try:
+            self.vector_store = get_vector_store(index_name)
+        except ValueError as e:
+            if not self.cli_mode:
+                repo_name, original_issue_number = self.git_provider._parse_issue_url(self.issue_url.split('=')[-1])
+                issue_main = self.git_provider.repo_obj.get_issue(original_issue_number)
+                issue_main.create_comment(str(e))
+            raise
 
-        elif get_settings().pr_similar_issue.vectordb == "lancedb":
-            try:
-                import lancedb  # import lancedb only if needed
-            except:
-                raise Exception("Please install lancedb to use lancedb as vectordb")
-            self.db = lancedb.connect(get_settings().lancedb.uri)
-            self.table = None
-
-            run_from_scratch = False
-            if run_from_scratch:  # for debugging
-                if index_name in self.db.table_names():
-                    get_logger().info('Removing Table...')
-                    self.db.drop_table(index_name)
-                    get_logger().info('Done')
-
-            ingest = True
-            if index_name not in self.db.table_names():
-                run_from_scratch = True
-                ingest = False
-            else:
-                if get_settings().pr_similar_issue.force_update_dataset:
-                    ingest = True
-                else:
-                    self.table = self.db[index_name]
-                    res = self.table.search().limit(len(self.table)).where(f"id='example_issue_{repo_name_for_index}'").to_list()
-                    get_logger().info("result: ", res)
-                    if res[0].get("vector"):
-                        ingest = False
-
-            if run_from_scratch or ingest:  # indexing the entire repo
-                get_logger().info('Indexing the entire repo...')
-
-                get_logger().info('Getting issues...')
-                issues = list(repo_obj.get_issues(state='all'))
-                get_logger().info('Done')
-
-                self._update_table_with_issues(issues, repo_name_for_index, ingest=ingest)
-            else:  # update table if needed
-                issues_to_update = []
-                issues_paginated_list = repo_obj.get_issues(state='all')
-                counter = 1
-                for issue in issues_paginated_list:
-                    if issue.pull_request:
-                        continue
-                    issue_str, comments, number = self._process_issue(issue)
-                    issue_key = f"issue_{number}"
-                    issue_id = issue_key + "." + "issue"
-                    res = self.table.search().limit(len(self.table)).where(f"id='{issue_id}'").to_list()
-                    is_new_issue = True
-                    for r in res:
-                        if r['metadata']['repo'] == repo_name_for_index:
-                            is_new_issue = False
-                            break
-                    if is_new_issue:
-                        counter += 1
-                        issues_to_update.append(issue)
-                    else:
-                        break
-
-                if issues_to_update:
-                    get_logger().info(f'Updating index with {counter} new issues...')
-                    self._update_table_with_issues(issues_to_update, repo_name_for_index, ingest=True)
-                else:
-                    get_logger().info('No new issues to update')
+        # check if index exists, and if repo is already indexed
+        from_scratch = not self.vector_store.index_exists()
+        if from_scratch:
+            reindex = True
+        elif get_settings().pr_similar_issue.force_update_dataset:
+            reindex = True
+        else:
+            reindex = not self.vector_store.contains(f"example_issue_{repo_name_for_index}", repo_name_for_index)
 
-        elif get_settings().pr_similar_issue.vectordb == "qdrant":
-            try:
-                import qdrant_client
-                from qdrant_client.models import (Distance, FieldCondition,
-                                                  Filter, MatchValue,
-                                                  PointStruct, VectorParams)
-            except Exception:
-                raise Exception("Please install qdrant-client to use qdrant as vectordb")
+        if reindex:  # index the entire repo
+            get_logger().info('Indexing the entire repo...')
 
-            api_key = None
-            url = None
-            try:
-                api_key = get_settings().qdrant.api_key
-                url = get_settings().qdrant.url
-            except Exception:
-                if not self.cli_mode:
-                    repo_name, original_issue_number = self.git_provider._parse_issue_url(self.issue_url.split('=')[-1])
-                    issue_main = self.git_provider.repo_obj.get_issue(original_issue_number)
-                    issue_main.create_comment("Please set qdrant url and api key in secrets file")
-                raise Exception("Please set qdrant url and api key in secrets file")
-
-            self.qdrant = qdrant_client.QdrantClient(url=url, api_key=api_key)
-
-            run_from_scratch = False
-            ingest = True
-
-            if not self.qdrant.collection_exists(collection_name=self.index_name):
-                run_from_scratch = True
-                ingest = False
-                self.qdrant.create_collection(
-                    collection_name=self.index_name,
-                    vectors_config=VectorParams(size=1536, distance=Distance.COSINE),
-                )
-            else:
-                if get_settings().pr_similar_issue.force_update_dataset:
-                    ingest = True
-                else:
-                    response = self.qdrant.count(
-                        collection_name=self.index_name,
-                        count_filter=Filter(must=[
-                            FieldCondition(key="metadata.repo", match=MatchValue(value=repo_name_for_index)),
-                            FieldCondition(key="id", match=MatchValue(value=f"example_issue_{repo_name_for_index}")),
-                        ]),
-                    )
-                    ingest = True if response.count == 0 else False
-
-            if run_from_scratch or ingest:
-                get_logger().info('Indexing the entire repo...')
-                get_logger().info('Getting issues...')
-                issues = list(repo_obj.get_issues(state='all'))
-                get_logger().info('Done')
-                self._update_qdrant_with_issues(issues, repo_name_for_index, ingest=ingest)
-            else:
-                issues_to_update = []
-                issues_paginated_list = repo_obj.get_issues(state='all')
-                counter = 1
-                for issue in issues_paginated_list:
-                    if issue.pull_request:
-                        continue
-                    issue_str, comments, number = self._process_issue(issue)
-                    issue_key = f"issue_{number}"
-                    point_id = issue_key + "." + "issue"
-                    response = self.qdrant.count(
-                        collection_name=self.index_name,
-                        count_filter=Filter(must=[
-                            FieldCondition(key="id", match=MatchValue(value=point_id)),
-                            FieldCondition(key="metadata.repo", match=MatchValue(value=repo_name_for_index)),
-                        ]),
-                    )
-                    if response.count == 0:
-                        counter += 1
-                        issues_to_update.append(issue)
-                    else:
-                        break
-
-                if issues_to_update:
-                    get_logger().info(f'Updating index with {counter} new issues...')
-                    self._update_qdrant_with_issues(issues_to_update, repo_name_for_index, ingest=True)
+            get_logger().info('Getting issues...')
+            issues = list(repo_obj.get_issues(state='all'))
+            get_logger().info('Done')
+            self._update_index_with_issues(issues, repo_name_for_index, from_scratch=from_scratch)
+        else:  # update index if needed
+            issues_to_update = []
+            issues_paginated_list = repo_obj.get_issues(state='all')
+            counter = 1
+            for issue in issues_paginated_list:
+                if issue.pull_request:
+                    continue
+                issue_key = f"issue_{issue.number}"
+                issue_id = issue_key + "." + "issue"
+                if not self.vector_store.contains(issue_id, repo_name_for_index):
+                    counter += 1
+                    issues_to_update.append(issue)
                 else:
-                    get_logger().info('No new issues to update')
+                    break
 
+            if issues_to_update:
+                get_logger().info(f'Updating index with {counter} new issues...')
+                self._update_index_with_issues(issues_to_update, repo_name_for_index)
+            else:
+                get_logger().info('No new issues to update')
 
     async def run(self):
         if not self.supported:
@@ -276,101 +103,40 @@ class PRSimilarIssue:
         repo_name, original_issue_number = self.git_provider._parse_issue_url(self.issue_url.split('=')[-1])
         issue_main = self.git_provider.repo_obj.get_issue(original_issue_number)
         issue_str, comments, number = self._process_issue(issue_main)
-        openai.api_key = get_settings().openai.key
         get_logger().info('Done')
 
         get_logger().info('Querying...')
-        res = openai.Embedding.create(input=[issue_str], engine=MODEL)
-        embeds = [record['embedding'] for record in res['data']]
+        embeds, failed_indices = self._embed_texts([issue_str])
+        if failed_indices:
+            get_logger().error('Failed to embed the issue, cannot search for similar issues')
+            return ""
 
         relevant_issues_number_list = []
         relevant_comment_number_list = []
         score_list = []
 
-        if get_settings().pr_similar_issue.vectordb == "pinecone":
-            pinecone_index = pinecone.Index(index_name=self.index_name)
-            res = pinecone_index.query(embeds[0],
-                                    top_k=5,
-                                    filter={"repo": self.repo_name_for_index},
-                                    include_metadata=True).to_dict()
-
-            for r in res['matches']:
-                # skip example issue
-                if 'example_issue_' in r["id"]:
-                    continue
-
-                try:
-                    issue_number = int(r["id"].split('.')[0].split('_')[-1])
-                except:
-                    get_logger().debug(f"Failed to parse issue number from {r['id']}")
-                    continue
-
-                if original_issue_number == issue_number:
-                    continue
-                if issue_number not in relevant_issues_number_list:
-                    relevant_issues_number_list.append(issue_number)
-                if 'comment' in r["id"]:
-                    relevant_comment_number_list.append(int(r["id"].split('.')[1].split('_')[-1]))
-                else:
-                    relevant_comment_number_list.append(-1)
-                score_list.append(str("{:.2f}".format(r['score'])))
-            get_logger().info('Done')
-
-        elif get_settings().pr_similar_issue.vectordb == "lancedb":
-            res = self.table.search(embeds[0]).where(f"metadata.repo='{self.repo_name_for_index}'", prefilter=True).to_list()
-
-            for r in res:
-                # skip example issue
-                if 'example_issue_' in r["id"]:
-                    continue
-
-                try:
-                    issue_number = int(r["id"].split('.')[0].split('_')[-1])
-                except:
-                    get_logger().debug(f"Failed to parse issue number from {r['id']}")
-                    continue
-
-                if original_issue_number == issue_number:
-                    continue
-                if issue_number not in relevant_issues_number_list:
-                    relevant_issues_number_list.append(issue_number)
+        matches = self.vector_store.query(embeds[0], self.repo_name_for_index, top_k=5)
+        for r in matches:
+            # skip example issue
+            if 'example_issue_' in r.id:
+                continue
 
-                if 'comment' in r["id"]:
-                    relevant_comment_number_list.append(int(r["id"].split('.')[1].split('_')[-1]))
-                else:
-                    relevant_comment_number_list.append(-1)
-                score_list.append(str("{:.2f}".format(1-r['_distance'])))
-            get_logger().info('Done')
+            try:
+                issue_number = int(r.id.split('.')[0].split('_')[-1])
+            except Exception:
+                get_logger().debug(f"Failed to parse issue number from {r.id}")
+                continue
 
-        elif get_settings().pr_similar_issue.vectordb == "qdrant":
-            from qdrant_client.models import FieldCondition, Filter, MatchValue
-            res = self.qdrant.search(
-                collection_name=self.index_name,
-                query_vector=embeds[0],
-                limit=5,
-                query_filter=Filter(must=[FieldCondition(key="metadata.repo", match=MatchValue(value=self.repo_name_for_index))]),
-                with_payload=True,
-            )
-
-            for r in res:
-                rid = r.payload.get("id", "")
-                if 'example_issue_' in rid:
-                    continue
-                try:
-                    issue_number = int(rid.split('.')[0].split('_')[-1])
-                except Exception:
-                    get_logger().debug(f"Failed to parse issue number from {rid}")
-                    continue
-                if original_issue_number == issue_number:
-                    continue
-                if issue_number not in relevant_issues_number_list:
-                    relevant_issues_number_list.append(issue_number)
-                if 'comment' in rid:
-                    relevant_comment_number_list.append(int(rid.split('.')[1].split('_')[-1]))
-                else:
-                    relevant_comment_number_list.append(-1)
-                score_list.append(str("{:.2f}".format(r.score)))
-            get_logger().info('Done')
+            if original_issue_number == issue_number:
+                continue
+            if issue_number not in relevant_issues_number_list:
+                relevant_issues_number_list.append(issue_number)
+            if 'comment' in r.id:
+                relevant_comment_number_list.append(int(r.id.split('.')[1].split('_')[-1]))
+            else:
+                relevant_comment_number_list.append(-1)
+            score_list.append(str("{:.2f}".format(r.score)))
+        get_logger().info('Done')
 
         get_logger().info('Publishing response...')
         similar_issues_str = "### Similar Issues\n___\n\n"
@@ -398,7 +164,7 @@ class PRSimilarIssue:
         issue_str = f"Issue Header: \"{header}\"\n\nIssue Body:\n{body}"
         return issue_str, comments, number
 
-    def _update_index_with_issues(self, issues_list, repo_name_for_index, upsert=False):
+    def _build_corpus(self, issues_list, repo_name_for_index) -> "Corpus":
         get_logger().info('Processing issues...')
         corpus = Corpus()
         example_issue_record = Record(
@@ -438,8 +204,7 @@ class PRSimilarIssue:
                 if comments:
                     for j, comment in enumerate(comments):
                         comment_body = comment.body
-                        num_words_comment = len(comment_body.split())
-                        if num_words_comment < 10 or not isinstance(comment_body, str):
+                        if not isinstance(comment_body, str) or len(comment_body.split()) < 10:
                             continue
 
                         if len(comment_body) < 8000 or \
@@ -453,230 +218,80 @@ class PRSimilarIssue:
                                                   level=IssueLevel.COMMENT)
                             )
                             corpus.append(comment_record)
-        df = pd.DataFrame(corpus.model_dump()["documents"])
-        get_logger().info('Done')
-
-        get_logger().info('Embedding...')
-        openai.api_key = get_settings().openai.key
-        list_to_encode = list(df["text"].values)
-        try:
-            res = openai.Embedding.create(input=list_to_encode, engine=MODEL)
-            embeds = [record['embedding'] for record in res['data']]
-        except:
-            embeds = []
-            get_logger().error('Failed to embed entire list, embedding one by one...')
-            for i, text in enumerate(list_to_encode):
-                try:
-                    res = openai.Embedding.create(input=[text], engine=MODEL)
-                    embeds.append(res['data'][0]['embedding'])
-                except:
-                    embeds.append([0] * 1536)
-        df["values"] = embeds
-        meta = DatasetMetadata.empty()
-        meta.dense_model.dimension = len(embeds[0])
-        ds = Dataset.from_pandas(df, meta)
-        get_logger().info('Done')
-
-        api_key = get_settings().pinecone.api_key
-        environment = get_settings().pinecone.environment
-        if not upsert:
-            get_logger().info('Creating index from scratch...')
-            ds.to_pinecone_index(self.index_name, api_key=api_key, environment=environment)
-            time.sleep(15)  # wait for pinecone to finalize indexing before querying
-        else:
-            get_logger().info('Upserting index...')
-            namespace = ""
-            batch_size: int = 100
-            concurrency: int = 10
-            pinecone.init(api_key=api_key, environment=environment)
-            ds._upsert_to_index(self.index_name, namespace, batch_size, concurrency)
-            time.sleep(5)  # wait for pinecone to finalize upserting before querying
-        get_logger().info('Done')
-
-    def _update_table_with_issues(self, issues_list, repo_name_for_index, ingest=False):
-        get_logger().info('Processing issues...')
-
-        corpus = Corpus()
-        example_issue_record = Record(
-            id=f"example_issue_{repo_name_for_index}",
-            text="example_issue",
-            metadata=Metadata(repo=repo_name_for_index)
-        )
-        corpus.append(example_issue_record)
-
-        counter = 0
-        for issue in issues_list:
-            if issue.pull_request:
-                continue
-
-            counter += 1
-            if counter % 100 == 0:
-                get_logger().info(f"Scanned {counter} issues")
-            if counter >= self.max_issues_to_scan:
-                get_logger().info(f"Scanned {self.max_issues_to_scan} issues, stopping")
-                break
-
-            issue_str, comments, number = self._process_issue(issue)
-            issue_key = f"issue_{number}"
-            username = issue.user.login
-            created_at = str(issue.created_at)
-            if len(issue_str) < 8000 or \
-                    self.token_handler.count_tokens(issue_str) < get_max_tokens(MODEL):  # fast reject first
-                issue_record = Record(
-                    id=issue_key + "." + "issue",
-                    text=issue_str,
-                    metadata=Metadata(repo=repo_name_for_index,
-                                        username=username,
-                                        created_at=created_at,
-                                        level=IssueLevel.ISSUE)
-                )
-                corpus.append(issue_record)
-                if comments:
-                    for j, comment in enumerate(comments):
-                        comment_body = comment.body
-                        num_words_comment = len(comment_body.split())
-                        if num_words_comment < 10 or not isinstance(comment_body, str):
-                            continue
-
-                        if len(comment_body) < 8000 or \
-                                self.token_handler.count_tokens(comment_body) < MAX_TOKENS[MODEL]:
-                            comment_record = Record(
-                                id=issue_key + ".comment_" + str(j + 1),
-                                text=comment_body,
-                                metadata=Metadata(repo=repo_name_for_index,
-                                                    username=username,  # use issue username for all comments
-                                                    created_at=created_at,
-                                                    level=IssueLevel.COMMENT)
-                            )
-                            corpus.append(comment_record)
-        df = pd.DataFrame(corpus.model_dump()["documents"])
-        get_logger().info('Done')
-
-        get_logger().info('Embedding...')
-        openai.api_key = get_settings().openai.key
-        list_to_encode = list(df["text"].values)
-        try:
-            res = openai.Embedding.create(input=list_to_encode, engine=MODEL)
-            embeds = [record['embedding'] for record in res['data']]
-        except:
-            embeds = []
-            get_logger().error('Failed to embed entire list, embedding one by one...')
-            for i, text in enumerate(list_to_encode):
-                try:
-                    res = openai.Embedding.create(input=[text], engine=MODEL)
-                    embeds.append(res['data'][0]['embedding'])
-                except:
-                    embeds.append([0] * 1536)
-        df["vector"] = embeds
-        get_logger().info('Done')
 
-        if not ingest:
-            get_logger().info('Creating table from scratch...')
-            self.table = self.db.create_table(self.index_name, data=df, mode="overwrite")
-            time.sleep(15)
-        else:
-            get_logger().info('Ingesting in Table...')
-            if self.index_name not in self.db.table_names():
-                self.table.add(df)
-            else:
-                get_logger().info(f"Table {self.index_name} doesn't exists!")
-            time.sleep(5)
+        for record in corpus.documents:
+            record.metadata.content_hash = content_hash(record.text)
         get_logger().info('Done')
-
-
-    def _update_qdrant_with_issues(self, issues_list, repo_name_for_index, ingest=False):
+        return corpus
+
+    def _skip_unchanged_records(self, corpus: "Corpus", indexed_hashes: dict) -> "Corpus":
+        """
+        Drop records whose text is already indexed with the same content hash, so they are not re-embedded.
+        """
+        changed = Corpus(documents=[r for r in corpus.documents
+                                    if indexed_hashes.get(r.id) != r.metadata.content_hash])
+        skipped = len(corpus.documents) - len(changed.documents)
+        if skipped:
+            get_logger().info(f"Skipping {skipped} records that are already indexed and unchanged")
+        return changed
+
+    def _get_embedding_cache(self) -> Optional[EmbeddingCache]:
+        cache_path = get_settings().pr_similar_issue.get('embedding_cache_path', '')
+        if not cache_path:
+            return None
         try:
-            import uuid
-
-            import pandas as pd
-            from qdrant_client.models import PointStruct
-        except Exception:
-            raise
-
-        get_logger().info('Processing issues...')
-        corpus = Corpus()
-        example_issue_record = Record(
-            id=f"example_issue_{repo_name_for_index}",
-            text="example_issue",
-            metadata=Metadata(repo=repo_name_for_index)
-        )
-        corpus.append(example_issue_record)
-
-        counter = 0
-        for issue in issues_list:
-            if issue.pull_request:
-                continue
-
-            counter += 1
-            if counter % 100 == 0:
-                get_logger().info(f"Scanned {counter} issues")
-            if counter >= self.max_issues_to_scan:
-                get_logger().info(f"Scanned {self.max_issues_to_scan} issues, stopping")
-                break
-
-            issue_str, comments, number = self._process_issue(issue)
-            issue_key = f"issue_{number}"
-            username = issue.user.login
-            created_at = str(issue.created_at)
-            if len(issue_str) < 8000 or \
-                    self.token_handler.count_tokens(issue_str) < get_max_tokens(MODEL):
-                issue_record = Record(
-                    id=issue_key + "." + "issue",
-                    text=issue_str,
-                    metadata=Metadata(repo=repo_name_for_index,
-                                      username=username,
-                                      created_at=created_at,
-                                      level=IssueLevel.ISSUE)
-                )
-                corpus.append(issue_record)
-                if comments:
-                    for j, comment in enumerate(comments):
-                        comment_body = comment.body
-                        num_words_comment = len(comment_body.split())
-                        if num_words_comment < 10 or not isinstance(comment_body, str):
-                            continue
-
-                        if len(comment_body) < 8000 or \
-                                self.token_handler.count_tokens(comment_body) < MAX_TOKENS[MODEL]:
-                            comment_record = Record(
-                                id=issue_key + ".comment_" + str(j + 1),
-                                text=comment_body,
-                                metadata=Metadata(repo=repo_name_for_index,
-                                                  username=username,
-                                                  created_at=created_at,
-                                                  level=IssueLevel.COMMENT)
-                            )
-                            corpus.append(comment_record)
-
-        df = pd.DataFrame(corpus.model_dump()["documents"])
-        get_logger().info('Done')
-
+            return EmbeddingCache(cache_path)
+        except Exception as e:
+            get_logger().warning(f"Failed to open embedding cache {cache_path}, embedding without it: {e}")
+            return None
+
+    def _embed_texts(self, texts: List[str],
+                     repo_name_for_index: Optional[str] = None) -> Tuple[List[List[float]], List[int]]:
+        """
+        Embed texts through the shared ingestion pipeline. A checkpoint is kept only when indexing a repo.
+        Returns the embeddings, and the indices of the texts that failed to embed.
+        """
         get_logger().info('Embedding...')
         openai.api_key = get_settings().openai.key
-        list_to_encode = list(df["text"].values)
-        try:
-            res = openai.Embedding.create(input=list_to_encode, engine=MODEL)
-            embeds = [record['embedding'] for record in res['data']]
-        except Exception:
-            embeds = []
-            get_logger().error('Failed to embed entire list, embedding one by one...')
-            for i, text in enumerate(list_to_encode):
-                try:
-                    res = openai.Embedding.create(input=[text], engine=MODEL)
-                    embeds.append(res['data'][0]['embedding'])
-                except Exception:
-                    embeds.append([0] * 1536)
-        df["vector"] = embeds
-        get_logger().info('Done')
 
-        get_logger().info('Upserting into Qdrant...')
-        points = []
-        for row in df.to_dict(orient="records"):
-            points.append(
-                PointStruct(id=uuid.uuid5(uuid.NAMESPACE_DNS, row["id"]).hex, vector=row["vector"], payload={"id": row["id"], "text": row["text"], "metadata": row["metadata"]})
-            )
-        self.qdrant.upsert(collection_name=self.index_name, points=points)
+        def embed_batch(batch: List[str]) -> List[List[float]]:
+            res = openai.Embedding.create(input=batch, engine=MODEL)
+            return [record['embedding'] for record in res['data']]
+
+        settings = get_settings().pr_similar_issue
+        checkpoint_path = None
+        checkpoint_dir = settings.get('embedding_checkpoint_dir', '')
+        if checkpoint_dir and repo_name_for_index:
+            checkpoint_path = os.path.join(checkpoint_dir, f"{self.index_name}-{repo_name_for_index}-{MODEL}.jsonl")
+        pipeline = EmbeddingIngestionPipeline(embed_batch,
+                                              count_tokens=self.token_handler.count_tokens,
+                                              max_batch_size=settings.get('embedding_batch_size', 256),
+                                              max_batch_tokens=settings.get('embedding_batch_max_tokens', 100_000),
+                                              max_concurrency=settings.get('embedding_max_concurrency', 4),
+                                              checkpoint_path=checkpoint_path,
+                                              cache=self.embedding_cache,
+                                              model=MODEL)
+        embeds, failed_indices = pipeline.embed(texts)
         get_logger().info('Done')
+        return embeds, failed_indices
+
+    def _update_index_with_issues(self, issues_list, repo_name_for_index, from_scratch=False):
+        corpus = self._build_corpus(issues_list, repo_name_for_index)
+        if not from_scratch:
+            ids = [r.id for r in corpus.documents]
+            corpus = self._skip_unchanged_records(corpus, self.vector_store.get_indexed_hashes(ids, repo_name_for_index))
+            if not corpus.documents:
+                get_logger().info('No changed issues to update')
+                return
+        records = corpus.model_dump()["documents"]
+        embeds, failed_indices = self._embed_texts([record["text"] for record in records], repo_name_for_index)
+        if failed_indices:
+            # not indexed, so they are embedded again on the next update
+            failed = set(failed_indices)
+            get_logger().warning(f"Not indexing {len(failed)} records that failed to embed")
+            records = [record for i, record in enumerate(records) if i not in failed]
+            embeds = [embed for i, embed in enumerate(embeds) if i not in failed]
+        self.vector_store.upsert(records, embeds, from_scratch=from_scratch)
 
 
 class IssueLevel(str, Enum):
@@ -689,6 +304,7 @@ class Metadata(BaseModel):
     username: str = Field(default="@codium")
     created_at: str = Field(default="01-01-1970 00:00:00.00000")
     level: IssueLevel = Field(default=IssueLevel.ISSUE)
+    content_hash: str = Field(default="")
 
     class Config:
         use_enum_values = True
@@ -109,7 +109,8 @@ class PRUpdateChangelog:
         system_prompt = environment.from_string(get_settings().pr_update_changelog_prompt.system).render(variables)
         user_prompt = environment.from_string(get_settings().pr_update_changelog_prompt.user).render(variables)
         response, finish_reason = await self.ai_handler.chat_completion(
-            model=model, system=system_prompt, user=user_prompt, temperature=get_settings().config.temperature)
+            model=model, system=system_prompt, user=user_prompt, temperature=get_settings().config.temperature,
+            local_prompt_tokens=self.token_handler.count_prompt_tokens(system_prompt, user_prompt, model))
 
         # post-process the response
         response = response.strip()
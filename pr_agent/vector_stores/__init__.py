@@ -0,0 +1,35 @@
+from pr_agent.config_loader import get_settings
+
+
+def get_vector_store(index_name: str):
+    vectordb = get_settings().pr_similar_issue.vectordb
+    if vectordb == "pinecone":
+        try:
+            from pr_agent.vector_stores.pinecone_vector_store import \
+                PineconeVectorStore
+        except ImportError as e:
+            raise ImportError("Please install 'pinecone' and 'pinecone_datasets' to use pinecone as vectordb") from e
+        return PineconeVectorStore(index_name)
+    elif vectordb == "lancedb":
+        try:
+            from pr_agent.vector_stores.lancedb_vector_store import \
+                LanceDBVectorStore
+        except ImportError as e:
+            raise ImportError("Please install lancedb to use lancedb as vectordb") from e
+        return LanceDBVectorStore(index_name)
+    elif vectordb == "qdrant":
+        try:
+            from pr_agent.vector_stores.qdrant_vector_store import \
+                QdrantVectorStore
+        except ImportError as e:
+            raise ImportError("Please install qdrant-client to use qdrant as vectordb") from e
+        return QdrantVectorStore(index_name)
+    elif vectordb == "local":
+        try:
+            from pr_agent.vector_stores.local_vector_store import \
+                LocalVectorStore
+        except ImportError as e:
+            raise ImportError("Please install numpy to use the local vectordb") from e
+        return LocalVectorStore(index_name)
+    else:
+        raise ValueError(f"Unknown vectordb: {vectordb}")
@@ -0,0 +1,57 @@
+import time
+from typing import Dict, List
+
+import lancedb
+import pandas as pd
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+from pr_agent.vector_stores.vector_store import VectorMatch, VectorStore
+
+
+class LanceDBVectorStore(VectorStore):
+    def __init__(self, index_name: str):
+        super().__init__(index_name)
+        self.db = lancedb.connect(get_settings().lancedb.uri)
+        self.table = self.db[index_name] if self.index_exists() else None
+
+    def index_exists(self) -> bool:
+        return self.index_name in self.db.table_names()
+
+    def contains(self, record_id: str, repo: str) -> bool:
+        return record_id in self.get_indexed_hashes([record_id], repo)
+
+    def get_indexed_hashes(self, record_ids: List[str], repo: str) -> Dict[str, str]:
+        indexed_hashes = {}
+        if self.table is None:
+            return indexed_hashes
+        for i in range(0, len(record_ids), 100):
+            ids_str = ", ".join(f"'{record_id}'" for record_id in record_ids[i:i + 100])
+            res = self.table.search().limit(len(self.table)).where(f"id IN ({ids_str})").to_list()
+            for r in res:
+                metadata = r.get('metadata') or {}
+                if metadata.get('repo') == repo:
+                    indexed_hashes[r['id']] = metadata.get('content_hash')
+        return indexed_hashes
+
+    def upsert(self, records: List[dict], embeddings: List[List[float]], from_scratch: bool = False):
+        df = pd.DataFrame(records)
+        df["vector"] = embeddings
+
+        if from_scratch or self.table is None:
+            get_logger().info('Creating table from scratch...')
+            self.table = self.db.create_table(self.index_name, data=df, mode="overwrite")
+            time.sleep(15)
+        else:
+            get_logger().info('Ingesting in Table...')
+            repo = records[0]['metadata']['repo']
+            for i in range(0, len(records), 100):  # replace previous versions of changed records
+                ids_str = ", ".join(f"'{r['id']}'" for r in records[i:i + 100])
+                self.table.delete(f"id IN ({ids_str}) AND metadata.repo = '{repo}'")
+            self.table.add(df)
+            time.sleep(5)
+        get_logger().info('Done')
+
+    def query(self, embedding: List[float], repo: str, top_k: int = 5) -> List[VectorMatch]:
+        res = self.table.search(embedding).where(f"metadata.repo='{repo}'", prefilter=True).limit(top_k).to_list()
+        return [VectorMatch(id=r["id"], score=1 - r['_distance']) for r in res]
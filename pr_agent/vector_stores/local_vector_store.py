@@ -0,0 +1,135 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+from pr_agent.vector_stores.vector_store import VectorMatch, VectorStore
+
+FORMAT_VERSION = 1
+
+
+class LocalVectorStore(VectorStore):
+    """
+    An embedded, dependency-light vector store.
+
+    Embeddings are kept L2-normalized in a float32 matrix saved as '<index_name>.npy' and memory-mapped on load,
+    so cosine similarity is a single matrix-vector product. Record ids and metadata are kept in the
+    '<index_name>.json' sidecar file, row-aligned with the matrix.
+    """
+
+    def __init__(self, index_name: str, path: Optional[str] = None):
+        super().__init__(index_name)
+        self.path = path or get_settings().get("local_vector_store.path", "./similar_issues_index")
+        self.matrix_path = os.path.join(self.path, f"{index_name}.npy")
+        self.metadata_path = os.path.join(self.path, f"{index_name}.json")
+        self._matrix = None
+        self._records = []
+        self._rows = {}  # (repo, record id) -> row
+        self._repo_rows = {}  # repo -> np.ndarray of rows
+        self._load()
+
+    def _load(self):
+        if not self.index_exists():
+            return
+        try:
+            with open(self.metadata_path, "r") as f:
+                sidecar = json.load(f)
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+            records = sidecar["records"]
+            if sidecar.get("version") != FORMAT_VERSION or matrix.shape[0] != len(records):
+                raise ValueError(f"inconsistent index files in {self.path}")
+        except Exception as e:
+            get_logger().warning(f"Failed to load local vector store '{self.index_name}', ignoring it: {e}")
+            return
+        self._set_index(matrix, records)
+
+    def _set_index(self, matrix, records: List[dict]):
+        self._matrix = matrix
+        self._records = records
+        self._rows = {}
+        repo_rows = {}
+        for row, record in enumerate(records):
+            repo = record["metadata"].get("repo")
+            self._rows[(repo, record["id"])] = row
+            repo_rows.setdefault(repo, []).append(row)
+        self._repo_rows = {repo: np.asarray(rows, dtype=np.int64) for repo, rows in repo_rows.items()}
+
+    def index_exists(self) -> bool:
+        return os.path.isfile(self.matrix_path) and os.path.isfile(self.metadata_path)
+
+    def contains(self, record_id: str, repo: str) -> bool:
+        return (repo, record_id) in self._rows
+
+    def get_indexed_hashes(self, record_ids: List[str], repo: str) -> Dict[str, str]:
+        indexed_hashes = {}
+        for record_id in record_ids:
+            row = self._rows.get((repo, record_id))
+            if row is not None:
+                indexed_hashes[record_id] = self._records[row]["metadata"].get("content_hash")
+        return indexed_hashes
+
+    def upsert(self, records: List[dict], embeddings: List[List[float]], from_scratch: bool = False):
+        new_vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        if from_scratch or self._matrix is None:
+            matrix = np.empty((0, new_vectors.shape[1]), dtype=np.float32)
+            all_records = []
+            rows = {}
+        else:
+            matrix = np.array(self._matrix, dtype=np.float32)  # copy out of the read-only memory map
+            all_records = list(self._records)
+            rows = dict(self._rows)
+            if matrix.shape[1] != new_vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {new_vectors.shape[1]} does not match "
+                                 f"the index dimension {matrix.shape[1]}")
+
+        appended = []
+        for record, vector in zip(records, new_vectors, strict=True):
+            sidecar_record = {"id": record["id"], "metadata": record["metadata"]}
+            key = (record["metadata"].get("repo"), record["id"])
+            if key in rows:
+                matrix[rows[key]] = vector
+                all_records[rows[key]] = sidecar_record
+            else:
+                rows[key] = len(all_records) + len(appended)
+                appended.append((sidecar_record, vector))
+        if appended:
+            matrix = np.vstack([matrix, np.stack([vector for _, vector in appended])])
+            all_records.extend(record for record, _ in appended)
+
+        self._write(matrix, all_records)
+        self._set_index(np.load(self.matrix_path, mmap_mode="r"), all_records)
+        get_logger().info(f"Local vector store '{self.index_name}' now holds {len(all_records)} records")
+
+    def _write(self, matrix, records: List[dict]):
+        os.makedirs(self.path, exist_ok=True)
+        matrix_tmp = self.matrix_path + ".tmp"
+        metadata_tmp = self.metadata_path + ".tmp"
+        with open(matrix_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        with open(metadata_tmp, "w") as f:
+            json.dump({"version": FORMAT_VERSION, "dimension": int(matrix.shape[1]), "records": records}, f)
+        os.replace(matrix_tmp, self.matrix_path)
+        os.replace(metadata_tmp, self.metadata_path)
+
+    def query(self, embedding: List[float], repo: str, top_k: int = 5) -> List[VectorMatch]:
+        rows = self._repo_rows.get(repo)
+        if rows is None or top_k <= 0:
+            return []
+        query_vector = _normalize(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        if len(rows) == self._matrix.shape[0]:
+            scores = self._matrix @ query_vector  # a single repo in the index, no need to gather rows
+        else:
+            scores = self._matrix[rows] @ query_vector
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [VectorMatch(id=self._records[rows[i]]["id"], score=float(scores[i])) for i in top]
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1  # zero vectors (failed embeddings) stay zero
+    return matrix / norms
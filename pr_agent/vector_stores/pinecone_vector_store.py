@@ -0,0 +1,67 @@
+import time
+from typing import Dict, List
+
+import pandas as pd
+import pinecone
+from pinecone_datasets import Dataset, DatasetMetadata
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+from pr_agent.vector_stores.vector_store import VectorMatch, VectorStore
+
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self, index_name: str):
+        super().__init__(index_name)
+        # assuming pinecone api key and environment are set in secrets file
+        try:
+            self.api_key = get_settings().pinecone.api_key
+            self.environment = get_settings().pinecone.environment
+        except Exception as e:
+            raise ValueError("Please set pinecone api key and environment in secrets file") from e
+        pinecone.init(api_key=self.api_key, environment=self.environment)
+
+    def index_exists(self) -> bool:
+        return self.index_name in pinecone.list_indexes()
+
+    def contains(self, record_id: str, repo: str) -> bool:
+        return record_id in self.get_indexed_hashes([record_id], repo)
+
+    def get_indexed_hashes(self, record_ids: List[str], repo: str) -> Dict[str, str]:
+        pinecone_index = pinecone.Index(index_name=self.index_name)
+        indexed_hashes = {}
+        for i in range(0, len(record_ids), 100):
+            res = pinecone_index.fetch(record_ids[i:i + 100]).to_dict()
+            for vector_id, vector in res["vectors"].items():
+                metadata = vector.get('metadata', {})
+                if metadata.get('repo') == repo:
+                    indexed_hashes[vector_id] = metadata.get('content_hash')
+        return indexed_hashes
+
+    def upsert(self, records: List[dict], embeddings: List[List[float]], from_scratch: bool = False):
+        df = pd.DataFrame(records)
+        df["values"] = embeddings
+        meta = DatasetMetadata.empty()
+        meta.dense_model.dimension = len(embeddings[0])
+        ds = Dataset.from_pandas(df, meta)
+
+        if from_scratch:
+            get_logger().info('Creating index from scratch...')
+            ds.to_pinecone_index(self.index_name, api_key=self.api_key, environment=self.environment)
+            time.sleep(15)  # wait for pinecone to finalize indexing before querying
+        else:
+            get_logger().info('Upserting index...')
+            namespace = ""
+            batch_size: int = 100
+            concurrency: int = 10
+            ds._upsert_to_index(self.index_name, namespace, batch_size, concurrency)
+            time.sleep(5)  # wait for pinecone to finalize upserting before querying
+        get_logger().info('Done')
+
+    def query(self, embedding: List[float], repo: str, top_k: int = 5) -> List[VectorMatch]:
+        pinecone_index = pinecone.Index(index_name=self.index_name)
+        res = pinecone_index.query(embedding,
+                                   top_k=top_k,
+                                   filter={"repo": repo},
+                                   include_metadata=True).to_dict()
+        return [VectorMatch(id=r["id"], score=r["score"]) for r in res['matches']]
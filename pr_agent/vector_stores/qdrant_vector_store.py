@@ -0,0 +1,78 @@
+import uuid
+from typing import Dict, List
+
+import qdrant_client
+from qdrant_client.models import (Distance, FieldCondition, Filter, MatchValue,
+                                  PointStruct, VectorParams)
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+from pr_agent.vector_stores.vector_store import VectorMatch, VectorStore
+
+
+def _point_id(record_id: str) -> str:
+    return uuid.uuid5(uuid.NAMESPACE_DNS, record_id).hex
+
+
+class QdrantVectorStore(VectorStore):
+    def __init__(self, index_name: str):
+        super().__init__(index_name)
+        try:
+            api_key = get_settings().qdrant.api_key
+            url = get_settings().qdrant.url
+        except Exception as e:
+            raise ValueError("Please set qdrant url and api key in secrets file") from e
+        self.qdrant = qdrant_client.QdrantClient(url=url, api_key=api_key)
+
+    def index_exists(self) -> bool:
+        return self.qdrant.collection_exists(collection_name=self.index_name)
+
+    def contains(self, record_id: str, repo: str) -> bool:
+        response = self.qdrant.count(
+            collection_name=self.index_name,
+            count_filter=Filter(must=[
+                FieldCondition(key="id", match=MatchValue(value=record_id)),
+                FieldCondition(key="metadata.repo", match=MatchValue(value=repo)),
+            ]),
+        )
+        return response.count > 0
+
+    def get_indexed_hashes(self, record_ids: List[str], repo: str) -> Dict[str, str]:
+        indexed_hashes = {}
+        for i in range(0, len(record_ids), 100):
+            points = self.qdrant.retrieve(collection_name=self.index_name,
+                                          ids=[_point_id(record_id) for record_id in record_ids[i:i + 100]],
+                                          with_payload=True)
+            for point in points:
+                payload = point.payload or {}
+                metadata = payload.get('metadata') or {}
+                if metadata.get('repo') == repo:
+                    indexed_hashes[payload.get('id')] = metadata.get('content_hash')
+        return indexed_hashes
+
+    def upsert(self, records: List[dict], embeddings: List[List[float]], from_scratch: bool = False):
+        if not self.index_exists():
+            self.qdrant.create_collection(
+                collection_name=self.index_name,
+                vectors_config=VectorParams(size=len(embeddings[0]), distance=Distance.COSINE),
+            )
+
+        get_logger().info('Upserting into Qdrant...')
+        points = []
+        for record, embedding in zip(records, embeddings, strict=True):
+            points.append(
+                PointStruct(id=_point_id(record["id"]), vector=embedding,
+                            payload={"id": record["id"], "text": record["text"], "metadata": record["metadata"]})
+            )
+        self.qdrant.upsert(collection_name=self.index_name, points=points)
+        get_logger().info('Done')
+
+    def query(self, embedding: List[float], repo: str, top_k: int = 5) -> List[VectorMatch]:
+        res = self.qdrant.search(
+            collection_name=self.index_name,
+            query_vector=embedding,
+            limit=top_k,
+            query_filter=Filter(must=[FieldCondition(key="metadata.repo", match=MatchValue(value=repo))]),
+            with_payload=True,
+        )
+        return [VectorMatch(id=r.payload.get("id", ""), score=r.score) for r in res]
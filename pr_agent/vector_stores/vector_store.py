@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class VectorMatch:
+    id: str
+    score: float
+
+
+class VectorStore(ABC):
+    """
+    A vector index of issue records. Each record is a dict with 'id', 'text' and 'metadata' keys, where
+    metadata['repo'] scopes the record to a single repository.
+    """
+
+    def __init__(self, index_name: str):
+        self.index_name = index_name
+
+    @abstractmethod
+    def index_exists(self) -> bool:
+        pass
+
+    @abstractmethod
+    def contains(self, record_id: str, repo: str) -> bool:
+        pass
+
+    @abstractmethod
+    def get_indexed_hashes(self, record_ids: List[str], repo: str) -> Dict[str, str]:
+        """
+        Returns the stored content hash for each of the given record ids that is indexed for the repo.
+        """
+        pass
+
+    @abstractmethod
+    def upsert(self, records: List[dict], embeddings: List[List[float]], from_scratch: bool = False):
+        pass
+
+    @abstractmethod
+    def query(self, embedding: List[float], repo: str, top_k: int = 5) -> List[VectorMatch]:
+        """
+        Returns the records of the repo most similar to the embedding, ordered by decreasing score.
+        """
+        pass
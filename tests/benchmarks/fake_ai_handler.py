@@ -0,0 +1,140 @@
+import asyncio
+import re
+from typing import List, Optional, Tuple
+
+from pr_agent.algo.ai_handlers.base_ai_handler import BaseAiHandler
+
+FILE_HEADER_RE = re.compile(r"^## File: '(.+?)'\s*$", re.MULTILINE)
+HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+NUMBERED_ADDED_LINE_RE = re.compile(r"^(\d+) \+(.*\S.*)$")
+SUGGESTED_FILE_RE = re.compile(r"'relevant_file': '([^']+)'")
+
+
+def _yaml_list(items: str) -> str:
+    """The value of a YAML list key: the items on the next lines, or an inline empty list."""
+    return "\n" + items.rstrip("\n") if items else " []"
+
+
+def _block(text: str, indent: int) -> str:
+    """A YAML block scalar ("|") body, indented."""
+    return "\n".join(" " * indent + line for line in (text.splitlines() or [""]))
+
+
+class FakeAIHandler(BaseAiHandler):
+    """
+    An AI handler returning canned, well-formed answers for /review, /describe and /improve (including the
+    self-reflection step), after a configurable delay that stands in for the model latency.
+
+    The answers are built from the prompt (the files and the added lines of the diff), so they go through the same
+    parsing, validation and publishing code paths as real answers.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[dict] = []
+
+    @property
+    def deployment_id(self):
+        return None
+
+    async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2,
+                              img_path: str = None, local_prompt_tokens: int = None):
+        self.calls.append({"model": model, "prompt_chars": len(system) + len(user)})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if "$PRCodeSuggestionsFeedback" in system or "$PRCodeSuggestionsFeedback" in user:
+            return self._reflect(user), "stop"
+        if "$PRCodeSuggestions" in system or "$PRCodeSuggestions" in user:
+            return self._improve(user), "stop"
+        if "$PRDescription" in system or "$PRDescription" in user:
+            return self._describe(user), "stop"
+        if "$PRReview" in system or "$PRReview" in user:
+            return self._review(user), "stop"
+        return "```yaml\nanswer: |\n  Looks good.\n```", "stop"
+
+    @staticmethod
+    def _file_sections(user: str) -> List[Tuple[str, str]]:
+        headers = list(FILE_HEADER_RE.finditer(user))
+        return [(header.group(1), user[header.end():headers[i + 1].start() if i + 1 < len(headers) else len(user)])
+                for i, header in enumerate(headers)]
+
+    @classmethod
+    def _first_added_line(cls, user: str, filename: Optional[str] = None) -> Optional[Tuple[str, int, str]]:
+        """
+        The first added (non blank) line of a file in the prompt's diff, with its line number in the new file. Handles
+        both the plain hunks and the '__new hunk__' sections with line numbers.
+        """
+        for section_file, section in cls._file_sections(user):
+            if filename is not None and section_file != filename:
+                continue
+            new_line = 0
+            for line in section.splitlines():
+                header = HUNK_HEADER_RE.match(line)
+                numbered = NUMBERED_ADDED_LINE_RE.match(line)
+                if header:
+                    new_line = int(header.group(1))
+                elif numbered:
+                    return section_file, int(numbered.group(1)), numbered.group(2)
+                elif line.startswith("+"):
+                    if line[1:].strip():
+                        return section_file, new_line, line[1:]
+                    new_line += 1
+                elif line.startswith(" "):
+                    new_line += 1
+        return None
+
+    def _review(self, user: str) -> str:
+        issues = ""
+        added = self._first_added_line(user)
+        if added:
+            filename, line, _ = added
+            issues = (f"  - relevant_file: |\n      {filename}\n"
+                      f"    issue_header: |\n      Possible Bug\n"
+                      f"    issue_content: |\n      The new debug call may log sensitive values.\n"
+                      f"    start_line: {line}\n    end_line: {line}\n")
+        return ("```yaml\nreview:\n"
+                "  estimated_effort_to_review_[1-5]: |\n    2\n"
+                "  relevant_tests: |\n    No\n"
+                f"  key_issues_to_review:{_yaml_list(issues)}\n"
+                "  security_concerns: |\n    No\n"
+                "```")
+
+    def _describe(self, user: str) -> str:
+        files = "".join(f"- filename: |\n    {filename}\n"
+                        f"  changes_title: |\n    Add debug logging to the helpers\n"
+                        f"  changes_summary: |\n    - Logs intermediate results\n"
+                        f"  label: |\n    enhancement\n"
+                        for filename, _ in self._file_sections(user))
+        return ("```yaml\ntype:\n- Enhancement\n"
+                "description: |\n  - Add debug logging to computation helpers\n"
+                "title: |\n  Add debug logging to computation helpers\n"
+                f"pr_files:{_yaml_list(files)}\n"
+                "```")
+
+    def _improve(self, user: str) -> str:
+        suggestions = ""
+        for filename, _ in self._file_sections(user)[:3]:
+            added = self._first_added_line(user, filename)
+            if not added:
+                continue
+            _, _, code = added
+            suggestions += (f"- relevant_file: |\n    {filename}\n"
+                            f"  language: |\n    python\n"
+                            f"  existing_code: |\n{_block(code, 4)}\n"
+                            f"  suggestion_content: |\n    Use lazy logging arguments.\n"
+                            f"  improved_code: |\n{_block(code.rstrip() + '  # reviewed', 4)}\n"
+                            f"  one_sentence_summary: |\n    Use lazy logging\n"
+                            f"  label: |\n    best practice\n")
+        return f"```yaml\ncode_suggestions:{_yaml_list(suggestions)}\n```"
+
+    def _reflect(self, user: str) -> str:
+        feedback = ""
+        for filename in SUGGESTED_FILE_RE.findall(user):
+            added = self._first_added_line(user, filename)
+            line = added[1] if added else 1
+            feedback += (f"- suggestion_summary: |\n    Use lazy logging\n"
+                         f"  relevant_file: |\n    {filename}\n"
+                         f"  relevant_lines_start: {line}\n  relevant_lines_end: {line}\n"
+                         f"  suggestion_score: 7\n"
+                         f"  why: |\n    Valid and low risk.\n")
+        return f"```yaml\ncode_suggestions:{_yaml_list(feedback)}\n```"
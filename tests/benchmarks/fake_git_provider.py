@@ -0,0 +1,111 @@
+import os
+from collections import Counter
+from typing import List, Optional
+
+from pr_agent.algo.types import FilePatchInfo
+from pr_agent.git_providers.git_provider import GitProvider
+from tests.benchmarks.fixtures import fixture_to_diff_files, load_fixture
+
+FIXTURE_URL_PREFIX = "benchmark://"
+
+
+def fixture_pr_url(fixture_path: str) -> str:
+    return FIXTURE_URL_PREFIX + os.path.abspath(fixture_path)
+
+
+class PullRequestMimic:
+    def __init__(self, title: str, number: int = 1):
+        self.title = title
+        self.number = number
+
+
+class FixtureGitProvider(GitProvider):
+    """
+    A git provider serving a PR fixture from disk (see tests/benchmarks/fixtures.py), for offline benchmarks.
+    The PR url is the fixture path prefixed with "benchmark://". Published content is kept in memory, so a benchmark
+    exercises the publishing code paths without network calls.
+    """
+
+    def __init__(self, pr_url: Optional[str] = None, incremental=False):
+        if not pr_url or not pr_url.startswith(FIXTURE_URL_PREFIX):
+            raise ValueError(f"Expected a {FIXTURE_URL_PREFIX}<fixture path> PR url, got '{pr_url}'")
+        self.pr_url = pr_url
+        self.fixture = load_fixture(pr_url[len(FIXTURE_URL_PREFIX):])
+        self.pr = PullRequestMimic(self.fixture["title"])
+        self.diff_files = None
+        self.incremental = incremental
+        self.published_comments: List[str] = []
+        self.published_inline_comments: List[dict] = []
+        self.published_code_suggestions: List[dict] = []
+        self.published_descriptions: List[tuple] = []
+        self.published_labels: List[list] = []
+
+    def is_supported(self, capability: str) -> bool:
+        return capability not in ("get_issue_comments", "gfm_markdown")
+
+    def get_files(self) -> List[str]:
+        return [f["filename"] for f in self.fixture["files"]]
+
+    def get_diff_files(self) -> List[FilePatchInfo]:
+        # fresh objects on every call, like a real provider: the tools mutate them (e.g. tokens, patch)
+        self.diff_files = fixture_to_diff_files(self.fixture)
+        return self.diff_files
+
+    def get_languages(self):
+        extensions = Counter(os.path.splitext(filename)[1].lstrip(".") for filename in self.get_files())
+        total = sum(extensions.values()) or 1
+        return {extension: count / total * 100 for extension, count in extensions.items()}
+
+    def get_pr_branch(self):
+        return self.fixture["branch"]
+
+    def get_user_id(self):
+        return -1
+
+    def get_pr_description_full(self) -> str:
+        return self.fixture["description"]
+
+    def get_repo_settings(self):
+        return ""
+
+    def get_commit_messages(self):
+        return self.fixture["commit_messages"]
+
+    def get_issue_comments(self):
+        raise NotImplementedError("Issue comments are not recorded in benchmark fixtures")
+
+    def get_pr_labels(self, update=False):
+        return self.published_labels[-1] if self.published_labels else []
+
+    def publish_description(self, pr_title: str, pr_body: str):
+        self.published_descriptions.append((pr_title, pr_body))
+
+    def publish_code_suggestions(self, code_suggestions: list) -> bool:
+        self.published_code_suggestions.extend(code_suggestions)
+        return True
+
+    def publish_comment(self, pr_comment: str, is_temporary: bool = False):
+        if not is_temporary:
+            self.published_comments.append(pr_comment)
+
+    def publish_inline_comment(self, body: str, relevant_file: str, relevant_line_in_file: str,
+                               original_suggestion=None):
+        self.published_inline_comments.append({"body": body, "path": relevant_file})
+
+    def publish_inline_comments(self, comments: list[dict]):
+        self.published_inline_comments.extend(comments)
+
+    def publish_labels(self, labels):
+        self.published_labels.append(list(labels))
+
+    def remove_initial_comment(self):
+        pass
+
+    def remove_comment(self, comment):
+        pass
+
+    def add_eyes_reaction(self, issue_comment_id: int, disable_eyes: bool = False) -> Optional[int]:
+        return None
+
+    def remove_reaction(self, issue_comment_id: int, reaction_id: int) -> bool:
+        return True
@@ -0,0 +1,190 @@
+"""
+PR fixtures for the benchmark suite.
+
+A fixture is a JSON file holding everything a tool reads from a git provider: the PR metadata and, for every changed
+file, the base and head contents and the unified diff patch. Fixtures come from two places:
+
+- synthetic PRs, generated deterministically (seeded) for each size in SYNTHETIC_SIZES, and cached on disk
+- real PRs, recorded once through a configured git provider with `record_fixture`, then replayed offline
+"""
+
+import difflib
+import json
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class SyntheticSize:
+    num_files: int
+    min_lines: int
+    max_lines: int
+    max_hunks: int
+
+
+SYNTHETIC_SIZES: Dict[str, SyntheticSize] = {
+    "small": SyntheticSize(num_files=3, min_lines=40, max_lines=120, max_hunks=2),
+    "medium": SyntheticSize(num_files=30, min_lines=80, max_lines=400, max_hunks=4),
+    "large": SyntheticSize(num_files=200, min_lines=80, max_lines=600, max_hunks=6),
+    "xlarge": SyntheticSize(num_files=1000, min_lines=40, max_lines=400, max_hunks=4),
+}
+
+EXTENSIONS = (".py", ".py", ".py", ".ts", ".go", ".java", ".md")
+PACKAGES = ("core", "api", "utils", "models", "services", "handlers", "storage", "cli")
+
+
+def _code_block(rng: random.Random, index: int) -> List[str]:
+    name = f"compute_{index}_{rng.randint(0, 999)}"
+    factor, threshold, offset = rng.randint(2, 9), rng.randint(10, 500), rng.randint(1, 50)
+    return [
+        f"def {name}(value, items=None):",
+        f"    \"\"\"Scales value by {factor} and folds in the optional items.\"\"\"",
+        f"    result = value * {factor}",
+        "    for item in items or []:",
+        f"        result += item.weight if item.weight < {threshold} else {offset}",
+        f"    if result > {threshold}:",
+        f"        return result - {offset}",
+        "    return result",
+        "",
+    ]
+
+
+def _base_lines(rng: random.Random, num_lines: int) -> List[str]:
+    lines = ["import logging", "", "logger = logging.getLogger(__name__)", ""]
+    index = 0
+    while len(lines) < num_lines:
+        lines.extend(_code_block(rng, index))
+        index += 1
+    return lines[:num_lines]
+
+
+def _modify(rng: random.Random, lines: List[str], max_hunks: int) -> List[str]:
+    head = list(lines)
+    positions = sorted(rng.sample(range(len(head)), k=min(len(head), rng.randint(1, max_hunks))), reverse=True)
+    for position in positions:  # bottom-up, so earlier positions stay valid
+        kind = rng.choice(("replace", "insert", "delete"))
+        span = rng.randint(1, 4)
+        new_lines = [f"    logger.debug('step {position}.{i}: %s', result)" for i in range(rng.randint(1, 5))]
+        if kind == "replace":
+            head[position:position + span] = new_lines
+        elif kind == "insert":
+            head[position:position] = new_lines
+        else:
+            del head[position:position + span]
+    return head
+
+
+def make_patch(base_file: str, head_file: str) -> str:
+    """
+    A unified diff in the git providers' format: hunks only, without the ---/+++ file header.
+    """
+    diff = difflib.unified_diff(base_file.splitlines(), head_file.splitlines(), lineterm="", n=3)
+    return "\n".join(line for line in diff if not line.startswith(("---", "+++")))
+
+
+def generate_synthetic_fixture(size: str, seed: int = 0) -> dict:
+    spec = SYNTHETIC_SIZES[size]
+    rng = random.Random(f"{size}-{seed}")
+    files = []
+    for i in range(spec.num_files):
+        filename = f"src/{PACKAGES[i % len(PACKAGES)]}/module_{i}{rng.choice(EXTENSIONS)}"
+        base = _base_lines(rng, rng.randint(spec.min_lines, spec.max_lines))
+        roll = rng.random()
+        if roll < 0.08:
+            edit_type, old_filename, base_file, head_file = EDIT_TYPE.ADDED, None, "", "\n".join(base) + "\n"
+        elif roll < 0.12:
+            edit_type, old_filename, base_file, head_file = EDIT_TYPE.DELETED, None, "\n".join(base) + "\n", ""
+        else:
+            edit_type = EDIT_TYPE.MODIFIED
+            old_filename = None
+            if roll < 0.15:
+                edit_type, old_filename = EDIT_TYPE.RENAMED, filename.replace("module_", "legacy_module_")
+            base_file = "\n".join(base) + "\n"
+            head_file = "\n".join(_modify(rng, base, spec.max_hunks)) + "\n"
+        files.append({
+            "filename": filename,
+            "old_filename": old_filename,
+            "edit_type": edit_type.name,
+            "base_file": base_file,
+            "head_file": head_file,
+            "patch": make_patch(base_file, head_file),
+        })
+    return {
+        "version": FIXTURE_FORMAT_VERSION,
+        "name": f"synthetic_{size}",
+        "title": f"Refactor computation helpers ({spec.num_files} files)",
+        "description": "Adds debug logging to the computation helpers and removes dead branches.",
+        "branch": f"feature/benchmark-{size}",
+        "commit_messages": "Add debug logging\nRemove dead branches",
+        "files": files,
+    }
+
+
+def save_fixture(fixture: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(fixture, f)
+    os.replace(tmp_path, path)
+
+
+def load_fixture(path: str) -> dict:
+    with open(path) as f:
+        fixture = json.load(f)
+    if fixture.get("version") != FIXTURE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported fixture version in {path}: {fixture.get('version')}")
+    return fixture
+
+
+def get_synthetic_fixture_path(size: str, seed: int = 0, fixtures_dir: Optional[str] = None) -> str:
+    """
+    Returns the path of a synthetic fixture, generating it on first use.
+    """
+    if size not in SYNTHETIC_SIZES:
+        raise ValueError(f"Unknown fixture size '{size}', expected one of {list(SYNTHETIC_SIZES)}")
+    path = os.path.join(fixtures_dir or FIXTURES_DIR, f"synthetic_{size}_{seed}.json")
+    if not os.path.exists(path):
+        save_fixture(generate_synthetic_fixture(size, seed), path)
+    return path
+
+
+def fixture_to_diff_files(fixture: dict) -> List[FilePatchInfo]:
+    return [FilePatchInfo(f["base_file"], f["head_file"], f["patch"], f["filename"],
+                          edit_type=EDIT_TYPE[f["edit_type"]], old_filename=f.get("old_filename"))
+            for f in fixture["files"]]
+
+
+def record_fixture(pr_url: str, path: str, name: Optional[str] = None) -> dict:
+    """
+    Records a real PR through the configured git provider (config.git_provider and its credentials), so it can be
+    replayed by the benchmarks without network access.
+    """
+    from pr_agent.git_providers import get_git_provider_with_context
+
+    git_provider = get_git_provider_with_context(pr_url)
+    files = [{
+        "filename": f.filename,
+        "old_filename": f.old_filename,
+        "edit_type": f.edit_type.name,
+        "base_file": f.base_file or "",
+        "head_file": f.head_file or "",
+        "patch": f.patch or "",
+    } for f in git_provider.get_diff_files()]
+    fixture = {
+        "version": FIXTURE_FORMAT_VERSION,
+        "name": name or os.path.splitext(os.path.basename(path))[0],
+        "title": git_provider.pr.title,
+        "description": git_provider.get_pr_description_full(),
+        "branch": str(git_provider.get_pr_branch()),
+        "commit_messages": git_provider.get_commit_messages() or "",
+        "files": files,
+    }
+    save_fixture(fixture, path)
+    return fixture
@@ -0,0 +1,259 @@
+"""
+Micro-benchmarks of the pure functions on the diff processing hot path, with scaling checks.
+
+Each primitive runs on synthetic inputs of growing size (up to 1000-hunk patches on 20k-line files, large pathological
+YAML answers). The scaling exponent is the slope of log(time) over log(size): about 1 for a linear function, 2 for a
+quadratic one. A primitive whose exponent is above MAX_SCALING_EXPONENT went superlinear.
+
+Usage:
+    python -m tests.benchmarks.micro_benchmarks --output micro_report.json
+    python -m tests.benchmarks.micro_benchmarks --primitives extend_patch try_fix_yaml --check
+
+With --check, the command exits with status 1 when a primitive scales superlinearly.
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+from pr_agent.algo.git_patch_processing import (
+    decouple_and_convert_to_hunks_with_lines_numbers, extend_patch,
+    handle_patch_deletions, process_patch_lines)
+from pr_agent.algo.token_handler import TokenEncoder
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+from pr_agent.algo.utils import (clip_tokens, convert_to_markdown_v2,
+                                 load_large_diff, try_fix_yaml)
+
+# 1 is linear and 2 quadratic; O(n log n) and timing noise stay well below 1.5
+MAX_SCALING_EXPONENT = 1.5
+HUNK_SPACING = 20  # lines between two changes, so the hunks (with their context) never overlap
+
+
+def make_file_lines(num_lines: int) -> List[str]:
+    lines = []
+    for i in range(num_lines):
+        if i % 10 == 0:
+            lines.append(f"def handler_{i}(request, retries=3):")
+        else:
+            lines.append(f"    value_{i} = process(request.field_{i % 7}, retries) + {i}")
+    return lines
+
+
+def make_patch(base_lines: List[str], num_hunks: int, deletion_only_every: int = 0) -> tuple:
+    """
+    Changes one line every HUNK_SPACING lines, and returns the new file lines and the unified diff (3 lines of
+    context, section headers as git writes them). With `deletion_only_every`, every n-th hunk only deletes a line.
+    """
+    head_lines = list(base_lines)
+    hunks = []
+    offset = 0  # line count difference between the new and the old file, before the current hunk
+    for h in range(num_hunks):
+        position = HUNK_SPACING * h + HUNK_SPACING // 2  # 0-based line of the change in the old file
+        if position + 4 > len(base_lines):
+            break
+        before, after = base_lines[position - 3:position], base_lines[position + 1:position + 4]
+        section_header = base_lines[position - position % 10]
+        deletion_only = deletion_only_every and h % deletion_only_every == 0
+        changed = [f"-{base_lines[position]}"] if deletion_only else \
+            [f"-{base_lines[position]}", f"+{base_lines[position]}  # updated"]
+        new_size = 6 if deletion_only else 7
+        hunks.append(f"@@ -{position - 2},7 +{position - 2 + offset},{new_size} @@ {section_header}")
+        hunks.extend(f" {line}" for line in before)
+        hunks.extend(changed)
+        hunks.extend(f" {line}" for line in after)
+        if deletion_only:
+            head_lines[position + offset] = None
+            offset -= 1
+        else:
+            head_lines[position + offset] = f"{base_lines[position]}  # updated"
+    head_lines = [line for line in head_lines if line is not None]
+    return head_lines, "\n".join(hunks)
+
+
+def _patch_inputs(num_hunks: int, deletion_only_every: int = 0):
+    base_lines = make_file_lines(num_hunks * HUNK_SPACING)
+    head_lines, patch = make_patch(base_lines, num_hunks, deletion_only_every)
+    return "\n".join(base_lines) + "\n", "\n".join(head_lines) + "\n", patch
+
+
+def make_pathological_yaml(num_suggestions: int) -> str:
+    """
+    A /improve answer that fails the plain YAML parse and most of try_fix_yaml's fallbacks: code blocks without a
+    block scalar indicator, dedented code lines, tabs and stray markdown fences.
+    """
+    parts = ["```yaml", "code_suggestions:"]
+    for i in range(num_suggestions):
+        parts.extend([
+            f"- relevant_file: src/module_{i}.py",
+            "  language: python",
+            "  existing_code: |",
+            f"    value = compute({i})",
+            f"if value > {i}: {{",
+            "\treturn value",
+            "  improved_code: |",
+            f"    value = compute({i}) or 0",
+            f"  one_sentence_summary: Handle missing value {i}",
+            "  label: possible bug",
+            "```yaml",
+        ])
+    parts.append("```")
+    return "\n".join(parts)
+
+
+def make_review_output(num_issues: int) -> tuple:
+    files = []
+    issues = []
+    for i in range(num_issues):
+        filename = f"src/module_{i}.py"
+        files.append(FilePatchInfo("", "\n".join(make_file_lines(40)), "", filename, edit_type=EDIT_TYPE.MODIFIED))
+        issues.append({"relevant_file": filename, "issue_header": "Possible Bug",
+                       "issue_content": f"The retries of handler_{i} are not bounded.",
+                       "start_line": 12, "end_line": 14})
+    output_data = {"review": {"estimated_effort_to_review_[1-5]": "3", "relevant_tests": "No",
+                              "key_issues_to_review": issues, "security_concerns": "No"}}
+    return output_data, files
+
+
+@dataclass
+class Primitive:
+    name: str
+    setup: Callable[[int], Callable[[], object]]  # size -> a function running the primitive once on that input
+    sizes: Sequence[int]
+    unit: str
+
+
+def _setup_extend_patch(num_hunks: int):
+    base_file, head_file, patch = _patch_inputs(num_hunks)
+    return lambda: extend_patch(base_file, patch, 5, 1, "module.py", new_file_str=head_file)
+
+
+def _setup_process_patch_lines(num_hunks: int):
+    base_file, head_file, patch = _patch_inputs(num_hunks)
+    return lambda: process_patch_lines(patch, base_file, 5, 1, head_file)
+
+
+def _setup_handle_patch_deletions(num_hunks: int):
+    base_file, head_file, patch = _patch_inputs(num_hunks, deletion_only_every=3)
+    return lambda: handle_patch_deletions(patch, base_file, head_file, "module.py", EDIT_TYPE.MODIFIED)
+
+
+def _setup_decouple(num_hunks: int):
+    base_file, head_file, patch = _patch_inputs(num_hunks)
+    file = FilePatchInfo(base_file, head_file, patch, "module.py", edit_type=EDIT_TYPE.MODIFIED)
+    return lambda: decouple_and_convert_to_hunks_with_lines_numbers(patch, file)
+
+
+def load_tokenizer():
+    """
+    tiktoken downloads its encodings on first use. litellm bundles them, and points TIKTOKEN_CACHE_DIR at its copy
+    when imported, so the tokenizer also loads offline.
+    """
+    import litellm.litellm_core_utils.default_encoding  # noqa: F401
+    return TokenEncoder.get_token_encoder()
+
+
+def _setup_load_large_diff(num_hunks: int):
+    base_file, head_file, _ = _patch_inputs(num_hunks)
+    return lambda: load_large_diff("module.py", head_file, base_file, show_warning=False)
+
+
+def _setup_clip_tokens(num_lines: int):
+    load_tokenizer()
+    text = "\n".join(make_file_lines(num_lines))
+    return lambda: clip_tokens(text, max_tokens=num_lines)
+
+
+def _setup_try_fix_yaml(num_suggestions: int):
+    response_text = make_pathological_yaml(num_suggestions)
+    keys = ["relevant_file:", "existing_code:", "improved_code:", "one_sentence_summary:", "label:"]
+    return lambda: try_fix_yaml(response_text, keys_fix_yaml=keys, first_key="code_suggestions", last_key="label",
+                                response_text_original=response_text)
+
+
+def _setup_convert_to_markdown(num_issues: int):
+    output_data, files = make_review_output(num_issues)
+
+    def run():
+        # the function pops keys from its input
+        return convert_to_markdown_v2({"review": dict(output_data["review"])}, files=files)
+
+    return run
+
+
+PRIMITIVES: Dict[str, Primitive] = {p.name: p for p in [
+    Primitive("extend_patch", _setup_extend_patch, (125, 250, 500, 1000), "hunks"),
+    Primitive("process_patch_lines", _setup_process_patch_lines, (125, 250, 500, 1000), "hunks"),
+    Primitive("handle_patch_deletions", _setup_handle_patch_deletions, (125, 250, 500, 1000), "hunks"),
+    Primitive("decouple_and_convert_to_hunks_with_lines_numbers", _setup_decouple, (125, 250, 500, 1000), "hunks"),
+    Primitive("load_large_diff", _setup_load_large_diff, (125, 250, 500, 1000), "hunks"),
+    Primitive("clip_tokens", _setup_clip_tokens, (1250, 2500, 5000, 10000), "lines"),
+    Primitive("try_fix_yaml", _setup_try_fix_yaml, (25, 50, 100, 200), "suggestions"),
+    Primitive("convert_to_markdown_v2", _setup_convert_to_markdown, (50, 100, 200, 400), "issues"),
+]}
+
+
+def time_call(func: Callable[[], object], repeat: int = 5) -> float:
+    """The best of `repeat` runs, in seconds: the least noisy estimate of a function's own cost."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scaling_exponent(sizes: Sequence[int], times: Sequence[float]) -> float:
+    """The least squares slope of log(time) over log(size)."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys, strict=True)) / sum((x - mean_x) ** 2 for x in xs)
+
+
+def run_primitive(primitive: Primitive, sizes: Sequence[int] = None, repeat: int = 5) -> dict:
+    sizes = list(sizes or primitive.sizes)
+    times = []
+    for size in sizes:
+        func = primitive.setup(size)
+        func()  # warm up (settings lookups, tokenizer loading, regex compilation)
+        times.append(time_call(func, repeat))
+    exponent = scaling_exponent(sizes, times)
+    return {
+        "primitive": primitive.name,
+        "unit": primitive.unit,
+        "sizes": sizes,
+        "times_ms": [round(t * 1000, 4) for t in times],
+        "scaling_exponent": round(exponent, 3),
+        "superlinear": exponent > MAX_SCALING_EXPONENT,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the diff processing primitives")
+    parser.add_argument("--primitives", nargs="*", default=list(PRIMITIVES), choices=list(PRIMITIVES))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per size (the best one is kept)")
+    parser.add_argument("--output", help="path of a JSON report")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if a primitive is superlinear")
+    args = parser.parse_args(argv)
+
+    from pr_agent.log import setup_logger
+    setup_logger(level="ERROR")
+
+    results = [run_primitive(PRIMITIVES[name], repeat=args.repeat) for name in args.primitives]
+    for result in results:
+        timings = "  ".join(f"{size} {result['unit']}: {t:.2f}ms"
+                            for size, t in zip(result["sizes"], result["times_ms"], strict=True))
+        flag = "  SUPERLINEAR" if result["superlinear"] else ""
+        print(f"{result['primitive']:<50} exponent {result['scaling_exponent']:.2f}  {timings}{flag}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"max_scaling_exponent": MAX_SCALING_EXPONENT, "results": results}, f, indent=2)
+    return 1 if args.check and any(result["superlinear"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
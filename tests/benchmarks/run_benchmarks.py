@@ -0,0 +1,270 @@
+"""
+Offline benchmarks of /review, /describe and /improve.
+
+Each command runs end to end on a PR fixture (tests/benchmarks/fixtures.py), served from disk by FixtureGitProvider,
+with FakeAIHandler standing in for the model. For every (fixture, command) pair the report has:
+
+- the end-to-end wall time (median of the timed runs)
+- the time spent in each traced stage (diff fetching, patch extension and compression, LLM calls, publishing)
+- the peak memory allocated by Python during the command (measured in a separate run, tracemalloc slows it down)
+- the number of tokenizer calls and of tokenized characters
+- the number of LLM calls
+
+Usage:
+    python -m tests.benchmarks.run_benchmarks --sizes small medium --output report.json
+    python -m tests.benchmarks.run_benchmarks --baseline baseline.json --max-regression 1.25
+
+With --baseline, the command exits with status 1 when a measurement regressed by more than the allowed ratio.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from starlette_context import request_cycle_context
+
+from pr_agent.agent.pr_agent import PRAgent, command2class
+from pr_agent.algo.token_handler import TokenEncoder
+from pr_agent.config_loader import get_settings
+from pr_agent.git_providers import _GIT_PROVIDERS
+from pr_agent.log import get_logger, setup_logger
+from pr_agent.log.tracing import InMemorySpanExporter, configure_tracing
+from tests.benchmarks.fake_ai_handler import FakeAIHandler
+from tests.benchmarks.fake_git_provider import (FixtureGitProvider,
+                                                fixture_pr_url)
+from tests.benchmarks.fixtures import (SYNTHETIC_SIZES,
+                                       get_synthetic_fixture_path,
+                                       load_fixture)
+
+REPORT_FORMAT_VERSION = 1
+COMMANDS = ("review", "describe", "improve")
+GIT_PROVIDER_ID = "benchmark"
+
+# settings of every benchmark run: output is published to the fixture provider, and no fallback model is retried
+BENCHMARK_SETTINGS = {
+    "config.git_provider": GIT_PROVIDER_ID,
+    "config.publish_output": True,
+    "config.publish_output_progress": False,
+    "config.fallback_models": [],
+    "config.add_repo_metadata": False,
+}
+
+# stages shorter than this are too noisy to be compared with a baseline
+MIN_COMPARED_STAGE_MS = 5.0
+
+_GIT_PROVIDERS[GIT_PROVIDER_ID] = FixtureGitProvider
+
+
+class _CountingEncoder:
+    def __init__(self, encoder, counter: Dict[str, int]):
+        self._encoder = encoder
+        self._counter = counter
+
+    def encode(self, text, *args, **kwargs):
+        self._counter["calls"] += 1
+        self._counter["chars"] += len(text)
+        return self._encoder.encode(text, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._encoder, name)
+
+
+@contextmanager
+def count_tokenizer_calls():
+    """
+    Counts the calls to the tokenizer (the encoder returned by TokenEncoder.get_token_encoder), and the number of
+    characters they tokenized.
+    """
+    counter = {"calls": 0, "chars": 0}
+    original = TokenEncoder.__dict__["get_token_encoder"]
+
+    def get_token_encoder(cls):
+        return _CountingEncoder(original.__func__(cls), counter)
+
+    TokenEncoder.get_token_encoder = classmethod(get_token_encoder)
+    try:
+        yield counter
+    finally:
+        TokenEncoder.get_token_encoder = original
+
+
+def _stage_timings(exporter: InMemorySpanExporter) -> Dict[str, dict]:
+    stages: Dict[str, dict] = {}
+    for s in exporter.spans:
+        if s.parent_span_id is None:  # the command itself
+            continue
+        stage = stages.setdefault(s.name, {"count": 0, "total_ms": 0.0})
+        stage["count"] += 1
+        stage["total_ms"] += s.duration_ms or 0.0
+    for stage in stages.values():
+        stage["total_ms"] = round(stage["total_ms"], 3)
+    return dict(sorted(stages.items()))
+
+
+def _warm_up(command: str):
+    # one-off costs (importing the tool and its dependencies, loading the tokenizer) are not part of a command's time
+    command2class[command]
+    TokenEncoder.get_token_encoder()
+
+
+async def _run_command(command: str, pr_url: str, latency: float, extra_settings: Optional[dict]):
+    with request_cycle_context({"settings": copy.deepcopy(get_settings())}):
+        for key, value in {**BENCHMARK_SETTINGS, **(extra_settings or {})}.items():
+            get_settings().set(key, value)
+        ai_handler = FakeAIHandler(latency=latency)
+        agent = PRAgent(ai_handler=lambda: ai_handler)
+        start = time.perf_counter()
+        success = await agent.handle_request(pr_url, [command])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return success, elapsed_ms, ai_handler
+
+
+def run_benchmark(fixture_path: str, command: str, latency: float = 0.0, repeat: int = 1,
+                  measure_memory: bool = True, extra_settings: Optional[dict] = None) -> dict:
+    """
+    Runs one command on one fixture, and returns its measurements.
+    """
+    pr_url = fixture_pr_url(fixture_path)
+    fixture = load_fixture(fixture_path)
+    _warm_up(command)
+    wall_times, success, stages, tokenizer, llm_calls = [], True, {}, {}, 0
+    for _ in range(max(repeat, 1)):
+        exporter = InMemorySpanExporter()
+        configure_tracing(enabled=True, exporter=exporter)
+        try:
+            with count_tokenizer_calls() as tokenizer:
+                run_success, elapsed_ms, ai_handler = asyncio.run(
+                    _run_command(command, pr_url, latency, extra_settings))
+        finally:
+            configure_tracing()
+        success = success and bool(run_success)
+        wall_times.append(round(elapsed_ms, 3))
+        stages = _stage_timings(exporter)
+        llm_calls = len(ai_handler.calls)
+
+    peak_memory = None
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            asyncio.run(_run_command(command, pr_url, latency, extra_settings))
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "fixture": fixture["name"],
+        "num_files": len(fixture["files"]),
+        "command": command,
+        "success": success,
+        "wall_time_ms": statistics.median(wall_times),
+        "wall_times_ms": wall_times,
+        "stages": stages,
+        "llm_calls": llm_calls,
+        "tokenizer_calls": tokenizer.get("calls", 0),
+        "tokenized_chars": tokenizer.get("chars", 0),
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def run_benchmarks(fixture_paths: List[str], commands=COMMANDS, latency: float = 0.0, repeat: int = 1,
+                   measure_memory: bool = True) -> dict:
+    results = []
+    for fixture_path in fixture_paths:
+        for command in commands:
+            get_logger().info(f"Benchmarking /{command} on {fixture_path}")
+            results.append(run_benchmark(fixture_path, command, latency=latency, repeat=repeat,
+                                         measure_memory=measure_memory))
+    return {
+        "version": REPORT_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "model": get_settings().config.model,
+        "llm_latency_s": latency,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare_reports(report: dict, baseline: dict, max_regression: float = 1.25) -> List[str]:
+    """
+    Compares a report with a baseline report, and returns the regressions: wall time, stage time, peak memory or
+    tokenizer calls of a (fixture, command) pair that grew by more than `max_regression` times, or a command that
+    succeeded in the baseline and failed now.
+    """
+    baseline_results = {(r["fixture"], r["command"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        key = (result["fixture"], result["command"])
+        previous = baseline_results.get(key)
+        if previous is None:
+            continue
+        name = f"{result['fixture']} /{result['command']}"
+        if previous["success"] and not result["success"]:
+            regressions.append(f"{name}: failed")
+        measurements = [("wall time (ms)", result["wall_time_ms"], previous["wall_time_ms"]),
+                        ("peak memory (bytes)", result.get("peak_memory_bytes"), previous.get("peak_memory_bytes")),
+                        ("tokenizer calls", result["tokenizer_calls"], previous["tokenizer_calls"])]
+        for stage, timing in result["stages"].items():
+            previous_timing = previous["stages"].get(stage)
+            if previous_timing and previous_timing["total_ms"] >= MIN_COMPARED_STAGE_MS:
+                measurements.append((f"stage {stage} (ms)", timing["total_ms"], previous_timing["total_ms"]))
+        for label, value, previous_value in measurements:
+            if value is None or not previous_value:
+                continue
+            if value > previous_value * max_regression:
+                regressions.append(f"{name}: {label} {previous_value} -> {value} "
+                                   f"(x{value / previous_value:.2f}, allowed x{max_regression})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks of /review, /describe and /improve")
+    parser.add_argument("--sizes", nargs="*", default=["small", "medium", "large"], choices=list(SYNTHETIC_SIZES),
+                        help="synthetic fixture sizes to run")
+    parser.add_argument("--fixtures", nargs="*", default=[], help="paths of recorded fixtures to run")
+    parser.add_argument("--commands", nargs="*", default=list(COMMANDS), choices=list(COMMANDS))
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated LLM latency, in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per command (the median is reported)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--output", default="benchmark_report.json", help="path of the JSON report")
+    parser.add_argument("--baseline", help="a previous report to compare with")
+    parser.add_argument("--max-regression", type=float, default=1.25,
+                        help="allowed ratio between a measurement and its baseline")
+    args = parser.parse_args(argv)
+
+    setup_logger(level=os.environ.get("LOG_LEVEL", "WARNING"))
+    fixture_paths = [get_synthetic_fixture_path(size) for size in args.sizes] + args.fixtures
+    report = run_benchmarks(fixture_paths, commands=args.commands, latency=args.latency, repeat=args.repeat,
+                            measure_memory=not args.no_memory)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for result in report["results"]:
+        memory = f"{result['peak_memory_bytes'] / 2 ** 20:.1f}MB" if result["peak_memory_bytes"] else "-"
+        print(f"{result['fixture']:>18} /{result['command']:<9} {result['wall_time_ms']:>10.1f}ms "
+              f"peak {memory:>8} tokenizer calls {result['tokenizer_calls']:>6} "
+              f"{'' if result['success'] else 'FAILED'}")
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0 if all(result["success"] for result in report["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
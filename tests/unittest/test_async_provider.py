@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from pr_agent.git_providers.async_provider import (AsyncGitProvider,
+                                                   run_provider_io)
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class SlowProvider:
+    pr_url = "https://github.com/org/repo/pull/1"
+
+    def __init__(self):
+        self.threads = []
+
+    def publish_comment(self, body, is_temporary=False):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return f"{body} ({request_id.get()}, temporary={is_temporary})"
+
+    def get_files(self):
+        raise RuntimeError("rate limited")
+
+
+def test_calls_do_not_block_the_event_loop():
+    provider = SlowProvider()
+
+    async def main():
+        request_id.set("pr-1")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await AsyncGitProvider(provider).publish_comment("Preparing review...", is_temporary=True)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result == "Preparing review... (pr-1, temporary=True)"
+    assert ticks >= 5
+    assert provider.threads[0].startswith("git_provider")
+
+
+def test_concurrent_calls_overlap():
+    providers = [SlowProvider() for _ in range(4)]
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*(AsyncGitProvider(p).publish_comment("x") for p in providers))
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 0.6
+
+
+def test_calls_on_the_same_provider_are_serialized():
+    provider = SlowProvider()
+    running = []
+    overlaps = []
+
+    def diff(provider):
+        running.append(1)
+        overlaps.append(len(running))
+        provider.publish_comment("x")
+        running.pop()
+
+    async def main():
+        await asyncio.gather(*(AsyncGitProvider(provider).run(diff, provider) for _ in range(3)),
+                             AsyncGitProvider(provider).publish_comment("y"))
+
+    asyncio.run(main())
+    assert overlaps == [1, 1, 1]
+    assert len(provider.threads) == 4
+
+
+def test_attributes_and_errors():
+    git_provider = AsyncGitProvider(SlowProvider())
+    assert git_provider.pr_url == "https://github.com/org/repo/pull/1"
+    with pytest.raises(RuntimeError, match="rate limited"):
+        asyncio.run(git_provider.get_files())
+    assert asyncio.run(run_provider_io(sorted, [3, 1, 2], reverse=True)) == [3, 2, 1]
@@ -0,0 +1,45 @@
+import pytest
+
+from tests.benchmarks.fixtures import (generate_synthetic_fixture,
+                                       get_synthetic_fixture_path,
+                                       load_fixture)
+from tests.benchmarks.run_benchmarks import (COMMANDS, compare_reports,
+                                             run_benchmark)
+
+
+@pytest.fixture(scope="module")
+def small_fixture(tmp_path_factory):
+    return get_synthetic_fixture_path("small", fixtures_dir=str(tmp_path_factory.mktemp("fixtures")))
+
+
+class TestBenchmarkHarness:
+    def test_synthetic_fixtures_are_deterministic(self, small_fixture):
+        assert load_fixture(small_fixture) == generate_synthetic_fixture("small")
+        assert generate_synthetic_fixture("small", seed=1) != generate_synthetic_fixture("small")
+        assert all(f["patch"].startswith("@@") for f in load_fixture(small_fixture)["files"])
+
+    @pytest.mark.parametrize("command", COMMANDS)
+    def test_commands_run_end_to_end(self, small_fixture, command):
+        result = run_benchmark(small_fixture, command, measure_memory=False)
+        assert result["success"] is True
+        assert result["num_files"] == 3
+        assert result["llm_calls"] == (2 if command == "improve" else 1)  # improve self-reflects
+        assert result["tokenizer_calls"] > 0 and result["tokenized_chars"] > 0
+        assert "pr_processing.extend_patches" in result["stages"]
+        assert result["stages"]["llm.chat_completion"]["count"] == result["llm_calls"]
+
+    def test_peak_memory(self, small_fixture):
+        assert run_benchmark(small_fixture, "describe")["peak_memory_bytes"] > 0
+
+    def test_compare_reports(self):
+        def report(wall_time_ms, stage_ms, tokenizer_calls, success=True):
+            return {"results": [{"fixture": "synthetic_small", "command": "review", "success": success,
+                                 "wall_time_ms": wall_time_ms, "peak_memory_bytes": 1000,
+                                 "tokenizer_calls": tokenizer_calls,
+                                 "stages": {"pr_processing.get_pr_diff": {"count": 1, "total_ms": stage_ms}}}]}
+
+        baseline = report(100, 50, 10)
+        assert compare_reports(report(110, 55, 10), baseline) == []
+        regressions = compare_reports(report(200, 80, 30, success=False), baseline)
+        assert len(regressions) == 4
+        assert any("stage pr_processing.get_pr_diff" in r for r in regressions)
@@ -15,6 +15,37 @@ class TestBitbucketProvider:
         assert repo_slug == "MY_TEST_REPO"
         assert pr_number == 321
 
+    def test_get_diff_files_streams_the_diff(self, monkeypatch):
+        def diffstat(path, status):
+            stat = MagicMock(data={"status": status, "lines_added": 1, "lines_removed": 1})
+            stat.new.path = path
+            stat.old.get_data.return_value = None
+            stat.new.get_data.return_value = None
+            return stat
+
+        provider = BitbucketProvider.__new__(BitbucketProvider)
+        provider.diff_files = None
+        provider.pr = MagicMock()
+        provider.pr.diffstat.return_value = [diffstat("src/app.py", "modified"), diffstat("docs/new.md", "added")]
+        provider.bitbucket_pull_request_api_url = "https://api.bitbucket.org/2.0/repositories/w/r/pullrequests/1"
+        provider.headers = {}
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [
+            b"diff --git a/src/app.py b/src/app.py\nindex 1..2 100644\n--- a/src/app.py\n+++ b/src/app.py\n"
+            b"@@ -1 +1 @@\n-a\n+b\ndiff --git a/docs/n", b"ew.md b/docs/new.md\nnew file mode 100644\n"
+            b"--- /dev/null\n+++ b/docs/new.md\n@@ -0,0 +1 @@\n+doc\n"]
+        session = MagicMock()
+        session.get.return_value = response
+        monkeypatch.setattr("pr_agent.git_providers.bitbucket_provider.get_shared_session", lambda: session)
+
+        diff_files = provider.get_diff_files()
+        assert session.get.call_args.kwargs["stream"] is True
+        assert [(f.filename, f.patch, f.edit_type) for f in diff_files] == [
+            ("src/app.py", "@@ -1 +1 @@\n-a\n+b", EDIT_TYPE.MODIFIED),
+            ("docs/new.md", "@@ -0,0 +1 @@\n+doc", EDIT_TYPE.ADDED)]
+        assert [(f.num_plus_lines, f.num_minus_lines) for f in diff_files] == [(1, 1), (1, 0)]
+
 
 class TestBitbucketServerProvider:
     def test_parse_pr_url(self):
@@ -117,6 +148,8 @@ class TestBitbucketServerProvider:
                 '--- \n+++ \n@@ -5,5 +5,5 @@\n to\n emulate\n a\n-real\n+fake\n file\n',
                 'Readme.md',
                 edit_type=EDIT_TYPE.MODIFIED,
+                num_plus_lines=1,
+                num_minus_lines=1,
             )
         ]
 
@@ -177,6 +210,8 @@ class TestBitbucketServerProvider:
                 '--- \n+++ \n@@ -5,5 +5,5 @@\n to\n emulate\n a\n-real\n-file\n+fake\n+test\n',
                 'Readme.md',
                 edit_type=EDIT_TYPE.MODIFIED,
+                num_plus_lines=2,
+                num_minus_lines=2,
             )
         ]
 
@@ -254,6 +289,8 @@ class TestBitbucketServerProvider:
                 '--- \n+++ \n@@ -1,9 +1,9 @@\n-file\n-with\n-multiple\n+readme\n+without\n+some\n lines\n to\n-emulate\n+simulate\n a\n real\n file\n',
                 'Readme.md',
                 edit_type=EDIT_TYPE.MODIFIED,
+                num_plus_lines=4,
+                num_minus_lines=4,
             )
         ]
 
@@ -276,6 +313,8 @@ class TestBitbucketServerProvider:
                 '--- \n+++ \n@@ -1,9 +1,9 @@\n-file\n-with\n+readme\n+without\n some\n lines\n to\n-emulate\n+simulate\n a\n real\n file\n',
                 'Readme.md',
                 edit_type=EDIT_TYPE.MODIFIED,
+                num_plus_lines=3,
+                num_minus_lines=3,
             )
         ]
 
@@ -298,6 +337,8 @@ class TestBitbucketServerProvider:
                 '--- \n+++ \n@@ -1,9 +1,9 @@\n-file\n-with\n+readme\n+without\n some\n lines\n to\n-emulate\n+simulate\n a\n real\n file\n',
                 'Readme.md',
                 edit_type=EDIT_TYPE.MODIFIED,
+                num_plus_lines=3,
+                num_minus_lines=3,
             )
         ]
 
@@ -0,0 +1,90 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from pr_agent.config_loader import get_settings
+from pr_agent.tools.pr_code_suggestions import PRCodeSuggestions
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings.pr_code_suggestions, "parallel_calls", False, raising=False)
+    monkeypatch.setattr(settings.pr_code_suggestions, "reflection_concurrency", 3, raising=False)
+    return settings
+
+
+def _tool(num_chunks, events):
+    tool = PRCodeSuggestions.__new__(PRCodeSuggestions)
+    tool.patches_diff_list = [f"diff {i}" for i in range(num_chunks)]
+    tool.patches_diff_list_no_line_numbers = [f"diff no lines {i}" for i in range(num_chunks)]
+    tool.token_handler = MagicMock(count_tokens=len)
+    tool._get_reflection_model = lambda model: "reasoning-model"
+    tool._get_reflection_batch_budget = lambda model: 0  # a reflection call per chunk
+    first_reflection_may_end = asyncio.Event()
+
+    async def generate(model, patches_diff, patches_diff_no_line_number):
+        events.append(f"generate {patches_diff}")
+        if patches_diff == f"diff {num_chunks - 1}":
+            first_reflection_may_end.set()
+        return {"code_suggestions": [{"label": patches_diff}]}
+
+    async def reflect(data, patches_diff, model):
+        if patches_diff == "diff 0":
+            # held until the last chunk is generated: would time out if generation waited for the reflection
+            await asyncio.wait_for(first_reflection_may_end.wait(), timeout=5)
+        events.append(f"reflect {patches_diff}")
+        data["code_suggestions"][0]["score"] = 8
+
+    tool._generate_suggestions = generate
+    tool._apply_self_reflection = reflect
+    return tool
+
+
+def test_generation_overlaps_reflection(settings):
+    events = []
+    tool = _tool(3, events)
+    predictions = asyncio.run(tool._get_predictions_pipelined("model"))
+    assert [p["code_suggestions"][0]["label"] for p in predictions] == ["diff 0", "diff 1", "diff 2"]
+    assert all(p["code_suggestions"][0]["score"] == 8 for p in predictions)
+    assert events.index("generate diff 2") < events.index("reflect diff 0")
+
+
+def test_generation_error_propagates(settings):
+    tool = _tool(2, [])
+
+    async def fail(model, patches_diff, patches_diff_no_line_number):
+        raise RuntimeError("rate limited")
+
+    tool._generate_suggestions = fail
+    with pytest.raises(RuntimeError):
+        asyncio.run(tool._get_predictions_pipelined("model"))
+
+
+def test_reflection_overlaps_generation_with_default_budget():
+    # the default reflection budget holds the suggestions of all the chunks: the first chunks must still be reflected
+    # on while the next ones are generated
+    events = []
+    tool = _tool(3, events)
+    del tool._get_reflection_batch_budget
+    tool._get_reflection_model = lambda model: get_settings().config.model
+    reflection_started = asyncio.Event()
+    generate = tool._generate_suggestions
+
+    async def generate_after_reflection(model, patches_diff, patches_diff_no_line_number):
+        if patches_diff == "diff 2":
+            await asyncio.wait_for(reflection_started.wait(), timeout=5)
+        return await generate(model, patches_diff, patches_diff_no_line_number)
+
+    async def reflect(data, patches_diff, model):
+        reflection_started.set()
+        events.append(f"reflect {patches_diff}")
+        data["code_suggestions"][0]["score"] = 8
+
+    tool._generate_suggestions = generate_after_reflection
+    tool._apply_self_reflection = reflect
+    predictions = asyncio.run(tool._get_predictions_pipelined("model"))
+    assert tool._get_reflection_batch_budget(get_settings().config.model) > 0
+    assert all(p["code_suggestions"][0]["score"] == 8 for p in predictions)
+    assert events.index("reflect diff 0") < events.index("generate diff 2")
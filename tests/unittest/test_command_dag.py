@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from starlette_context import context, request_cycle_context
+
+from pr_agent.agent.command_dag import (CommandNode, build_auto_command_dag,
+                                        run_command_dag)
+from pr_agent.config_loader import get_settings
+
+PR_URL = "https://github.com/org/repo/pull/1"
+
+
+@pytest.fixture
+def settings():
+    settings = get_settings()
+    original = {key: settings.config.get(key) for key in ("concurrent_auto_commands", "enable_ai_metadata")}
+    yield settings
+    for key, value in original.items():
+        settings.set(f"config.{key}", value)
+
+
+class TestBuildAutoCommandDag:
+    def test_commands_are_independent_by_default(self, settings):
+        settings.set("config.enable_ai_metadata", False)
+        nodes = build_auto_command_dag(["/describe", "/review", "/improve --pr_code_suggestions.extra=1"])
+        assert [node.name for node in nodes] == ["describe", "review", "improve"]
+        assert all(not node.depends_on for node in nodes)
+
+    def test_ai_metadata_makes_review_and_improve_wait_for_describe(self, settings):
+        settings.set("config.enable_ai_metadata", True)
+        nodes = build_auto_command_dag(["/describe", "/review", "/improve", "/generate_labels"])
+        assert {node.name: node.depends_on for node in nodes} == {
+            "describe": set(), "review": {"describe"}, "improve": {"describe"}, "generate_labels": set()}
+
+    def test_sequential_when_disabled(self, settings):
+        settings.set("config.concurrent_auto_commands", False)
+        nodes = build_auto_command_dag(["/describe", "/review", "/review -i"])
+        assert [node.name for node in nodes] == ["describe", "review", "review#2"]
+        assert [node.depends_on for node in nodes] == [set(), {"describe"}, {"review"}]
+
+
+class TestRunCommandDag:
+    def test_independent_commands_run_concurrently(self):
+        started = []
+        both_started = asyncio.Event()
+
+        async def run_node(node):
+            started.append(node.name)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=5)  # would time out if run one after another
+            return True
+
+        nodes = [CommandNode("review", "/review"), CommandNode("improve", "/improve")]
+        assert asyncio.run(run_command_dag(nodes, run_node)) == {"review": True, "improve": True}
+
+    def test_dependencies_are_respected_and_failures_do_not_block(self):
+        finished = []
+
+        async def run_node(node):
+            await asyncio.sleep(0.05 if node.name == "describe" else 0)
+            finished.append(node.name)
+            if node.name == "describe":
+                raise RuntimeError("describe failed")
+            return True
+
+        nodes = [CommandNode("describe", "/describe"),
+                 CommandNode("review", "/review", {"describe"}),
+                 CommandNode("labels", "/generate_labels")]
+        results = asyncio.run(run_command_dag(nodes, run_node))
+        assert finished.index("describe") < finished.index("review")
+        assert isinstance(results["describe"], RuntimeError)
+        assert results["review"] is True
+
+    def test_settings_changes_are_isolated(self, settings):
+        settings.set("config.enable_ai_metadata", True)
+        seen = {}
+
+        async def run_node(node):
+            if node.name == "review":
+                get_settings().set("config.enable_ai_metadata", False)
+            await asyncio.sleep(0.01)
+            seen[node.name] = get_settings().config.enable_ai_metadata
+
+        nodes = [CommandNode("review", "/review"), CommandNode("improve", "/improve")]
+        asyncio.run(run_command_dag(nodes, run_node))
+        assert seen == {"review": False, "improve": True}
+        assert get_settings().config.enable_ai_metadata is True
+
+    def test_each_command_gets_its_own_git_provider(self):
+        providers = {}
+
+        async def run_node(node):
+            providers[node.name] = context.get("git_provider", {}).get(PR_URL)
+            context["git_provider"] = {PR_URL: object()}  # as get_git_provider_with_context does
+
+        nodes = [CommandNode("describe", "/describe"), CommandNode("improve", "/improve"),
+                 CommandNode("review", "/review", {"describe"})]
+        with request_cycle_context({"git_provider": {PR_URL: object()}}):
+            asyncio.run(run_command_dag(nodes, run_node, pr_url=PR_URL))
+        assert providers == {"describe": None, "improve": None, "review": None}
+
+    def test_invalid_dag(self):
+        async def run_node(node):
+            return True
+
+        with pytest.raises(ValueError):
+            asyncio.run(run_command_dag([CommandNode("a", "/a", {"b"}), CommandNode("b", "/b", {"a"})], run_node))
+        with pytest.raises(ValueError):
+            asyncio.run(run_command_dag([CommandNode("a", "/a", {"missing"})], run_node))
@@ -0,0 +1,38 @@
+import pytest
+import yaml
+
+from tests.benchmarks.micro_benchmarks import (MAX_SCALING_EXPONENT,
+                                               PRIMITIVES, Primitive,
+                                               _patch_inputs,
+                                               make_pathological_yaml,
+                                               run_primitive,
+                                               scaling_exponent)
+
+
+class TestComplexityGuards:
+    def test_scaling_exponent(self):
+        sizes = [100, 200, 400, 800]
+        assert scaling_exponent(sizes, [s * 1e-6 for s in sizes]) == pytest.approx(1.0)
+        assert scaling_exponent(sizes, [s * s * 1e-9 for s in sizes]) == pytest.approx(2.0)
+
+    def test_quadratic_function_is_detected(self):
+        quadratic = Primitive("quadratic", lambda n: lambda: sum(i ^ j for i in range(n) for j in range(n)),
+                              (100, 200, 400, 800), "items")
+        assert run_primitive(quadratic, repeat=3)["superlinear"] is True
+
+    def test_inputs_exercise_the_slow_paths(self):
+        base_file, head_file, patch = _patch_inputs(500)
+        assert len(base_file.splitlines()) == 10_000
+        assert patch.count("\n@@ ") == 499
+        with pytest.raises(yaml.YAMLError):
+            yaml.safe_load(make_pathological_yaml(10))
+        assert PRIMITIVES["clip_tokens"].setup(1000)().endswith("...(truncated)")
+        assert PRIMITIVES["decouple_and_convert_to_hunks_with_lines_numbers"].setup(100)().count("__new hunk__") == 100
+        assert len(PRIMITIVES["extend_patch"].setup(100)()) > len(patch) / 5
+
+    @pytest.mark.parametrize("name", list(PRIMITIVES))
+    def test_primitive_scales_linearly(self, name):
+        result = run_primitive(PRIMITIVES[name], repeat=3)
+        if result["superlinear"]:  # rule out a noisy run, e.g. on a busy CI machine
+            result = run_primitive(PRIMITIVES[name], repeat=5)
+        assert result["scaling_exponent"] <= MAX_SCALING_EXPONENT, result
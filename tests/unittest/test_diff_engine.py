@@ -0,0 +1,84 @@
+import difflib
+import glob
+import json
+import os
+import random
+import re
+
+import pytest
+
+from pr_agent.algo.diff_engine import myers_matching_blocks, unified_diff
+from pr_agent.algo.git_diff_parser import count_patch_lines
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "synthetic_*.json")))
+
+
+def _apply(a_lines, patch):
+    """Rebuilds the new file from the old one and a unified diff."""
+    out, index = [], 0
+    for line in patch.splitlines(keepends=True)[2:]:
+        if line.startswith("@@"):
+            start, length = re.match(r"@@ -(\d+)(?:,(\d+))?", line).groups()
+            start = int(start) if length == "0" else int(start) - 1
+            out.extend(a_lines[index:start])
+            index = start
+        elif line.startswith(" "):
+            out.append(a_lines[index])
+            index += 1
+        elif line.startswith("-"):
+            index += 1
+        else:
+            out.append(line[1:])
+    return out + a_lines[index:]
+
+
+def _changed_lines(patch):
+    return sum(count_patch_lines(patch))
+
+
+def _fixture_files():
+    for path in FIXTURES:
+        with open(path) as f:
+            for file in json.load(f)["files"]:
+                yield (((file["base_file"] or "").rstrip() + "\n").splitlines(keepends=True),
+                       ((file["head_file"] or "").rstrip() + "\n").splitlines(keepends=True))
+
+
+def test_difflib_engine_unchanged():
+    a, b = ["a\n", "b\n", "c\n"], ["a\n", "c\n", "d\n"]
+    assert unified_diff(a, b, engine="difflib") == "".join(difflib.unified_diff(a, b))
+    assert unified_diff(a, a, engine="myers") == ""
+    with pytest.raises(ValueError):
+        unified_diff(a, b, engine="patience")
+
+
+def test_myers_random_edits_minimal():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = [f"{rng.randint(0, 4)}\n" for _ in range(rng.randint(0, 25))]
+        b = [f"{rng.randint(0, 4)}\n" for _ in range(rng.randint(0, 25))]
+        patch = unified_diff(a, b, engine="myers")
+        assert _apply(a, patch) == b
+        matched = sum(block[2] for block in myers_matching_blocks(a, b))
+        assert matched >= sum(block[2] for block in difflib.SequenceMatcher(None, a, b, False).get_matching_blocks())
+
+
+def test_myers_on_benchmark_fixtures():
+    same = total = 0
+    for a, b in _fixture_files():
+        reference, patch = unified_diff(a, b, engine="difflib"), unified_diff(a, b, engine="myers")
+        assert _apply(a, patch) == b
+        assert _changed_lines(patch) <= _changed_lines(reference)
+        # "auto" keeps difflib's output on files of this size
+        assert unified_diff(a, b) == reference
+        same += patch == reference
+        total += 1
+    assert total and same >= 0.9 * total
+
+
+def test_myers_large_file():
+    a = [f"line {i % 50} {i // 1000}\n" for i in range(20000)]
+    b = [f"changed {i}\n" if i % 37 == 0 else line for i, line in enumerate(a)]
+    patch = unified_diff(a, b, engine="auto")
+    assert _apply(a, patch) == b
+    assert _changed_lines(patch) == 2 * len(range(0, 20000, 37))
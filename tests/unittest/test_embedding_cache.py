@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+from pr_agent.algo.embedding_cache import EmbeddingCache
+from pr_agent.algo.embedding_ingestion import EmbeddingIngestionPipeline
+from pr_agent.config_loader import get_settings
+from pr_agent.tools import pr_similar_issue
+from pr_agent.tools.pr_similar_issue import PRSimilarIssue
+
+
+class TestEmbeddingCache:
+    def test_get_and_put_are_keyed_by_model(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+        cache.put_many("model-a", {"h1": [0.5, 1.0], "h2": [2.0, -1.0]})
+
+        assert cache.get_many("model-a", ["h1", "h2", "h3"]) == {"h1": [0.5, 1.0], "h2": [2.0, -1.0]}
+        assert cache.get_many("model-b", ["h1"]) == {}
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "nested" / "cache.sqlite")
+        EmbeddingCache(path).put_many("model", {"h": [1.0]})
+
+        assert EmbeddingCache(path).get_many("model", ["h"]) == {"h": [1.0]}
+
+    def test_pipeline_skips_cached_texts(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+        calls = []
+
+        def embed(texts):
+            calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+        EmbeddingIngestionPipeline(embed, cache=cache, model="model").embed(["a", "bb"])
+        result, _ = EmbeddingIngestionPipeline(embed, cache=cache, model="model").embed(["bb", "ccc", "a"])
+
+        assert result == [[2.0], [3.0], [1.0]]
+        assert calls == [["a", "bb"], ["ccc"]]
+
+    def test_disabled_by_default(self):
+        tool = PRSimilarIssue.__new__(PRSimilarIssue)
+        assert tool._get_embedding_cache() is None
+
+    def test_unopenable_cache_is_logged(self, tmp_path, monkeypatch):
+        not_a_directory = tmp_path / "file"
+        not_a_directory.write_text("")
+        monkeypatch.setattr(get_settings().pr_similar_issue, "embedding_cache_path",
+                            str(not_a_directory / "cache.sqlite"), raising=False)
+        logger = MagicMock()
+        monkeypatch.setattr(pr_similar_issue, "get_logger", lambda: logger)
+
+        assert PRSimilarIssue.__new__(PRSimilarIssue)._get_embedding_cache() is None
+        assert "Failed to open embedding cache" in logger.warning.call_args.args[0]
@@ -0,0 +1,100 @@
+import json
+from unittest.mock import MagicMock
+
+from pr_agent.algo.embedding_ingestion import (EmbeddingIngestionPipeline,
+                                               content_hash, make_batches)
+from pr_agent.tools.pr_similar_issue import (Corpus, Metadata, PRSimilarIssue,
+                                             Record)
+
+
+def fake_embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+class TestMakeBatches:
+    def test_respects_max_batch_size(self):
+        batches = make_batches(["a"] * 5, max_batch_size=2, max_batch_tokens=1000, count_tokens=lambda s: 1)
+        assert batches == [[0, 1], [2, 3], [4]]
+
+    def test_respects_max_batch_tokens(self):
+        texts = ["x" * 10, "x" * 10, "x" * 30, "x" * 5]
+        batches = make_batches(texts, max_batch_size=10, max_batch_tokens=25, count_tokens=len)
+        assert batches == [[0, 1], [2], [3]]
+
+    def test_empty(self):
+        assert make_batches([], max_batch_size=10, max_batch_tokens=10) == []
+
+
+class TestEmbeddingIngestionPipeline:
+    def test_embeds_in_order_and_deduplicates(self):
+        calls = []
+
+        def embed(texts):
+            calls.append(list(texts))
+            return fake_embed(texts)
+
+        pipeline = EmbeddingIngestionPipeline(embed, max_batch_size=2, max_concurrency=2)
+        result, failed = pipeline.embed(["aa", "b", "aa", "cccc"])
+
+        assert result == [[2.0, 1.0], [1.0, 1.0], [2.0, 1.0], [4.0, 1.0]]
+        assert sorted(text for call in calls for text in call) == ["aa", "b", "cccc"]
+        assert failed == []
+
+    def test_failing_batch_is_split_and_failed_text_gets_zero_vector(self):
+        def embed(texts):
+            if "bad" in texts:
+                raise RuntimeError("boom")
+            return fake_embed(texts)
+
+        pipeline = EmbeddingIngestionPipeline(embed, max_batch_size=10, dimension=2)
+        result, failed = pipeline.embed(["a", "bad", "ccc"])
+
+        assert result == [[1.0, 1.0], [0, 0], [3.0, 1.0]]
+        assert failed == [1]
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        checkpoint = tmp_path / "checkpoint.jsonl"
+        checkpoint.write_text(json.dumps({"hash": content_hash("a"), "embedding": [9.0, 9.0]}) + "\n")
+        calls = []
+
+        def embed(texts):
+            calls.append(list(texts))
+            return fake_embed(texts)
+
+        pipeline = EmbeddingIngestionPipeline(embed, checkpoint_path=str(checkpoint))
+        result, failed = pipeline.embed(["a", "bb"])
+
+        assert result == [[9.0, 9.0], [2.0, 1.0]]
+        assert calls == [["bb"]]
+        assert not checkpoint.exists()  # removed after a complete run
+
+    def test_checkpoint_kept_on_failure(self, tmp_path):
+        checkpoint = tmp_path / "checkpoint.jsonl"
+
+        def embed(texts):
+            if "bad" in texts:
+                raise RuntimeError("boom")
+            return fake_embed(texts)
+
+        pipeline = EmbeddingIngestionPipeline(embed, max_batch_size=1, checkpoint_path=str(checkpoint), dimension=2)
+        pipeline.embed(["a", "bad"])
+
+        entries = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+        assert entries == [{"hash": content_hash("a"), "embedding": [1.0, 1.0]}]
+
+
+class TestIndexUpdate:
+    def test_failed_texts_not_indexed(self):
+        tool = PRSimilarIssue.__new__(PRSimilarIssue)
+        records = [Record(id=f"issue_{i}.issue", text=text, metadata=Metadata(repo="r", content_hash=content_hash(text)))
+                   for i, text in enumerate(["a", "bad", "ccc"])]
+        tool._build_corpus = lambda issues_list, repo_name_for_index: Corpus(documents=records)
+        tool.vector_store = MagicMock()
+        tool.vector_store.get_indexed_hashes.return_value = {}
+        tool._embed_texts = lambda texts, repo_name_for_index: ([fake_embed([t])[0] for t in texts], [1])
+
+        tool._update_index_with_issues([], "r")
+
+        upserted, embeds = tool.vector_store.upsert.call_args.args
+        assert [record["id"] for record in upserted] == ["issue_0.issue", "issue_2.issue"]
+        assert embeds == [[1.0, 1.0], [3.0, 1.0]]
@@ -1,8 +1,11 @@
 import pytest
 
-from pr_agent.algo.git_patch_processing import extend_patch
-from pr_agent.algo.pr_processing import pr_generate_extended_diff
+from pr_agent.algo.file_content import LazyFileContent, SparseFileLines
+from pr_agent.algo.git_patch_processing import extend_patch, hunk_line_ranges
+from pr_agent.algo.pr_processing import (pr_generate_compressed_diff,
+                                         pr_generate_extended_diff)
 from pr_agent.algo.token_handler import TokenHandler
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
 from pr_agent.algo.utils import load_large_diff
 from pr_agent.config_loader import get_settings
 get_settings(use_context=False).set("CONFIG.CLI_MODE", True)
@@ -104,8 +107,26 @@ class TestExtendPatch:
         expected_output_no_dynamic_context = '\n@@ -7,4 +7,4 @@ def foo():\n     line(5)\n     line(6)\n     line(7)\n-    line(8)\n+    new_line(8)'
         assert actual_output3 == expected_output_no_dynamic_context
 
-
-
+    def test_sparse_lines_match_full_contents(self):
+        get_settings(use_context=False).config.max_extra_lines_before_dynamic_context = 10
+        base_lines = [f"def handler_{i}():" if i % 10 == 0 else f"    line({i})" for i in range(300)]
+        head_lines = list(base_lines)
+        head_lines[45] = "    new_line(45)"
+        head_lines[200] = "    new_line(200)"
+        patch_str = ("@@ -43,7 +43,7 @@ def handler_40():\n     line(42)\n     line(43)\n     line(44)\n"
+                     "-    line(45)\n+    new_line(45)\n     line(46)\n     line(47)\n     line(48)\n"
+                     "@@ -198,7 +198,7 @@ def handler_190():\n     line(197)\n     line(198)\n     line(199)\n"
+                     "-def handler_200():\n+    new_line(200)\n     line(201)\n     line(202)\n     line(203)")
+        base_file, head_file = "\n".join(base_lines), "\n".join(head_lines)
+        for allow_dynamic_context in (False, True):
+            get_settings(use_context=False).config.allow_dynamic_context = allow_dynamic_context
+            original_ranges, new_ranges = hunk_line_ranges(patch_str, 3, 2)
+            base_sparse = SparseFileLines.from_text(base_file, original_ranges)
+            head_sparse = SparseFileLines.from_text(head_file, new_ranges)
+            assert len(base_sparse) == 300 and len(base_sparse._lines) < 40
+            assert extend_patch(base_sparse, patch_str, 3, 2, new_file_str=head_sparse) == \
+                extend_patch(base_file, patch_str, 3, 2, new_file_str=head_file)
+        get_settings(use_context=False).config.allow_dynamic_context = False
 
 
 class TestExtendedPatchMoreLines:
@@ -117,6 +138,9 @@ class TestExtendedPatchMoreLines:
             self.filename = filename
             self.ai_file_summary = ai_file_summary
 
+        def get_line_ranges(self, ranges, head=False):
+            return self.head_file if head else self.base_file
+
     @pytest.fixture
     def token_handler(self):
         # Create a TokenHandler instance with dummy data
@@ -164,6 +188,34 @@ class TestExtendedPatchMoreLines:
         p0_extended = patches_extended_with_extra_lines[0].strip()
         assert p0_extended == "## File: 'file1'\n\n@@ -3,8 +3,8 @@ \n line0\n line1\n-original content\n+modified content\n line2\n line3\n line4\n line5\n line6"
 
+    def test_lazy_contents_fetched_once(self, token_handler):
+        fetches = []
+
+        def loader(name, text):
+            def load():
+                fetches.append(name)
+                return text
+            return LazyFileContent(load)
+
+        base_file = "\n".join(f"line{i}" for i in range(1, 21))
+        head_file = base_file.replace("line10", "changed10")
+        modified = FilePatchInfo(loader("base", base_file), loader("head", head_file),
+                                 "@@ -10 +10 @@\n-line10\n+changed10", "a.py", edit_type=EDIT_TYPE.MODIFIED)
+        deleted = FilePatchInfo(loader("deleted base", base_file), "",
+                                "@@ -1,20 +0,0 @@\n" + "\n".join(f"-line{i}" for i in range(1, 21)), "b.py",
+                                edit_type=EDIT_TYPE.DELETED)
+
+        # the compressed diff only checks the deleted files, without fetching anything
+        _, _, deleted_files, _, file_dict, _ = pr_generate_compressed_diff(
+            [{"files": [modified, deleted]}], token_handler, "gpt-4o", False, False)
+        assert deleted_files == ["b.py"] and list(file_dict) == ["a.py"] and fetches == []
+
+        pr_generate_extended_diff([{"files": [modified]}], token_handler, False, 2, 2)
+        pr_generate_compressed_diff([{"files": [modified]}], token_handler, "gpt-4o", False, False)
+        assert (modified.base_file, modified.head_file) == (base_file, head_file)
+        assert sorted(fetches) == ["base", "head"]
+
+
 class TestLoadLargeDiff:
     def test_no_newline(self):
         patch = load_large_diff("test.py",
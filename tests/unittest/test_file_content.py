@@ -0,0 +1,171 @@
+import copy
+import gc
+import io
+import pickle
+
+import pytest
+from starlette_context import context, request_cycle_context
+
+from pr_agent.algo.file_content import (CompressedFileContent, FileContent,
+                                        FileContentBudget,
+                                        InMemoryFileContent, LazyFileContent,
+                                        MissingLineError, SparseFileLines,
+                                        SpilledFileContent,
+                                        get_file_content_budget,
+                                        iter_stream_lines, iter_text_lines)
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+from pr_agent.config_loader import get_settings
+
+TEXT = "def handler(request):\n    return 'ünïcode \ud800'\n" * 500  # larger than MIN_OVERFLOW_SIZE
+
+
+class TestFileContentBudget:
+    def test_within_budget_kept_in_memory(self):
+        budget = FileContentBudget(max_bytes=10 * len(TEXT))
+        content = budget.store(TEXT)
+        assert isinstance(content, InMemoryFileContent)
+        assert content.get() == TEXT
+        assert budget.in_memory_bytes == len(TEXT)
+
+    def test_overflow_compressed(self):
+        budget = FileContentBudget(max_bytes=len(TEXT) + 1)
+        first, second = budget.store(TEXT), budget.store(TEXT)
+        assert isinstance(first, InMemoryFileContent)
+        assert isinstance(second, CompressedFileContent)
+        assert second.get() == TEXT
+        assert second.nbytes < len(TEXT)
+        assert budget.compressed_files == 1
+
+    def test_overflow_spilled(self, tmp_path):
+        budget = FileContentBudget(max_bytes=1, overflow="spill", spill_dir=str(tmp_path))
+        content = budget.store(TEXT)
+        assert isinstance(content, SpilledFileContent)
+        assert content.get() == TEXT
+        assert content.nbytes == 0
+        assert budget.spilled_files == 1
+
+    def test_small_contents_stay_in_memory(self):
+        budget = FileContentBudget(max_bytes=1)
+        assert isinstance(budget.store("x = 1\n"), InMemoryFileContent)
+
+    def test_released_when_collected(self):
+        budget = FileContentBudget(max_bytes=10 * len(TEXT))
+        content = budget.store(TEXT)
+        assert budget.in_memory_bytes == len(TEXT)
+        del content
+        gc.collect()
+        assert budget.in_memory_bytes == 0
+        assert budget.peak_in_memory_bytes == len(TEXT)
+
+    def test_budget_per_request(self):
+        with request_cycle_context({"settings": copy.deepcopy(get_settings())}):
+            get_settings().set("config.file_contents_memory_budget_mb", 2)
+            get_settings().set("config.file_contents_overflow", "spill")
+            budget = get_file_content_budget()
+            assert budget.max_bytes == 2 * 1024 * 1024
+            assert budget.overflow == "spill"
+            assert context["file_content_budget"] is budget
+        with request_cycle_context({"settings": copy.deepcopy(get_settings())}):
+            assert get_file_content_budget() is not budget
+
+
+def test_contents_implement_get_and_nbytes():
+    class NoNbytes(FileContent):
+        def get(self) -> str:
+            return ""
+
+    with pytest.raises(TypeError):
+        NoNbytes()
+
+
+class TestLazyFileContent:
+    def test_loaded_once_on_first_access(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return TEXT
+
+        content = LazyFileContent(loader, FileContentBudget())
+        assert not content.is_loaded and not calls
+        assert content.get() == TEXT
+        assert content.get() == TEXT
+        assert content.is_loaded and len(calls) == 1
+
+    def test_failed_load_is_empty(self):
+        def loader():
+            raise ConnectionError("rate limited")
+
+        assert LazyFileContent(loader, FileContentBudget()).get() == ""
+
+
+class TestSparseFileLines:
+    def test_reads_like_a_list_of_lines(self):
+        text = "\n".join(f"line {i}" for i in range(1, 101))
+        lines = SparseFileLines.from_text(text, [(10, 12), (-3, 2), (99, 120)])
+        full = text.splitlines()
+        assert len(lines) == 100
+        assert lines[9:12] == full[9:12]
+        assert lines[0] == "line 1" and lines[-1] == "line 100"
+        assert lines[98:500] == full[98:500]
+        with pytest.raises(MissingLineError):
+            lines[50]
+        with pytest.raises(IndexError):
+            lines[100]
+
+    @pytest.mark.parametrize("text", ["a\r\nb\rc\n\nd", "a\n", "", "\n\n", "no newline", "x\u2028y\r\n"])
+    def test_split_like_splitlines(self, text):
+        for chunk_size in (1, 2, 5):
+            chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+            assert list(iter_text_lines(chunks)) == text.splitlines()
+
+    def test_stream_lines(self):
+        text = "ünïcode\n" * 20000
+        assert list(iter_stream_lines(io.BytesIO(text.encode("utf-8")))) == text.splitlines()
+
+    def test_lazy_content_range_loader(self):
+        calls = []
+
+        def range_loader(ranges):
+            calls.append(ranges)
+            return SparseFileLines.from_text(TEXT, ranges)
+
+        content = LazyFileContent(lambda: TEXT, FileContentBudget(), range_loader=range_loader)
+        lines = content.get_line_ranges([(1, 2)])
+        assert isinstance(lines, SparseFileLines) and lines[:2] == TEXT.splitlines()[:2]
+        assert not content.is_loaded
+        assert content.get() == TEXT
+        assert content.get_line_ranges([(1, 2)]) == TEXT
+        assert len(calls) == 1
+
+
+class TestFilePatchInfo:
+    def test_contents_read_as_strings(self):
+        file = FilePatchInfo(TEXT, LazyFileContent(lambda: "new", FileContentBudget()), "@@ -1 +1 @@", "a.py",
+                             edit_type=EDIT_TYPE.MODIFIED)
+        assert not file.contents_loaded
+        assert file.base_file == TEXT
+        assert file.head_file == "new"
+        assert file.contents_loaded
+        file.head_file = "newer"
+        assert file.head_file == "newer"
+
+    def test_slots(self):
+        file = FilePatchInfo("", "", "", "a.py")
+        with pytest.raises(AttributeError):
+            file.unknown_attribute = 1
+        assert not hasattr(file, "patches_range")
+        file.patches_range = []
+        assert file.patches_range == []
+
+    def test_raw_values_kept(self):
+        file = FilePatchInfo(None, b"binary", None, "a.bin")
+        assert file.base_file is None
+        assert file.head_file == b"binary"
+
+    def test_equality_copy_and_pickle(self):
+        file = FilePatchInfo(TEXT, "new", "@@ -1 +1 @@", "a.py", tokens=12, edit_type=EDIT_TYPE.ADDED)
+        assert copy.deepcopy(file) == file
+        assert pickle.loads(pickle.dumps(file)) == file
+        assert file != FilePatchInfo(TEXT, "other", "@@ -1 +1 @@", "a.py", tokens=12, edit_type=EDIT_TYPE.ADDED)
+        assert "filename='a.py'" in repr(file)
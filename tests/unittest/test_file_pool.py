@@ -0,0 +1,69 @@
+import contextvars
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from pr_agent.algo.file_pool import map_files
+from pr_agent.algo.pr_processing import (pr_generate_compressed_diff,
+                                         pr_generate_extended_diff)
+from tests.benchmarks.fixtures import (fixture_to_diff_files,
+                                       generate_synthetic_fixture)
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_order_kept_on_the_pool():
+    threads = set()
+
+    def work(i):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.001 * (i % 3))
+        return i * i
+
+    assert map_files(work, range(40), min_files=10, max_workers=4) == [i * i for i in range(40)]
+    assert any(name.startswith("pr_files") for name in threads)
+
+
+def test_inline_below_the_threshold():
+    threads = set()
+    map_files(lambda i: threads.add(threading.current_thread().name), range(5), min_files=10, max_workers=4)
+    assert threads == {threading.current_thread().name}
+    threads.clear()
+    map_files(lambda i: threads.add(threading.current_thread().name), range(50), min_files=0, max_workers=4)
+    assert threads == {threading.current_thread().name}
+
+
+def test_context_and_errors_propagated():
+    request_id.set("pr-1")
+    assert map_files(lambda i: request_id.get(), range(20), min_files=1, max_workers=4) == ["pr-1"] * 20
+
+    def work(i):
+        if i == 7:
+            raise ValueError("file 7")
+        return i
+
+    with pytest.raises(ValueError, match="file 7"):
+        map_files(work, range(20), min_files=1, max_workers=4)
+
+
+def _diff_inputs():
+    files = fixture_to_diff_files(generate_synthetic_fixture("medium"))
+    token_handler = MagicMock(prompt_tokens=0)
+    token_handler.count_tokens.side_effect = len
+    return [{"language": "Python", "files": files}], token_handler
+
+
+@pytest.mark.parametrize("add_line_numbers", [False, True])
+def test_same_diff_inline_and_on_the_pool(monkeypatch, add_line_numbers):
+    results = []
+    for min_files in (0, 1):
+        monkeypatch.setattr("pr_agent.algo.pr_processing.map_files",
+                            lambda func, files, min_files=min_files: map_files(func, files, min_files, 4))
+        pr_languages, token_handler = _diff_inputs()
+        extended = pr_generate_extended_diff(pr_languages, token_handler, add_line_numbers, 2, 1)
+        compressed = pr_generate_compressed_diff(pr_languages, token_handler, "gpt-4o", add_line_numbers, False)
+        results.append((extended, compressed))
+    assert results[0] == results[1]
+    assert results[0][0][0]
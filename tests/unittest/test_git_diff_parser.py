@@ -0,0 +1,94 @@
+import pytest
+
+from pr_agent.algo.git_diff_parser import (count_patch_lines, decode_diff,
+                                           iter_file_diffs, parse_file_diff,
+                                           parse_git_diff)
+from pr_agent.algo.types import EDIT_TYPE
+
+DIFF = (b"diff --git a/src/app.py b/src/app.py\n"
+        b"index caa56f0..61528d7 100644\n"
+        b"--- a/src/app.py\n"
+        b"+++ b/src/app.py\n"
+        b"@@ -1,2 +1,2 @@\n"
+        b" a = 1\n"
+        b"-b = 2\n"
+        b"+b = 'diff --git is not a boundary here'\n"
+        b"diff --git a/docs/new.md b/docs/new.md\n"
+        b"new file mode 100644\n"
+        b"index 0000000..e69de29\n"
+        b"--- /dev/null\n"
+        b"+++ b/docs/new.md\n"
+        b"@@ -0,0 +1 @@\n"
+        b"+caf\xc3\xa9\n"
+        b"diff --git a/logo.png b/logo.png\n"
+        b"index 1111111..2222222 100644\n"
+        b"Binary files a/logo.png and b/logo.png differ\n"
+        b"diff --git a/legacy.txt b/legacy.txt\n"
+        b"index 3333333..4444444 100644\n"
+        b"--- a/legacy.txt\n"
+        b"+++ b/legacy.txt\n"
+        b"@@ -1 +1 @@\n"
+        b"-caf\xe9\n"
+        b"+cafe\n")
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 11, 64, 1 << 16])
+def test_split_per_file_across_chunk_boundaries(chunk_size):
+    file_diffs = list(iter_file_diffs(_chunks(DIFF, chunk_size)))
+    assert b"".join(file_diffs) == DIFF
+    assert [d.split(b"\n", 1)[0] for d in file_diffs] == [
+        b"diff --git a/src/app.py b/src/app.py", b"diff --git a/docs/new.md b/docs/new.md",
+        b"diff --git a/logo.png b/logo.png", b"diff --git a/legacy.txt b/legacy.txt"]
+
+
+def test_leading_text_dropped():
+    file_diffs = list(iter_file_diffs(_chunks(b"some preamble\n" + DIFF, 3)))
+    assert len(file_diffs) == 4 and file_diffs[0].startswith(b"diff --git a/src/app.py")
+    assert list(iter_file_diffs([b"no diff at all\n"])) == []
+
+
+def test_parse_git_diff():
+    file_diffs = list(parse_git_diff(_chunks(DIFF, 7)))
+    assert [(d.old_path, d.new_path, d.edit_type) for d in file_diffs] == [
+        ("src/app.py", "src/app.py", EDIT_TYPE.MODIFIED), (None, "docs/new.md", EDIT_TYPE.ADDED),
+        ("logo.png", "logo.png", EDIT_TYPE.MODIFIED), ("legacy.txt", "legacy.txt", EDIT_TYPE.MODIFIED)]
+    assert [d.patch for d in file_diffs] == [
+        "@@ -1,2 +1,2 @@\n a = 1\n-b = 2\n+b = 'diff --git is not a boundary here'",
+        "@@ -0,0 +1 @@\n+café",
+        "",
+        "@@ -1 +1 @@\n-café\n+cafe",  # not utf-8: decoded as iso-8859-1
+    ]
+    assert [(d.num_plus_lines, d.num_minus_lines) for d in file_diffs] == [(1, 1), (1, 0), (0, 0), (1, 1)]
+
+
+def test_parse_renamed_and_deleted_files():
+    renamed = parse_file_diff("diff --git a/old name.py b/new name.py\nsimilarity index 90%\n"
+                              "rename from old name.py\nrename to new name.py\nindex 1..2 100644\n"
+                              "--- a/old name.py\n+++ b/new name.py\n@@ -1 +1 @@\n-x\n+y\n")
+    assert (renamed.old_path, renamed.new_path, renamed.edit_type) == ("old name.py", "new name.py", EDIT_TYPE.RENAMED)
+    info = renamed.to_file_patch_info("x\n", "y\n")
+    assert (info.filename, info.old_filename, info.num_plus_lines, info.num_minus_lines) == \
+           ("new name.py", "old name.py", 1, 1)
+
+    deleted = parse_file_diff("diff --git a/gone.py b/gone.py\ndeleted file mode 100644\nindex 1..0\n"
+                              "--- a/gone.py\n+++ /dev/null\n@@ -1,2 +0,0 @@\n-a\n---b\n")
+    assert (deleted.filename, deleted.edit_type, deleted.num_minus_lines) == ("gone.py", EDIT_TYPE.DELETED, 2)
+
+    mode_only = parse_file_diff("diff --git a/run.sh b/run.sh\nold mode 100644\nnew mode 100755\n")
+    assert (mode_only.filename, mode_only.patch) == ("run.sh", "")
+
+
+def test_count_patch_lines():
+    # the '---'/'+++' lines of a unified diff are not counted, a removed '-- comment' line is
+    assert count_patch_lines("--- \n+++ \n@@ -1,2 +1,2 @@\n--- comment\n+++x\n a\n") == (1, 1)
+    assert count_patch_lines("@@ -1 +1 @@\n-a\n+b\n+c") == (2, 1)
+    assert count_patch_lines("") == (0, 0)
+
+
+def test_decode():
+    assert decode_diff("é".encode("utf-8")) == "é"
+    assert decode_diff(b"\xff") == "ÿ"
@@ -109,3 +109,32 @@ class TestGiteaProvider:
         args, kwargs = mock_api_client.call_api.call_args
         assert args[0] == '/repos/owner/repo/pulls/123/commits'
         assert kwargs.get('auth_settings') == ['AuthorizationHeaderToken']
+
+    def test_get_diff_files_from_the_parsed_diff(self):
+        provider = GiteaProvider.__new__(GiteaProvider)
+        provider.owner, provider.repo, provider.pr_number = 'owner', 'repo', 123
+        provider.logger = MagicMock()
+        provider.repo_api = MagicMock()
+        provider.repo_api.get_pull_request_diff.return_value = (
+            "diff --git a/src/app.py b/src/app.py\nindex 1..2 100644\n--- a/src/app.py\n+++ b/src/app.py\n"
+            "@@ -1 +1 @@\n-a\n+b\n"
+            "diff --git a/old.py b/new.py\nsimilarity index 90%\nrename from old.py\nrename to new.py\n"
+            "--- a/old.py\n+++ b/new.py\n@@ -1,2 +1,2 @@\n x\n-y\n+z\n")
+        provider.repo_api.get_file_content.return_value = "base"
+        provider._GiteaProvider__add_file_diff()
+
+        provider.diff_files = []
+        provider.git_files = [{"filename": "src/app.py", "status": "changed"},
+                              {"filename": "new.py", "status": "renamed"},
+                              {"filename": "docs/empty.md", "status": "added", "additions": 0}]
+        provider.file_contents = {"src/app.py": "b\n", "new.py": "x\nz\n"}
+        provider.incremental = MagicMock(is_incremental=False)
+        provider.base_sha = "base_sha"
+
+        diff_files = provider.get_diff_files()
+        assert [(f.filename, f.patch, f.edit_type.name, f.old_filename) for f in diff_files] == [
+            ("src/app.py", "@@ -1 +1 @@\n-a\n+b", "MODIFIED", None),
+            ("new.py", "@@ -1,2 +1,2 @@\n x\n-y\n+z", "RENAMED", "old.py"),
+            ("docs/empty.md", "", "ADDED", None)]
+        assert [(f.num_plus_lines, f.num_minus_lines) for f in diff_files] == [(1, 1), (1, 1), (0, 0)]
+        assert diff_files[1].head_file == "x\nz\n"
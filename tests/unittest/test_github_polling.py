@@ -0,0 +1,170 @@
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pr_agent.config_loader import get_settings, global_settings
+from pr_agent.servers import github_polling
+from pr_agent.servers.github_polling import (ConditionalResponseCache,
+                                             get_json_conditional,
+                                             is_valid_notification)
+
+
+class FakeResponse:
+    def __init__(self, status, body=None, headers=None):
+        self.status = status
+        self._body = body
+        self.headers = headers or {}
+
+    async def json(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, headers=None, params=None):
+        self.requests.append((url, headers))
+        return self.responses[url].pop(0)
+
+
+class TestConditionalRequests:
+    @pytest.mark.asyncio
+    async def test_not_modified_returns_cached_body(self):
+        url = "https://api.github.com/repos/o/r/issues/1/comments"
+        session = FakeSession({url: [FakeResponse(200, [{"id": 1}], {"ETag": '"abc"'}), FakeResponse(304)]})
+        cache = ConditionalResponseCache()
+
+        assert await get_json_conditional(session, url, {}, cache) == (200, [{"id": 1}])
+        assert await get_json_conditional(session, url, {}, cache) == (200, [{"id": 1}])
+        assert session.requests[1][1]["If-None-Match"] == '"abc"'
+
+    def test_cache_is_bounded(self):
+        cache = ConditionalResponseCache(max_entries=2)
+        for i in range(3):
+            cache.store(f"url{i}", {"ETag": str(i)}, i)
+
+        assert cache.get_body("url0") is None
+        assert cache.get_body("url2") == 2
+
+
+class TestIsValidNotification:
+    @pytest.mark.asyncio
+    async def test_mention_in_previous_comment_is_fetched_asynchronously(self):
+        pr_url = "https://api.github.com/repos/o/r/pulls/1"
+        latest_comment_url = "https://api.github.com/repos/o/r/issues/comments/2"
+        session = FakeSession({
+            latest_comment_url: [FakeResponse(200, {"id": 2, "user": {"login": "bot"}, "body": "done"})],
+            "https://api.github.com/repos/o/r/issues/1/comments": [
+                FakeResponse(200, [{"id": 1, "user": {"login": "dev"}, "body": "@bot /review"},
+                                   {"id": 2, "user": {"login": "bot"}, "body": "done"}])],
+        })
+        notification = {"reason": "mention",
+                        "subject": {"type": "PullRequest", "url": pr_url, "latest_comment_url": latest_comment_url}}
+
+        output = await is_valid_notification(notification, {}, set(), session, "bot", ConditionalResponseCache())
+
+        assert output[0] is True
+        assert output[2]["id"] == 1
+        assert output[3] == "@bot /review"
+
+
+@pytest.mark.asyncio
+async def test_comment_processing_uses_isolated_settings(monkeypatch):
+    seen = {}
+
+    async def fake_process_comment(pr_url, rest_of_comment, comment_id):
+        get_settings().set("config.model", "modified-by-tool")
+        seen["settings"] = get_settings()
+
+    monkeypatch.setattr(github_polling, "process_comment", fake_process_comment)
+    original_model = global_settings.config.model
+
+    await github_polling._process_comment_with_isolated_settings("pr_url", "/review", 1)
+
+    assert seen["settings"] is not global_settings
+    assert global_settings.config.model == original_model
+
+
+class FakeExecutor:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.submitted = []
+        self.futures = []
+
+    def submit(self, fn, *args):
+        if self.broken:
+            raise BrokenProcessPool("a worker died")
+        self.submitted.append(args)
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+class TestMentionWorkerPool:
+    @pytest.mark.asyncio
+    async def test_broken_pool_is_replaced(self, monkeypatch):
+        executors = [FakeExecutor(broken=True), FakeExecutor()]
+        monkeypatch.setattr(github_polling.MentionWorkerPool, "_new_pool", lambda self: executors.pop(0))
+        workers = github_polling.MentionWorkerPool(max_workers=1, max_pending_tasks=5)
+
+        workers.submit([("pr_1", "/review", 1), ("pr_2", "/describe", 2)])
+
+        assert not workers.pool.broken
+        assert workers.pool.submitted == [("pr_1", "/review", 1), ("pr_2", "/describe", 2)]
+        assert len(workers.pending_tasks) == 2
+
+    @pytest.mark.asyncio
+    async def test_mentions_of_a_dead_worker_are_submitted_again(self, monkeypatch):
+        executors = [FakeExecutor(), FakeExecutor()]
+        monkeypatch.setattr(github_polling.MentionWorkerPool, "_new_pool", lambda self: executors.pop(0))
+        workers = github_polling.MentionWorkerPool(max_workers=1, max_pending_tasks=5)
+        broken_pool = workers.pool
+
+        workers.submit([("pr_1", "/review", 1)])
+        broken_pool.futures[0].set_exception(BrokenProcessPool("a worker died"))
+        broken_pool.broken = True
+        await asyncio.sleep(0.01)
+        assert not workers.pending_tasks
+
+        workers.submit([])
+
+        assert workers.pool is not broken_pool
+        assert workers.pool.submitted == [("pr_1", "/review", 1)]
+
+        # a mention is submitted again only once
+        workers.pool.futures[0].set_exception(BrokenProcessPool("a worker died"))
+        await asyncio.sleep(0.01)
+        assert not workers.retry_queue
+
+    @pytest.mark.asyncio
+    async def test_worker_exceptions_are_logged(self, monkeypatch):
+        errors = []
+
+        class FakeLogger:
+            def error(self, message, **kwargs):
+                errors.append(message)
+
+        monkeypatch.setattr(github_polling.MentionWorkerPool, "_new_pool", lambda self: FakeExecutor())
+        monkeypatch.setattr(github_polling, "get_logger", lambda: FakeLogger())
+        workers = github_polling.MentionWorkerPool(max_workers=1, max_pending_tasks=5)
+
+        workers.submit([("pr_1", "/review", 1)])
+        workers.pool.futures[0].set_exception(ValueError("boom"))
+        await asyncio.sleep(0.01)
+
+        assert not workers.pending_tasks
+        assert not workers.retry_queue
+        assert len(errors) == 1 and "pr_1" in errors[0] and "boom" in errors[0]
@@ -0,0 +1,117 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pr_agent.git_providers import http_session
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "session=secret")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _PathHandler(_OkHandler):
+    def do_GET(self):
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def path_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PathHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    http_session.close_http_pools()
+    yield
+    http_session.close_http_pools()
+
+
+class TestHttpSession:
+    def test_sessions_share_connections(self, local_server):
+        first = http_session.get_pooled_session()
+        second = http_session.get_pooled_session()
+        first.headers["Authorization"] = "Bearer first"
+
+        assert first.get(local_server).text == "ok"
+        first.close()  # must not close the shared pools
+        assert second.get(local_server).text == "ok"
+
+        stats = http_session.get_http_pool_stats()["127.0.0.1"]
+        assert stats["requests"] == 2
+        assert stats["connections_created"] == 1
+        assert "Authorization" not in second.headers
+
+    def test_shared_session_keeps_no_cookies(self, local_server):
+        session = http_session.get_shared_session()
+        session.get(local_server)
+
+        assert http_session.get_shared_session() is session
+        assert len(session.cookies) == 0
+
+    def test_retry_policy_only_retries_idempotent_methods(self):
+        adapter, _ = http_session._get_adapters()
+        retry = adapter.max_retries
+
+        assert retry.is_retry("GET", 503)
+        assert not retry.is_retry("POST", 503)
+        assert not retry.is_retry("GET", 404)
+
+    def test_github_connection_shared_by_threads(self, path_server):
+        from github import Auth, Github
+
+        http_session.install_github_connection_pool()
+        requester = Github(auth=Auth.Token("token"), base_url=path_server)._Github__requester
+        # one connection object for all the requests of the client, as PyGithub does by default
+        requester._Requester__persist = True
+        assert requester.requestJson("GET", "/warmup")[2] == "/warmup"
+        connection = requester._Requester__connection
+        both_requests_pending = threading.Barrier(2)
+        send_request = connection.request
+
+        def request(*args):
+            send_request(*args)
+            both_requests_pending.wait(timeout=5)
+
+        connection.request = request
+        responses = {}
+
+        def get(path):
+            responses[path] = requester.requestJson("GET", path)[2]
+
+        threads = [threading.Thread(target=get, args=(f"/repos/o/r/contents/file{i}",)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert responses == {path: path for path in responses} and len(responses) == 2
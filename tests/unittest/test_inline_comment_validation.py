@@ -0,0 +1,120 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+from pr_agent.config_loader import get_settings
+from pr_agent.git_providers.git_provider import IncrementalPR
+from pr_agent.git_providers.github_provider import GithubProvider
+from pr_agent.git_providers.inline_comment_validation import (
+    INVALID, UNKNOWN, VALID, InlineCommentValidator, parse_hunk_ranges)
+
+PATCH = ("@@ -10,4 +10,5 @@ def handler():\n"
+         "     a = 1\n"
+         "-    b = 2\n"
+         "+    b = 3\n"
+         "+    c = 4\n"
+         "     return a\n"
+         "     \n"
+         "@@ -40 +41,2 @@ def other():\n"
+         "-    pass\n"
+         "+    x = 1\n"
+         "+    return x")
+
+
+@pytest.fixture
+def validator():
+    return InlineCommentValidator([FilePatchInfo("", "", PATCH, "src/app.py", edit_type=EDIT_TYPE.MODIFIED),
+                                   FilePatchInfo("", "", "", "big.min.js", edit_type=EDIT_TYPE.MODIFIED)])
+
+
+def test_parse_hunk_ranges():
+    assert parse_hunk_ranges(PATCH) == [(10, 13, 10, 14), (40, 40, 41, 42)]
+
+
+@pytest.mark.parametrize("comment, verdict", [
+    ({"path": "src/app.py", "line": 12, "side": "RIGHT"}, VALID),
+    ({"path": "src/app.py", "line": 42, "side": "RIGHT"}, VALID),
+    ({"path": "src/app.py", "line": 11, "side": "LEFT"}, VALID),
+    ({"path": "src/app.py", "line": 14, "start_line": 10, "start_side": "RIGHT", "side": "RIGHT"}, VALID),
+    ({"path": "src/app.py", "position": 3}, VALID),
+    ({"path": "src/app.py", "line": 20, "side": "RIGHT"}, INVALID),
+    ({"path": "src/app.py", "line": 41, "side": "LEFT"}, INVALID),
+    ({"path": "src/app.py", "line": 42, "start_line": 12, "start_side": "RIGHT", "side": "RIGHT"}, INVALID),
+    ({"path": "src/app.py", "line": 12, "start_line": 14, "side": "RIGHT"}, INVALID),
+    ({"path": "src/app.py", "line": 0, "side": "RIGHT"}, INVALID),
+    ({"path": "src/app.py", "position": 40}, INVALID),
+    ({"path": "big.min.js", "line": 1, "side": "RIGHT"}, UNKNOWN),
+    ({"path": "not/in/diff.py", "line": 1, "side": "RIGHT"}, UNKNOWN),
+])
+def test_validate(validator, comment, verdict):
+    assert validator.validate(comment)[0] == verdict
+
+
+def _provider(diff_files, accepted_lines):
+    """A GithubProvider whose API accepts the comments on the given lines of src/app.py and big.min.js."""
+    provider = GithubProvider.__new__(GithubProvider)
+    provider.diff_files = diff_files
+    provider.incremental = IncrementalPR(False)
+    provider.last_commit_id = MagicMock(sha="abc")
+    provider.pr = MagicMock(url="https://api.github.com/repos/o/r/pulls/1")
+    probed = []
+    pending_reviews = set()
+
+    def request(method, url, input=None):
+        if method == "POST":
+            comment = input["comments"][0]
+            probed.append(comment)
+            if pending_reviews:
+                raise Exception("422 Unprocessable Entity: User can only have one pending review per pull request")
+            if comment.get("line") not in accepted_lines:
+                raise Exception("422 Unprocessable Entity")
+            pending_reviews.add(len(probed))
+            return {}, {"id": len(probed)}
+        pending_reviews.discard(int(url.rsplit("/", 1)[1]))
+        return {}, {}
+
+    provider.pr._requester.requestJsonAndCheck.side_effect = request
+    return provider, probed
+
+
+class TestGithubFallbackVerification:
+    @pytest.fixture(autouse=True)
+    def no_probe_delay(self, monkeypatch):
+        monkeypatch.setattr(get_settings().github, "inline_comment_probe_interval", 0.0, raising=False)
+
+    def test_only_undecided_comments_are_probed(self):
+        diff_files = [FilePatchInfo("", "", PATCH, "src/app.py"), FilePatchInfo("", "", "", "big.min.js")]
+        provider, probed = _provider(diff_files, accepted_lines={3})
+        comments = [{"path": "src/app.py", "line": 12, "side": "RIGHT", "body": "ok"},
+                    {"path": "src/app.py", "line": 30, "side": "RIGHT", "body": "outside"},
+                    {"path": "big.min.js", "line": 3, "side": "RIGHT", "body": "probed, accepted"},
+                    {"path": "big.min.js", "line": 4, "side": "RIGHT", "body": "probed, rejected"}]
+        verified, invalid = provider._verify_code_comments(comments)
+        assert [c["body"] for c in verified] == ["ok", "probed, accepted"]
+        assert [c["body"] for c, _ in invalid] == ["outside", "probed, rejected"]
+        assert [c["body"] for c in probed] == ["probed, accepted", "probed, rejected"]
+
+    def test_probes_do_not_overlap(self):
+        provider, probed = _provider([], accepted_lines={1, 2, 3, 4, 5, 6})
+        comments = [{"path": "big.min.js", "line": line, "side": "RIGHT", "body": str(line)} for line in range(1, 7)]
+        verified, invalid = provider._probe_code_comments(comments)
+        assert len(verified) == 6
+        assert invalid == []
+
+    def test_locally_verified_comments_probed_when_rejected(self, monkeypatch):
+        monkeypatch.setattr(get_settings().github, "try_fix_invalid_inline_comments", False, raising=False)
+        provider, probed = _provider([FilePatchInfo("", "", PATCH, "src/app.py")], accepted_lines={12})
+        reviews = []
+
+        def create_review(commit, comments):
+            reviews.append(comments)
+            if len(reviews) == 1:
+                raise Exception("422 Unprocessable Entity")
+
+        provider.pr.create_review.side_effect = create_review
+        comments = [{"path": "src/app.py", "line": 12, "side": "RIGHT", "body": "ok"},
+                    {"path": "src/app.py", "line": 13, "side": "RIGHT", "body": "rejected by GitHub"}]
+        provider._publish_inline_comments_fallback_with_verification(comments)
+        assert len(probed) == 2
+        assert [c["body"] for c in reviews[-1]] == ["ok"]
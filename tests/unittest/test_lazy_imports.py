@@ -0,0 +1,80 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from pr_agent.algo.lazy_registry import LazyRegistry
+
+# modules that only the selected tool, git provider or AI handler may import
+HEAVY_MODULES = ["litellm", "openai", "github", "gitlab", "atlassian", "azure", "boto3", "giteapy",
+                 "pr_agent.tools.pr_reviewer", "pr_agent.git_providers.github_provider"]
+ENTRY_POINTS = ["pr_agent.agent.pr_agent", "pr_agent.cli", "pr_agent.git_providers",
+                "pr_agent.servers.github_action_runner"]
+# generous enough for slow CI machines; eagerly importing litellm alone takes several seconds
+STARTUP_BUDGET_MS = int(os.environ.get("PR_AGENT_STARTUP_BUDGET_MS", "3000"))
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+
+
+def import_times(module: str) -> dict:
+    """
+    Runs `python -X importtime -c "import <module>"` in a fresh interpreter, and returns the cumulative import time
+    (in microseconds) of every imported module.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, timeout=120,
+                            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+class TestLazyRegistry:
+    def test_values_are_imported_on_first_access(self):
+        registry = LazyRegistry({"join": "os.path:join", "obj": len})
+        assert not registry.is_loaded("join")
+        assert "join" in registry
+        assert list(registry.keys()) == ["join", "obj"]
+        assert registry["join"] is os.path.join
+        assert registry.is_loaded("join")
+        assert registry["obj"] is len
+
+    def test_override_and_delete(self):
+        registry = LazyRegistry({"join": "os.path:join"})
+        registry["join"] = len
+        assert registry["join"] is len
+        del registry["join"]
+        assert "join" not in registry
+        assert registry.get("join") is None
+
+    def test_invalid_path(self):
+        registry = LazyRegistry({"bad": "os.path"})
+        with pytest.raises(ValueError):
+            _ = registry["bad"]
+
+
+class TestColdStart:
+    @pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+    def test_entry_point_does_not_import_heavy_modules(self, entry_point):
+        times = import_times(entry_point)
+        assert entry_point in times
+        imported_heavy = [name for name in times
+                          if any(name == heavy or name.startswith(heavy + ".") for heavy in HEAVY_MODULES)]
+        assert imported_heavy == []
+
+    def test_agent_startup_budget(self):
+        times = import_times("pr_agent.agent.pr_agent")
+        assert times["pr_agent.agent.pr_agent"] / 1000 < STARTUP_BUDGET_MS
+
+    def test_command_resolves_only_its_tool(self):
+        code = ("import sys; from pr_agent.agent.pr_agent import command2class; command2class['config']; "
+                "print('pr_agent.tools.pr_config' in sys.modules, 'pr_agent.tools.pr_reviewer' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr[-2000:]
+        assert result.stdout.split() == ["True", "False"]
@@ -0,0 +1,47 @@
+import numpy as np
+
+from pr_agent.vector_stores.local_vector_store import LocalVectorStore
+
+
+def _record(record_id, repo="owner-repo", content_hash=""):
+    return {"id": record_id, "text": record_id, "metadata": {"repo": repo, "content_hash": content_hash}}
+
+
+class TestLocalVectorStore:
+    def test_query_returns_top_k_by_cosine_similarity(self, tmp_path):
+        store = LocalVectorStore("issues", path=str(tmp_path))
+        assert not store.index_exists()
+        store.upsert([_record("issue_1.issue"), _record("issue_2.issue"), _record("issue_3.issue")],
+                     [[1, 0], [0, 1], [1, 1]], from_scratch=True)
+
+        matches = store.query([2, 0.1], "owner-repo", top_k=2)
+
+        assert [m.id for m in matches] == ["issue_1.issue", "issue_3.issue"]
+        assert matches[0].score > matches[1].score
+        assert np.isclose(store.query([0, 3], "owner-repo", top_k=1)[0].score, 1.0)
+
+    def test_query_is_scoped_to_repo(self, tmp_path):
+        store = LocalVectorStore("issues", path=str(tmp_path))
+        store.upsert([_record("issue_1.issue", repo="a"), _record("issue_1.issue", repo="b")],
+                     [[1, 0], [0, 1]], from_scratch=True)
+
+        matches = store.query([1, 0], "b", top_k=5)
+
+        assert len(matches) == 1
+        assert np.isclose(matches[0].score, 0.0)
+        assert store.query([1, 0], "unknown", top_k=5) == []
+
+    def test_upsert_replaces_existing_records_and_persists(self, tmp_path):
+        store = LocalVectorStore("issues", path=str(tmp_path))
+        store.upsert([_record("issue_1.issue", content_hash="h1")], [[1, 0]], from_scratch=True)
+        store.upsert([_record("issue_1.issue", content_hash="h2"), _record("issue_2.issue", content_hash="h3")],
+                     [[0, 1], [1, 0]])
+
+        reloaded = LocalVectorStore("issues", path=str(tmp_path))
+
+        assert reloaded.index_exists()
+        assert reloaded.contains("issue_2.issue", "owner-repo")
+        assert not reloaded.contains("issue_2.issue", "other-repo")
+        assert reloaded.get_indexed_hashes(["issue_1.issue", "issue_2.issue", "issue_3.issue"], "owner-repo") == \
+            {"issue_1.issue": "h2", "issue_2.issue": "h3"}
+        assert reloaded.query([0, 1], "owner-repo", top_k=1)[0].id == "issue_1.issue"
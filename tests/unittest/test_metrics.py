@@ -0,0 +1,95 @@
+import asyncio
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+from fastapi import APIRouter, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from pr_agent.log.metrics import (CommandTimer, add_metrics_route,  # noqa: E402
+                                  record_cache_lookup, record_git_api_response,
+                                  record_llm_tokens, record_webhook_request,
+                                  track_background_task)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics:
+    def test_webhook_requests_and_background_tasks(self):
+        requests_before = sample("pr_agent_webhook_requests_total", server="test_app", event="pull_request")
+        record_webhook_request("test_app", "pull_request")
+        assert sample("pr_agent_webhook_requests_total", server="test_app", event="pull_request") == \
+               requests_before + 1
+
+        observed = {}
+
+        async def handle(body):
+            observed["queued"] = sample("pr_agent_background_tasks_queued", server="test_app")
+            observed["in_flight"] = sample("pr_agent_background_tasks_in_flight", server="test_app")
+            return body
+
+        task = track_background_task("test_app", handle)
+        assert sample("pr_agent_background_tasks_queued", server="test_app") == 1
+        assert asyncio.run(task("body")) == "body"
+        assert observed == {"queued": 0, "in_flight": 1}
+        assert sample("pr_agent_background_tasks_in_flight", server="test_app") == 0
+
+    def test_command_latency(self):
+        count_before = sample("pr_agent_command_duration_seconds_count", command="test_cmd", status="error")
+        with pytest.raises(RuntimeError):
+            with CommandTimer("test_cmd"):
+                raise RuntimeError("failed")
+        with CommandTimer("test_cmd"):
+            pass
+        assert sample("pr_agent_command_duration_seconds_count", command="test_cmd", status="error") == \
+               count_before + 1
+        assert sample("pr_agent_command_duration_seconds_count", command="test_cmd", status="success") >= 1
+
+    def test_llm_tokens_ignore_missing_usage(self):
+        record_llm_tokens("test-model", 120, 30)
+        record_llm_tokens("test-model", None, object())
+        assert sample("pr_agent_llm_tokens_total", model="test-model", direction="prompt") == 120
+        assert sample("pr_agent_llm_tokens_total", model="test-model", direction="completion") == 30
+
+    def test_git_api_response_hook(self):
+        response = SimpleNamespace(request=SimpleNamespace(url="https://api.test-git.com/repos/a/b/pulls/1"),
+                                   status_code=200, headers={"X-RateLimit-Remaining": "4999"})
+        record_git_api_response(response)
+        assert sample("pr_agent_git_api_requests_total", host="api.test-git.com", status="200") == 1
+        assert sample("pr_agent_git_api_rate_limit_remaining", host="api.test-git.com") == 4999
+
+    def test_cache_lookups(self):
+        record_cache_lookup("test_cache", hits=3, misses=1)
+        assert sample("pr_agent_cache_lookups_total", cache="test_cache", result="hit") == 3
+        assert sample("pr_agent_cache_lookups_total", cache="test_cache", result="miss") == 1
+
+    def test_metrics_route(self):
+        router = APIRouter()
+        add_metrics_route(router)
+        app = FastAPI()
+        app.include_router(router)
+        record_webhook_request("route_app", "push")
+
+        response = TestClient(app).get("/metrics")
+        assert response.status_code == 200
+        assert 'pr_agent_webhook_requests_total{event="push",server="route_app"} 1.0' in response.text
+
+    def test_metrics_are_shared_across_worker_processes(self, tmp_path):
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+        worker = "from pr_agent.log.metrics import record_webhook_request; record_webhook_request('mp_app', 'push')"
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", worker], env=env, cwd=REPO_ROOT, check=True, timeout=120)
+
+        reader = "from pr_agent.log.metrics import generate_metrics; print(generate_metrics()[0].decode())"
+        output = subprocess.run([sys.executable, "-c", reader], env=env, cwd=REPO_ROOT, check=True, timeout=120,
+                                capture_output=True, text=True).stdout
+        assert 'pr_agent_webhook_requests_total{event="push",server="mp_app"} 2.0' in output
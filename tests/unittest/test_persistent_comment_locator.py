@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from pr_agent.git_providers import persistent_comment_locator
+from pr_agent.git_providers.github_provider import GithubProvider
+from pr_agent.git_providers.persistent_comment_locator import \
+    PersistentCommentLocator
+
+HEADER = "## PR Reviewer Guide 🔍"
+PR_URL = "https://github.com/o/r/pull/1"
+
+
+class TestPersistentCommentLocator:
+    def test_memory_lru(self):
+        locator = PersistentCommentLocator(max_entries=2)
+        locator.put(PR_URL, HEADER, 1)
+        locator.put(PR_URL, "## Other", 2)
+        assert locator.get(PR_URL, HEADER) == "1"
+        locator.put("https://github.com/o/r/pull/2", HEADER, 3)
+        assert locator.get(PR_URL, "## Other") is None  # least recently used
+        assert locator.get(PR_URL, HEADER) == "1"
+        locator.delete(PR_URL, HEADER)
+        assert locator.get(PR_URL, HEADER) is None
+
+    def test_persisted(self, tmp_path):
+        path = str(tmp_path / "locator.sqlite")
+        PersistentCommentLocator(path=path).put(PR_URL, HEADER, 42)
+        assert PersistentCommentLocator(path=path).get(PR_URL, HEADER) == "42"
+
+
+def _comment(comment_id, body):
+    return SimpleNamespace(id=comment_id, body=body, html_url=f"{PR_URL}#issuecomment-{comment_id}")
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(persistent_comment_locator, "_locator", PersistentCommentLocator())
+    provider = GithubProvider.__new__(GithubProvider)
+    provider.pr = MagicMock(html_url=PR_URL)
+    provider.issue_main = None
+    provider.max_comment_chars = 65000
+    provider.last_commit_id = MagicMock(html_url=f"{PR_URL}/commits/abc")
+    comments = [_comment(i, f"comment {i}") for i in range(1, 50)] + [_comment(50, f"{HEADER}\nold review")]
+    provider.pr.get_issue_comments.return_value = comments
+    provider.pr.get_issue_comment.side_effect = lambda comment_id: comments[comment_id - 1]
+    provider.pr.create_issue_comment.side_effect = lambda body: _comment(len(comments) + 1, body)
+    provider.edit_comment = MagicMock()
+    return provider
+
+
+class TestPersistentComments:
+    def test_scan_only_on_miss(self, provider):
+        provider.publish_persistent_comment_full(f"{HEADER}\nreview 1", HEADER, final_update_message=False)
+        assert provider.pr.get_issue_comments.call_count == 1
+        provider.publish_persistent_comment_full(f"{HEADER}\nreview 2", HEADER, final_update_message=False)
+        assert provider.pr.get_issue_comments.call_count == 1
+        provider.pr.get_issue_comment.assert_called_with(50)
+        assert provider.edit_comment.call_count == 2
+
+    def test_stale_id_falls_back_to_scan(self, provider):
+        persistent_comment_locator._locator.put(PR_URL, HEADER, 3)  # no longer the persistent comment
+        provider.publish_persistent_comment_full(f"{HEADER}\nreview", HEADER, final_update_message=False)
+        assert provider.pr.get_issue_comments.call_count == 1
+        assert provider.edit_comment.call_args[0][0].id == 50
+        assert persistent_comment_locator._locator.get(PR_URL, HEADER) == "50"
+
+    def test_new_comment_recorded(self, provider):
+        provider.pr.get_issue_comments.return_value = []
+        response = provider.publish_persistent_comment_full(f"{HEADER}\nreview", HEADER)
+        assert persistent_comment_locator._locator.get(PR_URL, HEADER) == str(response.id)
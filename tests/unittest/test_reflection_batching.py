@@ -0,0 +1,136 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from pr_agent.algo.reflection_batching import (ReflectionItem,
+                                               ReflectionScheduler,
+                                               split_feedback)
+from pr_agent.config_loader import get_settings
+from pr_agent.tools.pr_code_suggestions import PRCodeSuggestions
+
+
+def _item(name, num_suggestions=1, tokens=40):
+    suggestions = [{"label": f"{name}.{i}", "existing_code": "a", "improved_code": "b", "relevant_lines_start": 1,
+                    "relevant_lines_end": 2} for i in range(num_suggestions)]
+    return ReflectionItem({"code_suggestions": suggestions}, f"## File: '{name}'", tokens)
+
+
+def _schedule(items, max_batch_tokens, concurrency=3):
+    batches = []
+
+    async def reflect_batch(batch):
+        batches.append([item.patches_diff for item in batch])
+
+    async def run():
+        scheduler = ReflectionScheduler(reflect_batch, max_batch_tokens, concurrency)
+        for item in items:
+            scheduler.add(item)
+        await scheduler.close()
+        return scheduler.num_batches
+
+    return asyncio.run(run()), batches
+
+
+class TestReflectionScheduler:
+    def test_items_merged_within_budget(self):
+        # "a" takes the only reflection slot, the next items are grouped while it runs
+        num_batches, batches = _schedule([_item("a"), _item("b"), _item("c"), _item("d")], max_batch_tokens=100,
+                                         concurrency=1)
+        assert num_batches == 3
+        assert batches == [["## File: 'a'"], ["## File: 'b'", "## File: 'c'"], ["## File: 'd'"]]
+
+    def test_items_dispatched_while_slots_are_free(self):
+        num_batches, _ = _schedule([_item("a"), _item("b"), _item("c"), _item("d")], max_batch_tokens=1000,
+                                   concurrency=2)
+        assert num_batches == 3
+
+    def test_pending_batch_dispatched_when_a_slot_is_freed(self):
+        started = []
+
+        async def reflect_batch(batch):
+            started.append([item.patches_diff for item in batch])
+            await asyncio.sleep(0)
+
+        async def run():
+            scheduler = ReflectionScheduler(reflect_batch, max_batch_tokens=1000, concurrency=1)
+            scheduler.add(_item("a"))
+            scheduler.add(_item("b"))
+            scheduler.add(_item("c"))
+            # "a" is reflected on, and frees the slot for the pending batch without waiting for close()
+            for _ in range(5):
+                await asyncio.sleep(0)
+            assert started == [["## File: 'a'"], ["## File: 'b'", "## File: 'c'"]]
+            await scheduler.close()
+
+        asyncio.run(run())
+
+    def test_no_budget_reflects_each_item_alone(self):
+        num_batches, _ = _schedule([_item("a"), _item("b"), _item("c")], max_batch_tokens=0)
+        assert num_batches == 3
+
+    def test_item_over_budget_gets_its_own_batch(self):
+        _, batches = _schedule([_item("a"), _item("big", tokens=500), _item("c")], max_batch_tokens=100,
+                               concurrency=1)
+        assert batches == [["## File: 'a'"], ["## File: 'big'"], ["## File: 'c'"]]
+
+    def test_concurrency_limit(self):
+        running, max_running = [0], [0]
+
+        async def reflect_batch(batch):
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+            await asyncio.sleep(0.01)
+            running[0] -= 1
+
+        async def run():
+            scheduler = ReflectionScheduler(reflect_batch, max_batch_tokens=0, concurrency=2)
+            for name in "abcde":
+                scheduler.add(_item(name))
+            await scheduler.close()
+
+        asyncio.run(run())
+        assert max_running[0] == 2
+
+
+def test_split_feedback():
+    items = [_item("a", 2), _item("b", 1)]
+    assert split_feedback(items, [1, 2, 3]) == [[1, 2], [3]]
+
+
+class TestReflectOnBatch:
+    @pytest.fixture
+    def tool(self, monkeypatch):
+        monkeypatch.setattr(get_settings().config, "publish_output", False)
+        tool = PRCodeSuggestions.__new__(PRCodeSuggestions)
+        tool.git_provider = MagicMock()
+        tool.git_provider.get_diff_files.return_value = []
+        return tool
+
+    def test_merged_feedback_split_back(self, tool):
+        calls = []
+
+        async def self_reflect(suggestion_list, patches_diff, model):
+            calls.append(patches_diff)
+            return "code_suggestions:\n" + "".join(
+                f"- suggestion_score: {score}\n  why: |\n    reason {score}\n" for score in (9, 4, 6))
+
+        tool.self_reflect_on_suggestions = self_reflect
+        items = [_item("a", 2), _item("b", 1)]
+        asyncio.run(tool._reflect_on_batch(items, model="reasoning-model"))
+        assert calls == ["## File: 'a'\n\n\n## File: 'b'"]
+        assert [s["score"] for s in items[0].data["code_suggestions"]] == [9, 4]
+        assert items[1].data["code_suggestions"][0]["score"] == 6
+
+    def test_mismatched_feedback_reflects_each_chunk(self, tool):
+        calls = []
+
+        async def self_reflect(suggestion_list, patches_diff, model):
+            calls.append(patches_diff)
+            return "code_suggestions:\n- suggestion_score: 8\n  why: |\n    only one\n"
+
+        tool.self_reflect_on_suggestions = self_reflect
+        items = [_item("a"), _item("b")]
+        asyncio.run(tool._reflect_on_batch(items, model="reasoning-model"))
+        assert calls[1:] == ["## File: 'a'", "## File: 'b'"]
+        assert [item.data["code_suggestions"][0]["score"] for item in items] == [8, 8]
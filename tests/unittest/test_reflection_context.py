@@ -0,0 +1,85 @@
+from pr_agent.algo.git_patch_processing import decouple_and_convert_to_hunks_with_lines_numbers
+from pr_agent.algo.reflection_context import (build_reflection_context,
+                                              parse_decoupled_diff)
+from pr_agent.algo.types import FilePatchInfo
+
+PATCH_A = ("@@ -1,3 +1,4 @@ def f():\n"
+           " a = 1\n"
+           "-b = 2\n"
+           "+b = 3\n"
+           "+c = 4\n"
+           " d = 5\n"
+           "@@ -20,2 +21,2 @@ def g():\n"
+           " x = 1\n"
+           "-y = 2\n"
+           "+y = 3\n")
+PATCH_B = "@@ -0,0 +1,20 @@\n" + "".join(f"+line_{i} = {i}\n" for i in range(1, 21))
+
+
+def _chunk():
+    return "\n\n".join(decouple_and_convert_to_hunks_with_lines_numbers(patch, FilePatchInfo("", "", patch, name))
+                       for name, patch in (("src/a.py", PATCH_A), ("src/new.py", PATCH_B))).strip()
+
+
+def test_parse_decoupled_diff():
+    sections = parse_decoupled_diff(_chunk())
+    assert [section.filename for section in sections] == ["src/a.py", "src/new.py"]
+    hunk = sections[0].hunks[1]
+    assert hunk.header == "@@ -20,2 +21,2 @@ def g():"
+    assert hunk.new_lines == [(21, " x = 1"), (22, "+y = 3")]
+    assert hunk.old_lines == [" x = 1", "-y = 2"]
+    assert len(sections[1].hunks[0].new_lines) == 20
+
+
+def test_only_relevant_hunks_kept():
+    suggestions = [{"relevant_file": "src/a.py", "existing_code": "y = 3\n"}]
+    context = build_reflection_context(_chunk(), suggestions)
+    assert context == ("## File: 'src/a.py'\n\n"
+                       "@@ -20,2 +21,2 @@ def g():\n"
+                       "__new hunk__\n21  x = 1\n22 +y = 3\n"
+                       "__old hunk__\n x = 1\n-y = 2")
+
+
+def test_long_hunk_cut_around_the_code():
+    suggestions = [{"relevant_file": "src/new.py", "existing_code": "line_10 = 10\n...\nline_11 = 11"}]
+    context = build_reflection_context(_chunk(), suggestions, margin=2)
+    new_lines = [line for line in context.splitlines() if line[:1].isdigit()]
+    assert [int(line.split()[0]) for line in new_lines] == [8, 9, 10, 11, 12, 13]
+    assert context.splitlines()[4] == "..." and context.splitlines()[-1] == "..."
+
+
+def test_line_numbers_used_when_known():
+    suggestions = [{"relevant_file": "src/new.py", "existing_code": "not in the diff",
+                    "relevant_lines_start": 1, "relevant_lines_end": 1}]
+    context = build_reflection_context(_chunk(), suggestions, margin=0)
+    assert [line for line in context.splitlines() if line[:1].isdigit()] == ["1 +line_1 = 1"]
+
+
+def test_fallbacks():
+    chunk = _chunk()
+    # code not found: all the hunks of the file
+    context = build_reflection_context(chunk, [{"relevant_file": "src/a.py", "existing_code": "zzz"}])
+    assert "def f():" in context and "def g():" in context and "src/new.py" not in context
+    # file not in the chunk, or not the decoupled format: the whole diff
+    assert build_reflection_context(chunk, [{"relevant_file": "other.py", "existing_code": "a"}]) == chunk
+    assert build_reflection_context(PATCH_A, [{"relevant_file": "src/a.py", "existing_code": "a = 1"}]) == PATCH_A
+
+
+def test_repeated_anchor_line():
+    body = [f"step_{i} = {i}" for i in range(1, 31)]
+    body[2], body[3] = "total = sum(values)  # accumulate the values", "return total"
+    body[24], body[25] = "total = sum(values)  # accumulate the values", "return total * 2"
+    patch = "@@ -0,0 +1,30 @@\n" + "".join(f"+{line}\n" for line in body)
+    chunk = decouple_and_convert_to_hunks_with_lines_numbers(patch, FilePatchInfo("", "", patch, "src/c.py")).strip()
+
+    def kept_lines(existing_code):
+        context = build_reflection_context(chunk, [{"relevant_file": "src/c.py", "existing_code": existing_code}],
+                                           margin=0)
+        return [int(line.split()[0]) for line in context.splitlines() if line[:1].isdigit()]
+
+    # the whole quote is matched, not its longest line
+    assert kept_lines("total = sum(values)  # accumulate the values\nreturn total * 2") == [25, 26]
+    # every occurrence of the quote is kept
+    assert kept_lines("total = sum(values)  # accumulate the values") == [3, 25]
+    # only the longest line is found, and it is not unique: the whole hunk
+    assert kept_lines("total = sum(values)  # accumulate the values\nreturn None") == list(range(1, 31))
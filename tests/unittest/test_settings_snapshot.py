@@ -0,0 +1,89 @@
+import marshal
+
+import pytest
+from dynaconf import Dynaconf
+from jinja2.exceptions import SecurityError
+
+import pr_agent.custom_merge_loader as custom_merge_loader
+from pr_agent.settings_snapshot import (_SNAPSHOT_HEADER, _snapshot_key,
+                                        build_snapshot, content_hash,
+                                        get_snapshot_data, load_snapshot)
+
+DYNACONF_KWARGS = {'core_loaders': [], 'loaders': ['pr_agent.custom_merge_loader'], 'merge_enabled': True}
+
+
+def load_settings(settings_files):
+    return Dynaconf(settings_files=[str(f) for f in settings_files], load_dotenv=False, envvar_prefix=False,
+                    **DYNACONF_KWARGS)
+
+
+@pytest.fixture
+def settings_files(tmp_path):
+    configuration = tmp_path / "configuration.toml"
+    configuration.write_text('[config]\nmodel = "gpt-4o"\nmax_tokens = 100\n')
+    prompts = tmp_path / "prompts.toml"
+    prompts.write_text('[pr_review_prompt]\nsystem = """review this"""\n')
+    secrets = tmp_path / ".secrets.toml"
+    secrets.write_text('[openai]\nkey = "sk-secret"\n')
+    return [configuration, prompts, secrets]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = tmp_path / "snapshot.marshal"
+    monkeypatch.setattr(custom_merge_loader, "load_snapshot", lambda: load_snapshot(str(path)))
+    return path
+
+
+class TestSettingsSnapshot:
+    def test_build_and_load(self, settings_files, snapshot_path):
+        assert build_snapshot([str(f) for f in settings_files], str(snapshot_path)) == 2
+
+        snapshot = load_snapshot(str(snapshot_path))
+        configuration, prompts, secrets = settings_files
+        assert get_snapshot_data(snapshot, str(configuration), configuration.read_bytes()) == {
+            "config": {"model": "gpt-4o", "max_tokens": 100}}
+        assert get_snapshot_data(snapshot, str(secrets), secrets.read_bytes()) is None  # never snapshotted
+        assert "sk-secret" not in snapshot_path.read_bytes().decode("utf-8", errors="replace")
+
+    def test_changed_file_is_not_taken_from_snapshot(self, settings_files, snapshot_path):
+        build_snapshot([str(f) for f in settings_files], str(snapshot_path))
+        configuration = settings_files[0]
+        configuration.write_text('[config]\nmodel = "gpt-4.1"\nmax_tokens = 100\n')
+
+        assert get_snapshot_data(load_snapshot(str(snapshot_path)), str(configuration),
+                                 configuration.read_bytes()) is None
+        assert load_settings(settings_files).config.model == "gpt-4.1"
+
+    def test_loader_uses_snapshot_for_unchanged_files(self, settings_files, snapshot_path):
+        configuration = settings_files[0]
+        # a snapshot entry with the file's hash but different content proves the file was not parsed again
+        entries = {_snapshot_key(str(configuration)): (content_hash(configuration.read_bytes()),
+                                                       {"config": {"model": "from-snapshot", "max_tokens": 100}})}
+        with open(snapshot_path, "wb") as f:
+            marshal.dump((_SNAPSHOT_HEADER, entries), f)
+
+        settings = load_settings(settings_files)
+        assert settings.config.model == "from-snapshot"
+        assert settings.pr_review_prompt.system == "review this"
+        assert settings.openai.key == "sk-secret"
+
+    def test_loaded_settings_match_without_snapshot(self, settings_files, snapshot_path):
+        expected = load_settings(settings_files).to_dict()
+        build_snapshot([str(f) for f in settings_files], str(snapshot_path))
+        assert load_settings(settings_files).to_dict() == expected
+
+    def test_incompatible_or_corrupted_snapshot_is_ignored(self, tmp_path):
+        path = tmp_path / "snapshot.marshal"
+        assert load_snapshot(str(path)) == {}
+        path.write_bytes(b"not a snapshot")
+        assert load_snapshot(str(path)) == {}
+        with open(path, "wb") as f:
+            marshal.dump((("pr-agent-settings-snapshot", -1), {"a": ("h", {})}), f)
+        assert load_snapshot(str(path)) == {}
+
+    def test_build_rejects_forbidden_directives(self, tmp_path):
+        unsafe = tmp_path / "unsafe.toml"
+        unsafe.write_text('[config]\ndynaconf_include = ["other.toml"]\n')
+        with pytest.raises(SecurityError):
+            build_snapshot([str(unsafe)], str(tmp_path / "snapshot.marshal"))
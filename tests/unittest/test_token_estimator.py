@@ -0,0 +1,138 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from pr_agent.algo import token_estimator
+from pr_agent.algo.token_estimator import (MIN_SAMPLE_TOKENS,
+                                           TokenCountEstimator,
+                                           get_model_family,
+                                           record_token_count_sample)
+from pr_agent.algo.token_handler import TokenHandler
+from pr_agent.config_loader import get_settings
+from pr_agent.tools.pr_code_suggestions import PRCodeSuggestions
+
+
+@pytest.mark.parametrize("model, family", [
+    ("anthropic/claude-3-7-sonnet-20250219", "anthropic"),
+    ("bedrock/anthropic.claude-3-5-sonnet-20240620-v1:0", "anthropic"),
+    ("vertex_ai/gemini-2.5-pro", "gemini"),
+    ("gpt-4o", "openai"),
+    ("o3-mini", "openai"),
+    ("deepseek/deepseek-chat", "deepseek"),
+    ("groq/llama-3.3-70b", "llama"),
+    ("some-custom-model", "other"),
+])
+def test_model_family(model, family):
+    assert get_model_family(model) == family
+
+
+class TestTokenCountEstimator:
+    def test_default_factor_until_calibrated(self):
+        estimator = TokenCountEstimator(min_samples=3, default_factor=0.3)
+        assert not estimator.is_calibrated("claude-3-7-sonnet")
+        assert estimator.estimate("claude-3-7-sonnet", 1000) == 1300
+        assert estimator.estimate("gpt-4o", 1000) == 1000
+
+    def test_calibrated_bounds(self):
+        rng = random.Random(0)
+        estimator = TokenCountEstimator(min_samples=20, confidence_z=2.0)
+        samples = []
+        for _ in range(500):
+            local = rng.randint(500, 20000)
+            samples.append(("claude-sonnet-4", local, round(local * rng.gauss(1.2, 0.02))))
+        estimator.fit(samples)
+        low, mean, high = estimator.ratio_bounds("anthropic/claude-3-5-haiku")
+        assert estimator.is_calibrated("claude-3-5-haiku")
+        assert mean == pytest.approx(1.2, abs=0.005)
+        assert low == pytest.approx(1.16, abs=0.01) and high == pytest.approx(1.24, abs=0.01)
+        # the upper bound covers almost every sample
+        covered = sum(true <= estimator.estimate("claude-sonnet-4", local) for _, local, true in samples)
+        assert covered / len(samples) > 0.95
+        # other families are not affected
+        assert not estimator.is_calibrated("gemini-2.5-pro")
+
+    def test_short_and_openai_samples_ignored(self):
+        estimator = TokenCountEstimator(min_samples=1)
+        estimator.record("claude-sonnet-4", MIN_SAMPLE_TOKENS - 1, 500)
+        estimator.record("gpt-4o", 5000, 5000)
+        assert estimator.calibrations == {}
+
+    def test_persisted(self, tmp_path):
+        path = str(tmp_path / "calibration.json")
+        estimator = TokenCountEstimator(path=path, min_samples=2)
+        estimator.fit([("gemini-2.5-pro", 1000, 1100), ("gemini-2.5-pro", 2000, 2300)])
+        with open(path) as f:
+            assert json.load(f)["families"]["gemini"]["count"] == 2
+        reloaded = TokenCountEstimator(path=path, min_samples=2)
+        assert reloaded.ratio_bounds("gemini-2.5-pro") == estimator.ratio_bounds("gemini-2.5-pro")
+
+    def test_saves_throttled(self, tmp_path):
+        path = tmp_path / "calibration.json"
+        estimator = TokenCountEstimator(path=str(path), save_every=3)
+        estimator.record("gemini-2.5-pro", 1000, 1100)
+        estimator.record("gemini-2.5-pro", 1000, 1100)
+        assert not path.exists()
+        estimator.record("gemini-2.5-pro", 1000, 1100)
+        assert json.loads(path.read_text())["families"]["gemini"]["count"] == 3
+        estimator.record("gemini-2.5-pro", 1000, 1100)
+        estimator.flush()
+        assert json.loads(path.read_text())["families"]["gemini"]["count"] == 4
+
+    def test_corrupted_file_ignored(self, tmp_path):
+        path = tmp_path / "calibration.json"
+        path.write_text("{not json")
+        assert TokenCountEstimator(path=str(path)).calibrations == {}
+
+
+class TestAccurateTokenCount:
+    @pytest.fixture
+    def estimator(self, monkeypatch):
+        estimator = TokenCountEstimator(min_samples=2)
+        monkeypatch.setattr(token_estimator, "_estimator", estimator)
+        return estimator
+
+    def test_no_network_for_claude(self, estimator, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings.config, "model", "anthropic/claude-3-7-sonnet-20250219")
+        handler = TokenHandler()
+        text = "def handler(request):\n    return request.retries + 1\n" * 100
+        local = handler.count_tokens(text)
+        factor = 1 + settings.config.model_token_count_estimate_factor
+        assert handler.count_tokens(text, force_accurate=True) == pytest.approx(local * factor, abs=1)
+
+        record_token_count_sample("anthropic/claude-3-7-sonnet-20250219", local, round(local * 1.1))
+        record_token_count_sample("anthropic/claude-3-7-sonnet-20250219", local, round(local * 1.1))
+        assert estimator.is_calibrated("claude-3-7-sonnet-20250219")
+        assert handler.count_tokens(text, force_accurate=True) == pytest.approx(local * 1.1, abs=1)
+
+
+class TestPromptTokens:
+    def test_counted_for_calibrated_families_only(self, monkeypatch):
+        handler = TokenHandler()
+        system, user = "You are a reviewer.", "def f():\n    return 1\n" * 50
+        assert handler.count_prompt_tokens(system, user, "anthropic/claude-3-7-sonnet-20250219") == \
+            handler.count_tokens(system) + handler.count_tokens(user)
+        assert handler.count_prompt_tokens(system, user, "gpt-4o") is None
+
+        monkeypatch.setattr(get_settings().token_count_calibration, "enabled", False)
+        assert handler.count_prompt_tokens(system, user, "anthropic/claude-3-7-sonnet-20250219") is None
+
+    def test_reflection_passes_the_rendered_prompt_count(self):
+        calls = []
+
+        class FakeAIHandler:
+            async def chat_completion(self, model, system, user, temperature, local_prompt_tokens=None):
+                calls.append((system, user, local_prompt_tokens))
+                return "code_suggestions: []", "stop"
+
+        tool = PRCodeSuggestions.__new__(PRCodeSuggestions)
+        tool.token_handler = TokenHandler()
+        tool.ai_handler = FakeAIHandler()
+        suggestions = [{"label": "bug", "existing_code": "a", "improved_code": "b"}]
+        asyncio.run(tool.self_reflect_on_suggestions(suggestions, "## File: 'a.py'\n+a\n",
+                                                     model="anthropic/claude-3-7-sonnet-20250219"))
+
+        system, user, local_prompt_tokens = calls[0]
+        assert local_prompt_tokens == tool.token_handler.count_tokens(system) + tool.token_handler.count_tokens(user)
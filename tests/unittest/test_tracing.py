@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+from pr_agent.algo.ai_handlers.base_ai_handler import BaseAiHandler
+from pr_agent.git_providers.local_git_provider import LocalGitProvider
+from pr_agent.log import tracing
+from pr_agent.log.tracing import (STATUS_ERROR, STATUS_OK,
+                                  InMemorySpanExporter, JsonLinesSpanExporter,
+                                  SpanExporter, configure_tracing, get_current_span, span,
+                                  traced)
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    configure_tracing(enabled=True, exporter=exporter)
+    yield exporter
+    configure_tracing(enabled=False)
+
+
+@traced("test.sync", record_args=("model",))
+def sync_stage(value, model="gpt-4o"):
+    with span("test.inner", value=value):
+        return value * 2
+
+
+@traced("test.async")
+async def async_stage(fail=False):
+    await asyncio.sleep(0)
+    if fail:
+        raise ValueError("boom")
+    return get_current_span()
+
+
+class TestTracing:
+    def test_nested_spans_share_trace(self, exporter):
+        with span("command.review", pr_url="https://example.com/pr/1") as root:
+            assert sync_stage(3, model="gpt-4.1") == 6
+        inner, middle, outer = exporter.spans
+        assert [s.name for s in exporter.spans] == ["test.inner", "test.sync", "command.review"]
+        assert outer is root and outer.parent_span_id is None
+        assert middle.parent_span_id == outer.span_id and inner.parent_span_id == middle.span_id
+        assert len({s.trace_id for s in exporter.spans}) == 1
+        assert middle.attributes == {"model": "gpt-4.1"}
+        assert inner.attributes == {"value": 3}
+        assert all(s.status_code == STATUS_OK and s.duration_ms >= 0 for s in exporter.spans)
+
+    def test_async_spans_and_errors(self, exporter):
+        async def run():
+            with span("command.improve"):
+                current = await async_stage()
+                with pytest.raises(ValueError):
+                    await async_stage(fail=True)
+                return current
+
+        current = asyncio.run(run())
+        ok, failed, root = exporter.spans
+        assert current is ok
+        assert ok.parent_span_id == root.span_id and failed.parent_span_id == root.span_id
+        assert failed.status_code == STATUS_ERROR and "ValueError: boom" in failed.status_message
+
+    def test_concurrent_tasks_have_separate_parents(self, exporter):
+        async def command(name):
+            with span(name):
+                await asyncio.sleep(0.01)
+                return await async_stage()
+
+        async def run():
+            return await asyncio.gather(command("command.review"), command("command.improve"))
+
+        review_stage, improve_stage = asyncio.run(run())
+        roots = {s.name: s for s in exporter.spans if s.name.startswith("command.")}
+        assert review_stage.parent_span_id == roots["command.review"].span_id
+        assert improve_stage.parent_span_id == roots["command.improve"].span_id
+        assert review_stage.trace_id != improve_stage.trace_id
+
+    def test_disabled_tracing_records_nothing(self):
+        exporter = InMemorySpanExporter()
+        configure_tracing(enabled=False, exporter=exporter)
+        assert sync_stage(2) == 4
+        with span("command.review") as s:
+            s.set_attribute("ignored", True)
+        assert exporter.spans == []
+        assert get_current_span() is None
+
+    def test_json_lines_exporter(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        configure_tracing(enabled=True, exporter=JsonLinesSpanExporter(str(path)))
+        try:
+            with span("command.describe", attempt=1):
+                pass
+        finally:
+            configure_tracing(enabled=False)
+        record = json.loads(path.read_text().strip())
+        assert record["name"] == "command.describe"
+        assert record["attributes"] == {"attempt": 1}
+        assert record["status"]["code"] == STATUS_OK
+        assert len(record["traceId"]) == 32 and len(record["spanId"]) == 16 and record["parentSpanId"] == ""
+
+    def test_exporters_implement_export(self):
+        class NoExport(SpanExporter):
+            pass
+
+        with pytest.raises(TypeError):
+            NoExport()
+
+    def test_providers_and_ai_handlers_are_traced(self, exporter):
+        class DummyHandler(BaseAiHandler):
+            def __init__(self):
+                pass
+
+            @property
+            def deployment_id(self):
+                return None
+
+            async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2,
+                                      img_path: str = None):
+                return "response", "stop"
+
+        assert asyncio.run(DummyHandler().chat_completion(model="gpt-4o", system="", user="")) == ("response", "stop")
+        assert getattr(LocalGitProvider.get_diff_files, "__pr_agent_traced__", False)
+        llm_span = exporter.spans[-1]
+        assert llm_span.name == "llm.chat_completion"
+        assert llm_span.attributes == {"ai_handler": "DummyHandler", "model": "gpt-4o"}
+
+    def test_configured_from_settings(self, monkeypatch):
+        monkeypatch.setattr(tracing, "_enabled", None)
+        from pr_agent.config_loader import get_settings
+        assert get_settings().get("tracing.enabled") is False
+        assert tracing.is_tracing_enabled() is False